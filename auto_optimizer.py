@@ -6,9 +6,9 @@ Ajusta automaticamente parâmetros do sistema baseado em performance
 import time
 import json
 import logging
-import sqlite3
 from datetime import datetime, timedelta
-import numpy as np
+
+from lib_analytics import TradeAnalytics, HORIZONS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,14 +21,15 @@ logging.basicConfig(
 logger = logging.getLogger("AutoOptimizer")
 
 class AutoOptimizer:
-    def __init__(self):
-        self.db_path = 'sniper_brain.db'
-        self.config_file = 'optimizer_config.json'
+    def __init__(self, db_path='sniper_brain.db', config_file='optimizer_config.json'):
+        self.db_path = db_path
+        self.config_file = config_file
         self.load_config()
         
         # Métricas de performance
         self.performance_history = []
         self.max_history_size = 100
+        self.analytics = None
         
     def load_config(self):
         """Carregar ou criar configuração padrão"""
@@ -90,43 +91,38 @@ class AutoOptimizer:
         except Exception as e:
             logger.error(f"❌ Erro ao salvar configuração: {e}")
     
+    @staticmethod
+    def _since(now, hours_back=0):
+        """Início do período carregado: janela pedida ou maior horizonte"""
+        return now - max(hours_back * 3600, max(HORIZONS.values()))
+
     def calculate_performance_metrics(self, hours_back=24):
         """Calcular métricas de performance recentes"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cutoff_time = int((time.time() - hours_back * 3600))
-            
-            # Buscar trades recentes
-            cursor.execute('''
-                SELECT trade_result, reward, pnl_real, confidence
-                FROM raw_samples 
-                WHERE trade_result IS NOT NULL 
-                AND created_at > ?
-                ORDER BY created_at DESC
-            ''', (cutoff_time,))
-            
-            trades = cursor.fetchall()
-            conn.close()
-            
-            if not trades:
+            # Trades fechados carregados uma vez em NumPy, só o período que alguma
+            # métrica usa (janela pedida ou maior horizonte); janela, horizontes e
+            # optimize_risk_parameters saem dos mesmos arrays
+            now = time.time()
+            self.analytics = TradeAnalytics.from_db(self.db_path, since=self._since(now, hours_back))
+            stats = self.analytics.window(now - hours_back * 3600)
+            
+            if not stats['n']:
                 logger.warning(f"⚠️  Nenhum trade encontrado nas últimas {hours_back}h")
                 return None
             
             # Calcular métricas
-            total_trades = len(trades)
-            wins = sum(1 for t in trades if t[0] == 'WIN')
-            losses = sum(1 for t in trades if t[0] == 'LOSS')
-            break_even = sum(1 for t in trades if t[0] == 'BREAKEVEN')
+            total_trades = stats['n']
+            wins = stats['wins']
+            losses = stats['losses']
+            break_even = total_trades - wins - losses
             
-            win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
-            avg_reward = np.mean([t[1] for t in trades if t[1] is not None]) if trades else 0
-            total_pnl = sum(t[2] for t in trades if t[2] is not None)
-            avg_confidence = np.mean([t[3] for t in trades if t[3] is not None and t[3] > 0]) if trades else 0
+            win_rate = stats['win_rate']
+            avg_reward = stats['avg_reward']
+            total_pnl = stats['total_pnl']
+            avg_confidence = stats['avg_confidence']
             
             metrics = {
-                'timestamp': int(time.time()),
+                'timestamp': int(now),
                 'period_hours': hours_back,
                 'total_trades': total_trades,
                 'wins': wins,
@@ -136,8 +132,12 @@ class AutoOptimizer:
                 'avg_reward': avg_reward,
                 'total_pnl': total_pnl,
                 'avg_confidence': avg_confidence,
-                'sharpe_ratio': self.calculate_sharpe_ratio(trades),
-                'max_drawdown': self.calculate_max_drawdown(trades)
+                'sharpe_ratio': stats['sharpe_ratio'],
+                'sortino_ratio': stats['sortino_ratio'],
+                'max_drawdown': stats['max_drawdown_pct'],
+                'profit_factor': stats['profit_factor'],
+                'expectancy': stats['expectancy'],
+                'horizons': self.analytics.horizons(now)
             }
             
             # Adicionar ao histórico
@@ -148,6 +148,7 @@ class AutoOptimizer:
             logger.info(f"📈 Performance ({hours_back}h): "
                        f"Win Rate: {win_rate:.1f}% | "
                        f"Avg Reward: {avg_reward:.3f} | "
+                       f"Sortino: {stats['sortino_ratio']:.2f} | "
                        f"Trades: {total_trades}")
             
             return metrics
@@ -157,37 +158,22 @@ class AutoOptimizer:
             return None
     
     def calculate_sharpe_ratio(self, trades):
-        """Calcular Sharpe Ratio simplificado"""
+        """Calcular Sharpe Ratio (trades = [(timestamp, pnl), ...])"""
         try:
-            rewards = [t[1] for t in trades if t[1] is not None]
-            if len(rewards) < 2:
-                return 0
-            
-            avg_reward = np.mean(rewards)
-            std_reward = np.std(rewards)
-            
-            if std_reward == 0:
+            if len(trades) < 2:
                 return 0
-            
-            # Sharpe Ratio anualizado (assumindo 365 trades/ano)
-            sharpe = (avg_reward / std_reward) * np.sqrt(365)
-            return float(sharpe)
+            ts, pnl = zip(*trades)
+            return TradeAnalytics(ts, pnl).window(0)['sharpe_ratio']
         except:
             return 0
     
     def calculate_max_drawdown(self, trades):
-        """Calcular máximo drawdown"""
+        """Calcular máximo drawdown (% do capital; trades = [(timestamp, pnl), ...])"""
         try:
-            pnls = [t[2] for t in trades if t[2] is not None]
-            if not pnls:
+            if not trades:
                 return 0
-            
-            cumulative = np.cumsum(pnls)
-            peak = np.maximum.accumulate(cumulative)
-            drawdown = (cumulative - peak) / (peak + 1e-10)  # Evitar divisão por zero
-            
-            max_drawdown = np.min(drawdown) * 100  # Em percentual
-            return float(max_drawdown)
+            ts, pnl = zip(*trades)
+            return TradeAnalytics(ts, pnl).window(0)['max_drawdown_pct']
         except:
             return 0
     
@@ -298,29 +284,13 @@ class AutoOptimizer:
     def optimize_risk_parameters(self):
         """Otimizar parâmetros de risco"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Analisar performance de diferentes tamanhos de posição
-            cursor.execute('''
-                SELECT 
-                    CASE 
-                        WHEN pnl_real > 2 THEN 'large_win'
-                        WHEN pnl_real > 0 THEN 'small_win'
-                        WHEN pnl_real < -2 THEN 'large_loss'
-                        ELSE 'small_loss'
-                    END as pnl_category,
-                    COUNT(*) as count
-                FROM raw_samples 
-                WHERE pnl_real IS NOT NULL
-                GROUP BY pnl_category
-            ''')
-            
-            results = cursor.fetchall()
-            conn.close()
+            # Distribuição dos resultados do período carregado no ciclo (maior horizonte)
+            analytics = self.analytics
+            if analytics is None:
+                analytics = TradeAnalytics.from_db(self.db_path, since=self._since(time.time()))
+            categories = analytics.risk_buckets()
             
             # Calcular proporções
-            categories = {cat: count for cat, count in results}
             total = sum(categories.values())
             
             if total == 0:
@@ -414,4 +384,36 @@ class AutoOptimizer:
 
 def main():
     """Função principal"""
-    print("⚙️
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Otimizador automático de pesos')
+    parser.add_argument('--mode', choices=['continuous', 'once'], default='continuous',
+                        help='Modo de execução: continuous (loop) ou once (um ciclo)')
+    parser.add_argument('--hours', type=int, default=48, help='Janela das métricas (horas)')
+    args = parser.parse_args()
+
+    print("⚙️  AUTO OPTIMIZER - Protocolo Severino")
+    print("=" * 60)
+
+    optimizer = AutoOptimizer()
+
+    if args.mode == 'continuous':
+        optimizer.run_continuous_optimization(
+            interval_hours=optimizer.config.get('optimize_interval_hours', 6)
+        )
+        return 0
+
+    metrics = optimizer.calculate_performance_metrics(hours_back=args.hours)
+    if not metrics:
+        print("⚠️  Sem métricas para otimização")
+        return 1
+    optimizer.optimize_weights(metrics)
+    optimizer.optimize_risk_parameters()
+    optimizer.log_optimization_results(metrics)
+    print(f"✅ Ciclo completo: {metrics['total_trades']} trades | WR {metrics['win_rate']:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+📈 BACKTESTER - Replay offline do pipeline Scanner -> Monitor -> Executor
+
+Percorre candles históricos de arquivos locais (JSON/CSV) barra a barra,
+aplicando as mesmas regras do sistema ao vivo:
+
+1. Scanner: filtro de volume (validar_volume), AnalistaTecnico na janela de
+   200 candles, Smart Blacklist (6h) e filtro de cenário (should_trade_in_scenario)
+2. Monitor: gatilho na neckline, stop antes da entrada e revalidação técnica
+   no fechamento de cada candle (padrão desfeito/mudou -> remove + blacklist)
+3. Executor: entrada a mercado com sizing por risco (RISK_PER_TRADE, MAX_LEVERAGE),
+   SL/TP e Break-Even (brain_simulator), com taxas e slippage
+
+Saída: ledger de trades + curva de equity (marcada a mercado em cada candle).
+
+Uso:
+    python backtester.py --data historico/ETH_USDT_15m.json --symbol ETH/USDT --timeframe 15m
+    python backtester.py --store --start 2026-01-01 --timeframe 15m   # candles do ohlcv_backfill.py
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from brain_simulator import TIMEFRAME_MINUTES
+from lib_risk import RISK_PER_TRADE, MAX_LEVERAGE, BE_TRIGGER_RATIO, BE_STOP_OFFSET
+from lib_padroes import AnalistaTecnico
+from lib_utils import should_trade_in_scenario, get_market_scenario
+
+logger = logging.getLogger("Backtester")
+
+BLACKLIST_HOURS = 6
+MIN_NOTIONAL = 5  # Mínimo $5 nocional (mesmo do executor)
+
+
+@dataclass
+class BacktestConfig:
+    initial_equity: float = 1000.0
+    risk_per_trade: float = RISK_PER_TRADE
+    max_leverage: float = MAX_LEVERAGE
+    fee_rate: float = 0.00055        # Taker Bybit linear (por lado)
+    slippage_pct: float = 0.0005     # 0.05% contra nós em entradas e saídas a mercado
+    volume_multiplier: float = 1.2   # validar_volume: volume atual > média20 * mult
+    window: int = 200                # Candles por análise (scanner/monitor usam limit=200)
+    scenario_filter: bool = True
+    revalidate: bool = True          # Revalidação técnica do monitor a cada fechamento
+    break_even: bool = True
+    be_trigger_ratio: float = BE_TRIGGER_RATIO
+    be_stop_offset: float = BE_STOP_OFFSET
+    blacklist_hours: float = BLACKLIST_HOURS
+
+
+# ============================================================
+# DADOS
+# ============================================================
+def load_candles(path: str) -> np.ndarray:
+    """
+    Carrega candles [timestamp_ms, open, high, low, close, volume].
+    JSON: lista de candles ccxt (ou {"candles": [...]}) | CSV: com ou sem cabeçalho
+    """
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('candles', [])
+        rows = [c[:6] for c in data]
+    else:
+        rows = []
+        with open(path, 'r', newline='') as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                try:
+                    rows.append([float(v) for v in row[:6]])
+                except ValueError:
+                    continue  # Cabeçalho
+
+    candles = np.array(rows, dtype=float).reshape(-1, 6)
+    # Ordena e remove timestamps duplicados
+    candles = candles[np.argsort(candles[:, 0], kind='stable')]
+    keep = np.ones(len(candles), dtype=bool)
+    keep[1:] = np.diff(candles[:, 0]) > 0
+    return candles[keep]
+
+
+def candle_file(data_dir: str, symbol: str, timeframe: str) -> Optional[str]:
+    """Convenção de nome: ETH/USDT 15m -> ETH_USDT_15m.json|.csv"""
+    base = symbol.split(':')[0].replace('/', '_')
+    for ext in ('.json', '.csv'):
+        path = os.path.join(data_dir, f"{base}_{timeframe}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def volume_pass_mask(volumes: np.ndarray, multiplier: float) -> np.ndarray:
+    """validar_volume vetorizado: volume[i] > média(volume[i-20:i]) * mult"""
+    mask = np.zeros(len(volumes), dtype=bool)
+    if len(volumes) < 21:
+        return mask
+    csum = np.concatenate(([0.0], np.cumsum(volumes)))
+    media = (csum[20:-1] - csum[:-21]) / 20
+    mask[20:] = volumes[20:] > media * multiplier
+    return mask
+
+
+def build_scenario_series(btc_candles: np.ndarray, alt_candles: Dict[str, np.ndarray],
+                          timeframe: str = '4h'):
+    """
+    Cenário de mercado histórico (mesma lógica de check_btc_trend + proxy de BTC.D).
+    Retorna (available_at_ms, scenario_numbers) - cenário só vale após o fechamento do candle.
+    """
+    closes = btc_candles[:, 4]
+    n = len(closes)
+    trend = np.full(n, 'NEUTRAL', dtype=object)
+    if n >= 201:
+        csum = np.concatenate(([0.0], np.cumsum(closes)))
+        sma200 = (csum[200:-1] - csum[:-201]) / 200
+        trend[200:] = np.where(closes[200:] > sma200, 'LONG', 'SHORT')
+
+    btc_perf = np.full(n, np.nan)
+    btc_perf[20:] = (closes[20:] - closes[:-20]) / closes[:-20] * 100
+
+    rel = []
+    for candles in alt_candles.values():
+        alt = dict(zip(candles[:, 0].astype(np.int64), candles[:, 4]))
+        alt_close = np.array([alt.get(int(ts), np.nan) for ts in btc_candles[:, 0]])
+        alt_perf = np.full(n, np.nan)
+        alt_perf[20:] = (alt_close[20:] - alt_close[:-20]) / alt_close[:-20] * 100
+        rel.append(btc_perf - alt_perf)
+
+    btcd = np.full(n, 'NEUTRAL', dtype=object)
+    if rel:
+        with np.errstate(invalid='ignore'):
+            stacked = np.vstack(rel)
+            counts = (~np.isnan(stacked)).sum(axis=0)
+            avg = np.where(counts > 0, np.nansum(stacked, axis=0) / np.maximum(counts, 1), 0.0)
+        btcd[avg > 1.0] = 'LONG'
+        btcd[avg < -1.0] = 'SHORT'
+
+    scenarios = np.array([get_market_scenario(t, d)[0] for t, d in zip(trend, btcd)])
+    tf_ms = TIMEFRAME_MINUTES.get(timeframe, 240) * 60 * 1000
+    return btc_candles[:, 0] + tf_ms, scenarios
+
+
+def scenario_lookup_from_series(available_at: np.ndarray, scenarios: np.ndarray) -> Callable[[float], int]:
+    """Converte a série em função timestamp -> cenário vigente (5 = lateral antes do início)"""
+    def lookup(ts):
+        idx = np.searchsorted(available_at, ts, side='right') - 1
+        return int(scenarios[idx]) if idx >= 0 else 5
+    return lookup
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+class Backtester:
+    """
+    Máquina de estados por par/timeframe: IDLE (scanner) -> WATCH (monitor) -> POSITION (executor)
+    """
+
+    def __init__(self, config: Optional[BacktestConfig] = None, analista: Optional[AnalistaTecnico] = None):
+        self.config = config or BacktestConfig()
+        self.analista = analista or AnalistaTecnico()
+
+    def _analisar(self, symbol, candles, i):
+        cfg = self.config
+        window = candles[max(0, i + 1 - cfg.window):i + 1]
+        return self.analista.analisar_par(symbol, window.tolist())
+
+    def run(self, symbol: str, timeframe: str, candles: np.ndarray,
+            scenario: Union[int, Callable[[float], int]] = 5) -> Dict:
+        """
+        Executa o replay. `scenario` pode ser um número fixo (1-5) ou função ts_ms -> cenário.
+        """
+        cfg = self.config
+        candles = np.asarray(candles, dtype=float)
+        n = len(candles)
+        vol_ok = volume_pass_mask(candles[:, 5], cfg.volume_multiplier).tolist()
+        # Listas Python: indexação escalar no loop é bem mais rápida que em arrays NumPy
+        ts, opens, highs, lows, closes = (candles[:, k].tolist() for k in range(5))
+        tf_ms = TIMEFRAME_MINUTES.get(timeframe, 15) * 60 * 1000
+        scenario_at = scenario if callable(scenario) else (lambda _ts, s=scenario: s)
+
+        blacklist: Dict[str, float] = {}
+
+        equity = cfg.initial_equity
+        equity_curve = [0.0] * n
+        trades: List[Dict] = []
+        watch = None
+        pos = None
+        start_time = time.perf_counter()
+        analyses = 0
+
+        for i in range(n):
+            # ---------------- POSITION (executor) ----------------
+            if pos is not None:
+                long_side = pos['direcao'] == 'LONG'
+                stop = pos['stop']
+                exit_price = None
+                reason = None
+
+                if long_side:
+                    if lows[i] <= stop:
+                        exit_price, reason = min(opens[i], stop), 'BREAK_EVEN' if pos['be'] else 'STOP_LOSS'
+                    elif highs[i] >= pos['target']:
+                        exit_price, reason = max(opens[i], pos['target']), 'TARGET'
+                else:
+                    if highs[i] >= stop:
+                        exit_price, reason = max(opens[i], stop), 'BREAK_EVEN' if pos['be'] else 'STOP_LOSS'
+                    elif lows[i] <= pos['target']:
+                        exit_price, reason = min(opens[i], pos['target']), 'TARGET'
+
+                if exit_price is not None:
+                    equity = self._close_position(pos, exit_price, ts[i], reason, equity, trades)
+                    pos = None
+                else:
+                    # BE acionado neste candle protege a partir do próximo
+                    if cfg.break_even and not pos['be']:
+                        hit = highs[i] >= pos['be_trigger'] if long_side else lows[i] <= pos['be_trigger']
+                        if hit:
+                            pos['be'] = True
+                            pos['stop'] = pos['entry'] * (1 + cfg.be_stop_offset if long_side else 1 - cfg.be_stop_offset)
+                    pos['mfe'] = max(pos['mfe'], highs[i] if long_side else -lows[i])
+                    pos['mae'] = min(pos['mae'], lows[i] if long_side else -highs[i])
+
+            # ---------------- WATCH (monitor) ----------------
+            elif watch is not None:
+                if watch['direcao'] == 'SHORT':
+                    invalid = highs[i] >= watch['stop_loss']
+                    trigger = lows[i] <= watch['neckline']
+                else:
+                    invalid = lows[i] <= watch['stop_loss']
+                    trigger = highs[i] >= watch['neckline']
+
+                if invalid:
+                    # Stop antes (ou no mesmo candle) da entrada: conservador, invalida
+                    blacklist[watch['key']] = ts[i] + cfg.blacklist_hours * 3600 * 1000
+                    watch = None
+                elif trigger:
+                    pos = self._open_position(watch, symbol, timeframe, i, opens[i], ts[i], equity)
+                    watch = None
+                elif cfg.revalidate:
+                    analyses += 1
+                    novo = self._analisar(symbol, candles, i)
+                    if not novo or novo.nome != watch['padrao'] or novo.direcao != watch['direcao']:
+                        blacklist[watch['key']] = ts[i] + cfg.blacklist_hours * 3600 * 1000
+                        watch = None
+                    else:
+                        watch['neckline'] = float(novo.neckline_price)
+                        watch['target'] = float(novo.target_price)
+                        watch['stop_loss'] = float(novo.stop_loss_price)
+
+            # ---------------- IDLE (scanner) ----------------
+            elif vol_ok[i] and i + 1 >= 30:
+                analyses += 1
+                padrao = self._analisar(symbol, candles, i)
+                if padrao:
+                    key = f"{symbol}_{padrao.nome}_{timeframe}"
+                    blocked = blacklist.get(key, 0) > ts[i]
+                    allowed = True
+                    if cfg.scenario_filter:
+                        allowed, _ = should_trade_in_scenario(scenario_at(ts[i] + tf_ms), padrao.direcao)
+                    if not blocked and allowed:
+                        watch = {
+                            'key': key,
+                            'padrao': padrao.nome,
+                            'direcao': padrao.direcao,
+                            'neckline': float(padrao.neckline_price),
+                            'target': float(padrao.target_price),
+                            'stop_loss': float(padrao.stop_loss_price),
+                            'detected_at': int(ts[i] + tf_ms)
+                        }
+
+            # Equity marcada a mercado no fechamento
+            if pos is not None:
+                sign = 1 if pos['direcao'] == 'LONG' else -1
+                equity_curve[i] = equity + sign * (closes[i] - pos['entry']) * pos['qty']
+            else:
+                equity_curve[i] = equity
+
+        # Posição ainda aberta no fim dos dados: fecha no último close
+        if pos is not None and n:
+            equity = self._close_position(pos, closes[-1], ts[-1], 'END_OF_DATA', equity, trades)
+            equity_curve[-1] = equity
+
+        elapsed = time.perf_counter() - start_time
+        stats = self._stats(trades, equity_curve, n, elapsed)
+        stats['analyses'] = analyses
+        logger.info(
+            f"📈 {symbol} [{timeframe}]: {stats['trades']} trades | Net {stats['net_pnl']:+.2f} | "
+            f"DD {stats['max_drawdown_pct']:.1f}% | {stats['bars_per_second']:.0f} candles/s"
+        )
+
+        return {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'config': asdict(cfg),
+            'trades': trades,
+            'equity_curve': [(int(t), e) for t, e in zip(ts, equity_curve)],
+            'stats': stats
+        }
+
+    def _open_position(self, watch, symbol, timeframe, i, open_price, bar_ts, equity):
+        cfg = self.config
+        long_side = watch['direcao'] == 'LONG'
+        neckline = watch['neckline']
+
+        # Gap além da neckline: executa na abertura
+        raw = max(open_price, neckline) if long_side else min(open_price, neckline)
+        entry = raw * (1 + cfg.slippage_pct) if long_side else raw * (1 - cfg.slippage_pct)
+
+        stop_dist = abs(entry - watch['stop_loss'])
+        if stop_dist <= 0 or equity <= 0:
+            return None
+        qty = (equity * cfg.risk_per_trade) / stop_dist
+        if qty * entry > equity * cfg.max_leverage:
+            qty = (equity * cfg.max_leverage) / entry
+        if qty * entry < MIN_NOTIONAL:
+            return None
+
+        distancia = abs(watch['target'] - entry)
+        be_trigger = entry + distancia * cfg.be_trigger_ratio if long_side else entry - distancia * cfg.be_trigger_ratio
+
+        return {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'padrao': watch['padrao'],
+            'direcao': watch['direcao'],
+            'detected_at': watch['detected_at'],
+            'entry_time': int(bar_ts),
+            'entry': entry,
+            'qty': qty,
+            'stop': watch['stop_loss'],
+            'initial_stop': watch['stop_loss'],
+            'target': watch['target'],
+            'be_trigger': be_trigger,
+            'be': False,
+            'entry_fee': qty * entry * cfg.fee_rate,
+            'mfe': entry if long_side else -entry,
+            'mae': entry if long_side else -entry,
+        }
+
+    def _close_position(self, pos, raw_exit, bar_ts, reason, equity, trades):
+        cfg = self.config
+        long_side = pos['direcao'] == 'LONG'
+        exit_price = raw_exit * (1 - cfg.slippage_pct) if long_side else raw_exit * (1 + cfg.slippage_pct)
+        sign = 1 if long_side else -1
+
+        gross = sign * (exit_price - pos['entry']) * pos['qty']
+        fees = pos['entry_fee'] + pos['qty'] * exit_price * cfg.fee_rate
+        pnl = gross - fees
+        risk = abs(pos['entry'] - pos['initial_stop']) * pos['qty']
+        new_equity = equity + pnl
+
+        trades.append({
+            'symbol': pos['symbol'],
+            'timeframe': pos['timeframe'],
+            'padrao': pos['padrao'],
+            'direcao': pos['direcao'],
+            'detected_at': pos['detected_at'],
+            'entry_time': pos['entry_time'],
+            'entry_price': pos['entry'],
+            'exit_time': int(bar_ts),
+            'exit_price': exit_price,
+            'exit_reason': reason,
+            'qty': pos['qty'],
+            'fees': fees,
+            'pnl': pnl,
+            'pnl_pct': pnl / equity * 100 if equity else 0.0,
+            'r_multiple': pnl / risk if risk else 0.0,
+            'max_favorable_pct': abs(abs(pos['mfe']) - pos['entry']) / pos['entry'] * 100,
+            'max_adverse_pct': abs(pos['entry'] - abs(pos['mae'])) / pos['entry'] * 100,
+            'break_even': pos['be'],
+            'equity_after': new_equity
+        })
+        return new_equity
+
+    def _stats(self, trades, equity_curve, bars, elapsed) -> Dict:
+        cfg = self.config
+        pnls = np.array([t['pnl'] for t in trades]) if trades else np.zeros(0)
+        wins = int((pnls > 0).sum())
+        equity_curve = np.asarray(equity_curve, dtype=float)
+        if len(equity_curve):
+            peaks = np.maximum.accumulate(equity_curve)
+            max_dd = float(((peaks - equity_curve) / peaks).max() * 100)
+            final = float(equity_curve[-1])
+        else:
+            max_dd, final = 0.0, cfg.initial_equity
+        gross_win = float(pnls[pnls > 0].sum())
+        gross_loss = float(-pnls[pnls < 0].sum())
+        return {
+            'trades': len(trades),
+            'wins': wins,
+            'win_rate': wins / len(trades) if trades else 0.0,
+            'net_pnl': float(pnls.sum()),
+            'final_equity': final,
+            'return_pct': (final - cfg.initial_equity) / cfg.initial_equity * 100,
+            'profit_factor': gross_win / gross_loss if gross_loss else (float('inf') if gross_win else 0.0),
+            'max_drawdown_pct': max_dd,
+            'fees': float(sum(t['fees'] for t in trades)),
+            'bars': bars,
+            'elapsed_s': elapsed,
+            'bars_per_second': bars / elapsed if elapsed > 0 else 0.0
+        }
+
+    def run_many(self, datasets: List[Dict], scenario: Union[int, Callable[[float], int]] = 5) -> Dict:
+        """
+        Roda vários pares/timeframes. Cada série usa a banca inicial completa para
+        o sizing; o ledger combinado é ordenado por saída e acumulado numa equity única.
+        """
+        results = [self.run(d['symbol'], d['timeframe'], d['candles'], scenario) for d in datasets]
+        ledger = sorted((t for r in results for t in r['trades']), key=lambda t: t['exit_time'])
+
+        equity = self.config.initial_equity
+        curve = []
+        for t in ledger:
+            equity += t['pnl']
+            curve.append((t['exit_time'], equity))
+
+        return {'results': results, 'trades': ledger, 'equity_curve': curve, 'final_equity': equity}
+
+
+# ============================================================
+# EXPORTAÇÃO
+# ============================================================
+def save_ledger(trades: List[Dict], path: str):
+    if not trades:
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(trades[0].keys()))
+        writer.writeheader()
+        writer.writerows(trades)
+
+
+def save_equity_curve(curve, path: str):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'equity'])
+        writer.writerows(curve)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Backtester offline do Sniper')
+    parser.add_argument('--data', help='Arquivo de candles ou diretório (SYMBOL_tf.json|csv)')
+    parser.add_argument('--store', nargs='?', const='', help='Ler do OHLCVStore (ohlcv_backfill.py) em vez de arquivos')
+    parser.add_argument('--start', help='Início YYYY-MM-DD (UTC, só com --store)')
+    parser.add_argument('--end', help='Fim YYYY-MM-DD (UTC, só com --store)')
+    parser.add_argument('--symbol', help='Par (padrão: todos do config_futures.json)')
+    parser.add_argument('--timeframe', help='Timeframe (padrão: todos do config_futures.json)')
+    parser.add_argument('--scenario', type=int, default=5, help='Cenário fixo 1-5 (padrão: 5 lateral)')
+    parser.add_argument('--volume-mult', type=float, help='Multiplicador do filtro de volume')
+    parser.add_argument('--fee', type=float, default=BacktestConfig.fee_rate)
+    parser.add_argument('--slippage', type=float, default=BacktestConfig.slippage_pct)
+    parser.add_argument('--no-break-even', action='store_true')
+    parser.add_argument('--no-revalidate', action='store_true')
+    parser.add_argument('--out', default='backtest', help='Prefixo dos arquivos de saída')
+    args = parser.parse_args()
+
+    config_file = {}
+    if os.path.exists('config_futures.json'):
+        with open('config_futures.json', 'r') as f:
+            config_file = json.load(f)
+
+    cfg = BacktestConfig(
+        fee_rate=args.fee,
+        slippage_pct=args.slippage,
+        volume_multiplier=args.volume_mult or config_file.get('volume_multiplier', 1.2),
+        break_even=not args.no_break_even,
+        revalidate=not args.no_revalidate
+    )
+
+    symbols = [args.symbol] if args.symbol else config_file.get('pairs', [])
+    tfs = [args.timeframe] if args.timeframe else config_file.get('timeframes', ['15m'])
+
+    if args.store is not None:
+        from datetime import datetime, timezone
+        from ohlcv_store import OHLCVStore
+
+        def to_ms(day):
+            if not day:
+                return None
+            return int(datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+        store = OHLCVStore(args.store) if args.store else OHLCVStore()
+        datasets = []
+        for sym in symbols:
+            for tf in tfs:
+                candles = store.read(sym, tf, to_ms(args.start), to_ms(args.end))
+                if len(candles):
+                    datasets.append({'symbol': sym, 'timeframe': tf, 'candles': candles})
+    elif args.data and os.path.isdir(args.data):
+        datasets = []
+        for sym in symbols:
+            for tf in tfs:
+                path = candle_file(args.data, sym, tf)
+                if path:
+                    datasets.append({'symbol': sym, 'timeframe': tf, 'candles': load_candles(path)})
+    elif args.data:
+        datasets = [{
+            'symbol': args.symbol or 'UNKNOWN',
+            'timeframe': args.timeframe or '15m',
+            'candles': load_candles(args.data)
+        }]
+    else:
+        parser.error('informe --data ou --store')
+
+    if not datasets:
+        print("❌ Nenhum arquivo de candles encontrado")
+        raise SystemExit(1)
+
+    bt = Backtester(cfg)
+    result = bt.run_many(datasets, scenario=args.scenario)
+
+    save_ledger(result['trades'], f"{args.out}_ledger.csv")
+    save_equity_curve(result['equity_curve'], f"{args.out}_equity.csv")
+
+    print("\n📊 RESULTADO DO BACKTEST")
+    print("=" * 60)
+    for r in result['results']:
+        s = r['stats']
+        print(f"{r['symbol']:<12} {r['timeframe']:<4} | {s['trades']:>4} trades | WR {s['win_rate']*100:5.1f}% | "
+              f"Net {s['net_pnl']:+10.2f} | DD {s['max_drawdown_pct']:5.1f}% | {s['bars_per_second']:.0f} candles/s")
+    print("-" * 60)
+    print(f"Equity final: {result['final_equity']:.2f} ({len(result['trades'])} trades)")
+    print(f"Ledger: {args.out}_ledger.csv | Equity: {args.out}_equity.csv")
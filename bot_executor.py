@@ -8,6 +8,9 @@ import logging
 from datetime import datetime
 from lib_utils import JsonManager
 from post_entry_validator import PostEntryValidator
+from lib_risk import RISK_PER_TRADE, MAX_LEVERAGE, break_even_trigger, break_even_stop
+from candle_scheduler import CandleCloseScheduler
+from health_status import HealthReporter
 
 # Configuração de Logs
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,8 +25,8 @@ logging.basicConfig(
 logger = logging.getLogger("ExecutorBybit")
 
 # --- CONFIGURAÇÃO DE RISCO (FASE 3) ---
-RISK_PER_TRADE = 0.05  # Arrisca 5% da banca por trade
-MAX_LEVERAGE = 5        # Alavancagem máxima permitida
+# RISK_PER_TRADE / MAX_LEVERAGE e regras de Break-Even ficam em lib_risk.py
+# para que o replay histórico do cérebro use exatamente os mesmos valores.
 
 class ExecutorBybit:
     def __init__(self, symbol):
@@ -218,6 +221,7 @@ class ExecutorBybit:
                 "entry_price": entry_price,
                 "size": size,
                 "risco_estimado": risco,
+                "brain_decision": self.alvo_dados.get('brain_decision'),
                 "opened_at": str(datetime.now()),
                 "status": "OPEN"
             })
@@ -234,18 +238,30 @@ class ExecutorBybit:
         stop_price = self.alvo_dados['stop_loss']
         
         # Definições (Exemplo: BE ao atingir 50% do alvo)
-        distancia_alvo = abs(target_price - entry_price)
-        trigger_be = entry_price + (distancia_alvo * 0.5) if side == 'buy' else entry_price - (distancia_alvo * 0.5)
+        trigger_be = break_even_trigger(entry_price, target_price, side)
         
         be_acionado = False
         
+        # Validação pós-entrada acorda no fechamento de cada candle (relógio da exchange),
+        # sem polling de fetch_ohlcv a cada ciclo
+        timeframe = self.alvo_dados.get('timeframe', '5m')
+        scheduler = CandleCloseScheduler(self.exchange)
+        if hasattr(self, 'post_validator'):
+            scheduler.register(self.target_symbol_final, timeframe)
+        health = HealthReporter(f"executor:{self.target_symbol_final}", interval=30)
+        
         while True:
             try:
-                time.sleep(30)
+                # Posição/BE continuam checados a cada 30s no máximo
+                time.sleep(scheduler.seconds_until_next_close(max_wait=30))
+                inicio = time.perf_counter()
                 
                 # === SEVERINO: VALIDAÇÃO PÓS-ENTRADA (CRÍTICO) ===
-                if hasattr(self, 'post_validator'):
-                    should_exit, reason = self.post_validator.should_exit()
+                fechamento = scheduler.due().get(timeframe)
+                if hasattr(self, 'post_validator') and fechamento:
+                    close_ms, _ = fechamento
+                    candles = self.exchange.fetch_ohlcv(self.target_symbol_final, timeframe, limit=51)
+                    should_exit, reason = self.post_validator.should_exit(candles, close_ms)
                     if should_exit:
                         logger.warning(f"⚠️ INVALIDAÇÃO DETECTADA: {reason}")
                         logger.info(f"🚪 Fechando posição IMEDIATAMENTE (antes do SL)")
@@ -289,6 +305,9 @@ class ExecutorBybit:
                 
                 pos = open_pos[0]
                 mark_price = float(pos['markPrice'] or pos['lastPrice']) # Bybit usa markPrice para liquidar
+                if hasattr(self, 'post_validator'):
+                    health.set_extra(**self.post_validator.stats())
+                health.beat((time.perf_counter() - inicio) * 1000)
                 
                 # --- LOGICA BREAK-EVEN ---
                 if not be_acionado:
@@ -300,7 +319,7 @@ class ExecutorBybit:
                         logger.info(f"🛡️ PROTEÇÃO: Movendo Stop para Break-Even ({entry_price})")
                         
                         # Atualiza SL na Bybit
-                        new_sl = entry_price * 1.002 if side == 'buy' else entry_price * 0.998 # Pequeno lucro para cobrir taxas
+                        new_sl = break_even_stop(entry_price, side) # Pequeno lucro para cobrir taxas
                         
                         # === CAMADA 1: AJUSTAR STOP LOSS EXISTENTE ===
                         try:
@@ -372,14 +391,18 @@ class ExecutorBybit:
                             except Exception as e2:
                                 logger.error(f"❌ [CAMADA 2] FALHA CRÍTICA ao recriar SL: {e2}")
                                 logger.error("⚠️ POSIÇÃO SEM PROTEÇÃO DE BREAK-EVEN! Monitorar manualmente.")
+                                health.error(f"Break-even falhou: {e2}")
 
                 # --- LOGICA TRAILING (Opcional Futuro: Mover SL a cada X%) ---
                 # Por enquanto, BE é a prioridade da Fase 4.
 
             except Exception as e:
                 logger.error(f"Erro no monitoramento: {e}")
+                health.error(e)
                 time.sleep(30)
 
+        health.close()
+
     def run(self):
         self.setup_futures_mode()
         order, side, price = self.executar_trade()
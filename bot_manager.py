@@ -77,6 +77,18 @@ def start_monitor():
     log(f"Monitor iniciado (PID: {proc.pid})")
     return proc
 
+def start_market_context():
+    """Inicia o serviço de contexto de mercado (snapshot compartilhado)"""
+    log("Iniciando Market Context Service...")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "market_context_service.py")],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=BASE_DIR
+    )
+    log(f"Market Context Service iniciado (PID: {proc.pid})")
+    return proc
+
 def start_telegram_control():
     """Inicia o controle via Telegram"""
     log("Iniciando Telegram Control...")
@@ -110,6 +122,7 @@ def start_all():
     log("INICIANDO BOT SNIPER BYBIT")
     log("=" * 50)
     
+    kill_process_by_name("market_context_service.py")
     kill_process_by_name("bot_scanner.py")
     kill_process_by_name("bot_monitor.py")
     kill_process_by_name("bot_executor.py")
@@ -117,12 +130,14 @@ def start_all():
     kill_process_by_name("dashboard_server.py")
     time.sleep(2)
     
+    start_market_context()
     scanner_proc = start_scanner()
     monitor_proc = start_monitor()
     telegram_proc = start_telegram_control()
     dash_proc = start_dashboard()
     
     log("Todos os componentes iniciados")
+    log("Market Context: Snapshot BTC/BTC.D compartilhado")
     log("Scanner: Monitorando e populando watchlist")
     log("Monitor: Validando padrões e disparando executores")
     log("Telegram: Centro de Comando Online")
@@ -137,6 +152,7 @@ def stop_all():
     log("PARANDO BOT SNIPER BYBIT")
     log("=" * 50)
     
+    kill_process_by_name("market_context_service.py")
     kill_process_by_name("bot_scanner.py")
     kill_process_by_name("bot_monitor.py")
     kill_process_by_name("bot_executor.py")
@@ -147,31 +163,14 @@ def stop_all():
     log("=" * 50)
 
 def status():
-    """Verifica status dos componentes"""
-    scanner_pids = get_process_by_name("bot_scanner.py")
-    monitor_pids = get_process_by_name("bot_monitor.py")
-    executor_pids = get_process_by_name("bot_executor.py")
-    telegram_pids = get_process_by_name("bot_telegram_control.py")
-    dash_pids = get_process_by_name("dashboard_server.py")
-    
+    """Verifica status dos componentes (snapshot publicado por cada um)"""
+    from health_status import HealthCollector, format_status
+
     log("=" * 50)
     log("STATUS DO BOT SNIPER BYBIT")
     log("=" * 50)
-    log(f"Scanner: {'ATIVO' if scanner_pids else 'PARADO'} (PIDs: {scanner_pids})")
-    log(f"Monitor: {'ATIVO' if monitor_pids else 'PARADO'} (PIDs: {monitor_pids})")
-    log(f"Telegram: {'ATIVO' if telegram_pids else 'PARADO'} (PIDs: {telegram_pids})")
-    log(f"Dashboard: {'ATIVO' if dash_pids else 'PARADO'} (PIDs: {dash_pids})")
-    log(f"Executores: {'ATIVOS' if executor_pids else 'PARADOS'} (Qtd: {len(executor_pids)})")
-    
-    # Verifica watchlist
-    try:
-        import json
-        with open(os.path.join(BASE_DIR, "watchlist.json"), "r") as f:
-            wl = json.load(f)
-        log(f"Watchlist: {wl['slots_ocupados']}/{wl['max_slots']} slots ocupados")
-    except:
-        log("Watchlist: Não foi possível ler")
-    
+    for line in format_status(HealthCollector().snapshot()).splitlines():
+        log(line)
     log("=" * 50)
 
 def main():
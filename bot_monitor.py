@@ -7,6 +7,9 @@ import ccxt
 from datetime import datetime
 from lib_utils import JsonManager
 from vision_validator_watchlist import VisionValidatorWatchlist # SEVERINO: Import IA
+from vision_worker_pool import VisionWorkerPool
+from telegram_service import enqueue_message
+from health_status import HealthReporter
 
 # --- CONFIGURAÇÃO ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,13 +20,9 @@ sys.path.insert(0, BASE_DIR)
 # Tenta importar bot telegram (pode falhar se nao configurado)
 try:
     from bot_telegram import lancar_executor
-    CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
-    TOKEN = os.getenv('TELEGRAM_TOKEN')
-    import telebot
-    bot = telebot.TeleBot(TOKEN) if TOKEN else None
 except Exception:
-    bot = None
     pass
+CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 logging.basicConfig(
     level=logging.INFO,
@@ -51,6 +50,34 @@ except Exception as e:
     logger.error(f"Falha ao iniciar Vision AI: {e}")
     vision_validator = None
 
+# Validações Vision AI rodam no pool: o loop de preços não espera o Gemini
+vision_pool = VisionWorkerPool(vision_validator.validate_pattern, max_concurrency=3, timeout=45) if vision_validator else None
+
+# Brain (política Q-learning em memória): opinião registrada em cada gatilho.
+# config_futures.json -> "brain": {"enabled": false, "gate_entries": false}
+# gate_entries=true faz o SKIP do brain vetar a entrada (senão é só consultivo)
+# Só carrega o modelo salvo: treino e gravação ficam com o brain_trainer/cron
+BRAIN_CONTEXT_REFRESH = 60  # s entre snapshots de contexto de mercado (fora do caminho de decisão)
+
+def carregar_config_brain():
+    try:
+        with open(os.path.join(BASE_DIR, 'config_futures.json'), 'r') as f:
+            return json.load(f).get('brain', {})
+    except Exception:
+        return {}
+
+BRAIN_CONFIG = carregar_config_brain()
+brain = None
+if BRAIN_CONFIG.get('enabled'):
+    try:
+        from brain_integration import BrainIntegration
+        brain = BrainIntegration(trainer=False)
+        if not brain.load_for_inference():
+            brain = None
+    except Exception as e:
+        logger.error(f"Falha ao iniciar Brain: {e}")
+        brain = None
+
 def get_fechamento_candle(timeframe):
     """Retorna True se estivermos no minuto de fechamento do candle"""
     now = datetime.now()
@@ -122,24 +149,32 @@ def remove_par_watchlist(wl_data, index, motivo, symbol, padrao, timeframe):
             logger.info(f"❌ Par {symbol} removido: {motivo}")
             adicionar_smart_blacklist(symbol, padrao, timeframe, motivo)
             
-            try:
-                if bot and CHAT_ID:
-                    bot.send_message(CHAT_ID, f"❌ PADRÃO INVALIDADO: {symbol}\nMotivo: {motivo}", parse_mode='Markdown')
-            except: pass
+            # Só enfileira (o TelegramService envia); não segura o loop do monitor
+            enqueue_message(f"❌ PADRÃO INVALIDADO: {symbol}\nMotivo: {motivo}", CHAT_ID)
             return True
     except Exception as e:
         logger.error(f"Erro ao remover par: {e}")
     return False
 
 def disparar_trade(wl_data, index, preco_atual):
-    """Dispara executor para entrada IMEDIATA"""
+    """Dispara executor para entrada IMEDIATA. Retorna False se o par saiu da watchlist (veto do brain)."""
     try:
         par = wl_data['pares'][index]
         symbol = par['symbol']
         direcao = par['direcao']
         
         if par.get('status') == 'EXECUTANDO':
-            return
+            return True
+
+        if brain:
+            # Lookup na política compilada (sem I/O): não atrasa a entrada
+            decisao = brain.should_enter_trade_fast(par)
+            par['brain_decision'] = {k: decisao.get(k) for k in ('decision', 'brain_advice', 'confidence')}
+            logger.info(f"🧠 Brain {symbol}: {decisao['decision']} - {decisao['reason']}")
+            if BRAIN_CONFIG.get('gate_entries') and decisao['decision'] == 'SKIP':
+                remove_par_watchlist(wl_data, index, f"Brain vetou a entrada ({decisao['reason']})",
+                                     symbol, par['padrao'], par['timeframe'])
+                return False
 
         logger.info(f"🔥 GATILHO ACIONADO para {symbol} em {preco_atual}! Disparando Executor...")
         
@@ -150,28 +185,60 @@ def disparar_trade(wl_data, index, preco_atual):
         # Lança processo filho
         lancar_executor(symbol)
         
-        try:
-            if bot and CHAT_ID:
-                bot.send_message(CHAT_ID, f"🚀 GATILHO ROMPIDO: {symbol} @ {preco_atual}. Entrando {direcao}...", parse_mode='Markdown')
-        except: pass
+        enqueue_message(f"🚀 GATILHO ROMPIDO: {symbol} @ {preco_atual}. Entrando {direcao}...", CHAT_ID)
         
     except Exception as e:
         logger.error(f"Erro ao disparar executor para {symbol}: {e}")
+    return True
+
+def aplicar_veredictos_vision(wl):
+    """Aplica veredictos que chegaram do pool. Retorna True se a watchlist mudou."""
+    mudou = False
+    for result in vision_pool.drain():
+        ctx = result.context
+        if not result.ok:
+            # Timeout/erro: mesma política do validador (aprova, lógica matemática segue valendo)
+            logger.warning(f"⚠️ Vision AI sem veredicto para {result.key} ({result.error}) - mantido")
+            continue
+        if result.value:
+            logger.info(f"✅ Vision AI aprovou {result.key} ({result.elapsed:.1f}s)")
+            continue
+
+        # Rejeitado: só remove se o par ainda é o mesmo padrão que foi validado
+        for idx, p in enumerate(wl['pares']):
+            if (p['symbol'] == result.key and p['padrao'] == ctx.get('padrao')
+                    and p['timeframe'] == ctx.get('timeframe') and p.get('status') != 'EXECUTANDO'):
+                remove_par_watchlist(wl, idx, "Vision AI REJECTED (Visual Inválido)", p['symbol'], p['padrao'], p['timeframe'])
+                mudou = True
+                break
+    return mudou
 
 def monitorar_watchlist():
     logger.info(">>> Monitor de Watchlist Iniciado v2.3.1 (IA Ativa) <<<")
     exchange = get_bybit_public()
+    health = HealthReporter('monitor', interval=10)
     
     # Controle de validação IA para não chamar toda hora
     last_ai_check = {} 
+    ultimo_contexto_brain = 0
     
     while True:
         try:
+            inicio = time.perf_counter()
+            if brain and time.time() - ultimo_contexto_brain >= BRAIN_CONTEXT_REFRESH:
+                brain.refresh_inference_context(exchange)
+                ultimo_contexto_brain = time.time()
+                health.set_extra(brain=brain.inference.latency_stats())
             wl = watchlist_mgr.read()
             if not wl or 'pares' not in wl or len(wl['pares']) == 0:
+                health.beat((time.perf_counter() - inicio) * 1000, watchlist=0,
+                            vision=vision_pool.pending_count() if vision_pool else 0)
                 time.sleep(10)
                 continue
 
+            if vision_pool and aplicar_veredictos_vision(wl):
+                continue
+
             pares = wl['pares']
             restart_loop = False
 
@@ -227,7 +294,9 @@ def monitorar_watchlist():
                         break # Reinicia loop pois lista mudou
 
                     if acionar_gatilho:
-                        disparar_trade(wl, real_idx, preco_atual)
+                        if not disparar_trade(wl, real_idx, preco_atual):
+                            restart_loop = True
+                            break # Brain vetou: lista mudou
                         continue # Vai pro proximo, esse ja disparou
 
                 except Exception as e:
@@ -258,15 +327,11 @@ def monitorar_watchlist():
                         restart_loop = True
                         break
                     
-                    # 2.2 Validação Vision AI (NOVO v2.3.1)
-                    if vision_validator:
-                        logger.info(f"🧠 Vision AI analisando Watchlist: {symbol}...")
-                        ai_aprovado = vision_validator.validate_pattern(symbol, timeframe, par)
-                        
-                        if not ai_aprovado:
-                            remove_par_watchlist(wl, real_idx, "Vision AI REJECTED (Visual Inválido)", symbol, padrao_nome, timeframe)
-                            restart_loop = True
-                            break
+                    # 2.2 Validação Vision AI (assíncrona - veredicto aplicado quando chegar)
+                    if vision_pool:
+                        if vision_pool.submit(symbol, symbol, timeframe, dict(par),
+                                              context={'padrao': padrao_nome, 'timeframe': timeframe}):
+                            logger.info(f"🧠 Vision AI analisando Watchlist: {symbol} (em background)...")
                     
                     # Se passou por tudo, atualiza níveis finos
                     if novo_padrao.neckline_price != neckline:
@@ -283,12 +348,15 @@ def monitorar_watchlist():
             if restart_loop:
                 continue
 
+            health.beat((time.perf_counter() - inicio) * 1000, watchlist=len(wl['pares']),
+                        vision=vision_pool.pending_count() if vision_pool else 0)
             time.sleep(10) # Loop principal
 
         except KeyboardInterrupt:
             break
         except Exception as e:
             logger.error(f"Erro fatal monitor loop: {e}")
+            health.error(e)
             time.sleep(5)
 
 if __name__ == "__main__":
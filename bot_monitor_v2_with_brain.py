@@ -228,31 +228,33 @@ class MonitorWithBrain:
             return False
     
     def get_brain_recommendation(self, symbol, pattern_data):
-        """Obter recomendação do brain para um padrão específico"""
+        """Obter recomendação do brain para um padrão específico (política em memória)"""
         if not self.brain_initialized:
             logger.warning("⚠️ Brain não inicializado - retornando recomendação padrão")
             return {'action': 'NEUTRAL', 'confidence': 0.5, 'source': 'fallback'}
         
         try:
-            # Preparar features para o brain
-            features = {
-                'symbol': symbol,
-                'pattern_name': pattern_data.get('pattern_name', 'UNKNOWN'),
-                'confidence': pattern_data.get('confiabilidade', 0.5),
-                'timeframe': pattern_data.get('timeframe', '1h'),
-                'market_context': self.get_market_context()
-            }
-            
-            # Obter decisão do brain
-            decision = self.brain.get_decision(features)
+            decision = self.brain.should_enter_trade_fast(dict(pattern_data, symbol=symbol))
+            recommendation = self._to_recommendation(decision)
             
-            logger.info(f"🧠 Brain recommendation for {symbol}: {decision}")
-            return decision
+            logger.info(f"🧠 Brain recommendation for {symbol}: {recommendation}")
+            return recommendation
             
         except Exception as e:
             logger.error(f"❌ Erro ao obter recomendação do brain: {e}")
             return {'action': 'NEUTRAL', 'confidence': 0.5, 'source': 'error'}
     
+    @staticmethod
+    def _to_recommendation(decision):
+        """Decisão do BrainInferenceService -> formato salvo em brain_decisions.json"""
+        return {
+            'action': decision.get('brain_advice', 'NEUTRAL'),
+            'decision': decision.get('decision'),
+            'confidence': decision.get('confidence', 0.5),
+            'reason': decision.get('reason'),
+            'source': 'inference'
+        }
+    
     def get_market_context(self):
         """Obter contexto atual do mercado"""
         try:
@@ -297,39 +299,45 @@ class MonitorWithBrain:
     def analyze_watchlist_with_brain(self):
         """Analisar watchlist usando recomendações do brain"""
         try:
-            watchlist = self.watchlist_mgr.load()
+            watchlist = self.watchlist_mgr.read()
             if not watchlist or 'pares' not in watchlist:
                 logger.warning("⚠️ Watchlist vazia ou inválida")
                 return
             
+            pares = watchlist['pares']
+            if self.brain_initialized:
+                # Contexto e modelo atualizados uma vez por ciclo; a watchlist é pontuada numa chamada
+                self.brain.refresh_inference_context()
+                recommendations = [self._to_recommendation(d) for d in self.brain.score_watchlist(pares)]
+            else:
+                recommendations = [self.get_brain_recommendation(item.get('symbol', ''), item) for item in pares]
+            
             brain_decisions = []
             
-            for item in watchlist['pares']:
+            for item, recommendation in zip(pares, recommendations):
                 symbol = item.get('symbol', '')
-                pattern_data = {
-                    'pattern_name': item.get('padrao', 'UNKNOWN'),
-                    'confiabilidade': item.get('confiabilidade', 0.5),
-                    'timeframe': item.get('timeframe', '1h'),
-                    'direction': item.get('direcao', 'NEUTRAL')
-                }
-                
-                # Obter recomendação do brain
-                recommendation = self.get_brain_recommendation(symbol, pattern_data)
+                pattern = item.get('padrao', 'UNKNOWN')
+                confiabilidade = item.get('confiabilidade', 0.5)
                 
                 brain_decisions.append({
                     'symbol': symbol,
-                    'pattern': pattern_data['pattern_name'],
-                    'original_confidence': pattern_data['confiabilidade'],
+                    'pattern': pattern,
+                    'original_confidence': confiabilidade,
                     'brain_action': recommendation['action'],
+                    'brain_decision': recommendation.get('decision'),
                     'brain_confidence': recommendation['confidence'],
                     'source': recommendation['source']
                 })
                 
                 # Log decision
-                logger.info(f"   {symbol}: {pattern_data['pattern_name']} | "
-                          f"Conf: {pattern_data['confiabilidade']:.2f} → "
+                logger.info(f"   {symbol}: {pattern} | "
+                          f"Conf: {confiabilidade:.2f} → "
                           f"Brain: {recommendation['action']} ({recommendation['confidence']:.2f})")
             
+            if self.brain_initialized:
+                stats = self.brain.inference.latency_stats()
+                logger.info(f"⏱️ Brain: {stats['count']} decisões | p50: {stats['p50_us']}µs | p99: {stats['p99_us']}µs")
+            
             # Salvar decisões do brain
             self.save_brain_decisions(brain_decisions)
             
@@ -393,7 +401,7 @@ class MonitorWithBrain:
     def get_watchlist_stats(self):
         """Obter estatísticas da watchlist"""
         try:
-            watchlist = self.watchlist_mgr.load()
+            watchlist = self.watchlist_mgr.read()
             if not watchlist or 'pares' not in watchlist:
                 return {'count': 0, 'patterns': {}}
             
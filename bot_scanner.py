@@ -6,8 +6,16 @@ import logging
 import ccxt
 from datetime import datetime
 from lib_padroes import AnalistaTecnico
-from lib_utils import JsonManager, check_btc_trend, get_market_analysis, should_trade_in_scenario
+from lib_utils import JsonManager, check_btc_trend, should_trade_in_scenario
+from market_context_service import get_market_context
+from lib_indicadores import SMA, get_series
+from lib_resample import MultiTimeframeFeed
+from scan_scheduler import ScanScheduler
+from scan_pipeline import ScanPipeline
+from universe_manager import UniverseManager
+from candle_scheduler import timeframe_seconds
 from brain_collector import collector # SEVERINO: Brain Connection
+from health_status import HealthReporter
 
 # Configuração de Logs
 logging.basicConfig(
@@ -31,6 +39,17 @@ class ScannerBybit:
             'enableRateLimit': True,
             'options': {'defaultType': 'linear'} # Futures Linear
         })
+        # Só o menor timeframe é baixado; os demais são agregados localmente
+        self.feed = MultiTimeframeFeed(self.exchange, self.config.get('timeframes', ['30m']), history=200)
+        # Universo: top N perpétuos USDT por turnover (ou "pairs" do config)
+        self.universe = UniverseManager(self.exchange, self.config)
+        # Prioridade por (par, tf): fechamento, volatilidade, volume e blacklist
+        self.scheduler = ScanScheduler(self.config.get('pairs', []), self.config.get('timeframes', ['30m']), self.exchange)
+        universe_cfg = self.config.get('universe', {})
+        self.pipeline = ScanPipeline(self.feed, fetch_workers=universe_cfg.get('fetch_workers', 8),
+                                     cpu_workers=universe_cfg.get('cpu_workers'))
+        # Saúde: heartbeat + duração do ciclo + filas (lida pelo /status)
+        self.health = HealthReporter('scanner', interval=120)
         self.running = True
 
     def carregar_json(self, arquivo):
@@ -54,17 +73,25 @@ class ScannerBybit:
         livres = wl['max_slots'] - wl['slots_ocupados']
         return livres, wl
 
-    def validar_volume(self, candles):
+    def validar_volume(self, candles, symbol=None, timeframe=None):
         """Phase 2: Filtro de Volume"""
         try:
-            volumes = [c[5] for c in candles]
-            if len(volumes) < 21: return False
+            if len(candles) < 21: return False
             
-            vol_atual = volumes[-1]
-            media_vol = sum(volumes[-21:-1]) / 20
+            vol_atual = candles[-1][5]
+            if symbol and timeframe:
+                # Média de volume em streaming (estado por par/timeframe em lib_indicadores)
+                serie = get_series(symbol, timeframe)
+                with serie.lock:
+                    media = serie.get('vol_sma20', lambda: SMA(20, 'volume'))
+                    serie.sync(candles)
+                    media_vol = media.value
+            else:
+                media_vol = SMA.from_array([c[5] for c in candles[-21:-1]], 20).value
             
             # Volume atual deve ser pelo menos 1.2x a media para confirmar interesse
-            return vol_atual > (media_vol * 1.2)
+            # (configurável via "volume_multiplier" - avaliar mudanças no backtester.py)
+            return vol_atual > (media_vol * self.config.get('volume_multiplier', 1.2))
         except:
             return False
 
@@ -84,95 +111,112 @@ class ScannerBybit:
             return False
         except: return False
 
+    def _prefiltrar(self, par, tf, candles):
+        """Pré-filtro do pipeline (thread principal): volume + registro no scheduler"""
+        volume_ok = self.validar_volume(candles, par, tf)
+        self.scheduler.mark_analyzed(par, tf, candles, volume_ok)
+        # Phase 2: Filtro de Volume - se não tem volume, nem perde tempo processando padrão
+        return volume_ok
+
     def scan(self):
-        logger.info(">>> Iniciando Ciclo de Scan (30 Pares x Multi-TF) <<<")
+        inicio = time.perf_counter()
+        tfs = self.config.get('timeframes', ['30m'])
+        pares = self.universe.pairs()
+        self.scheduler.set_universe(pares, tfs)
+        self.feed.retain(pares)
+        logger.info(f">>> Iniciando Ciclo de Scan ({len(pares)} Pares x Multi-TF) <<<")
         
         # SEVERINO: Análise Completa de Mercado (BTC + BTC.D + Cenário)
-        market = get_market_analysis(self.exchange, timeframe='4h')
+        # Snapshot do market_context_service (calcula localmente se o serviço estiver parado)
+        market = get_market_context(self.exchange, timeframe='4h')
         logger.info(f"📊 Mercado: BTC={market['btc_trend']} | BTC.D={market['btcd_trend']} | Cenário #{market['scenario_number']}: {market['scenario_name']}")
         logger.info(f"   {market['scenario_description']}")
 
         livres, watchlist_data = self.verificar_slots_livres()
         if livres <= 0:
             logger.info("Watchlist cheia (5/5). Scanner em modo de espera.")
+            self.health.beat((time.perf_counter() - inicio) * 1000, itens=0, watchlist=len(watchlist_data['pares']))
             time.sleep(60)
             return
 
         pares_ignorados = [item['symbol'] for item in watchlist_data['pares']]
-        tfs = self.config.get('timeframes', ['30m'])
 
-        for par in self.config['pairs']:
+        # Só (par, tf) com barra fechada desde a última análise, por prioridade.
+        # Download em threads, detecção em processos; aqui chegam só os padrões.
+        itens = self.scheduler.due(skip=pares_ignorados)
+        resultados = self.pipeline.run(itens, self._prefiltrar)
+        for par, tf, candles, padrao in resultados:
             if not self.running: break
             if par in pares_ignorados: continue
 
-            for tf in tfs:
-                # Re-verifica slots a cada iteração para evitar Race Condition lógica
-                livres, wl_now = self.verificar_slots_livres()
-                if livres <= 0: break
-
-                try:
-                    # Baixar Candles
-                    candles = self.exchange.fetch_ohlcv(par, timeframe=tf, limit=200)
-                    
-                    # Phase 2: Filtro de Volume (Pré-análise)
-                    if not self.validar_volume(candles):
-                        # Se não tem volume, nem perde tempo processando padrão
-                        continue
-
-                    padrao = self.analista.analisar_par(par, candles)
-                    
-                    if padrao:
-                        # CHECK BLACKLIST
-                        if self.is_blacklisted(par, padrao.nome, tf):
-                            continue
-
-                        # SEVERINO: Filtro de Correlação BTC/BTC.D/Cenário
-                        should_trade, reason = should_trade_in_scenario(
-                            market['scenario_number'], 
-                            padrao.direcao
-                        )
-                        
-                        if not should_trade:
-                            logger.info(f"❌ Ignorando {padrao.nome} {padrao.direcao} em {par}: {reason}")
-                            continue
-
-                        logger.info(f"🚨 PADRAO CONFIRMADO EM {par} [{tf}]: {padrao.nome} ({padrao.direcao})")
-                        
-                        # SEVERINO: Coleta de Inteligência para Vision AI
-                        collector.collect(par, tf, padrao.nome, padrao.direcao, candles)
-                        
-                        novo_item = {
-                            "symbol": par,
-                            "timeframe": tf,
-                            "padrao": padrao.nome,
-                            "direcao": padrao.direcao,
-                            "status": "EM_FORMACAO",
-                            "confiabilidade": padrao.confiabilidade,
-                            "neckline": padrao.neckline_price,
-                            "target": padrao.target_price,
-                            "stop_loss": padrao.stop_loss_price,
-                            "timestamp_descoberta": int(time.time())
-                        }
-                        
-                        # Adiciona com Lock Seguro (Phase 1)
-                        livres_final, wl_final = self.verificar_slots_livres()
-                        if livres_final > 0:
-                            wl_final['pares'].append(novo_item)
-                            wl_final['slots_ocupados'] = len(wl_final['pares'])
-                            wl_final['updated_at'] = str(datetime.now())
-                            self.watchlist_mgr.write(wl_final)
-                            logger.info(f"Adicionado {par} a Watchlist.")
-                            pares_ignorados.append(par)
-                            break
-                        
-                    time.sleep(0.5) # Rate limit
-
-                except Exception as e:
-                    logger.error(f"Erro ao processar {par} {tf}: {e}")
-                    time.sleep(2)
-
-        logger.info("Ciclo de scan finalizado. Aguardando proximo.")
-        time.sleep(30)
+            # Re-verifica slots a cada iteração para evitar Race Condition lógica
+            livres, wl_now = self.verificar_slots_livres()
+            if livres <= 0: break
+
+            try:
+                # CHECK BLACKLIST
+                if self.is_blacklisted(par, padrao.nome, tf):
+                    continue
+
+                # SEVERINO: Filtro de Correlação BTC/BTC.D/Cenário
+                should_trade, reason = should_trade_in_scenario(
+                    market['scenario_number'], 
+                    padrao.direcao
+                )
+                
+                if not should_trade:
+                    logger.info(f"❌ Ignorando {padrao.nome} {padrao.direcao} em {par}: {reason}")
+                    continue
+
+                logger.info(f"🚨 PADRAO CONFIRMADO EM {par} [{tf}]: {padrao.nome} ({padrao.direcao})")
+                
+                # SEVERINO: Coleta de Inteligência para Vision AI
+                collector.collect(par, tf, padrao.nome, padrao.direcao, candles)
+                
+                novo_item = {
+                    "symbol": par,
+                    "timeframe": tf,
+                    "padrao": padrao.nome,
+                    "direcao": padrao.direcao,
+                    "status": "EM_FORMACAO",
+                    "confiabilidade": padrao.confiabilidade,
+                    "neckline": padrao.neckline_price,
+                    "target": padrao.target_price,
+                    "stop_loss": padrao.stop_loss_price,
+                    "timestamp_descoberta": int(time.time())
+                }
+                
+                # Adiciona com Lock Seguro (Phase 1)
+                livres_final, wl_final = self.verificar_slots_livres()
+                if livres_final > 0:
+                    wl_final['pares'].append(novo_item)
+                    wl_final['slots_ocupados'] = len(wl_final['pares'])
+                    wl_final['updated_at'] = str(datetime.now())
+                    self.watchlist_mgr.write(wl_final)
+                    logger.info(f"Adicionado {par} a Watchlist.")
+                    pares_ignorados.append(par)
+
+            except Exception as e:
+                logger.error(f"Erro ao processar {par} {tf}: {e}")
+                time.sleep(2)
+
+        # Parada antecipada (watchlist cheia): o que foi marcado no pré-filtro e não
+        # chegou a ser processado volta para a fila em vez de esperar o próximo fechamento
+        resultados.close()
+        for par, tf in self.pipeline.unfinished:
+            self.scheduler.mark_due(par, tf)
+
+        stats = self.pipeline.last_cycle
+        if stats.get('items'):
+            logger.info(f"⚙️ Pipeline: {stats['items']} itens / {stats['pairs']} pares em {stats['seconds']}s "
+                        f"({stats['analyzed']} analisados, {stats['found']} padrões)")
+            self.pipeline.check_target(min(timeframe_seconds(tf) for tf in tfs))
+
+        # Dorme até o próximo fechamento de barra entre os timeframes escaneados
+        espera = self.scheduler.seconds_until_next_close(max_wait=60)
+        logger.info(f"Ciclo de scan finalizado. Próximo em {espera:.0f}s.")
+        self.health.beat((time.perf_counter() - inicio) * 1000, itens=len(itens), watchlist=len(pares_ignorados))
+        time.sleep(espera)
 
     def start(self):
         logger.info("Scanner Bybit Iniciado (v2.0 - Secure & Smart).")
@@ -184,6 +228,7 @@ class ScannerBybit:
                 self.running = False
             except Exception as e:
                 logger.error(f"Erro fatal no loop: {e}")
+                self.health.error(e)
                 time.sleep(10)
 
 def start_scanner():
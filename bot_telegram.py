@@ -1,12 +1,9 @@
-import telebot
-from telebot import types
 import json
-import time
 import os
 import sys
-import threading
 import ccxt
 from datetime import datetime
+from telegram_service import TelegramService, enqueue_message, inline_keyboard
 
 # --- CONFIGURAÇÃO ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -40,8 +37,6 @@ except Exception as e:
     print(f"Erro critico na configuracao: {e}")
     sys.exit(1)
 
-bot = telebot.TeleBot(TOKEN)
-
 # --- FUNÇÕES DE MODO ---
 def get_mode():
     try:
@@ -82,80 +77,67 @@ def lancar_executor(symbol):
     print(f"Executor lançado para {symbol}")
 
 # --- MONITOR DE SINAIS ---
-def monitor_watchlist():
-    last_processed = set()
-    print(">>> Monitor de Sinais Iniciado <<<")
-    
-    while True:
-        try:
-            if os.path.exists(WATCHLIST_FILE):
-                dados = carregar_json(WATCHLIST_FILE)
-                current_mode = get_mode()
-                
-                for par in dados.get('pares', []):
-                    key = f"{par['symbol']}_{par['timestamp_descoberta']}"
-                    
-                    if key not in last_processed and par['status'] == 'EM_FORMACAO':
-                        direcao_emoji = "🔻 SHORT" if par['direcao'] == 'SHORT' else "🔼 LONG"
-                        
-                        if current_mode == 'AUTO':
-                            # MODO AUTOMÁTICO: Executa direto!
-                            msg = (
-                                f"🤖 *AUTO MODE - EXECUTANDO*\n"
-                                f"━━━━━━━━━━━━━━━━━━\n"
-                                f"🎯 *{par['symbol']}* {direcao_emoji}\n"
-                                f"📊 Padrão: {par['padrao']}\n"
-                                f"⚡ Confiança: {par['confiabilidade']*100:.0f}%\n\n"
-                                f"💵 Gatilho: `${par['neckline']}`\n"
-                                f"🎯 Alvo: `${par['target']}`\n"
-                                f"🛑 Stop: `${par['stop_loss']}`\n\n"
-                                f"_Executor despachado automaticamente!_"
-                            )
-                            try:
-                                bot.send_message(CHAT_ID, msg, parse_mode='Markdown')
-                            except: pass
-                            
-                            # Lança executor imediatamente
-                            lancar_executor(par['symbol'])
-                            last_processed.add(key)
-                            
-                        else:
-                            # MODO MANUAL: Pede aprovação
-                            msg = (
-                                f"🎯 *SNIPER ALERT: {par['symbol']}*\n"
-                                f"━━━━━━━━━━━━━━━━━━\n"
-                                f"📊 *Padrão:* {par['padrao']}\n"
-                                f"🧭 *Direção:* {direcao_emoji}\n"
-                                f"⚡ *Confiança:* {par['confiabilidade']*100:.0f}%\n\n"
-                                f"💵 *Gatilho:* `${par['neckline']}`\n"
-                                f"🎯 *Alvo:* `${par['target']}`\n"
-                                f"🛑 *Stop:* `${par['stop_loss']}`\n\n"
-                                f"_Aguardando autorização..._"
-                            )
-                            
-                            markup = types.InlineKeyboardMarkup()
-                            btn_approve = types.InlineKeyboardButton(f"✅ APROVAR", callback_data=f"aprov_{par['symbol']}")
-                            btn_ignore = types.InlineKeyboardButton("❌ IGNORAR", callback_data=f"ignora_{par['symbol']}")
-                            markup.row(btn_approve, btn_ignore)
-                            
-                            try:
-                                bot.send_message(CHAT_ID, msg, parse_mode='Markdown', reply_markup=markup)
-                                last_processed.add(key)
-                            except Exception as e:
-                                print(f"Erro ao enviar msg: {e}")
+_processados = set()
 
-        except Exception as e:
-            print(f"Erro no monitor: {e}")
+def verificar_watchlist():
+    """Uma passada na watchlist (tarefa periódica do TelegramService): só enfileira, não espera o Telegram"""
+    if not os.path.exists(WATCHLIST_FILE):
+        return
+    dados = carregar_json(WATCHLIST_FILE)
+    current_mode = get_mode()
+    
+    for par in dados.get('pares', []):
+        key = f"{par['symbol']}_{par['timestamp_descoberta']}"
         
-        time.sleep(10)
+        if key not in _processados and par['status'] == 'EM_FORMACAO':
+            direcao_emoji = "🔻 SHORT" if par['direcao'] == 'SHORT' else "🔼 LONG"
+            
+            if current_mode == 'AUTO':
+                # MODO AUTOMÁTICO: Executa direto!
+                msg = (
+                    f"🤖 *AUTO MODE - EXECUTANDO*\n"
+                    f"━━━━━━━━━━━━━━━━━━\n"
+                    f"🎯 *{par['symbol']}* {direcao_emoji}\n"
+                    f"📊 Padrão: {par['padrao']}\n"
+                    f"⚡ Confiança: {par['confiabilidade']*100:.0f}%\n\n"
+                    f"💵 Gatilho: `${par['neckline']}`\n"
+                    f"🎯 Alvo: `${par['target']}`\n"
+                    f"🛑 Stop: `${par['stop_loss']}`\n\n"
+                    f"_Executor despachado automaticamente!_"
+                )
+                enqueue_message(msg, CHAT_ID)
+                
+                # Lança executor imediatamente
+                lancar_executor(par['symbol'])
+                _processados.add(key)
+                
+            else:
+                # MODO MANUAL: Pede aprovação
+                msg = (
+                    f"🎯 *SNIPER ALERT: {par['symbol']}*\n"
+                    f"━━━━━━━━━━━━━━━━━━\n"
+                    f"📊 *Padrão:* {par['padrao']}\n"
+                    f"🧭 *Direção:* {direcao_emoji}\n"
+                    f"⚡ *Confiança:* {par['confiabilidade']*100:.0f}%\n\n"
+                    f"💵 *Gatilho:* `${par['neckline']}`\n"
+                    f"🎯 *Alvo:* `${par['target']}`\n"
+                    f"🛑 *Stop:* `${par['stop_loss']}`\n\n"
+                    f"_Aguardando autorização..._"
+                )
+                markup = inline_keyboard([
+                    ("✅ APROVAR", f"aprov_{par['symbol']}"),
+                    ("❌ IGNORAR", f"ignora_{par['symbol']}"),
+                ])
+                if enqueue_message(msg, CHAT_ID, reply_markup=markup):
+                    _processados.add(key)
 
 # --- HANDLERS TELEGRAM ---
+# Assinatura do TelegramService: handler(service, message, args) -> resposta
+# (o serviço já descarta mensagens de outros chats)
 
-@bot.message_handler(commands=['start', 'help'])
-def send_welcome(message):
-    if str(message.chat.id) != str(CHAT_ID): return
+def send_welcome(service, message, args):
     mode = get_mode()
-    msg = (
+    return (
         f"🤖 *BYBIT SNIPER COMMANDER*\n\n"
         f"Modo atual: *{mode}*\n\n"
         f"Comandos:\n"
@@ -165,14 +147,8 @@ def send_welcome(message):
         f"/manual - Ativar modo manual\n"
         f"/limpar - Limpar watchlist\n"
     )
-    bot.reply_to(message, msg, parse_mode='Markdown')
 
-@bot.message_handler(commands=['status'])
-def send_status(message):
-    if str(message.chat.id) != str(CHAT_ID): return
-    
-    bot.send_chat_action(message.chat.id, 'typing')
-    
+def send_status(service, message, args):
     scanner_on = os.system("pgrep -f bot_scanner.py > /dev/null 2>&1") == 0
     executor_on = os.system("pgrep -f bot_executor.py > /dev/null 2>&1") == 0
     mode = get_mode()
@@ -195,25 +171,15 @@ def send_status(message):
     slots = wl.get('slots_ocupados', 0)
     max_slots = wl.get('max_slots', 5)
     status_msg += f"\n📋 *Watchlist:* {slots}/{max_slots} slots"
-        
-    bot.reply_to(message, status_msg, parse_mode='Markdown')
+    return status_msg
 
-@bot.message_handler(commands=['modo'])
-def toggle_mode(message):
-    if str(message.chat.id) != str(CHAT_ID): return
-    
+def toggle_mode(service, message, args):
     current = get_mode()
     
-    markup = types.InlineKeyboardMarkup()
-    btn_auto = types.InlineKeyboardButton(
-        f"{'✅' if current == 'AUTO' else '⚪'} AUTOMÁTICO", 
-        callback_data="setmode_AUTO"
-    )
-    btn_manual = types.InlineKeyboardButton(
-        f"{'✅' if current == 'MANUAL' else '⚪'} MANUAL", 
-        callback_data="setmode_MANUAL"
-    )
-    markup.row(btn_auto, btn_manual)
+    markup = inline_keyboard([
+        (f"{'✅' if current == 'AUTO' else '⚪'} AUTOMÁTICO", "setmode_AUTO"),
+        (f"{'✅' if current == 'MANUAL' else '⚪'} MANUAL", "setmode_MANUAL"),
+    ])
     
     msg = (
         f"🎛️ *MODO DE OPERAÇÃO*\n\n"
@@ -221,36 +187,26 @@ def toggle_mode(message):
         f"🤖 *AUTO* - Executa trades automaticamente\n"
         f"👤 *MANUAL* - Pede aprovação no Telegram"
     )
-    bot.reply_to(message, msg, parse_mode='Markdown', reply_markup=markup)
+    return {'text': msg, 'reply_markup': markup}
 
-@bot.message_handler(commands=['auto'])
-def set_auto(message):
-    if str(message.chat.id) != str(CHAT_ID): return
+def set_auto(service, message, args):
     set_mode('AUTO')
-    bot.reply_to(message, "🤖 *Modo AUTOMÁTICO ativado!*\n\nTrades serão executados automaticamente.", parse_mode='Markdown')
+    return "🤖 *Modo AUTOMÁTICO ativado!*\n\nTrades serão executados automaticamente."
 
-@bot.message_handler(commands=['manual'])
-def set_manual(message):
-    if str(message.chat.id) != str(CHAT_ID): return
+def set_manual(service, message, args):
     set_mode('MANUAL')
-    bot.reply_to(message, "👤 *Modo MANUAL ativado!*\n\nVocê precisará aprovar cada trade.", parse_mode='Markdown')
+    return "👤 *Modo MANUAL ativado!*\n\nVocê precisará aprovar cada trade."
 
-@bot.message_handler(commands=['limpar'])
-def limpar_watchlist(message):
-    if str(message.chat.id) != str(CHAT_ID): return
+def limpar_watchlist(service, message, args):
     try:
         with open(WATCHLIST_FILE, 'w') as f:
             json.dump({"slots_ocupados": 0, "max_slots": 10, "pares": []}, f)
-        bot.reply_to(message, "🗑️ Watchlist limpa!", parse_mode='Markdown')
+        return "🗑️ Watchlist limpa!"
     except Exception as e:
-        bot.reply_to(message, f"Erro: {e}")
+        return {'text': f"Erro: {e}", 'parse_mode': None}
 
 # --- MONITOR ---
-import threading
-import subprocess
-
 monitor_process = None
-monitor_thread = None
 
 def start_monitor():
     global monitor_process
@@ -269,61 +225,42 @@ def stop_monitor():
     monitor_process = None
     return True
 
-@bot.message_handler(commands=['monitor'])
-def monitor_cmd(message):
-    if str(message.chat.id) != str(CHAT_ID): return
-    args = message.text.split()
-    if len(args) < 2:
-        bot.reply_to(message, "Uso: /monitor <start|stop>", parse_mode='Markdown')
-        return
-    cmd = args[1].lower()
+def monitor_cmd(service, message, args):
+    if not args:
+        return "Uso: /monitor <start|stop>"
+    cmd = args[0].lower()
     if cmd == 'start':
-        if start_monitor():
-            bot.reply_to(message, "✅ Monitor iniciado.", parse_mode='Markdown')
-        else:
-            bot.reply_to(message, "⚠️ Monitor já está rodando.", parse_mode='Markdown')
+        return "✅ Monitor iniciado." if start_monitor() else "⚠️ Monitor já está rodando."
     elif cmd == 'stop':
-        if stop_monitor():
-            bot.reply_to(message, "🛑 Monitor parado.", parse_mode='Markdown')
-        else:
-            bot.reply_to(message, "⚠️ Monitor não estava rodando.", parse_mode='Markdown')
-    else:
-        bot.reply_to(message, "Uso: /monitor <start|stop>", parse_mode='Markdown')
+        return "🛑 Monitor parado." if stop_monitor() else "⚠️ Monitor não estava rodando."
+    return "Uso: /monitor <start|stop>"
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('setmode_'))
-def callback_setmode(call):
-    mode = call.data.split('_')[1]
+# Callbacks: handler(service, query, data) -> (resposta curta, novo texto da mensagem)
+def callback_setmode(service, query, data):
+    mode = data.split('_')[1]
     set_mode(mode)
-    bot.answer_callback_query(call.id, f"Modo {mode} ativado!")
-    bot.edit_message_text(
-        f"✅ *Modo alterado para {mode}*",
-        call.message.chat.id,
-        call.message.message_id,
-        parse_mode='Markdown'
-    )
+    return f"Modo {mode} ativado!", f"✅ *Modo alterado para {mode}*"
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('aprov_'))
-def callback_aprovar(call):
-    symbol = call.data.split('_')[1]
-    bot.answer_callback_query(call.id, f"Iniciando {symbol}...")
-    bot.edit_message_text(
-        f"✅ *APROVADO: {symbol}*\nExecutor despachado!",
-        call.message.chat.id,
-        call.message.message_id,
-        parse_mode='Markdown'
-    )
+def callback_aprovar(service, query, data):
+    symbol = data.split('_')[1]
     lancar_executor(symbol)
+    return f"Iniciando {symbol}...", f"✅ *APROVADO: {symbol}*\nExecutor despachado!"
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('ignora_'))
-def callback_ignorar(call):
-    symbol = call.data.split('_')[1]
-    bot.answer_callback_query(call.id, "Descartado.")
-    bot.edit_message_text(
-        f"❌ *IGNORADO: {symbol}*",
-        call.message.chat.id,
-        call.message.message_id,
-        parse_mode='Markdown'
-    )
+def callback_ignorar(service, query, data):
+    symbol = data.split('_')[1]
+    return "Descartado.", f"❌ *IGNORADO: {symbol}*"
+
+def register(service, monitor=True):
+    """Registra comandos/callbacks no TelegramService (monitor=True inclui o aviso de sinais da watchlist)"""
+    for name, handler in (('/start', send_welcome), ('/help', send_welcome), ('/status', send_status),
+                          ('/modo', toggle_mode), ('/auto', set_auto), ('/manual', set_manual),
+                          ('/limpar', limpar_watchlist), ('/monitor', monitor_cmd)):
+        service.add_command(name, handler)
+    service.add_callback('setmode_', callback_setmode)
+    service.add_callback('aprov_', callback_aprovar)
+    service.add_callback('ignora_', callback_ignorar)
+    if monitor:
+        service.add_task(verificar_watchlist, interval=10)
 
 # --- INICIALIZAÇÃO ---
 if __name__ == "__main__":
@@ -331,13 +268,9 @@ if __name__ == "__main__":
     if not os.path.exists(MODE_FILE):
         set_mode('AUTO')
     
-    t = threading.Thread(target=monitor_watchlist)
-    t.daemon = True
-    t.start()
+    service = TelegramService(TOKEN, CHAT_ID)
+    register(service)
     
     print(f"🤖 Bot Telegram Iniciado (Modo: {get_mode()})")
-    try:
-        bot.polling(none_stop=True)
-    except Exception as e:
-        print(f"Erro fatal: {e}")
-        time.sleep(10)
+    print(">>> Monitor de Sinais Iniciado <<<")
+    service.run_forever()
@@ -1,13 +1,13 @@
-import time
 import json
 import os
 import sys
 import logging
-import requests
 import subprocess
 import ccxt
 from datetime import datetime
 from lib_utils import JsonManager
+from telegram_service import TelegramService, enqueue_message
+from health_status import HealthCollector, HealthReporter, format_status
 
 # --- CONFIGURAÇÃO ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,14 +18,15 @@ WATCHLIST_FILE = os.path.join(BASE_DIR, 'watchlist.json')
 sys.path.insert(0, BASE_DIR)
 TOKEN = None
 CHAT_ID = None
+bot_telegram = None
 
 try:
-    from bot_telegram import TOKEN as T, CHAT_ID as C
-    TOKEN = T
-    CHAT_ID = str(C)
+    import bot_telegram
+    TOKEN = bot_telegram.TOKEN
+    CHAT_ID = str(bot_telegram.CHAT_ID)
 except:
     # Fallback para .env
-    pass
+    bot_telegram = None
 
 if not TOKEN or not CHAT_ID:
     # Tenta ler do .env manual
@@ -56,9 +57,10 @@ class TelegramBot:
     def __init__(self, token, admin_id):
         self.token = token
         self.admin_id = str(admin_id)
-        self.base_url = f"https://api.telegram.org/bot{token}/"
-        self.offset = 0
         self.config = self.carregar_json('config_futures.json')
+        self.health_collector = HealthCollector()
+        self.service = TelegramService(token, self.admin_id, health=HealthReporter('telegram', interval=5))
+        self.register()
         
     def carregar_json(self, arquivo):
         try:
@@ -66,39 +68,13 @@ class TelegramBot:
         except: return {}
 
     def send_message(self, text):
-        try:
-            url = self.base_url + "sendMessage"
-            data = {"chat_id": self.admin_id, "text": text, "parse_mode": "Markdown"}
-            requests.post(url, data=data, timeout=10)
-        except Exception as e:
-            logger.error(f"Erro ao enviar msg: {e}")
-
-    def get_updates(self):
-        try:
-            url = self.base_url + "getUpdates"
-            params = {"offset": self.offset, "timeout": 30}
-            resp = requests.get(url, params=params, timeout=40)
-            if resp.status_code == 200:
-                result = resp.json().get("result", [])
-                if result:
-                    self.offset = result[-1]["update_id"] + 1
-                    return result
-            return []
-        except Exception as e:
-            logger.error(f"Erro no polling: {e}")
-            time.sleep(5)
-            return []
+        # Só enfileira: o envio (sessão HTTP, limites) fica com o TelegramService
+        enqueue_message(text, self.admin_id)
 
     def cmd_status(self):
         try:
-            # Roda o comando status do manager e captura output
-            result = subprocess.run(
-                [sys.executable, os.path.join(BASE_DIR, "bot_manager.py"), "status"],
-                capture_output=True, text=True
-            )
-            # Limpa e formata
-            output = result.stdout.replace("==================================================", "")
-            output = output.strip()
+            # Snapshot publicado pelos próprios componentes (sem subprocesso)
+            output = format_status(self.health_collector.snapshot())
             return f"📊 *STATUS DO SISTEMA*\n```\n{output}\n```"
         except Exception as e:
             return f"Erro ao obter status: {e}"
@@ -164,48 +140,37 @@ class TelegramBot:
         subprocess.Popen([sys.executable, os.path.join(BASE_DIR, "bot_manager.py"), "restart"])
         return "Comando de restart enviado."
 
-    def process_command(self, cmd):
-        cmd = cmd.lower().strip()
-        logger.info(f"Comando recebido: {cmd}")
-        
-        if cmd == "/start" or cmd == "/help":
-            msg = "🦅 *COMANDOS SEVERINO*\n\n"
-            msg += "/status - Saúde do sistema\n"
-            msg += "/wl - Ver Watchlist\n"
-            msg += "/saldo - Saldo Bybit\n"
-            msg += "/restart - Reiniciar Bot"
-            self.send_message(msg)
-            
-        elif cmd == "/status":
-            self.send_message(self.cmd_status())
-            
-        elif cmd == "/wl":
-            self.send_message(self.cmd_watchlist())
-            
-        elif cmd == "/saldo":
-            self.send_message(self.cmd_saldo())
-            
-        elif cmd == "/restart":
-            self.send_message(self.cmd_restart())
-            
-        else:
-            self.send_message("Comando desconhecido. Use /help")
+    def cmd_help(self):
+        msg = "🦅 *COMANDOS SEVERINO*\n\n"
+        msg += "/status - Saúde do sistema\n"
+        msg += "/wl - Ver Watchlist\n"
+        msg += "/saldo - Saldo Bybit\n"
+        msg += "/restart - Reiniciar Bot"
+        if bot_telegram is not None:
+            msg += "\n/modo - Alternar AUTO/MANUAL\n"
+            msg += "/limpar - Limpar watchlist\n"
+            msg += "/monitor <start|stop> - Monitor de watchlist"
+        return msg
+
+    def register(self):
+        """Um único getUpdates por token: comandos de modo/aprovação do bot_telegram entram no mesmo loop"""
+        if bot_telegram is not None:
+            bot_telegram.register(self.service, monitor=False)
+        commands = {
+            "/start": self.cmd_help,
+            "/help": self.cmd_help,
+            "/status": self.cmd_status,
+            "/wl": self.cmd_watchlist,
+            "/saldo": self.cmd_saldo,
+            "/restart": self.cmd_restart,
+        }
+        for name, func in commands.items():
+            self.service.add_command(name, lambda service, message, args, func=func: func())
 
     def run(self):
         logger.info("Telegram Control Iniciado")
         self.send_message("🦅 *SEVERINO ONLINE*\nCentro de Comando Ativo.\nDigite /help para opções.")
-        
-        while True:
-            updates = self.get_updates()
-            for update in updates:
-                if "message" in update:
-                    msg = update["message"]
-                    # Segurança: Só responde ao Admin ID configurado
-                    if str(msg.get("chat", {}).get("id")) == self.admin_id:
-                        text = msg.get("text", "")
-                        if text.startswith("/"):
-                            self.process_command(text)
-            time.sleep(1)
+        self.service.run_forever()
 
 if __name__ == "__main__":
     bot = TelegramBot(TOKEN, CHAT_ID)
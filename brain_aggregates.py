@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+📐 BRAIN AGGREGATES - Estatísticas de performance mantidas incrementalmente
+
+Antes, cada consumidor reagregava trade_performance/raw_samples com seu
+próprio GROUP BY (_update_pattern_metrics a cada trade, _collect_performance_data,
+get_performance_summary, auto_optimizer). Agora o escritor do feedback
+(BrainPerformanceTracker / RealtimeFeedbackCollector) atualiza, na mesma
+transação do INSERT, uma linha por dimensão:
+
+    (scope, dimension, key) -> n, wins, losses, Σpnl, Σpnl², Σreward, Σreward²,
+                               Σscore, Σduração, Σconfiança, últimos N trades,
+                               XᵀX / Xᵀy (regressão do modelo de confiança)
+
+- dimension: all | pattern | symbol | timeframe | hour (bucket de 1h, p/ janelas)
+- scope: 'feedback' (trade_performance); outros escopos são livres
+- Leitura O(1) por chave; janelas de N horas somam no máximo N buckets
+- O RealtimeFeedbackCollector relê as últimas 24h a cada ciclo: claim_new(scope='realtime')
+  deixa passar só os trades com trade_id ainda não visto (tabela aggregate_seen,
+  PK (scope, trade_id)) antes do INSERT em raw_samples
+- prune_aggregates(): buckets 'hour' e ids vistos somem junto com a retenção
+  do DataCompactor
+"""
+
+import json
+import time
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("BrainAggregates")
+
+DB_PATH = 'sniper_brain.db'
+WINDOW_SIZE = 50          # Últimos N trades por chave
+ALL_WINDOW_SIZE = 500     # Janela maior para a chave global (drawdown)
+DIMENSIONS = ('all', 'pattern', 'symbol', 'timeframe', 'hour')
+N_FEATURES = 4            # ai_conf, tech_conf, min(24, duração), bias
+
+
+def hour_key(ts: int) -> str:
+    return str(int(ts) // 3600 * 3600)
+
+
+def trade_keys(trade: dict) -> List[tuple]:
+    keys = [('all', '*')]
+    for dim in ('pattern', 'symbol', 'timeframe'):
+        if trade.get(dim):
+            keys.append((dim, str(trade[dim])))
+    if trade.get('ts'):
+        keys.append(('hour', hour_key(trade['ts'])))
+    return keys
+
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS performance_aggregates (
+            scope TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            n INTEGER DEFAULT 0,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            sum_pnl REAL DEFAULT 0,
+            sumsq_pnl REAL DEFAULT 0,
+            sum_reward REAL DEFAULT 0,
+            sumsq_reward REAL DEFAULT 0,
+            sum_score REAL DEFAULT 0,
+            sum_duration REAL DEFAULT 0,
+            sum_conf REAL DEFAULT 0,
+            n_conf INTEGER DEFAULT 0,
+            xtx_json TEXT,
+            xty_json TEXT,
+            window_json TEXT,
+            updated_at INTEGER,
+            PRIMARY KEY (scope, dimension, key)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS aggregate_seen (
+            scope TEXT NOT NULL,
+            trade_id TEXT NOT NULL,
+            ts INTEGER,
+            PRIMARY KEY (scope, trade_id)
+        )
+    ''')
+
+
+def prune_aggregates(conn, before_ts: int) -> int:
+    """Apaga buckets 'hour' e ids vistos anteriores a before_ts (mesma retenção do DataCompactor)"""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    deleted = 0
+    if 'performance_aggregates' in tables:
+        deleted += conn.execute(
+            "DELETE FROM performance_aggregates WHERE dimension = 'hour' AND CAST(key AS INTEGER) < ?",
+            (int(hour_key(before_ts)),)
+        ).rowcount
+    if 'aggregate_seen' in tables:
+        deleted += conn.execute('DELETE FROM aggregate_seen WHERE ts < ?', (int(before_ts),)).rowcount
+    return deleted
+
+
+def _row_to_stats(row: sqlite3.Row) -> dict:
+    n = row['n'] or 0
+    mean_pnl = row['sum_pnl'] / n if n else 0.0
+    mean_reward = row['sum_reward'] / n if n else 0.0
+    window = json.loads(row['window_json'] or '[]')
+    recent_pnl = [w[1] for w in window]
+    return {
+        'n': n,
+        'wins': row['wins'],
+        'losses': row['losses'],
+        'win_rate': row['wins'] / n if n else 0.0,
+        'total_pnl': row['sum_pnl'],
+        'avg_pnl': mean_pnl,
+        'std_pnl': float(np.sqrt(max(0.0, row['sumsq_pnl'] / n - mean_pnl ** 2))) if n else 0.0,
+        'avg_reward': mean_reward,
+        'std_reward': float(np.sqrt(max(0.0, row['sumsq_reward'] / n - mean_reward ** 2))) if n else 0.0,
+        'avg_score': row['sum_score'] / n if n else 0.0,
+        'avg_duration': row['sum_duration'] / n if n else 0.0,
+        'avg_confidence': row['sum_conf'] / row['n_conf'] if row['n_conf'] else 0.0,
+        'recent_n': len(window),
+        'recent_win_rate': sum(1 for w in window if w[2] > 0) / len(window) if window else 0.0,
+        'recent_avg_pnl': float(np.mean(recent_pnl)) if recent_pnl else 0.0,
+        'updated_at': row['updated_at'],
+    }
+
+
+class PerformanceAggregates:
+    """
+    Escrita (dentro da transação do chamador):
+        aggregates.record(cursor.connection, [trade, ...], scope='feedback')
+    trade: {pattern, symbol, timeframe, ts, pnl, result ('WIN'|'LOSS'|'BREAKEVEN'),
+            reward, score, duration, confidence, features: [ai_conf, tech_conf, duration]}
+
+    Leitura:
+        aggregates.get('pattern', 'OCO')  /  aggregates.get_all('pattern')
+        aggregates.period(hours_back=24)
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        try:
+            conn = sqlite3.connect(self.db_path)
+            init_tables(conn)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar agregados: {e}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ============================================================
+    # ESCRITA
+    # ============================================================
+    def record(self, conn, trades: Iterable[dict], scope: str = 'feedback'):
+        """Aplica os trades nos agregados (não faz commit - usa a transação do chamador)"""
+        deltas: Dict[tuple, dict] = {}
+        for t in trades:
+            pnl = float(t.get('pnl') or 0.0)
+            result = t.get('result') or ('WIN' if pnl > 0 else 'LOSS' if pnl < 0 else 'BREAKEVEN')
+            reward = float(t.get('reward') if t.get('reward') is not None else pnl)
+            conf = t.get('confidence')
+            feats = t.get('features')
+            x = np.append(np.asarray(feats, dtype=np.float64), 1.0) if feats is not None else None
+            y = float(t.get('score') or 0.0)
+            ts = int(t.get('ts') or time.time())
+            outcome = 1 if result == 'WIN' else -1 if result == 'LOSS' else 0
+
+            for key in trade_keys(dict(t, ts=ts)):
+                d = deltas.setdefault(key, {
+                    'n': 0, 'wins': 0, 'losses': 0, 'sum_pnl': 0.0, 'sumsq_pnl': 0.0,
+                    'sum_reward': 0.0, 'sumsq_reward': 0.0, 'sum_score': 0.0, 'sum_duration': 0.0,
+                    'sum_conf': 0.0, 'n_conf': 0, 'xtx': None, 'xty': None, 'window': [],
+                })
+                d['n'] += 1
+                d['wins'] += outcome > 0
+                d['losses'] += outcome < 0
+                d['sum_pnl'] += pnl
+                d['sumsq_pnl'] += pnl * pnl
+                d['sum_reward'] += reward
+                d['sumsq_reward'] += reward * reward
+                d['sum_score'] += y
+                d['sum_duration'] += float(t.get('duration') or 0.0)
+                if conf is not None and conf > 0:
+                    d['sum_conf'] += float(conf)
+                    d['n_conf'] += 1
+                if x is not None:
+                    d['xtx'] = np.outer(x, x) + (d['xtx'] if d['xtx'] is not None else 0)
+                    d['xty'] = x * y + (d['xty'] if d['xty'] is not None else 0)
+                d['window'].append([ts, round(pnl, 8), outcome, round(reward, 8)])
+
+        now = int(time.time())
+        for (dim, key), d in deltas.items():
+            row = conn.execute(
+                'SELECT xtx_json, xty_json, window_json FROM performance_aggregates '
+                'WHERE scope = ? AND dimension = ? AND key = ?', (scope, dim, key)
+            ).fetchone()
+            xtx, xty, window = d['xtx'], d['xty'], d['window']
+            if row:
+                if row[0] and xtx is not None:
+                    xtx = xtx + np.array(json.loads(row[0]))
+                    xty = xty + np.array(json.loads(row[1]))
+                elif row[0]:
+                    xtx, xty = np.array(json.loads(row[0])), np.array(json.loads(row[1]))
+                window = json.loads(row[2] or '[]') + window
+            size = ALL_WINDOW_SIZE if dim == 'all' else WINDOW_SIZE
+            window = sorted(window, key=lambda w: w[0])[-size:]
+
+            conn.execute('''
+                INSERT INTO performance_aggregates
+                (scope, dimension, key, n, wins, losses, sum_pnl, sumsq_pnl, sum_reward, sumsq_reward,
+                 sum_score, sum_duration, sum_conf, n_conf, xtx_json, xty_json, window_json, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(scope, dimension, key) DO UPDATE SET
+                    n = n + excluded.n, wins = wins + excluded.wins, losses = losses + excluded.losses,
+                    sum_pnl = sum_pnl + excluded.sum_pnl, sumsq_pnl = sumsq_pnl + excluded.sumsq_pnl,
+                    sum_reward = sum_reward + excluded.sum_reward,
+                    sumsq_reward = sumsq_reward + excluded.sumsq_reward,
+                    sum_score = sum_score + excluded.sum_score,
+                    sum_duration = sum_duration + excluded.sum_duration,
+                    sum_conf = sum_conf + excluded.sum_conf, n_conf = n_conf + excluded.n_conf,
+                    xtx_json = excluded.xtx_json, xty_json = excluded.xty_json,
+                    window_json = excluded.window_json, updated_at = excluded.updated_at
+            ''', (scope, dim, key, d['n'], d['wins'], d['losses'], d['sum_pnl'], d['sumsq_pnl'],
+                  d['sum_reward'], d['sumsq_reward'], d['sum_score'], d['sum_duration'],
+                  d['sum_conf'], d['n_conf'],
+                  json.dumps(xtx.tolist()) if xtx is not None else None,
+                  json.dumps(xty.tolist()) if xty is not None else None,
+                  json.dumps(window), now))
+
+    def claim_new(self, conn, trades: Iterable[tuple], scope: str = 'realtime') -> set:
+        """
+        trades: [(trade_id, ts)]. Retorna os trade_id ainda não registrados no escopo
+        e os marca como vistos (na transação do chamador, junto com os INSERTs).
+        """
+        new = set()
+        for trade_id, ts in trades:
+            cur = conn.execute('INSERT OR IGNORE INTO aggregate_seen (scope, trade_id, ts) VALUES (?, ?, ?)',
+                               (scope, str(trade_id), int(ts)))
+            if cur.rowcount:
+                new.add(str(trade_id))
+        return new
+
+    def rebuild_from_trade_performance(self, conn=None) -> int:
+        """Recria o escopo 'feedback' a partir de trade_performance (migração única)"""
+        own = conn is None
+        conn = conn or sqlite3.connect(self.db_path)
+        try:
+            init_tables(conn)
+            rows = conn.execute('''
+                SELECT tp.pattern_detected, tp.symbol, rs.timeframe, tp.closed_at, tp.created_at,
+                       tp.actual_pnl, tp.performance_score, tp.trade_duration_hours,
+                       tp.ai_confidence, rs.ai_confidence
+                FROM trade_performance tp
+                LEFT JOIN raw_samples rs ON tp.brain_sample_id = rs.id
+                ORDER BY tp.id
+            ''').fetchall()
+            conn.execute("DELETE FROM performance_aggregates WHERE scope = 'feedback'")
+            self.record(conn, [feedback_trade(*r) for r in rows], scope='feedback')
+            if own:
+                conn.commit()
+            logger.info(f"📐 Agregados reconstruídos a partir de {len(rows)} feedbacks")
+            return len(rows)
+        finally:
+            if own:
+                conn.close()
+
+    # ============================================================
+    # LEITURA
+    # ============================================================
+    def get(self, dimension: str, key: str = '*', scope: str = 'feedback') -> Optional[dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT * FROM performance_aggregates WHERE scope = ? AND dimension = ? AND key = ?',
+                (scope, dimension, key)
+            ).fetchone()
+            return _row_to_stats(row) if row else None
+        finally:
+            conn.close()
+
+    def get_all(self, dimension: str, scope: str = 'feedback') -> Dict[str, dict]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT * FROM performance_aggregates WHERE scope = ? AND dimension = ?', (scope, dimension)
+            ).fetchall()
+            return {r['key']: _row_to_stats(r) for r in rows}
+        finally:
+            conn.close()
+
+    def regression(self, dimension: str, key: str, scope: str = 'feedback') -> Optional[np.ndarray]:
+        """Coeficientes [ai, tech, duração, bias] por equações normais (mesmo ótimo do lstsq)"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT xtx_json, xty_json FROM performance_aggregates WHERE scope = ? AND dimension = ? AND key = ?',
+                (scope, dimension, key)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row or not row['xtx_json']:
+            return None
+        xtx, xty = np.array(json.loads(row['xtx_json'])), np.array(json.loads(row['xty_json']))
+        return np.linalg.lstsq(xtx, xty, rcond=None)[0]
+
+    def period(self, hours_back: float, scope: str = 'feedback') -> dict:
+        """Totais das últimas N horas (soma dos buckets 'hour') + drawdown da janela global"""
+        cutoff = int(time.time() - hours_back * 3600)
+        conn = self._connect()
+        try:
+            row = conn.execute('''
+                SELECT COALESCE(SUM(n), 0) AS n, COALESCE(SUM(wins), 0) AS wins,
+                       COALESCE(SUM(losses), 0) AS losses,
+                       COALESCE(SUM(sum_pnl), 0) AS sum_pnl, COALESCE(SUM(sumsq_pnl), 0) AS sumsq_pnl,
+                       COALESCE(SUM(sum_reward), 0) AS sum_reward,
+                       COALESCE(SUM(sumsq_reward), 0) AS sumsq_reward,
+                       COALESCE(SUM(sum_score), 0) AS sum_score, COALESCE(SUM(sum_duration), 0) AS sum_duration,
+                       COALESCE(SUM(sum_conf), 0) AS sum_conf, COALESCE(SUM(n_conf), 0) AS n_conf,
+                       NULL AS window_json, MAX(updated_at) AS updated_at
+                FROM performance_aggregates
+                WHERE scope = ? AND dimension = 'hour' AND key >= ?
+            ''', (scope, hour_key(cutoff))).fetchone()
+            glob = conn.execute(
+                "SELECT window_json FROM performance_aggregates WHERE scope = ? AND dimension = 'all' AND key = '*'",
+                (scope,)
+            ).fetchone()
+        finally:
+            conn.close()
+        stats = _row_to_stats(row)
+        window = [w for w in json.loads(glob['window_json'] or '[]') if w[0] >= cutoff] if glob else []
+        stats['window'] = window
+        stats['recent_n'] = len(window)
+        return stats
+
+
+def feedback_trade(pattern, symbol, timeframe, closed_at, created_at, pnl, score, duration,
+                   ai_conf, tech_conf) -> dict:
+    """Linha de trade_performance (+ raw_samples) -> trade para PerformanceAggregates.record"""
+    pnl = float(pnl or 0.0)
+    duration = float(duration or 0.0)
+    return {
+        'pattern': pattern, 'symbol': symbol, 'timeframe': timeframe,
+        'ts': int(closed_at or created_at or time.time()),
+        'pnl': pnl, 'result': 'WIN' if pnl > 0 else 'LOSS',
+        'reward': pnl, 'score': float(score or 0.0), 'duration': duration,
+        'confidence': ai_conf,
+        'features': [float(ai_conf or 0.0), float(tech_conf or 0.0), min(24.0, duration)],
+    }
+
+
+_aggregates = None
+
+
+def get_aggregates(db_path: str = DB_PATH) -> PerformanceAggregates:
+    global _aggregates
+    if _aggregates is None or _aggregates.db_path != db_path:
+        _aggregates = PerformanceAggregates(db_path)
+    return _aggregates
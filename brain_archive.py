@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+🧊 BRAIN ARCHIVE - Arquivo frio particionado por mês para sniper_brain.db
+
+Linhas expiradas de raw_samples / trade_performance saíam para tabelas de
+arquivo dentro do próprio banco (archived_samples, trade_performance_archive),
+então o arquivo quente só crescia. Agora vão para fora, em colunas comprimidas:
+
+    brain_archive/raw_samples/2026-01.0001.npz
+    brain_archive/trade_performance/2026-01.0001.npz
+    brain_archive/manifest.json      <- índice: segmentos (tabela, mês, min/max ts,
+                                        linhas, colunas) + cursor de exportação
+
+- Colunar: um array por coluna no .npz (texto = bytes UTF-8 + offsets, sem
+  pickle); np.load é preguiçoso, então ler 2 colunas não descomprime o resto
+- Exportação só lê (WAL: não bloqueia escritores) e anda por cursor de
+  timestamp; o manifest (troca atômica) é o commit - segmento órfão de uma
+  queda é sobrescrito na próxima rodada
+- Linhas só saem do banco depois de exportadas: prune() apaga abaixo do
+  cursor, em chunks curtos; DataCompactor também respeita o cursor
+- Amostras VALID são exportadas (cópia fria) mas continuam no banco quente:
+  get_training_data e os loaders do backtest só leem o raw_samples
+- Leitura: scan()/read() abrem só os segmentos do intervalo pedido
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("BrainArchive")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARCHIVE_DIR = os.path.join(BASE_DIR, 'brain_archive')
+DB_PATH = 'sniper_brain.db'
+MANIFEST = 'manifest.json'
+
+# Colunas de tempo por tabela, em ordem de preferência: a linha envelhece pela
+# primeira não nula (mesma regra do DataCompactor)
+TIME_COLUMNS = {
+    'raw_samples': ('created_at', 'timestamp_detection'),
+    'trade_performance': ('created_at',),
+}
+HOT_DAYS = {                  # Quanto fica no banco quente depois de arquivado
+    'raw_samples': 90,        # (não-VALID saem antes, pelo DataCompactor)
+    'trade_performance': 90,
+}
+KEEP_HOT = {                  # Nunca podadas do banco quente (dataset de treino)
+    'raw_samples': "ai_verdict = 'VALID'",
+}
+SEGMENT_ROWS = 5000           # Linhas por segmento/leitura
+DELETE_ROWS = 200             # Linhas por transação de prune
+PAUSE_SECONDS = 0.02
+
+
+def _month_key(ts: float) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime('%Y-%m')
+
+
+def _next_month_start(ts: float) -> int:
+    dt = datetime.fromtimestamp(int(ts), tz=timezone.utc)
+    year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def age_condition(conn, table: str, ts_col: str) -> str:
+    """`anterior IS NULL AND ...` para as colunas de tempo que vêm antes de ts_col"""
+    cols = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    previous = []
+    for col in TIME_COLUMNS.get(table, ()):
+        if col == ts_col:
+            break
+        if col in cols:
+            previous.append(f'{col} IS NULL')
+    return ' AND '.join(previous) or '1'
+
+
+def ensure_time_index(conn, table: str, ts_col: str):
+    """Índice com ts_col na frente (reaproveita um existente, ex. idx_performance_created)"""
+    for index in conn.execute(f'PRAGMA index_list({table})').fetchall():
+        info = conn.execute(f'PRAGMA index_info({index[1]})').fetchall()
+        if info and info[0][2] == ts_col:
+            return
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{ts_col} ON {table}({ts_col})')
+
+
+# ============================================================
+# CODIFICAÇÃO COLUNAR
+# ============================================================
+def _encode_column(name: str, values: list) -> Dict[str, np.ndarray]:
+    null = np.array([v is None for v in values], dtype=bool)
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, int) for v in present):
+        data = np.array([0 if v is None else v for v in values], dtype=np.int64)
+    elif all(isinstance(v, (int, float)) for v in present):
+        data = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    else:
+        encoded = [b'' if v is None else (v if isinstance(v, bytes) else str(v).encode('utf-8')) for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        return {f'{name}.bytes': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+                f'{name}.offsets': offsets, f'{name}.null': null}
+    return {name: data, f'{name}.null': null}
+
+
+def _decode_column(npz, name: str) -> np.ndarray:
+    null = npz[f'{name}.null']
+    if f'{name}.bytes' in npz.files:
+        raw, offsets = npz[f'{name}.bytes'].tobytes(), npz[f'{name}.offsets']
+        out = np.empty(len(null), dtype=object)
+        for i in range(len(null)):
+            out[i] = None if null[i] else raw[offsets[i]:offsets[i + 1]].decode('utf-8')
+        return out
+    data = npz[name]
+    if null.any():
+        data = data.astype(object)
+        data[null] = None
+    return data
+
+
+class BrainArchive:
+    """
+        archive = BrainArchive()
+        archive.run()                                        # exporta + poda o que expirou
+        df = archive.read('trade_performance', start=ts0, columns=['symbol', 'actual_pnl'])
+    """
+
+    def __init__(self, root: str = DEFAULT_ARCHIVE_DIR, db_path: str = DB_PATH):
+        self.root = root
+        self.db_path = db_path
+        self._manifest = None
+
+    # ============================================================
+    # MANIFEST
+    # ============================================================
+    @property
+    def manifest(self) -> dict:
+        if self._manifest is None:
+            path = os.path.join(self.root, MANIFEST)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = {'version': 1, 'cursors': {}, 'segments': []}
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f'.{MANIFEST}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.root, MANIFEST))
+
+    def cursor(self, table: str, ts_col: str) -> int:
+        """Tudo com ts_col abaixo disto já está no arquivo frio"""
+        return int(self.manifest['cursors'].get(f'{table}.{ts_col}', 0))
+
+    def segments(self, table: str, start: Optional[int] = None, end: Optional[int] = None) -> List[dict]:
+        """Segmentos da tabela que cruzam [start, end)"""
+        return [s for s in self.manifest['segments']
+                if s['table'] == table
+                and (start is None or s['max_ts'] >= start)
+                and (end is None or s['min_ts'] < end)]
+
+    # ============================================================
+    # EXPORTAÇÃO
+    # ============================================================
+    def _write_segment(self, table: str, ts_col: str, columns: Sequence[str], rows: list):
+        month = _month_key(rows[0][columns.index(ts_col)])
+        table_dir = os.path.join(self.root, table)
+        os.makedirs(table_dir, exist_ok=True)
+        seq = 1 + sum(1 for s in self.manifest['segments'] if s['table'] == table and s['month'] == month)
+        name = f'{month}.{seq:04d}.npz'
+
+        arrays = {}
+        for i, col in enumerate(columns):
+            arrays.update(_encode_column(col, [r[i] for r in rows]))
+        tmp = os.path.join(table_dir, f'.{name}.tmp.npz')
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, os.path.join(table_dir, name))
+
+        ts = [r[columns.index(ts_col)] for r in rows]
+        return {
+            'table': table, 'month': month, 'file': os.path.join(table, name),
+            'ts_column': ts_col, 'min_ts': int(min(ts)), 'max_ts': int(max(ts)),
+            'rows': len(rows), 'columns': list(columns),
+            'bytes': os.path.getsize(os.path.join(table_dir, name)), 'created_at': int(time.time()),
+        }
+
+    def export(self, table: str, upto: int) -> int:
+        """Copia para o arquivo frio as linhas com tempo < upto (retoma pelo cursor). Só leitura no banco."""
+        exported = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cols = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+            if not cols:
+                return 0
+            for ts_col in TIME_COLUMNS.get(table, ()):
+                if ts_col not in cols:
+                    continue
+                ensure_time_index(conn, table, ts_col)
+                conn.commit()
+                extra = age_condition(conn, table, ts_col)
+                key = f'{table}.{ts_col}'
+                cursor = self.cursor(table, ts_col)
+
+                while cursor < upto:
+                    first = conn.execute(
+                        f'SELECT MIN({ts_col}) FROM {table} WHERE {ts_col} >= ? AND {ts_col} < ? AND {extra}',
+                        (cursor, upto)).fetchone()[0]
+                    if first is None:
+                        self.manifest['cursors'][key] = int(upto)
+                        self._save_manifest()
+                        break
+                    hi = min(upto, _next_month_start(first))        # Um segmento nunca cruza o mês
+                    rows = conn.execute(
+                        f'SELECT {", ".join(cols)} FROM {table} '
+                        f'WHERE {ts_col} >= ? AND {ts_col} < ? AND {extra} ORDER BY {ts_col} LIMIT ?',
+                        (first, hi, SEGMENT_ROWS + 1)).fetchall()
+                    if len(rows) > SEGMENT_ROWS:
+                        # Corta antes do último timestamp para não partir empates entre segmentos
+                        last_ts = rows[SEGMENT_ROWS][cols.index(ts_col)]
+                        cut = [r for r in rows if r[cols.index(ts_col)] < last_ts]
+                        if cut:
+                            rows, hi = cut, last_ts
+                        else:
+                            rows = conn.execute(
+                                f'SELECT {", ".join(cols)} FROM {table} WHERE {ts_col} = ? AND {extra}',
+                                (last_ts,)).fetchall()
+                            hi = last_ts + 1
+
+                    self.manifest['segments'].append(self._write_segment(table, ts_col, cols, rows))
+                    self.manifest['cursors'][key] = int(hi)
+                    self._save_manifest()                           # Commit do segmento
+                    exported += len(rows)
+                    cursor = hi
+        finally:
+            conn.close()
+
+        if exported:
+            logger.info(f"🧊 {table}: {exported} linhas exportadas para {self.root}")
+        return exported
+
+    # ============================================================
+    # PODA DO BANCO QUENTE
+    # ============================================================
+    def prune(self, table: str, older_than: int, where: str = '1') -> int:
+        """Apaga do banco o que já foi exportado e é mais velho que older_than (transações curtas)"""
+        deleted = 0
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            cols = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+            for ts_col in TIME_COLUMNS.get(table, ()):
+                if ts_col not in cols:
+                    continue
+                limit = min(older_than, self.cursor(table, ts_col))
+                extra = age_condition(conn, table, ts_col)
+                while True:
+                    conn.execute('BEGIN IMMEDIATE')
+                    cur = conn.execute(
+                        f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} '
+                        f'WHERE {ts_col} < ? AND {extra} AND ({where}) LIMIT ?)', (limit, DELETE_ROWS))
+                    conn.execute('COMMIT')
+                    deleted += cur.rowcount
+                    if cur.rowcount < DELETE_ROWS:
+                        break
+                    time.sleep(PAUSE_SECONDS)
+        finally:
+            conn.close()
+
+        if deleted:
+            logger.info(f"🗑️ {table}: {deleted} linhas arquivadas removidas do banco quente")
+        return deleted
+
+    def run(self, now: Optional[float] = None) -> dict:
+        """Exporta e poda todas as tabelas conforme HOT_DAYS"""
+        now = now or time.time()
+        report = {}
+        for table, days in HOT_DAYS.items():
+            try:
+                upto = int(now - days * 86400)
+                where = f'NOT ({KEEP_HOT[table]})' if table in KEEP_HOT else '1'
+                report[table] = {'exported': self.export(table, upto), 'pruned': self.prune(table, upto, where)}
+            except Exception as e:
+                logger.error(f"❌ Erro ao arquivar {table}: {e}")
+        return report
+
+    # ============================================================
+    # LEITURA
+    # ============================================================
+    def scan(self, table: str, start: Optional[int] = None, end: Optional[int] = None,
+             columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Itera segmento a segmento ({coluna: array}), abrindo só os do intervalo e só as colunas pedidas"""
+        for seg in self.segments(table, start, end):
+            with np.load(os.path.join(self.root, seg['file'])) as npz:
+                ts = _decode_column(npz, seg['ts_column'])
+                if ts.dtype == object:
+                    ts = np.array([np.nan if t is None else t for t in ts], dtype=np.float64)
+                mask = np.ones(len(ts), dtype=bool)
+                if start is not None:
+                    mask &= ts >= start
+                if end is not None:
+                    mask &= ts < end
+                if not mask.any():
+                    continue
+                wanted = [c for c in (columns or seg['columns']) if c in seg['columns']]
+                yield {c: _decode_column(npz, c)[mask] for c in wanted}
+
+    def read(self, table: str, start: Optional[int] = None, end: Optional[int] = None,
+             columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        parts = [pd.DataFrame(chunk) for chunk in self.scan(table, start, end, columns)]
+        if not parts:
+            return pd.DataFrame(columns=list(columns or []))
+        return pd.concat(parts, ignore_index=True)
+
+    def stats(self) -> dict:
+        out = {}
+        for seg in self.manifest['segments']:
+            t = out.setdefault(seg['table'], {'segments': 0, 'rows': 0, 'bytes': 0, 'months': set()})
+            t['segments'] += 1
+            t['rows'] += seg['rows']
+            t['bytes'] += seg['bytes']
+            t['months'].add(seg['month'])
+        for t in out.values():
+            t['months'] = sorted(t['months'])
+        return out
+
+
+_archive = None
+
+
+def get_archive(db_path: str = DB_PATH) -> BrainArchive:
+    global _archive
+    if _archive is None or _archive.db_path != db_path:
+        _archive = BrainArchive(db_path=db_path)
+    return _archive
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Arquivo frio de sniper_brain.db")
+    parser.add_argument('command', choices=['run', 'stats'], nargs='?', default='stats')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--root', default=DEFAULT_ARCHIVE_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    archive = BrainArchive(args.root, args.db)
+    if args.command == 'run':
+        print(json.dumps(archive.run(), indent=2))
+    for table, s in archive.stats().items():
+        print(f"🧊 {table}: {s['rows']} linhas em {s['segments']} segmentos "
+              f"({s['bytes'] / 1024 / 1024:.1f}MB, {s['months'][0]} → {s['months'][-1]})")
@@ -13,17 +13,27 @@ import threading
 import pickle
 import os
 from datetime import datetime
-from collections import defaultdict
+
+from brain_aggregates import get_aggregates
+from brain_watermark import TrainingWatermark
+from brain_online_learning import OnlineLearner
+from brain_archive import get_archive, HOT_DAYS
 
 logger = logging.getLogger("BrainContinuousLearning")
 
 class ContinuousLearningEngine:
-    def __init__(self, db_path='sniper_brain.db', models_dir='brain_models/'):
+    def __init__(self, db_path='sniper_brain.db', models_dir='brain_models/', online_mode=True):
         self.db_path = db_path
         self.models_dir = models_dir
         self.is_training = False
         self.training_thread = None
         
+        # Modo online: o tracker atualiza o modelo a cada trade fechado (sem job em lote)
+        self.online_mode = online_mode
+        self.online = OnlineLearner(db_path)
+        self.online_version = 0
+        self.confidence_model = {}
+        
         # Parâmetros de treinamento
         self.batch_size = 50  # Treina a cada 50 novas amostras
         self.min_pattern_samples = 10  # Mínimo de amostras por padrão para treinar
@@ -31,10 +41,33 @@ class ContinuousLearningEngine:
         # Cria diretório de modelos
         os.makedirs(models_dir, exist_ok=True)
         
+        # Watermark do último treino + outbox de feedbacks (trigger barato)
+        self.watermark = TrainingWatermark(db_path)
+        
         # Estado atual do modelo
         self.current_model_version = self._get_latest_model_version()
         self.pattern_weights = self._load_pattern_weights()
+        if self.online_mode:
+            self.refresh_online_model()
         
+    def refresh_online_model(self):
+        """Recarrega o modelo online se houver versão nova (1 lookup indexado quando não há)"""
+        try:
+            if self.online.latest_version() <= self.online_version:
+                return False
+            version, weights, confidence_model = self.online.load()
+            updated_weights = {pattern: dict(w) for pattern, w in self.pattern_weights.items()}
+            for pattern, w in weights.items():
+                updated_weights.setdefault(pattern, {}).update(w)
+            self.pattern_weights = updated_weights
+            self.confidence_model = {**self.confidence_model, **confidence_model}
+            self.online_version = version
+            logger.info(f"📡 Modelo online v{version} carregado ({len(weights)} padrões)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar modelo online: {e}")
+            return False
+    
     def _get_latest_model_version(self):
         """Retorna a versão mais recente do modelo"""
         try:
@@ -75,36 +108,33 @@ class ContinuousLearningEngine:
         """Verifica se deve iniciar novo ciclo de treinamento"""
         if self.is_training:
             return False
+        
+        if self.online_mode:
+            # Modelo já atualizado por trade; só recarrega a versão publicada
+            self.refresh_online_model()
+            # Feedbacks já aplicados pelo OnlineLearner: avança o watermark e libera o outbox
+            pending = self.watermark.pending()
+            if pending and pending['feedbacks']:
+                self.watermark.advance(pending['last_sample_id'], pending['feedback_hi'])
+            return False
             
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Conta amostras não processadas para treinamento
-            c.execute('''
-                SELECT COUNT(*) FROM raw_samples 
-                WHERE status = 'PROCESSED' 
-                AND id NOT IN (SELECT DISTINCT brain_sample_id FROM trade_performance WHERE brain_sample_id IS NOT NULL)
-            ''')
-            
-            untrained_samples = c.fetchone()[0]
-            
-            # Conta feedbacks de performance disponíveis para aprendizado
-            c.execute('SELECT COUNT(*) FROM trade_performance WHERE created_at > ?', 
-                     (time.time() - 86400,))  # Últimas 24h
+            # Amostras e feedbacks novos desde o último treinamento (watermark)
+            pending = self.watermark.pending()
+            if not pending:
+                return False
             
-            recent_feedbacks = c.fetchone()[0]
-            
-            conn.close()
+            untrained_samples = pending['samples']
+            new_feedbacks = pending['feedbacks']
             
             # Critérios para iniciar treinamento
             should_train = (
                 untrained_samples >= self.batch_size or 
-                recent_feedbacks >= 20
+                new_feedbacks >= 20
             )
             
             if should_train:
-                logger.info(f"🧠 Trigger de treinamento: {untrained_samples} amostras + {recent_feedbacks} feedbacks")
+                logger.info(f"🧠 Trigger de treinamento: {untrained_samples} amostras + {new_feedbacks} feedbacks")
                 return True
             
             return False
@@ -133,6 +163,11 @@ class ContinuousLearningEngine:
         try:
             logger.info("🚀 Iniciando treinamento incremental...")
             
+            # 0. Delta desde o último watermark (fixado no início: o que chegar durante fica p/ o próximo)
+            pending = self.watermark.pending() or {}
+            delta = self.watermark.delta_feedback(pending.get('feedback_hi', 0), pending.get('last_feedback_seq', 0))
+            logger.info(f"🔖 Delta: {pending.get('samples', 0)} amostras, {len(delta)} feedbacks novos")
+            
             # 1. Coleta dados de performance
             performance_data = self._collect_performance_data()
             
@@ -161,6 +196,11 @@ class ContinuousLearningEngine:
             # 6. Compacta dados antigos
             self._compact_old_training_data()
             
+            # 7. Marca o delta como treinado e avança o watermark
+            self._mark_delta_trained(delta)
+            if pending:
+                self.watermark.advance(pending['sample_hi'], pending['feedback_hi'])
+            
             elapsed = time.time() - start_time
             logger.info(f"⏱️ Treinamento concluído em {elapsed:.1f}s")
             
@@ -169,45 +209,35 @@ class ContinuousLearningEngine:
         finally:
             self.is_training = False
     
-    def _collect_performance_data(self):
-        """Coleta dados de performance para treinamento"""
+    def _mark_delta_trained(self, delta):
+        """training_used = 1 nas amostras dos feedbacks do delta (por PK)"""
+        sample_ids = [(int(time.time()), row[2]) for row in delta if row[2] is not None]
+        if not sample_ids:
+            return
         try:
             conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
-            
-            # Busca dados de performance com features
-            c.execute('''
-                SELECT 
-                    tp.pattern_detected,
-                    tp.ai_confidence,
-                    tp.success_binary,
-                    tp.actual_pnl,
-                    tp.performance_score,
-                    tp.trade_duration_hours,
-                    rs.ai_confidence as technical_confidence
-                FROM trade_performance tp
-                LEFT JOIN raw_samples rs ON tp.brain_sample_id = rs.id
-                WHERE tp.created_at > ?
-                ORDER BY tp.created_at DESC
-            ''', (time.time() - (30 * 86400),))  # Últimos 30 dias
-            
-            data = c.fetchall()
+            c.execute("PRAGMA table_info(raw_samples)")
+            if 'training_used' in [col[1] for col in c.fetchall()]:
+                c.executemany('UPDATE raw_samples SET training_used = 1, training_used_at = ? WHERE id = ?', sample_ids)
+                conn.commit()
             conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao marcar delta como treinado: {e}")
+    
+    def _collect_performance_data(self):
+        """
+        Estatísticas de performance por padrão para treinamento
+        (lidas dos agregados incrementais - sem reescanear trade_performance)
+        """
+        try:
+            aggregates = get_aggregates(self.db_path)
+            performance_by_pattern = aggregates.get_all('pattern')
+            for pattern, stats in performance_by_pattern.items():
+                stats['regression'] = aggregates.regression('pattern', pattern)
             
-            # Organiza dados por padrão
-            performance_by_pattern = defaultdict(list)
-            for row in data:
-                pattern = row[0]
-                performance_by_pattern[pattern].append({
-                    'ai_confidence': row[1] or 0,
-                    'success': row[2],
-                    'pnl': row[3] or 0,
-                    'performance_score': row[4] or 0,
-                    'duration': row[5] or 0,
-                    'technical_confidence': row[6] or 0
-                })
-            
-            logger.info(f"📊 Coletados dados de {len(data)} trades para {len(performance_by_pattern)} padrões")
+            total = sum(s['n'] for s in performance_by_pattern.values())
+            logger.info(f"📊 Coletados dados de {total} trades para {len(performance_by_pattern)} padrões")
             return performance_by_pattern
             
         except Exception as e:
@@ -218,14 +248,14 @@ class ContinuousLearningEngine:
         """Atualiza pesos dos padrões baseado em performance real"""
         updated_weights = self.pattern_weights.copy()
         
-        for pattern, samples in performance_data.items():
-            if len(samples) < self.min_pattern_samples:
+        for pattern, stats in performance_data.items():
+            if stats['n'] < self.min_pattern_samples:
                 continue
                 
             # Calcula métricas do padrão
-            success_rate = np.mean([s['success'] for s in samples])
-            avg_pnl = np.mean([s['pnl'] for s in samples])
-            avg_score = np.mean([s['performance_score'] for s in samples])
+            success_rate = stats['win_rate']
+            avg_pnl = stats['avg_pnl']
+            avg_score = stats['avg_score']
             
             # Calcula novo peso baseado em performance
             # Fórmula: peso = baseline * (success_rate * 0.6 + normalized_pnl * 0.4)
@@ -250,7 +280,7 @@ class ContinuousLearningEngine:
             updated_weights[pattern].update({
                 'confidence_base': new_confidence,
                 'success_weight': new_weight,
-                'samples_count': len(samples),
+                'samples_count': stats['n'],
                 'success_rate': success_rate,
                 'avg_pnl': avg_pnl,
                 'last_updated': time.time()
@@ -264,41 +294,32 @@ class ContinuousLearningEngine:
     def _train_adaptive_confidence_model(self, performance_data):
         """Treina modelo simples de confiança adaptiva"""
         try:
-            # Modelo simples baseado em regressão linear dos fatores
+            # Regressão linear dos fatores: y = a*ai_conf + b*tech_conf + c*duration + d
+            # Resolvida pelas equações normais (XᵀX, Xᵀy mantidos nos agregados)
             confidence_model = {}
             
-            for pattern, samples in performance_data.items():
-                if len(samples) < self.min_pattern_samples:
+            for pattern, stats in performance_data.items():
+                if stats['n'] < self.min_pattern_samples:
                     continue
                 
-                # Features: AI conf, technical conf, duration
-                X = np.array([[s['ai_confidence'], s['technical_confidence'], 
-                             min(24, s['duration'])] for s in samples])
-                y = np.array([s['performance_score'] for s in samples])
-                
-                if len(X) > 5:  # Mínimo para regressão
-                    # Regressão linear simples (sem bibliotecas externas)
-                    # y = a*ai_conf + b*tech_conf + c*duration + d
-                    X_with_bias = np.column_stack([X, np.ones(len(X))])
-                    
-                    try:
-                        coefficients = np.linalg.lstsq(X_with_bias, y, rcond=None)[0]
-                        confidence_model[pattern] = {
-                            'ai_coeff': coefficients[0],
-                            'tech_coeff': coefficients[1], 
-                            'duration_coeff': coefficients[2],
-                            'bias': coefficients[3],
-                            'samples': len(samples)
-                        }
-                    except:
-                        # Fallback para média simples se falhar
-                        confidence_model[pattern] = {
-                            'ai_coeff': 0.6,
-                            'tech_coeff': 0.3,
-                            'duration_coeff': 0.1,
-                            'bias': 0.1,
-                            'samples': len(samples)
-                        }
+                coefficients = stats.get('regression')
+                if coefficients is not None and np.all(np.isfinite(coefficients)):
+                    confidence_model[pattern] = {
+                        'ai_coeff': coefficients[0],
+                        'tech_coeff': coefficients[1], 
+                        'duration_coeff': coefficients[2],
+                        'bias': coefficients[3],
+                        'samples': stats['n']
+                    }
+                else:
+                    # Fallback para média simples se falhar
+                    confidence_model[pattern] = {
+                        'ai_coeff': 0.6,
+                        'tech_coeff': 0.3,
+                        'duration_coeff': 0.1,
+                        'bias': 0.1,
+                        'samples': stats['n']
+                    }
             
             logger.info(f"🤖 Modelo de confiança treinado para {len(confidence_model)} padrões")
             return confidence_model
@@ -380,33 +401,15 @@ class ContinuousLearningEngine:
             logger.error(f"❌ Erro ao salvar modelo: {e}")
     
     def _compact_old_training_data(self):
-        """Move dados antigos de treinamento para arquivo compactado"""
+        """Move dados antigos de treinamento para o arquivo frio (brain_archive)"""
         try:
-            # Move dados de performance > 90 dias para tabela de arquivo
-            cutoff_time = time.time() - (90 * 86400)
+            # Performance > 90 dias vai para arquivos mensais e sai do banco quente
+            # (as estatísticas continuam nos agregados incrementais)
+            cutoff_time = int(time.time() - (HOT_DAYS['trade_performance'] * 86400))
             
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Cria tabela de arquivo se não existir
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS trade_performance_archive AS 
-                SELECT * FROM trade_performance WHERE 1=0
-            ''')
-            
-            # Move dados antigos
-            c.execute('''
-                INSERT INTO trade_performance_archive 
-                SELECT * FROM trade_performance WHERE created_at < ?
-            ''', (cutoff_time,))
-            
-            archived_count = c.rowcount
-            
-            # Remove da tabela principal
-            c.execute('DELETE FROM trade_performance WHERE created_at < ?', (cutoff_time,))
-            
-            conn.commit()
-            conn.close()
+            archive = get_archive(self.db_path)
+            archive.export('trade_performance', cutoff_time)
+            archived_count = archive.prune('trade_performance', cutoff_time)
             
             if archived_count > 0:
                 logger.info(f"🗄️ Arquivados {archived_count} registros de performance antigos")
@@ -417,6 +420,9 @@ class ContinuousLearningEngine:
     def get_enhanced_confidence(self, pattern, ai_confidence, technical_confidence, market_conditions=None):
         """Retorna confiança melhorada baseada no modelo treinado"""
         try:
+            if self.online_mode:
+                self.refresh_online_model()
+            
             # Aplica pesos do padrão
             pattern_weight = self.pattern_weights.get(pattern, {}).get('success_weight', 1.0)
             base_confidence = self.pattern_weights.get(pattern, {}).get('confidence_base', ai_confidence)
@@ -444,7 +450,9 @@ class ContinuousLearningEngine:
             'current_model_version': self.current_model_version,
             'patterns_count': len(self.pattern_weights),
             'models_dir': self.models_dir,
-            'batch_size': self.batch_size
+            'batch_size': self.batch_size,
+            'online_mode': self.online_mode,
+            'online_version': self.online_version
         }
 
 # Singleton para uso global
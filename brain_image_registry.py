@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+🖼️ BRAIN IMAGE REGISTRY - Ciclo de vida indexado das imagens em brain_images/
+
+Antes, cada limpeza listava o diretório inteiro, fazia stat arquivo a arquivo
+e extraía o id do nome (BrainMaintenance.cleanup_old_images, e os
+_cleanup_old_images do PostEntryValidator / VisionValidatorWatchlist após
+cada chamada ao modelo). Agora todo escritor registra a imagem ao gravar:
+
+    image_registry: path | sample_id | kind | size_bytes | created_at | referenced_by
+
+- kind: 'sample' (vision_validator, image_path do raw_samples) | 'watchlist' | 'postval'
+- referenced_by: quem ainda precisa do arquivo (ex. 'raw_samples' p/ amostra VALID
+  do dataset de treino); NULL = descartável
+- Limpeza = range delete indexado: TTL por kind em (kind, created_at) e depois
+  orçamento de bytes (total mantido por trigger), despejando as mais antigas
+  não referenciadas primeiro; referenciadas só se ainda estourar o orçamento
+- Diretório só é percorrido uma vez, no backfill de quem já tinha imagens
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from typing import Optional
+
+logger = logging.getLogger("BrainImageRegistry")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, 'brain_images')
+DB_PATH = os.path.join(BASE_DIR, 'sniper_brain.db')
+
+MAX_BYTES = int(os.getenv('BRAIN_IMAGES_MAX_MB', '2048')) * 1024 * 1024
+LOW_WATERMARK = 0.9          # Despeja até ficar abaixo de 90% do orçamento (evita oscilar)
+TTL_SECONDS = {
+    'sample': 15 * 86400,    # Mesmo prazo do BrainMaintenance (VALID referenciadas ficam)
+    'watchlist': 3600,
+    'postval': 3600,
+}
+EVICT_BATCH = 200
+
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_registry (
+            path TEXT PRIMARY KEY,
+            sample_id INTEGER,
+            kind TEXT NOT NULL,
+            size_bytes INTEGER DEFAULT 0,
+            created_at INTEGER NOT NULL,
+            referenced_by TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_image_registry_kind_created ON image_registry(kind, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_image_registry_ref_created ON image_registry(referenced_by, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_image_registry_sample ON image_registry(sample_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_registry_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            files INTEGER DEFAULT 0,
+            bytes INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO image_registry_totals (id, files, bytes) VALUES (1, 0, 0)')
+    # Marcadores persistentes (ex. backfill_done_at): o registro já recebe imagens
+    # novas antes da 1ª manutenção, então "vazio" não indica backfill pendente
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_registry_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    # Total em O(1) para o orçamento (sem SUM sobre a tabela)
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_image_registry_insert AFTER INSERT ON image_registry
+        BEGIN
+            UPDATE image_registry_totals SET files = files + 1, bytes = bytes + NEW.size_bytes WHERE id = 1;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_image_registry_delete AFTER DELETE ON image_registry
+        BEGIN
+            UPDATE image_registry_totals SET files = files - 1, bytes = bytes - OLD.size_bytes WHERE id = 1;
+        END
+    ''')
+
+
+def _unlink(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.warning(f"⚠️ Não foi possível remover {path}: {e}")
+        return False
+
+
+class ImageRegistry:
+    """
+        registry = get_image_registry()
+        registry.register(path, kind='watchlist')                  # logo após gravar o PNG
+        registry.set_reference(sample_id, 'raw_samples')           # amostra virou dataset
+        registry.cleanup()                                         # TTL + orçamento (indexado)
+    """
+
+    def __init__(self, db_path: str = DB_PATH, images_dir: str = IMAGES_DIR, max_bytes: int = MAX_BYTES):
+        self.db_path = db_path
+        self.images_dir = images_dir
+        self.max_bytes = max_bytes
+        try:
+            conn = sqlite3.connect(self.db_path)
+            init_tables(conn)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar registro de imagens: {e}")
+
+    # ============================================================
+    # ESCRITA
+    # ============================================================
+    def register(self, path: Optional[str], kind: str = 'sample', sample_id: Optional[int] = None,
+                 referenced_by: Optional[str] = None, created_at: Optional[int] = None) -> bool:
+        """Registra uma imagem recém-gravada (um stat do próprio arquivo, sem listar diretório)"""
+        if not path:
+            return False
+        try:
+            path = os.path.abspath(path)
+            size = os.path.getsize(path)
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute('DELETE FROM image_registry WHERE path = ?', (path,))   # Regravação: mantém o total certo
+                conn.execute('''
+                    INSERT INTO image_registry (path, sample_id, kind, size_bytes, created_at, referenced_by)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (path, sample_id, kind, size, int(created_at or time.time()), referenced_by))
+                conn.commit()
+            finally:
+                conn.close()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao registrar imagem {path}: {e}")
+            return False
+
+    def set_reference(self, sample_id: int, referenced_by: Optional[str]):
+        """Marca (ou libera, com None) as imagens de uma amostra"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('UPDATE image_registry SET referenced_by = ? WHERE sample_id = ?', (referenced_by, sample_id))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao referenciar imagens da amostra {sample_id}: {e}")
+
+    # ============================================================
+    # LIMPEZA
+    # ============================================================
+    def _evict(self, conn, rows) -> int:
+        """Apaga arquivos e linhas (a linha sai mesmo se o arquivo já não existir)"""
+        for (path,) in rows:
+            _unlink(path)
+        conn.executemany('DELETE FROM image_registry WHERE path = ?', rows)
+        conn.commit()
+        return len(rows)
+
+    def expire(self, kind: Optional[str] = None, now: Optional[float] = None,
+               ttl_seconds: Optional[int] = None) -> int:
+        """Remove imagens não referenciadas que passaram do TTL do seu kind"""
+        now = now or time.time()
+        removed = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for k, ttl in TTL_SECONDS.items():
+                if kind and k != kind:
+                    continue
+                cutoff = int(now - (ttl_seconds if ttl_seconds is not None else ttl))
+                while True:
+                    rows = conn.execute('''
+                        SELECT path FROM image_registry
+                        WHERE kind = ? AND created_at < ? AND referenced_by IS NULL
+                        LIMIT ?
+                    ''', (k, cutoff, EVICT_BATCH)).fetchall()
+                    if not rows:
+                        break
+                    removed += self._evict(conn, rows)
+        finally:
+            conn.close()
+        return removed
+
+    def enforce_budget(self) -> int:
+        """Se o total passar de max_bytes, despeja as mais antigas até LOW_WATERMARK"""
+        removed = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            total = conn.execute('SELECT bytes FROM image_registry_totals WHERE id = 1').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            target = int(self.max_bytes * LOW_WATERMARK)
+            # Primeiro as descartáveis; referenciadas só se ainda não bastar
+            for condition in ('referenced_by IS NULL', 'referenced_by IS NOT NULL'):
+                while total > target:
+                    rows = conn.execute(f'''
+                        SELECT path, size_bytes FROM image_registry
+                        WHERE {condition} ORDER BY created_at LIMIT ?
+                    ''', (EVICT_BATCH,)).fetchall()
+                    if not rows:
+                        break
+                    batch = []
+                    for path, size in rows:
+                        batch.append((path,))
+                        total -= size or 0
+                        if total <= target:
+                            break
+                    removed += self._evict(conn, batch)
+                    if condition == 'referenced_by IS NOT NULL':
+                        logger.warning(f"⚠️ Orçamento de imagens estourado: {len(batch)} imagens referenciadas removidas")
+        finally:
+            conn.close()
+        if removed:
+            logger.info(f"🧹 Orçamento de imagens: {removed} removidas (limite {self.max_bytes / 1024 / 1024:.0f}MB)")
+        return removed
+
+    def cleanup(self, kind: Optional[str] = None, now: Optional[float] = None) -> int:
+        try:
+            return self.expire(kind, now) + self.enforce_budget()
+        except Exception as e:
+            logger.error(f"❌ Erro na limpeza de imagens: {e}")
+            return 0
+
+    # ============================================================
+    # BACKFILL / STATUS
+    # ============================================================
+    def backfill(self) -> int:
+        """Registra imagens gravadas antes do registro existir (única listagem do diretório)"""
+        if not os.path.isdir(self.images_dir):
+            return 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            valid = {row[0] for row in conn.execute("SELECT id FROM raw_samples WHERE ai_verdict = 'VALID'")} \
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'raw_samples'").fetchone() else set()
+            known = {row[0] for row in conn.execute('SELECT path FROM image_registry')}
+            rows = []
+            for entry in os.scandir(self.images_dir):
+                if not entry.is_file() or not entry.name.endswith('.png') or os.path.abspath(entry.path) in known:
+                    continue
+                kind = 'watchlist' if entry.name.startswith('watchlist_') else \
+                    'postval' if entry.name.startswith('postval_') else 'sample'
+                sample_id = None
+                if kind == 'sample':
+                    try:
+                        sample_id = int(entry.name.split('_')[0])    # ID_SYMBOL_PATTERN.png
+                    except ValueError:
+                        pass
+                st = entry.stat()
+                rows.append((os.path.abspath(entry.path), sample_id, kind, st.st_size, int(st.st_mtime),
+                             'raw_samples' if sample_id in valid else None))
+            conn.executemany('''
+                INSERT OR IGNORE INTO image_registry (path, sample_id, kind, size_bytes, created_at, referenced_by)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+        finally:
+            conn.close()
+        if rows:
+            logger.info(f"🖼️ Backfill: {len(rows)} imagens registradas")
+        return len(rows)
+
+    def backfill_once(self) -> int:
+        """backfill() só na primeira vez por banco (marcador em image_registry_meta)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            done = conn.execute("SELECT value FROM image_registry_meta WHERE key = 'backfill_done_at'").fetchone()
+        finally:
+            conn.close()
+        if done:
+            return 0
+        count = self.backfill()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("INSERT OR REPLACE INTO image_registry_meta (key, value) VALUES ('backfill_done_at', ?)",
+                         (str(int(time.time())),))
+            conn.commit()
+        finally:
+            conn.close()
+        return count
+
+    def stats(self) -> dict:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            files, total = conn.execute('SELECT files, bytes FROM image_registry_totals WHERE id = 1').fetchone()
+        finally:
+            conn.close()
+        return {'files': files, 'bytes': total, 'max_bytes': self.max_bytes}
+
+
+_registry = None
+
+
+def get_image_registry(db_path: str = DB_PATH) -> ImageRegistry:
+    global _registry
+    if _registry is None or _registry.db_path != db_path:
+        _registry = ImageRegistry(db_path)
+    return _registry
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Registro e limpeza de brain_images/")
+    parser.add_argument('command', choices=['stats', 'backfill', 'cleanup'], nargs='?', default='stats')
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    registry = ImageRegistry(args.db)
+    if args.command == 'backfill':
+        registry.backfill()
+    elif args.command == 'cleanup':
+        print(f"🧹 {registry.cleanup()} imagens removidas")
+    s = registry.stats()
+    print(f"🖼️ {s['files']} imagens, {s['bytes'] / 1024 / 1024:.1f}MB de {s['max_bytes'] / 1024 / 1024:.0f}MB")
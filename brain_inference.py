@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+🧠 BRAIN INFERENCE - Decisão de entrada em memória (baixa latência)
+
+O caminho antigo (`BrainIntegration.should_enter_trade`) atualiza o contexto
+de mercado na exchange a cada decisão e passa pelo ε-greedy do
+`QLearningBrain.get_action`. Aqui a Q-table é compilada numa política gulosa
+(estado -> ação, confiança) e o contexto de mercado vem de um snapshot
+pré-calculado, então decidir é só montar a chave do estado e fazer um lookup.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("BrainInference")
+
+ACTIONS = ('ENTER_LONG', 'ENTER_SHORT', 'SKIP')
+
+# Estado nunca visto: o predict() inicializa a Q-table com zeros e o argmax
+# cai na primeira ação com confiança neutra. Mantemos o mesmo comportamento.
+UNKNOWN_STATE_DECISION = (ACTIONS[0], 0.5)
+
+
+class BrainInferenceService:
+    """
+    Serviço de inferência sem exploração para o monitor.
+
+    - compile_policy(): pré-calcula a melhor ação de cada estado da Q-table
+    - set_context(): registra o snapshot de mercado usado nas decisões
+    - decide() / decide_batch(): decisão unitária ou da watchlist inteira
+    - latency_stats(): p50/p99 das últimas decisões (microssegundos)
+    """
+
+    def __init__(self, brain=None, latency_window=2000):
+        self.brain = brain
+        self.policy: Dict[str, Tuple[str, float]] = {}
+        self.context: Optional[Dict] = None
+        self.context_updated_at = 0
+        self.model_mtime = 0
+        self._latencies_us = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+        if brain is not None:
+            self.compile_policy(brain)
+            try:
+                from brain_trainer import MODEL_PATH
+                self.model_mtime = os.path.getmtime(MODEL_PATH)
+            except OSError:
+                pass
+
+    # ============================================================
+    # POLÍTICA
+    # ============================================================
+    def compile_policy(self, brain) -> int:
+        """Converte a Q-table em lookup estado -> (ação gulosa, confiança)"""
+        policy = {}
+        for state_key, q_values in brain.q_table.items():
+            if not q_values:
+                continue
+            action = max(q_values, key=q_values.get)
+            max_q = q_values[action]
+            min_q = min(q_values.values())
+            # Mesma normalização do BrainTrainer.predict para a ação escolhida
+            confidence = 0.5 if max_q == min_q else (q_values[action] - min_q) / (max_q - min_q)
+            policy[state_key] = (action, confidence)
+
+        with self._lock:
+            self.brain = brain
+            self.policy = policy
+
+        logger.info(f"✅ Política compilada: {len(policy)} estados")
+        return len(policy)
+
+    def maybe_reload(self, model_path: Optional[str] = None) -> bool:
+        """Recompila a política se o arquivo do modelo mudou em disco"""
+        if self.brain is None:
+            return False
+
+        try:
+            if model_path is None:
+                from brain_trainer import MODEL_PATH
+                model_path = MODEL_PATH
+            mtime = os.path.getmtime(model_path)
+        except OSError:
+            return False
+
+        if mtime <= self.model_mtime:
+            return False
+
+        self.model_mtime = mtime
+        if self.brain.load_model():
+            self.compile_policy(self.brain)
+            return True
+        return False
+
+    # ============================================================
+    # CONTEXTO DE MERCADO
+    # ============================================================
+    def set_context(self, snapshot: Optional[Dict]):
+        """Registra snapshot de contexto (scenario_number, btc_trend, btcd_trend)"""
+        with self._lock:
+            self.context = dict(snapshot) if snapshot else None
+            self.context_updated_at = time.time()
+
+    def refresh_context(self, exchange) -> Optional[Dict]:
+        """Recalcula o snapshot (fora do caminho de decisão)"""
+        try:
+            from market_context_service import get_market_context
+            snapshot = get_market_context(exchange)
+            self.set_context(snapshot)
+            logger.debug(f"📊 Snapshot de contexto: {snapshot.get('scenario_name')}")
+            return snapshot
+        except Exception as e:
+            logger.error(f"❌ Erro ao atualizar snapshot de contexto: {e}")
+            return None
+
+    def context_age(self) -> float:
+        if not self.context_updated_at:
+            return float('inf')
+        return time.time() - self.context_updated_at
+
+    # ============================================================
+    # DECISÃO
+    # ============================================================
+    def _state_key(self, item: Dict, context: Optional[Dict]) -> str:
+        """Monta só as features que compõem a chave da Q-table"""
+        state = {
+            'pattern': item.get('pattern') or item.get('padrao', 'UNKNOWN'),
+            'timeframe': item.get('timeframe', '15m'),
+            'direction': item.get('direction') or item.get('direcao', 'NEUTRAL'),
+            'ai_confidence': item.get('ai_confidence', 0),
+        }
+        if context:
+            state['market_scenario'] = context.get('scenario_number', 5)
+            state['btc_trend'] = context.get('btc_trend', 'NEUTRAL')
+            state['btcd_trend'] = context.get('btcd_trend', 'NEUTRAL')
+
+        if self.brain is not None:
+            return self.brain._state_to_key(state)
+
+        return '|'.join(str(f) for f in (
+            state['pattern'], state['timeframe'], state['direction'], state['ai_confidence'],
+            state.get('market_scenario', 5), state.get('btc_trend', 'NEUTRAL'),
+            state.get('btcd_trend', 'NEUTRAL')
+        ))
+
+    def _decide(self, item: Dict, policy: Dict, context: Optional[Dict]) -> Dict:
+        action, confidence = policy.get(self._state_key(item, context), UNKNOWN_STATE_DECISION)
+        pattern_direction = item.get('direction') or item.get('direcao', 'NEUTRAL')
+
+        if action == 'SKIP':
+            decision = 'SKIP'
+            reason = f"Brain recomendou SKIP (conf: {confidence:.2f})"
+        elif (action == 'ENTER_LONG' and pattern_direction == 'LONG') or \
+             (action == 'ENTER_SHORT' and pattern_direction == 'SHORT'):
+            decision = 'ENTER'
+            reason = f"Brain recomendou {action} (conf: {confidence:.2f})"
+        else:
+            decision = 'SKIP'
+            reason = f"Brain recomendou {action} mas padrão é {pattern_direction} (conf: {confidence:.2f})"
+
+        return {
+            'symbol': item.get('symbol'),
+            'decision': decision,
+            'confidence': confidence,
+            'reason': reason,
+            'brain_advice': action
+        }
+
+    def decide(self, item: Dict) -> Dict:
+        """Decisão gulosa para um padrão (sem I/O)"""
+        start = time.perf_counter_ns()
+        result = self._decide(item, self.policy, self.context)
+        self._latencies_us.append((time.perf_counter_ns() - start) / 1000)
+        return result
+
+    def decide_batch(self, items: List[Dict]) -> List[Dict]:
+        """Pontua a watchlist inteira numa chamada, com o mesmo snapshot de contexto"""
+        policy = self.policy
+        context = self.context
+        results = []
+        for item in items:
+            start = time.perf_counter_ns()
+            results.append(self._decide(item, policy, context))
+            self._latencies_us.append((time.perf_counter_ns() - start) / 1000)
+        return results
+
+    def latency_stats(self) -> Dict:
+        """p50/p99 das decisões recentes em microssegundos"""
+        samples = sorted(self._latencies_us)
+        if not samples:
+            return {'count': 0, 'p50_us': 0.0, 'p99_us': 0.0, 'max_us': 0.0}
+
+        def percentile(p):
+            idx = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+            return samples[idx]
+
+        return {
+            'count': len(samples),
+            'p50_us': round(percentile(50), 2),
+            'p99_us': round(percentile(99), 2),
+            'max_us': round(samples[-1], 2)
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    from brain_trainer import QLearningBrain
+
+    print("🧠 TESTE DO BRAIN INFERENCE")
+    print("=" * 50)
+
+    service = BrainInferenceService(QLearningBrain())
+    service.set_context({'scenario_number': 3, 'btc_trend': 'LONG', 'btcd_trend': 'SHORT'})
+
+    watchlist = [
+        {'symbol': 'ETH/USDT', 'timeframe': '15m', 'padrao': 'OCO', 'direcao': 'SHORT'},
+        {'symbol': 'SOL/USDT', 'timeframe': '1h', 'padrao': 'FUNDO_DUPLO', 'direcao': 'LONG'},
+    ] * 500
+
+    for decision in service.decide_batch(watchlist)[:2]:
+        print(f"  {decision['symbol']}: {decision['decision']} - {decision['reason']}")
+
+    stats = service.latency_stats()
+    print(f"\n⏱️ {stats['count']} decisões | p50: {stats['p50_us']}µs | p99: {stats['p99_us']}µs")
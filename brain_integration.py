@@ -8,18 +8,19 @@ import time
 import json
 import os
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 # Importar módulos do bot
 try:
-    from lib_utils import get_market_analysis
+    from market_context_service import get_market_context
     import ccxt
 except ImportError:
     print("⚠️ Módulos do bot não encontrados. Executando em modo standalone.")
 
 # Importar brain trainer
 try:
-    from brain_trainer import BrainTrainer
+    from brain_trainer import BrainTrainer, QLearningBrain, MODEL_PATH
+    from brain_inference import BrainInferenceService
     BRAIN_AVAILABLE = True
 except ImportError:
     print("⚠️ Brain Trainer não disponível. Execute setup primeiro.")
@@ -32,12 +33,13 @@ class BrainIntegration:
     Integra o sistema de aprendizado com o bot operacional
     """
     
-    def __init__(self):
+    def __init__(self, trainer: bool = True):
         self.brain_trainer = None
         self.exchange = None
         self.market_context = None
+        self.inference = None
         
-        if BRAIN_AVAILABLE:
+        if BRAIN_AVAILABLE and trainer:
             self.brain_trainer = BrainTrainer()
             logger.info("✅ Brain Integration inicializado")
         else:
@@ -61,6 +63,9 @@ class BrainIntegration:
             # Treinamento inicial rápido
             self.brain_trainer.train_offline(episodes=10)
             
+            # Política gulosa em memória para o caminho rápido
+            self.inference = BrainInferenceService(self.brain_trainer.brain)
+            
             logger.info("✅ Brain Integration inicializado com sucesso")
             return True
             
@@ -68,11 +73,38 @@ class BrainIntegration:
             logger.error(f"❌ Erro ao inicializar Brain Integration: {e}")
             return False
     
+    def load_for_inference(self, exchange=None) -> bool:
+        """
+        Caminho só-leitura (bot_monitor): carrega o modelo salvo e compila a
+        política gulosa. Não treina e não salva - o modelo é do brain_trainer/cron.
+        exchange: conexão do chamador, usada só no snapshot de contexto.
+        """
+        if not BRAIN_AVAILABLE:
+            return False
+        
+        try:
+            if not os.path.exists(MODEL_PATH):
+                logger.warning(f"⚠️ Modelo não encontrado ({MODEL_PATH}) - brain desativado")
+                return False
+            
+            brain = self.brain_trainer.brain if self.brain_trainer else QLearningBrain(epsilon=0.0, load=False)
+            if not brain.load_model():
+                return False
+            
+            self.exchange = exchange
+            self.inference = BrainInferenceService(brain)
+            logger.info(f"✅ Brain carregado para inferência: {len(self.inference.policy)} estados")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar Brain para inferência: {e}")
+            return False
+    
     def update_market_context(self):
         """Atualiza contexto de mercado"""
         try:
             if self.exchange:
-                self.market_context = get_market_analysis(self.exchange)
+                self.market_context = get_market_context(self.exchange)
                 logger.debug(f"📊 Contexto de mercado: {self.market_context.get('scenario_name')}")
         except Exception as e:
             logger.error(f"❌ Erro ao atualizar contexto: {e}")
@@ -143,6 +175,39 @@ class BrainIntegration:
                 'brain_advice': 'SKIP'
             }
     
+    def refresh_inference_context(self, exchange=None):
+        """
+        Recalcula o snapshot de contexto do caminho rápido.
+        Deve ser chamado fora do loop de decisão (ex: a cada ciclo do monitor).
+        exchange: conexão do chamador (padrão: a do initialize/load_for_inference)
+        """
+        if not self.inference:
+            return None
+        
+        self.inference.maybe_reload()
+        exchange = exchange or self.exchange
+        if exchange:
+            snapshot = self.inference.refresh_context(exchange)
+            if snapshot:
+                self.market_context = snapshot
+            return snapshot
+        return None
+    
+    def should_enter_trade_fast(self, pattern_data: Dict) -> Dict:
+        """
+        Mesma decisão do should_enter_trade, sem exploração e sem I/O:
+        usa o último snapshot de contexto e a política compilada.
+        """
+        if not self.inference:
+            return self.should_enter_trade(pattern_data)
+        return self.inference.decide(pattern_data)
+    
+    def score_watchlist(self, pares: List[Dict]) -> List[Dict]:
+        """Pontua todos os pares da watchlist numa única chamada"""
+        if not self.inference:
+            return [self.should_enter_trade(p) for p in pares]
+        return self.inference.decide_batch(pares)
+    
     def record_trade_result(self, trade_data: Dict):
         """
         Registra resultado do trade para aprendizado futuro
@@ -208,6 +273,8 @@ class BrainIntegration:
             stats = self.brain_trainer.brain.get_stats()
             stats['status'] = 'ACTIVE'
             stats['market_context'] = self.market_context
+            if self.inference:
+                stats['inference_latency'] = self.inference.latency_stats()
             return stats
         except Exception as e:
             return {'status': 'ERROR', 'error': str(e)}
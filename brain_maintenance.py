@@ -11,6 +11,10 @@ import shutil
 import logging
 from datetime import datetime, timedelta
 
+from data_compactor import DataCompactor
+from brain_archive import get_archive
+from brain_image_registry import ImageRegistry
+
 logger = logging.getLogger("BrainMaintenance")
 
 class BrainMaintenance:
@@ -18,89 +22,33 @@ class BrainMaintenance:
         self.db_path = db_path
         self.images_path = images_path
         
-    def archive_old_data(self, days_threshold=30):
-        """Arquiva dados antigos mantendo apenas amostras VÁLIDAS"""
+    def archive_old_data(self, days_threshold=30, max_seconds=60):
+        """
+        Arquiva dados expirados em arquivos mensais (brain_archive) e compacta
+        os antigos mantendo apenas amostras VÁLIDAS no banco quente
+        (resumo diário em learning_summary - ver data_compactor.DataCompactor)
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Timestamp limite (30 dias atrás)
-            threshold = int(time.time()) - (days_threshold * 24 * 60 * 60)
-            
-            # Conta dados que serão arquivados
-            c.execute("""
-                SELECT COUNT(*) FROM raw_samples 
-                WHERE timestamp_detection < ? AND ai_verdict = 'INVALID'
-            """, (threshold,))
-            
-            count_to_archive = c.fetchone()[0]
-            
-            if count_to_archive > 0:
-                # Move dados INVÁLIDOS antigos para tabela de arquivo
-                c.execute("""
-                    CREATE TABLE IF NOT EXISTS archived_samples AS 
-                    SELECT * FROM raw_samples WHERE 1=0
-                """)
-                
-                c.execute("""
-                    INSERT INTO archived_samples 
-                    SELECT * FROM raw_samples 
-                    WHERE timestamp_detection < ? AND ai_verdict = 'INVALID'
-                """, (threshold,))
-                
-                # Remove da tabela principal
-                c.execute("""
-                    DELETE FROM raw_samples 
-                    WHERE timestamp_detection < ? AND ai_verdict = 'INVALID'
-                """, (threshold,))
-                
-                conn.commit()
-                logger.info(f"🗄️ Arquivados {count_to_archive} registros antigos (INVALID)")
-                
-            conn.close()
+            archive = get_archive(self.db_path)
+            archive.run()
+            stats = DataCompactor(self.db_path, retention_days=days_threshold,
+                                  archive=archive).run(max_seconds=max_seconds)
+            if stats['rows'] > 0:
+                logger.info(f"🗄️ Compactados {stats['rows']} registros antigos (VÁLIDOS preservados)")
+            return stats['rows']
             
         except Exception as e:
             logger.error(f"Erro ao arquivar dados: {e}")
+            return 0
     
     def cleanup_old_images(self, days_threshold=15):
-        """Remove imagens antigas mantendo apenas as de amostras VÁLIDAS"""
+        """Remove imagens antigas mantendo apenas as de amostras VÁLIDAS (registro indexado + orçamento de bytes)"""
         try:
-            if not os.path.exists(self.images_path):
-                return
-                
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
+            registry = ImageRegistry(self.db_path, images_dir=self.images_path)
+            registry.backfill_once()    # Imagens de antes do registro (uma vez por banco)
             
-            # Pega IDs de amostras válidas para preservar suas imagens
-            c.execute("SELECT id FROM raw_samples WHERE ai_verdict = 'VALID'")
-            valid_ids = {row[0] for row in c.fetchall()}
-            
-            threshold = time.time() - (days_threshold * 24 * 60 * 60)
-            removed_count = 0
-            
-            for filename in os.listdir(self.images_path):
-                if not filename.endswith('.png'):
-                    continue
-                    
-                filepath = os.path.join(self.images_path, filename)
-                
-                # Verifica idade do arquivo
-                if os.path.getctime(filepath) < threshold:
-                    # Extrai ID do filename (formato: ID_SYMBOL_PATTERN.png)
-                    try:
-                        file_id = int(filename.split('_')[0])
-                        
-                        # Remove apenas se NÃO for uma amostra válida
-                        if file_id not in valid_ids:
-                            os.remove(filepath)
-                            removed_count += 1
-                            
-                    except (ValueError, IndexError):
-                        # Se não conseguir extrair ID, remove (arquivo malformado)
-                        os.remove(filepath)
-                        removed_count += 1
-            
-            conn.close()
+            removed_count = registry.expire('sample', ttl_seconds=days_threshold * 24 * 60 * 60)
+            removed_count += registry.cleanup()
             
             if removed_count > 0:
                 logger.info(f"🧹 Removidas {removed_count} imagens antigas (preservadas as VÁLIDAS)")
@@ -127,10 +75,9 @@ class BrainMaintenance:
             # Tamanho do arquivo
             db_size_mb = os.path.getsize(self.db_path) / (1024 * 1024)
             
-            # Contagem de imagens
-            image_count = 0
-            if os.path.exists(self.images_path):
-                image_count = len([f for f in os.listdir(self.images_path) if f.endswith('.png')])
+            # Contagem de imagens (totais do registro, sem listar o diretório)
+            image_stats = ImageRegistry(self.db_path, images_dir=self.images_path).stats()
+            image_count = image_stats['files']
             
             conn.close()
             
@@ -139,7 +86,8 @@ class BrainMaintenance:
                 'valid_samples': valid,
                 'invalid_samples': invalid,
                 'db_size_mb': round(db_size_mb, 2),
-                'image_count': image_count
+                'image_count': image_count,
+                'image_mb': round(image_stats['bytes'] / (1024 * 1024), 2)
             }
             
         except Exception as e:
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+📡 BRAIN ONLINE LEARNING - Modelo atualizado a cada trade fechado
+
+O _incremental_training_worker recalculava pesos e refazia o lstsq com todo
+o histórico a cada ciclo. No modo online, o escritor do feedback
+(BrainPerformanceTracker) chama OnlineLearner.update na mesma transação do
+INSERT e cada trade atualiza o estado do seu padrão:
+
+- Pesos: médias exponencialmente ponderadas (win, pnl, score) com meia-vida
+  de HALF_LIFE_TRADES trades -> success_weight / confidence_base
+- Confiança: mínimos quadrados recursivos (RLS) com fator de esquecimento
+  y = a*ai_conf + b*tech_conf + c*duração + d  -> O(features²) por trade
+
+Cada update grava uma nova versão (online_models.version); consumidores
+(ContinuousLearningEngine) comparam MAX(version) e recarregam só se mudou.
+Estado novo de um padrão parte dos agregados (XᵀX/Xᵀy, médias), então o
+primeiro update continua de onde o lote parou.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from brain_aggregates import N_FEATURES
+
+logger = logging.getLogger("BrainOnlineLearning")
+
+DB_PATH = 'sniper_brain.db'
+HALF_LIFE_TRADES = 30      # Meia-vida das médias EW (em trades do padrão)
+FORGETTING = 0.99          # λ do RLS (~100 trades de memória efetiva)
+P0 = 1000.0                # P inicial = P0·I (prior fraco)
+P_MAX_TRACE = 1e6          # Limite contra explosão de P sem excitação
+MIN_SAMPLES = 10           # Mínimo de trades para publicar pesos do padrão
+DEFAULT_COEFFS = [0.6, 0.3, 0.1, 0.1]   # Mesmo fallback do modelo em lote
+
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS online_models (
+            pattern TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            n INTEGER DEFAULT 0,
+            ew_win REAL,
+            ew_pnl REAL,
+            ew_score REAL,
+            theta_json TEXT,
+            p_json TEXT,
+            updated_at INTEGER
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_online_models_version ON online_models(version)')
+
+
+# ============================================================
+# ATUALIZAÇÕES (puras)
+# ============================================================
+def ew_alpha(half_life: float) -> float:
+    return 1.0 - 0.5 ** (1.0 / half_life)
+
+
+def rls_update(theta: np.ndarray, P: np.ndarray, x: np.ndarray, y: float,
+               lam: float = FORGETTING) -> Tuple[np.ndarray, np.ndarray]:
+    """Um passo de RLS com esquecimento exponencial (O(d²))"""
+    Px = P @ x
+    k = Px / (lam + x @ Px)
+    theta = theta + k * (y - x @ theta)
+    P = (P - np.outer(k, Px)) / lam
+    P = (P + P.T) / 2
+    trace = np.trace(P)
+    if trace > P_MAX_TRACE:
+        P *= P_MAX_TRACE / trace
+    return theta, P
+
+
+def pattern_weights(success_rate: float, avg_pnl: float, avg_score: float) -> Tuple[float, float]:
+    """
+    (success_weight, confidence_base) - ponto fixo das fórmulas do lote
+    (lá o peso anterior entra na mistura; aqui a suavização é a média EW)
+    """
+    normalized_pnl = max(0, min(2.0, 1.0 + avg_pnl / 5.0))
+    success_weight = max(0.2, min(2.0, success_rate * 0.4 + normalized_pnl * 0.3))
+    confidence_base = max(0.3, min(0.95, 0.5 + avg_score * 0.5))
+    return success_weight, confidence_base
+
+
+class OnlineLearner:
+    """
+    Escrita (dentro da transação do chamador, antes de PerformanceAggregates.record):
+        version = learner.update(conn, [trade, ...])     # trades de feedback_trade()
+
+    Leitura:
+        learner.latest_version()
+        version, weights, confidence_model = learner.load()
+    """
+
+    def __init__(self, db_path: str = DB_PATH, half_life: float = HALF_LIFE_TRADES,
+                 forgetting: float = FORGETTING, min_samples: int = MIN_SAMPLES):
+        self.db_path = db_path
+        self.alpha = ew_alpha(half_life)
+        self.forgetting = forgetting
+        self.min_samples = min_samples
+        try:
+            conn = sqlite3.connect(self.db_path)
+            init_tables(conn)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar modelo online: {e}")
+
+    # ============================================================
+    # ESCRITA
+    # ============================================================
+    def _seed(self, conn, pattern: str) -> dict:
+        """Estado inicial do padrão a partir dos agregados (ou prior)"""
+        state = {'n': 0, 'ew_win': 0.0, 'ew_pnl': 0.0, 'ew_score': 0.0,
+                 'theta': np.array(DEFAULT_COEFFS, dtype=np.float64), 'P': np.eye(N_FEATURES) * P0}
+        try:
+            row = conn.execute(
+                "SELECT n, wins, sum_pnl, sum_score, xtx_json, xty_json FROM performance_aggregates "
+                "WHERE scope = 'feedback' AND dimension = 'pattern' AND key = ?", (pattern,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row and row[0]:
+            n, wins, sum_pnl, sum_score, xtx_json, xty_json = row
+            state.update(n=n, ew_win=wins / n, ew_pnl=sum_pnl / n, ew_score=sum_score / n)
+            if xtx_json:
+                # Mesmo ótimo do lstsq do lote (com o prior P0 como regularização)
+                P = np.linalg.inv(np.array(json.loads(xtx_json)) + np.eye(N_FEATURES) / P0)
+                state['P'] = P
+                state['theta'] = P @ (np.array(json.loads(xty_json)) + np.array(DEFAULT_COEFFS) / P0)
+        return state
+
+    def _load_state(self, conn, pattern: str) -> dict:
+        row = conn.execute(
+            'SELECT n, ew_win, ew_pnl, ew_score, theta_json, p_json FROM online_models WHERE pattern = ?',
+            (pattern,)
+        ).fetchone()
+        if not row:
+            return self._seed(conn, pattern)
+        n, ew_win, ew_pnl, ew_score, theta_json, p_json = row
+        return {'n': n, 'ew_win': ew_win, 'ew_pnl': ew_pnl, 'ew_score': ew_score,
+                'theta': np.array(json.loads(theta_json)), 'P': np.array(json.loads(p_json))}
+
+    def update(self, conn, trades: Iterable[dict]) -> Optional[int]:
+        """Aplica os trades (não faz commit). Retorna a nova versão publicada."""
+        states: Dict[str, dict] = {}
+        a = self.alpha
+        for t in trades:
+            pattern = t.get('pattern')
+            if not pattern:
+                continue
+            s = states.get(pattern)
+            if s is None:
+                s = states[pattern] = self._load_state(conn, pattern)
+
+            pnl = float(t.get('pnl') or 0.0)
+            win = 1.0 if pnl > 0 else 0.0
+            score = float(t.get('score') or 0.0)
+            s['n'] += 1
+            # Média simples até ~1/α trades (sem viés do primeiro), depois EW
+            step = max(a, 1.0 / s['n'])
+            s['ew_win'] += step * (win - s['ew_win'])
+            s['ew_pnl'] += step * (pnl - s['ew_pnl'])
+            s['ew_score'] += step * (score - s['ew_score'])
+
+            feats = t.get('features')
+            if feats is not None:
+                x = np.append(np.asarray(feats, dtype=np.float64), 1.0)
+                s['theta'], s['P'] = rls_update(s['theta'], s['P'], x, score, self.forgetting)
+
+        if not states:
+            return None
+
+        version = conn.execute('SELECT COALESCE(MAX(version), 0) + 1 FROM online_models').fetchone()[0]
+        now = int(time.time())
+        conn.executemany('''
+            INSERT OR REPLACE INTO online_models
+            (pattern, version, n, ew_win, ew_pnl, ew_score, theta_json, p_json, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(pattern, version, s['n'], s['ew_win'], s['ew_pnl'], s['ew_score'],
+               json.dumps(s['theta'].tolist()), json.dumps(s['P'].tolist()), now)
+              for pattern, s in states.items()])
+        return version
+
+    # ============================================================
+    # LEITURA
+    # ============================================================
+    def latest_version(self) -> int:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute('SELECT COALESCE(MAX(version), 0) FROM online_models').fetchone()[0]
+        finally:
+            conn.close()
+
+    def load(self) -> Tuple[int, Dict[str, dict], Dict[str, dict]]:
+        """(versão, pesos por padrão, modelo de confiança por padrão) - formato do modelo em lote"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                'SELECT pattern, version, n, ew_win, ew_pnl, ew_score, theta_json, updated_at FROM online_models'
+            ).fetchall()
+        finally:
+            conn.close()
+
+        version, weights, confidence_model = 0, {}, {}
+        for pattern, v, n, ew_win, ew_pnl, ew_score, theta_json, updated_at in rows:
+            version = max(version, v)
+            if n < self.min_samples:
+                continue
+            success_weight, confidence_base = pattern_weights(ew_win, ew_pnl, ew_score)
+            weights[pattern] = {
+                'confidence_base': confidence_base,
+                'success_weight': success_weight,
+                'samples_count': n,
+                'success_rate': ew_win,
+                'avg_pnl': ew_pnl,
+                'last_updated': updated_at,
+            }
+            theta = json.loads(theta_json)
+            confidence_model[pattern] = {
+                'ai_coeff': theta[0],
+                'tech_coeff': theta[1],
+                'duration_coeff': theta[2],
+                'bias': theta[3],
+                'samples': n,
+            }
+        return version, weights, confidence_model
@@ -10,12 +10,86 @@ import time
 import logging
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+
+from brain_aggregates import PerformanceAggregates, init_tables as init_aggregate_tables, feedback_trade
+from brain_watermark import init_tables as init_watermark_tables
+from brain_online_learning import OnlineLearner
+
 logger = logging.getLogger("BrainPerformanceTracker")
 
+MATCH_WINDOW_SECONDS = 2 * 60 * 60   # Predição até ±2h da abertura do trade
+SQL_MAX_VARS = 500                   # Símbolos por cláusula IN (limite de variáveis do SQLite)
+
+
+# ============================================================
+# MATCHING EM LOTE (trade fechado -> detecção mais próxima)
+# ============================================================
+def normalize_symbol(symbol):
+    """'BTCUSDT' (Bybit) / 'BTC/USDT:USDT' (ccxt) -> 'BTC/USDT' (raw_samples)"""
+    symbol = (symbol or '').split(':')[0]
+    if '/' not in symbol and symbol.endswith('USDT'):
+        symbol = symbol[:-4] + '/USDT'
+    return symbol
+
+
+def ensure_detection_index(conn):
+    """Índice composto que sustenta o as-of join (symbol + tempo de detecção)"""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='raw_samples'").fetchone()
+    if exists:
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_raw_samples_symbol_detection '
+                     'ON raw_samples(symbol, timestamp_detection)')
+
+
+def load_detections(conn, symbols, start, end, where="1=1", columns="id, pattern_detected, direction, ai_verdict, ai_confidence"):
+    """
+    Candidatas de raw_samples para vários símbolos num intervalo de tempo
+    (range scan em idx_raw_samples_symbol_detection, uma consulta por bloco de símbolos)
+    """
+    symbols = sorted(set(symbols))
+    frames = []
+    for i in range(0, len(symbols), SQL_MAX_VARS):
+        chunk = symbols[i:i + SQL_MAX_VARS]
+        marks = ','.join('?' * len(chunk))
+        frames.append(pd.read_sql_query(
+            f"SELECT symbol, timestamp_detection, {columns} FROM raw_samples "
+            f"WHERE symbol IN ({marks}) AND timestamp_detection BETWEEN ? AND ? AND {where}",
+            conn, params=[*chunk, int(start), int(end)]
+        ))
+    if not frames:
+        return pd.DataFrame(columns=['symbol', 'timestamp_detection'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def match_nearest_detections(trades, detections, time_col, window=MATCH_WINDOW_SECONDS):
+    """
+    As-of join vetorizado: para cada trade, a detecção do mesmo símbolo mais
+    próxima de trades[time_col] dentro de ±window segundos (NaN se não houver).
+    Preserva a ordem original dos trades.
+    """
+    trades = trades.copy()
+    trades['_order'] = np.arange(len(trades))
+    trades[time_col] = trades[time_col].astype('int64')
+    if detections.empty:
+        return trades.sort_values('_order').drop(columns='_order')
+
+    detections = detections.dropna(subset=['timestamp_detection']).copy()
+    detections['timestamp_detection'] = detections['timestamp_detection'].astype('int64')
+    merged = pd.merge_asof(
+        trades.sort_values(time_col), detections.sort_values('timestamp_detection'),
+        left_on=time_col, right_on='timestamp_detection', by='symbol',
+        direction='nearest', tolerance=int(window),
+    )
+    return merged.sort_values('_order').drop(columns='_order').reset_index(drop=True)
+
 class BrainPerformanceTracker:
     def __init__(self, db_path='sniper_brain.db'):
         self.db_path = db_path
         self._init_performance_tables()
+        self.aggregates = PerformanceAggregates(db_path)
+        self.online = OnlineLearner(db_path)
+        self._migrate_aggregates()
     
     def _init_performance_tables(self):
         """Cria tabelas de performance se não existirem"""
@@ -77,6 +151,9 @@ class BrainPerformanceTracker:
             c.execute('CREATE INDEX IF NOT EXISTS idx_performance_symbol ON trade_performance(symbol)')
             c.execute('CREATE INDEX IF NOT EXISTS idx_performance_pattern ON trade_performance(pattern_detected)')
             c.execute('CREATE INDEX IF NOT EXISTS idx_performance_created ON trade_performance(created_at)')
+            ensure_detection_index(conn)
+            init_aggregate_tables(conn)
+            init_watermark_tables(conn)
             
             conn.commit()
             conn.close()
@@ -85,97 +162,134 @@ class BrainPerformanceTracker:
         except Exception as e:
             logger.error(f"❌ Erro ao inicializar tabelas: {e}")
     
+    def _migrate_aggregates(self):
+        """Primeira execução com agregados: preenche a partir do histórico existente"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                has_aggregates = conn.execute(
+                    "SELECT 1 FROM performance_aggregates WHERE scope = 'feedback' LIMIT 1").fetchone()
+                has_feedback = conn.execute('SELECT 1 FROM trade_performance LIMIT 1').fetchone()
+                if has_feedback and not has_aggregates:
+                    self.aggregates.rebuild_from_trade_performance(conn)
+                    for (pattern,) in conn.execute(
+                            'SELECT DISTINCT pattern_detected FROM trade_performance WHERE pattern_detected IS NOT NULL').fetchall():
+                        self._update_pattern_metrics(conn.cursor(), pattern)
+                    conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao migrar agregados de performance: {e}")
+
     def match_prediction_with_result(self, closed_trade_data):
         """
         Conecta um trade fechado com a predição original da IA
         closed_trade_data: dados do trade fechado (symbol, pnl, opened_at, closed_at, etc)
         """
+        return self.match_predictions_batch([closed_trade_data]) > 0
+
+    def match_predictions_batch(self, closed_trades, window=MATCH_WINDOW_SECONDS):
+        """
+        Conecta trades fechados com as predições da IA numa passada:
+        carrega as detecções PROCESSED dos símbolos no intervalo coberto pelos
+        trades (±window) e faz um as-of join por símbolo (mais próxima da abertura).
+        Retorna quantos feedbacks foram registrados.
+        """
+        if not closed_trades:
+            return 0
         try:
+            trades = pd.DataFrame({
+                'symbol': [normalize_symbol(t.get('symbol', '')) for t in closed_trades],
+                'opened_at': [int(t.get('opened_at', 0) or 0) // 1000 for t in closed_trades],  # Bybit usa milissegundos
+                'closed_at': [int(t.get('closed_at', 0) or 0) // 1000 for t in closed_trades],
+                'pnl': [float(t.get('pnl', 0) or 0) for t in closed_trades],
+            })
+
             conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
-            
-            symbol = closed_trade_data.get('symbol', '').replace('USDT', '/USDT')
-            opened_at = closed_trade_data.get('opened_at', 0) // 1000  # Bybit usa milissegundos
-            closed_at = closed_trade_data.get('closed_at', 0) // 1000
-            actual_pnl = float(closed_trade_data.get('pnl', 0))
-            
-            # Busca predições da IA próximas ao horário de abertura (±2h)
-            time_window = 2 * 60 * 60  # 2 horas em segundos
-            
-            c.execute('''
-                SELECT id, pattern_detected, direction, ai_confidence, timestamp_detection
-                FROM raw_samples 
-                WHERE symbol = ? 
-                AND timestamp_detection BETWEEN ? AND ?
-                AND status = 'PROCESSED'
-                ORDER BY ABS(timestamp_detection - ?) ASC
-                LIMIT 1
-            ''', (symbol, opened_at - time_window, opened_at + time_window, opened_at))
-            
-            prediction = c.fetchone()
-            
-            if prediction:
-                brain_sample_id, pattern, ai_direction, ai_conf, pred_time = prediction
-                
-                # Calcula métricas de performance
-                actual_direction = "PROFIT" if actual_pnl > 0 else "LOSS"
-                success_binary = 1 if actual_pnl > 0 else 0
-                
-                # Score de performance (0-1) baseado em P&L e direção
-                if ai_direction == "LONG" and actual_pnl > 0:
-                    performance_score = min(1.0, (actual_pnl / 10.0) + 0.5)  # Normaliza P&L
-                elif ai_direction == "SHORT" and actual_pnl > 0:
-                    performance_score = min(1.0, (actual_pnl / 10.0) + 0.5)
-                else:
-                    performance_score = max(0.0, 0.5 - abs(actual_pnl / 10.0))
-                
-                trade_duration = (closed_at - opened_at) / 3600.0  # horas
-                
-                # Salva feedback de performance
-                c.execute('''
-                    INSERT INTO trade_performance 
-                    (brain_sample_id, symbol, pattern_detected, ai_prediction, ai_confidence,
-                     actual_pnl, actual_direction, success_binary, performance_score,
-                     trade_duration_hours, opened_at, closed_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (brain_sample_id, symbol, pattern, ai_direction, ai_conf,
-                      actual_pnl, actual_direction, success_binary, performance_score,
-                      trade_duration, opened_at, closed_at))
-                
-                # Atualiza métricas agregadas do padrão
+            detections = load_detections(
+                conn, trades['symbol'], trades['opened_at'].min() - window, trades['opened_at'].max() + window,
+                where="status = 'PROCESSED'", columns="id, timeframe, pattern_detected, direction, ai_confidence"
+            )
+            matched = match_nearest_detections(trades, detections, 'opened_at', window)
+
+            if 'id' not in matched:
+                matched['id'] = np.nan
+            found = matched.dropna(subset=['id'])
+            misses = matched[matched['id'].isna()]
+            if len(misses) == 1:
+                miss = misses.iloc[0]
+                logger.warning(f"⚠️ Nenhuma predição encontrada para {miss['symbol']} em {datetime.fromtimestamp(miss['opened_at'])}")
+            elif len(misses) > 1:
+                logger.warning(f"⚠️ Nenhuma predição encontrada para {len(misses)}/{len(matched)} trades "
+                               f"({', '.join(sorted(misses['symbol'].unique())[:10])})")
+            if found.empty:
+                return 0
+
+            # Métricas de performance (vetorizado)
+            pnl = found['pnl'].to_numpy()
+            direcional = found['direction'].isin(['LONG', 'SHORT']).to_numpy()
+            # Score de performance (0-1) baseado em P&L e direção
+            score = np.where(direcional & (pnl > 0),
+                             np.minimum(1.0, pnl / 10.0 + 0.5),       # Normaliza P&L
+                             np.maximum(0.0, 0.5 - np.abs(pnl / 10.0)))
+            duration = (found['closed_at'] - found['opened_at']).to_numpy() / 3600.0  # horas
+
+            rows = [
+                (int(r.id), r.symbol, r.pattern_detected, r.direction, r.ai_confidence,
+                 float(p), "PROFIT" if p > 0 else "LOSS", int(p > 0), float(sc), float(d),
+                 int(r.opened_at), int(r.closed_at))
+                for r, p, sc, d in zip(found.itertuples(index=False), pnl, score, duration)
+            ]
+            # Salva feedback de performance
+            c.executemany('''
+                INSERT INTO trade_performance 
+                (brain_sample_id, symbol, pattern_detected, ai_prediction, ai_confidence,
+                 actual_pnl, actual_direction, success_binary, performance_score,
+                 trade_duration_hours, opened_at, closed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+            # Modelo online + agregados incrementais (mesma transação) e métricas (uma vez por padrão)
+            feedbacks = [
+                feedback_trade(r[2], r[1], tf, r[11], None, r[5], r[8], r[9], r[4], r[4])
+                for r, tf in zip(rows, found['timeframe'])
+            ]
+            online_version = self.online.update(conn, feedbacks)
+            self.aggregates.record(conn, feedbacks)
+            for pattern in found['pattern_detected'].dropna().unique():
                 self._update_pattern_metrics(c, pattern)
-                
-                conn.commit()
-                logger.info(f"🎯 Feedback registrado: {symbol} {pattern} → P&L: {actual_pnl:.3f} (Score: {performance_score:.2f})")
-                return True
-            else:
-                logger.warning(f"⚠️ Nenhuma predição encontrada para {symbol} em {datetime.fromtimestamp(opened_at)}")
-                return False
-                
+
+            conn.commit()
+            for row in rows:
+                logger.info(f"🎯 Feedback registrado: {row[1]} {row[2]} → P&L: {row[5]:.3f} (Score: {row[8]:.2f})")
+            if online_version:
+                logger.info(f"📡 Modelo online publicado: versão {online_version}")
+            return len(rows)
+
         except Exception as e:
             logger.error(f"❌ Erro ao processar feedback: {e}")
-            return False
+            return 0
         finally:
             if 'conn' in locals():
                 conn.close()
     
     def _update_pattern_metrics(self, cursor, pattern_name):
-        """Atualiza métricas agregadas de um padrão específico"""
+        """Atualiza métricas de um padrão a partir dos agregados incrementais (O(1))"""
         try:
-            # Calcula estatísticas do padrão
+            # Estatísticas do padrão (mantidas por PerformanceAggregates.record)
             cursor.execute('''
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(success_binary) as successes,
-                    AVG(actual_pnl) as avg_pnl,
-                    AVG(trade_duration_hours) as avg_duration,
-                    AVG(performance_score) as avg_score
-                FROM trade_performance 
-                WHERE pattern_detected = ?
+                SELECT n, wins, sum_pnl, sum_duration
+                FROM performance_aggregates
+                WHERE scope = 'feedback' AND dimension = 'pattern' AND key = ?
             ''', (pattern_name,))
             
             stats = cursor.fetchone()
-            total, successes, avg_pnl, avg_duration, avg_score = stats
+            if not stats:
+                return
+            total, successes, sum_pnl, sum_duration = stats
+            avg_pnl = sum_pnl / total if total else 0
+            avg_duration = sum_duration / total if total else 0
             
             if total > 0:
                 success_rate = successes / total
@@ -262,7 +376,17 @@ class BrainPerformanceTracker:
                 feedback_data['closed_at']
             ))
             
-            # Atualizar métricas do padrão
+            # Agregados incrementais + métricas do padrão
+            c.execute('SELECT timeframe, ai_confidence FROM raw_samples WHERE id = ?', (feedback_data['brain_sample_id'],))
+            sample = c.fetchone() or (None, None)
+            feedbacks = [feedback_trade(
+                feedback_data['pattern_detected'], feedback_data['symbol'], sample[0],
+                feedback_data['closed_at'], None, feedback_data['actual_pnl'],
+                feedback_data['performance_score'], feedback_data['trade_duration_hours'],
+                None, sample[1]
+            )]
+            self.online.update(conn, feedbacks)
+            self.aggregates.record(conn, feedbacks)
             self._update_pattern_metrics(c, feedback_data['pattern_detected'])
             
             conn.commit()
@@ -418,18 +542,8 @@ class BrainPerformanceTracker:
             conn = sqlite3.connect(self.db_path)
             c = conn.cursor()
             
-            # Estatísticas gerais
-            c.execute('''
-                SELECT 
-                    COUNT(*) as total_feedback,
-                    SUM(success_binary) as total_successes,
-                    AVG(actual_pnl) as avg_pnl,
-                    SUM(actual_pnl) as total_pnl,
-                    AVG(performance_score) as avg_score
-                FROM trade_performance
-            ''')
-            
-            general_stats = c.fetchone()
+            # Estatísticas gerais (agregado global, O(1))
+            geral = self.aggregates.get('all') or {}
             
             # Top padrões por performance
             c.execute('''
@@ -445,11 +559,11 @@ class BrainPerformanceTracker:
             
             return {
                 'general': {
-                    'total_feedback': general_stats[0] or 0,
-                    'success_rate': (general_stats[1] or 0) / max(1, general_stats[0] or 1),
-                    'avg_pnl': general_stats[2] or 0,
-                    'total_pnl': general_stats[3] or 0,
-                    'avg_performance_score': general_stats[4] or 0
+                    'total_feedback': geral.get('n', 0),
+                    'success_rate': geral.get('win_rate', 0),
+                    'avg_pnl': geral.get('avg_pnl', 0),
+                    'total_pnl': geral.get('total_pnl', 0),
+                    'avg_performance_score': geral.get('avg_score', 0)
                 },
                 'top_patterns': [
                     {
@@ -472,10 +586,7 @@ class BrainPerformanceTracker:
             with open(closed_trades_file, 'r') as f:
                 data = json.load(f)
             
-            processed = 0
-            for trade in data.get('trades', []):
-                if self.match_prediction_with_result(trade):
-                    processed += 1
+            processed = self.match_predictions_batch(data.get('trades', []))
             
             logger.info(f"✅ Processados {processed} feedbacks de performance")
             return processed
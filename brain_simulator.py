@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+🧠 BRAIN SIMULATOR - Replay histórico de trades para o treinamento offline
+
+Substitui os resultados inventados (`random.uniform`) do BrainTrainer: para cada
+detecção em `raw_samples`, reconstrói os candles posteriores a partir das
+amostras seguintes do mesmo par/timeframe e percorre esses candles com as
+mesmas regras do monitor + ExecutorBybit:
+
+- Gatilho na neckline (SHORT: preço <= neckline | LONG: preço >= neckline)
+- Stop atingido antes do gatilho invalida o padrão (sem trade)
+- Saída no stop loss ou no target
+- Break-Even ao atingir 50% da distância até o alvo (SL -> entrada ± 0.2%)
+
+Todo o lote é simulado de uma vez com arrays NumPy (amostras x candles).
+Em candle ambíguo (stop e alvo no mesmo candle) o stop vence.
+"""
+
+import json
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from lib_risk import BE_TRIGGER_RATIO, BE_STOP_OFFSET   # Mesmas regras do ExecutorBybit
+
+logger = logging.getLogger("BrainSimulator")
+DB_NAME = 'sniper_brain.db'
+
+MAX_FUTURE_CANDLES = 500
+
+TIMEFRAME_MINUTES = {
+    '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30,
+    '1h': 60, '2h': 120, '4h': 240, '6h': 360, '12h': 720, '1d': 1440
+}
+
+# Códigos de resultado
+OUTCOME_NO_DATA = 'NO_DATA'            # Sem candles futuros ou sem níveis
+OUTCOME_NO_TRIGGER = 'NO_TRIGGER'      # Neckline não rompida no horizonte
+OUTCOME_INVALIDATED = 'INVALIDATED'    # Stop atingido antes da entrada
+OUTCOME_STOP = 'STOP_LOSS'
+OUTCOME_BREAKEVEN = 'BREAK_EVEN'
+OUTCOME_TARGET = 'TARGET'
+OUTCOME_OPEN = 'OPEN'                  # Ainda aberto no fim dos dados (marcado no close)
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """Índice do primeiro True por linha (-1 se nenhum)"""
+    idx = np.argmax(mask, axis=1)
+    return np.where(mask.any(axis=1), idx, -1)
+
+
+def simulate_batch(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                   direction_short: np.ndarray, neckline: np.ndarray,
+                   target: np.ndarray, stop_loss: np.ndarray,
+                   tf_minutes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Simula N trades em paralelo.
+
+    highs/lows/closes: (N, H) candles após a detecção, preenchidos com NaN
+    direction_short: (N,) bool | neckline/target/stop_loss/tf_minutes: (N,)
+
+    SHORT é simulado como LONG no espaço de preços negados, então uma única
+    rotina cobre os dois lados.
+    """
+    n, horizon = highs.shape
+    sign = np.where(direction_short, -1.0, 1.0)[:, None]
+
+    # Espaço "long": para SHORT, high' = -low e low' = -high
+    hi = np.where(sign > 0, highs, -lows)
+    lo = np.where(sign > 0, lows, -highs)
+    cl = closes * sign
+    neck = neckline * sign[:, 0]
+    tgt = target * sign[:, 0]
+    stp = stop_loss * sign[:, 0]
+
+    valid = ~np.isnan(hi)
+    bars = np.arange(horizon)[None, :]
+
+    # 1. Gatilho x invalidação antes da entrada (stop vence no mesmo candle)
+    trigger_idx = _first_true(valid & (hi >= neck[:, None]))
+    invalid_idx = _first_true(valid & (lo <= stp[:, None]))
+    invalidated = (invalid_idx >= 0) & ((trigger_idx < 0) | (invalid_idx <= trigger_idx))
+    entered = (trigger_idx >= 0) & ~invalidated
+
+    entry = neck
+    be_mult = np.where(direction_short, 1 - BE_STOP_OFFSET, 1 + BE_STOP_OFFSET)
+    be_stop = entry * be_mult
+    be_trigger = entry + np.abs(tgt - entry) * BE_TRIGGER_RATIO
+
+    # 2. Gestão após o candle de entrada
+    in_trade = valid & entered[:, None] & (bars > trigger_idx[:, None])
+    be_idx = _first_true(in_trade & (hi >= be_trigger[:, None]))
+    be_active = (be_idx[:, None] >= 0) & (bars > be_idx[:, None])
+    stop_path = np.where(be_active, be_stop[:, None], stp[:, None])
+
+    hit_stop = in_trade & (lo <= stop_path)
+    hit_target = in_trade & (hi >= tgt[:, None])
+    exit_mask = hit_stop | hit_target
+    exit_idx = _first_true(exit_mask)
+
+    rows = np.arange(n)
+    has_exit = exit_idx >= 0
+    safe_exit = np.where(has_exit, exit_idx, 0)
+    stop_at_exit = has_exit & hit_stop[rows, safe_exit]
+    exit_price = np.where(stop_at_exit, stop_path[rows, safe_exit], tgt)
+
+    # Sem saída no horizonte: marca no último close disponível
+    last_idx = np.maximum(valid.sum(axis=1) - 1, 0)
+    still_open = entered & ~has_exit
+    exit_price = np.where(still_open, cl[rows, last_idx], exit_price)
+    exit_idx = np.where(still_open, last_idx, exit_idx)
+
+    # Excursões dentro do trade (entrada até a saída, inclusive)
+    span = in_trade & (bars <= exit_idx[:, None])
+    abs_entry = np.abs(entry)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        worst = np.where(span, lo, np.inf).min(axis=1)
+        best = np.where(span, hi, -np.inf).max(axis=1)
+        profit_pct = (exit_price - entry) / abs_entry * 100
+        max_drawdown = np.clip((entry - worst) / abs_entry * 100, 0, None)
+        max_favorable = np.clip((best - entry) / abs_entry * 100, 0, None)
+
+    duration_hours = (exit_idx - trigger_idx) * tf_minutes / 60.0
+
+    outcome = np.full(n, OUTCOME_NO_TRIGGER, dtype=object)
+    outcome[invalidated] = OUTCOME_INVALIDATED
+    outcome[entered & stop_at_exit] = OUTCOME_STOP
+    outcome[entered & stop_at_exit & be_active[rows, safe_exit]] = OUTCOME_BREAKEVEN
+    outcome[entered & has_exit & ~stop_at_exit] = OUTCOME_TARGET
+    outcome[still_open] = OUTCOME_OPEN
+
+    zero = ~entered
+    return {
+        'outcome': outcome,
+        'profit_pct': np.where(zero, 0.0, profit_pct),
+        'duration_hours': np.where(zero, 0.0, duration_hours),
+        'max_drawdown': np.where(zero, 0.0, max_drawdown),
+        'max_favorable': np.where(zero, 0.0, max_favorable),
+        'entry_index': np.where(entered, trigger_idx, -1),
+        'exit_index': np.where(entered, exit_idx, -1),
+    }
+
+
+class TradeSimulator:
+    """
+    Replay determinístico das amostras do cérebro.
+
+    - load_history(): monta a série contínua de candles por (symbol, timeframe)
+    - simulate_samples(): anexa 'simulation' a cada amostra com resultado
+    - result_for_action(): converte o resultado para a ação escolhida pelo Q-learning
+    """
+
+    def __init__(self, db_path: str = DB_NAME, max_future_candles: int = MAX_FUTURE_CANDLES):
+        self.db_path = db_path
+        self.max_future_candles = max_future_candles
+        self.history: Dict[tuple, np.ndarray] = {}
+        self._analista = None
+
+    # ============================================================
+    # HISTÓRICO DE CANDLES
+    # ============================================================
+    def load_history(self, symbols: Optional[List[str]] = None) -> int:
+        """
+        Une os OHLCV de todas as amostras (cada uma guarda os últimos 100 candles)
+        numa série única por par/timeframe, deduplicada por timestamp.
+        """
+        merged: Dict[tuple, Dict[int, list]] = {}
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            query = "SELECT symbol, timeframe, ohlcv_json FROM raw_samples WHERE ohlcv_json IS NOT NULL"
+            params = []
+            if symbols:
+                query += f" AND symbol IN ({','.join('?' * len(symbols))})"
+                params = list(symbols)
+            cursor.execute(query, params)
+
+            for symbol, timeframe, ohlcv_json in cursor:
+                try:
+                    candles = json.loads(ohlcv_json)
+                except (TypeError, ValueError):
+                    continue
+                series = merged.setdefault((symbol, timeframe), {})
+                for c in candles:
+                    # Candles mais recentes sobrescrevem (último candle pode estar em formação)
+                    series[int(c[0])] = c[:6]
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar histórico de candles: {e}")
+
+        for key, series in merged.items():
+            self.history[key] = np.array([series[ts] for ts in sorted(series)], dtype=float)
+
+        logger.info(f"📊 Histórico carregado: {len(self.history)} séries")
+        return len(self.history)
+
+    def set_history(self, symbol: str, timeframe: str, candles: list):
+        """Registra uma série diretamente (usado em testes e no backtester)"""
+        self.history[(symbol, timeframe)] = np.asarray(candles, dtype=float)
+
+    def _future_candles(self, sample: Dict) -> Optional[np.ndarray]:
+        series = self.history.get((sample.get('symbol'), sample.get('timeframe')))
+        ohlcv = sample.get('ohlcv') or []
+        if series is None or not len(series) or not ohlcv:
+            return None
+        last_ts = ohlcv[-1][0]
+        start = np.searchsorted(series[:, 0], last_ts, side='right')
+        future = series[start:start + self.max_future_candles]
+        return future if len(future) else None
+
+    # ============================================================
+    # NÍVEIS DO PADRÃO
+    # ============================================================
+    def _levels(self, sample: Dict) -> Optional[tuple]:
+        """(neckline, target, stop_loss) da amostra ou recalculados pelo AnalistaTecnico"""
+        if all(sample.get(k) for k in ('neckline', 'target', 'stop_loss')):
+            return float(sample['neckline']), float(sample['target']), float(sample['stop_loss'])
+
+        ohlcv = sample.get('ohlcv') or []
+        if len(ohlcv) < 30:
+            return None
+
+        if self._analista is None:
+            from lib_padroes import AnalistaTecnico
+            self._analista = AnalistaTecnico()
+
+        padrao = self._analista.analisar_par(sample.get('symbol', ''), ohlcv)
+        if not padrao or padrao.direcao != sample.get('direction'):
+            return None
+        return padrao.neckline_price, padrao.target_price, padrao.stop_loss_price
+
+    # ============================================================
+    # SIMULAÇÃO
+    # ============================================================
+    def simulate_samples(self, samples: List[Dict]) -> List[Dict]:
+        """
+        Simula o lote inteiro e grava o resultado em sample['simulation'].
+        Retorna só as amostras que têm resultado (níveis + candles futuros).
+        """
+        if not self.history:
+            self.load_history(sorted({s.get('symbol') for s in samples if s.get('symbol')}))
+
+        ready, futures, levels = [], [], []
+        for sample in samples:
+            if sample.get('direction') not in ('LONG', 'SHORT'):
+                continue
+            future = self._future_candles(sample)
+            if future is None:
+                continue
+            lv = self._levels(sample)
+            if lv is None:
+                continue
+            ready.append(sample)
+            futures.append(future)
+            levels.append(lv)
+
+        if not ready:
+            logger.warning("⚠️ Nenhuma amostra com candles futuros para simular")
+            return []
+
+        n = len(ready)
+        horizon = max(len(f) for f in futures)
+        highs = np.full((n, horizon), np.nan)
+        lows = np.full((n, horizon), np.nan)
+        closes = np.full((n, horizon), np.nan)
+        for i, f in enumerate(futures):
+            highs[i, :len(f)] = f[:, 2]
+            lows[i, :len(f)] = f[:, 3]
+            closes[i, :len(f)] = f[:, 4]
+
+        lv = np.array(levels, dtype=float)
+        result = simulate_batch(
+            highs, lows, closes,
+            direction_short=np.array([s['direction'] == 'SHORT' for s in ready]),
+            neckline=lv[:, 0], target=lv[:, 1], stop_loss=lv[:, 2],
+            tf_minutes=np.array([TIMEFRAME_MINUTES.get(s.get('timeframe'), 15) for s in ready], dtype=float)
+        )
+
+        for i, sample in enumerate(ready):
+            sample['simulation'] = {
+                'outcome': result['outcome'][i],
+                'profit_pct': float(result['profit_pct'][i]),
+                'duration_hours': float(result['duration_hours'][i]),
+                'max_drawdown': float(result['max_drawdown'][i]),
+                'max_favorable': float(result['max_favorable'][i]),
+            }
+
+        logger.info(f"✅ {n}/{len(samples)} amostras simuladas")
+        return ready
+
+    @staticmethod
+    def result_for_action(sample: Dict, action: str) -> Optional[Dict]:
+        """
+        Resultado do trade para a ação do Q-learning.
+        Ação contra a direção do padrão recebe o P&L espelhado.
+        """
+        sim = sample.get('simulation')
+        if sim is None:
+            return None
+
+        if action == 'SKIP' or sim['outcome'] in (OUTCOME_NO_TRIGGER, OUTCOME_INVALIDATED):
+            return {'profit_pct': 0, 'duration_hours': 0, 'max_drawdown': 0}
+
+        direction = sample.get('direction')
+        action_matches = (
+            (action == 'ENTER_LONG' and direction == 'LONG') or
+            (action == 'ENTER_SHORT' and direction == 'SHORT')
+        )
+        if action_matches:
+            return {
+                'profit_pct': sim['profit_pct'],
+                'duration_hours': sim['duration_hours'],
+                'max_drawdown': sim['max_drawdown']
+            }
+
+        return {
+            'profit_pct': -sim['profit_pct'],
+            'duration_hours': sim['duration_hours'],
+            'max_drawdown': sim['max_favorable']
+        }
+
+
+if __name__ == "__main__":
+    import time
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    print("🧠 TESTE DO BRAIN SIMULATOR")
+    print("=" * 50)
+
+    # Lote sintético: 10.000 trades LONG com random walk
+    rng = np.random.default_rng(42)
+    n, horizon = 10000, 300
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, (n, horizon)), axis=1)
+    highs = closes + rng.uniform(0, 0.5, (n, horizon))
+    lows = closes - rng.uniform(0, 0.5, (n, horizon))
+
+    start = time.perf_counter()
+    res = simulate_batch(
+        highs, lows, closes,
+        direction_short=np.zeros(n, dtype=bool),
+        neckline=np.full(n, 101.0), target=np.full(n, 105.0), stop_loss=np.full(n, 98.0),
+        tf_minutes=np.full(n, 15.0)
+    )
+    elapsed = time.perf_counter() - start
+
+    outcomes, counts = np.unique(res['outcome'].astype(str), return_counts=True)
+    for o, c in zip(outcomes, counts):
+        print(f"  {o}: {c}")
+    print(f"\n⏱️ {n} trades simulados em {elapsed:.3f}s")
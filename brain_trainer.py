@@ -16,20 +16,44 @@ import random
 from collections import deque
 import math
 
+from brain_simulator import TradeSimulator
+from lib_indicadores import SMA, RollingRange
+
 # Configuração
 logger = logging.getLogger("BrainTrainer")
 DB_NAME = 'sniper_brain.db'
 MODEL_PATH = 'brain_models/q_learning_model.pkl'
+CONFIG_PATH = 'brain_config.json'
+
+# Pesos da recompensa (seção "rewards" do brain_config.json)
+DEFAULT_REWARDS = {
+    'profit_weight': 1.0,
+    'duration_penalty': 0.5,
+    'drawdown_penalty': 2.0,
+    'quick_win_bonus': 1.0
+}
+
+
+def load_reward_config(path: str = CONFIG_PATH) -> Dict:
+    """Lê os pesos de recompensa do brain_config.json (fallback: DEFAULT_REWARDS)"""
+    rewards = dict(DEFAULT_REWARDS)
+    try:
+        with open(path, 'r') as f:
+            rewards.update(json.load(f).get('rewards', {}))
+    except Exception as e:
+        logger.debug(f"brain_config.json indisponível, usando rewards padrão: {e}")
+    return rewards
 
 class QLearningBrain:
     """
     Sistema de Q-Learning avançado para trading
     """
     
-    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.3):
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.3, rewards: Optional[Dict] = None, load: bool = True):
         self.alpha = alpha  # Taxa de aprendizado
         self.gamma = gamma  # Fator de desconto
         self.epsilon = epsilon  # Exploração vs Exploração
+        self.rewards = rewards or load_reward_config()
         
         # Q-table: estado -> ação -> valor
         self.q_table = {}
@@ -47,7 +71,8 @@ class QLearningBrain:
         }
         
         # Carregar modelo se existir
-        self.load_model()
+        if load:
+            self.load_model()
     
     def _state_to_key(self, state: Dict) -> str:
         """Converte estado para chave da Q-table"""
@@ -155,21 +180,23 @@ class QLearningBrain:
         profit_pct = trade_result.get('profit_pct', 0)
         duration_hours = trade_result.get('duration_hours', 1)
         
+        weights = self.rewards
+        
         # Recompensa base: profit percentual
-        reward = profit_pct
+        reward = profit_pct * weights['profit_weight']
         
         # Penalizar trades longos (oportunidade custo)
         if duration_hours > 24:
-            reward -= 0.5
+            reward -= weights['duration_penalty']
         
         # Bônus para trades rápidos e lucrativos
         if profit_pct > 2 and duration_hours < 6:
-            reward += 1.0
+            reward += weights['quick_win_bonus']
         
         # Penalizar grandes drawdowns
         max_drawdown = trade_result.get('max_drawdown', 0)
         if max_drawdown > 5:
-            reward -= 2.0
+            reward -= weights['drawdown_penalty']
         
         return reward
     
@@ -243,6 +270,7 @@ class BrainTrainer:
     def __init__(self):
         self.brain = QLearningBrain()
         self.db_conn = None
+        self.simulator = TradeSimulator(DB_NAME)
         
     def connect_db(self):
         """Conecta ao database"""
@@ -332,13 +360,13 @@ class BrainTrainer:
             try:
                 closes = [c[4] for c in ohlcv[-20:]]  # Últimos 20 closes
                 
-                # Médias móveis
-                sma10 = sum(closes[-10:]) / 10 if len(closes) >= 10 else closes[-1]
-                sma20 = sum(closes[-20:]) / 20
+                # Médias móveis (mesma implementação dos indicadores ao vivo)
+                sma10 = SMA.from_array(closes, 10).value
+                sma20 = SMA.from_array(closes, 20).value
                 
                 state.update({
                     'price_trend': 'UP' if closes[-1] > sma10 else 'DOWN',
-                    'volatility': (max(closes) - min(closes)) / min(closes) * 100,
+                    'volatility': RollingRange.from_array(closes, 20).value,
                     'sma_distance': (closes[-1] - sma20) / sma20 * 100
                 })
             except:
@@ -346,46 +374,15 @@ class BrainTrainer:
         
         return state
     
-    def simulate_trade(self, sample: Dict, action: str) -> Dict:
+    def simulate_trade(self, sample: Dict, action: str) -> Optional[Dict]:
         """
-        Simula resultado do trade (para treinamento offline)
+        Resultado do trade via replay dos candles históricos (brain_simulator)
+        Retorna None se a amostra não tem candles futuros/níveis para simular
         """
-        # Em produção real, isso viria do banco de dados de trades reais
-        # Por enquanto, simulamos baseado na confiança da AI
-        
-        ai_confidence = sample.get('ai_confidence', 0.5)
-        direction = sample.get('direction', 'NEUTRAL')
-        
-        # Baseado em dados históricos (aproximação)
-        if action == 'SKIP':
-            return {'profit_pct': 0, 'duration_hours': 0, 'max_drawdown': 0}
-        
-        # Verificar se ação combina com direção
-        action_matches = (
-            (action == 'ENTER_LONG' and direction == 'LONG') or
-            (action == 'ENTER_SHORT' and direction == 'SHORT')
-        )
-        
-        if not action_matches:
-            # Entrar contra a direção do padrão geralmente dá prejuízo
-            return {'profit_pct': -random.uniform(1, 5), 'duration_hours': random.uniform(2, 48), 'max_drawdown': random.uniform(3, 10)}
-        
-        # Simular resultado baseado na confiança da AI
-        if ai_confidence > 0.7:
-            # Alta confiança → maior chance de lucro
-            profit = random.uniform(0.5, 5.0) if random.random() < 0.7 else random.uniform(-2, -0.5)
-        elif ai_confidence > 0.5:
-            # Média confiança → resultado misto
-            profit = random.uniform(-1, 3) if random.random() < 0.6 else random.uniform(-3, -0.5)
-        else:
-            # Baixa confiança → maior chance de prejuízo
-            profit = random.uniform(-3, 1) if random.random() < 0.4 else random.uniform(-5, -1)
+        if 'simulation' not in sample:
+            self.simulator.simulate_samples([sample])
         
-        return {
-            'profit_pct': profit,
-            'duration_hours': random.uniform(1, 24),
-            'max_drawdown': abs(profit * random.uniform(0.5, 2))
-        }
+        return self.simulator.result_for_action(sample, action)
     
     def train_offline(self, episodes=100):
         """
@@ -398,6 +395,12 @@ class BrainTrainer:
             logger.warning("❌ Nenhum dado para treinamento")
             return
         
+        # Replay de todo o lote de uma vez; amostras sem resultado ficam de fora
+        training_data = self.simulator.simulate_samples(training_data)
+        if not training_data:
+            logger.warning("❌ Nenhuma amostra com resultado simulável")
+            return
+        
         for episode in range(episodes):
             episode_reward = 0
             
@@ -413,6 +416,8 @@ class BrainTrainer:
                 
                 # Simular resultado
                 trade_result = self.simulate_trade(sample, action)
+                if trade_result is None:
+                    continue
                 reward = self.brain.calculate_reward(trade_result)
                 
                 # Próximo estado (mesmo para simulação)
@@ -7,7 +7,6 @@ Sistema independente que não interfere com funcionamento existente
 
 import time
 import logging
-import sqlite3
 import os
 import sys
 from datetime import datetime
@@ -52,28 +51,16 @@ class BrainTrainingCron:
     def get_feedback_stats(self):
         """Retorna estatísticas de feedbacks disponíveis"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
+            # Agregados incrementais + outbox/watermark: sem varrer trade_performance
+            aggregates = self.tracker.aggregates
+            total_feedbacks = (aggregates.get('all') or {}).get('n', 0)
             
-            # Total de feedbacks
-            c.execute('SELECT COUNT(*) FROM trade_performance')
-            total_feedbacks = c.fetchone()[0]
-            
-            # Feedbacks não usados para treinamento
-            c.execute('''
-                SELECT COUNT(*) 
-                FROM trade_performance tp
-                LEFT JOIN raw_samples rs ON tp.brain_sample_id = rs.id
-                WHERE rs.training_used = 0 OR rs.training_used IS NULL
-            ''')
-            untrained_feedbacks = c.fetchone()[0]
+            # Feedbacks que chegaram depois do último treinamento
+            pending = continuous_learning.watermark.pending() or {}
+            untrained_feedbacks = pending.get('feedbacks', 0)
             
             # Feedbacks das últimas 24h
-            c.execute('SELECT COUNT(*) FROM trade_performance WHERE created_at > ?', 
-                     (time.time() - 86400,))
-            recent_feedbacks = c.fetchone()[0]
-            
-            conn.close()
+            recent_feedbacks = aggregates.period(24)['n']
             
             return {
                 'total_feedbacks': total_feedbacks,
@@ -87,6 +74,11 @@ class BrainTrainingCron:
     
     def should_run_training(self):
         """Verifica se deve executar treinamento"""
+        if continuous_learning.online_mode:
+            # Cada trade fechado já atualiza o modelo (brain_online_learning)
+            logger.info(f"📡 Modo online ativo (modelo v{continuous_learning.online_version}) - treino em lote desnecessário")
+            return False
+        
         stats = self.get_feedback_stats()
         if not stats:
             return False
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+🔖 BRAIN WATERMARK - Trigger de treinamento sem varrer raw_samples
+
+check_training_trigger fazia `id NOT IN (SELECT DISTINCT brain_sample_id
+FROM trade_performance)` sobre a tabela inteira a cada verificação. Agora:
+
+- feedback_outbox: fila append-only (seq crescente) alimentada por trigger
+  AFTER INSERT em trade_performance - vale para qualquer escritor
+- training_watermark: último raw_samples.id e último seq já treinados
+
+Verificação = leitura do watermark (PK) + MAX(seq) do outbox (PK) + contagem
+de raw_samples com id > watermark (range scan só no delta). O worker de
+treinamento consome apenas (watermark, topo] e avança o watermark no fim.
+
+As amostras são processadas fora de ordem (PENDING -> PROCESSED quando a
+Vision AI responde), então o topo de amostras para logo antes da menor
+PENDING: as PROCESSED acima dela ficam para o próximo ciclo em vez de
+ficarem para trás do watermark. Uma PENDING só segura o topo por
+PENDING_GRACE_SECONDS desde a detecção: depois disso é tratada como travada
+(a Vision AI não vai responder) e o watermark passa por cima dela; falhas
+repetidas já saem de PENDING antes disso (status ERROR, vision_retry.py).
+Linhas do outbox abaixo do menor watermark são apagadas no advance() (no
+modo online o outbox só serve de contador).
+"""
+
+import time
+import sqlite3
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger("BrainWatermark")
+
+DB_PATH = 'sniper_brain.db'
+DEFAULT_NAME = 'continuous_learning'
+PENDING_GRACE_SECONDS = 3600   # Espera máxima por uma PENDING antes de ignorá-la no topo
+
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS feedback_outbox (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            performance_id INTEGER,
+            brain_sample_id INTEGER,
+            created_at INTEGER DEFAULT (strftime('%s', 'now'))
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS training_watermark (
+            name TEXT PRIMARY KEY,
+            last_sample_id INTEGER DEFAULT 0,
+            last_feedback_seq INTEGER DEFAULT 0,
+            updated_at INTEGER
+        )
+    ''')
+    has_performance = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='trade_performance'").fetchone()
+    if has_performance:
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_feedback_outbox
+            AFTER INSERT ON trade_performance
+            BEGIN
+                INSERT INTO feedback_outbox (performance_id, brain_sample_id)
+                VALUES (NEW.id, NEW.brain_sample_id);
+            END
+        ''')
+
+
+def purge_outbox(conn) -> int:
+    """Remove do outbox o que todos os watermarks já consumiram (seq <= menor last_feedback_seq)"""
+    low = conn.execute('SELECT MIN(last_feedback_seq) FROM training_watermark').fetchone()[0]
+    if not low:
+        return 0
+    return conn.execute('DELETE FROM feedback_outbox WHERE seq <= ?', (low,)).rowcount
+
+
+class TrainingWatermark:
+    """
+        wm = TrainingWatermark(db_path)
+        pending = wm.pending()          # {'samples', 'feedbacks', 'sample_hi', 'feedback_hi', ...}
+        ...  # treina com o delta
+        wm.advance(pending['sample_hi'], pending['feedback_hi'])
+    """
+
+    def __init__(self, db_path: str = DB_PATH, name: str = DEFAULT_NAME,
+                 pending_grace: float = PENDING_GRACE_SECONDS):
+        self.db_path = db_path
+        self.name = name
+        self.pending_grace = pending_grace
+        try:
+            conn = sqlite3.connect(self.db_path)
+            init_tables(conn)
+            conn.execute('INSERT OR IGNORE INTO training_watermark (name, last_sample_id, last_feedback_seq, updated_at) '
+                         'VALUES (?, 0, 0, ?)', (self.name, int(time.time())))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar watermark: {e}")
+
+    def pending(self) -> Optional[dict]:
+        """O que chegou desde o último treinamento (lookups por chave primária)"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                c = conn.cursor()
+                c.execute('SELECT last_sample_id, last_feedback_seq FROM training_watermark WHERE name = ?', (self.name,))
+                last_sample, last_seq = c.fetchone() or (0, 0)
+
+                c.execute('SELECT COALESCE(MAX(seq), 0) FROM feedback_outbox')
+                feedback_hi = c.fetchone()[0]
+
+                # Topo = antes da menor PENDING recente (ainda pode virar PROCESSED); sem PENDING, a maior id.
+                # PENDING mais antiga que a folga (ou sem timestamp) não segura o topo
+                cutoff = int(time.time() - self.pending_grace)
+                c.execute("SELECT MIN(id) FROM raw_samples WHERE id > ? AND status = 'PENDING' "
+                          "AND timestamp_detection >= ?", (last_sample, cutoff))
+                lowest_pending = c.fetchone()[0]
+                c.execute("SELECT COUNT(*) FROM raw_samples WHERE id > ? AND id < ? AND status = 'PENDING'",
+                          (last_sample, lowest_pending if lowest_pending is not None else 2 ** 62))
+                stalled = c.fetchone()[0]
+                if stalled:
+                    logger.warning(f"⚠️ {stalled} amostra(s) PENDING há mais de {self.pending_grace:.0f}s "
+                                   f"ignoradas no watermark")
+                if lowest_pending is not None:
+                    sample_hi = lowest_pending - 1
+                else:
+                    c.execute('SELECT COALESCE(MAX(id), ?) FROM raw_samples WHERE id > ?', (last_sample, last_sample))
+                    sample_hi = c.fetchone()[0]
+
+                c.execute("SELECT COUNT(*) FROM raw_samples WHERE id > ? AND id <= ? AND status = 'PROCESSED'",
+                          (last_sample, sample_hi))
+                samples = c.fetchone()[0]
+            finally:
+                conn.close()
+            return {
+                'samples': samples,
+                'feedbacks': max(0, feedback_hi - last_seq),
+                'sample_hi': sample_hi,
+                'feedback_hi': feedback_hi,
+                'last_sample_id': last_sample,
+                'last_feedback_seq': last_seq,
+                'stalled': stalled,
+            }
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler watermark: {e}")
+            return None
+
+    def delta_feedback(self, feedback_hi: int, last_seq: Optional[int] = None) -> List[tuple]:
+        """(seq, performance_id, brain_sample_id) no intervalo (watermark, feedback_hi]"""
+        if last_seq is None:
+            last_seq = (self.pending() or {}).get('last_feedback_seq', 0)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(
+                'SELECT seq, performance_id, brain_sample_id FROM feedback_outbox WHERE seq > ? AND seq <= ? ORDER BY seq',
+                (last_seq, feedback_hi)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def advance(self, sample_hi: int, feedback_hi: int):
+        """Avança o watermark (nunca retrocede) e apaga o outbox já consumido"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+                UPDATE training_watermark
+                SET last_sample_id = MAX(last_sample_id, ?),
+                    last_feedback_seq = MAX(last_feedback_seq, ?),
+                    updated_at = ?
+                WHERE name = ?
+            ''', (int(sample_hi), int(feedback_hi), int(time.time()), self.name))
+            purged = purge_outbox(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"🔖 Watermark '{self.name}': amostra #{sample_hi}, feedback #{feedback_hi}"
+                    + (f" ({purged} do outbox removidos)" if purged else ""))
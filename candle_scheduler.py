@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+⏰ CANDLE SCHEDULER - Acorda validadores no fechamento exato de cada candle
+
+Em vez de cada posição perguntar a cada 30s "fechou candle?" (fetch_ohlcv
+limit=2 por checagem), o horário de fechamento é calculado:
+
+    próximo_fechamento = (agora_exchange // duração + 1) * duração
+
+- agora_exchange = relógio local + offset medido via exchange.fetch_time()
+  (ressincronizado periodicamente), para não depender do NTP do servidor
+- Posições do mesmo timeframe acordam juntas, uma vez por barra fechada
+- GRACE_SECONDS de folga após o fechamento para a exchange publicar a barra
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from brain_simulator import TIMEFRAME_MINUTES
+
+logger = logging.getLogger("CandleScheduler")
+
+GRACE_SECONDS = 2.0
+RESYNC_SECONDS = 3600
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    return TIMEFRAME_MINUTES[timeframe] * 60
+
+
+def next_close_ms(now_ms: int, timeframe: str) -> int:
+    step = timeframe_seconds(timeframe) * 1000
+    return (now_ms // step + 1) * step
+
+
+def last_close_ms(now_ms: int, timeframe: str) -> int:
+    step = timeframe_seconds(timeframe) * 1000
+    return (now_ms // step) * step
+
+
+class ExchangeClock:
+    """Relógio da exchange: tempo local corrigido pelo offset do servidor"""
+
+    def __init__(self, exchange=None, resync_seconds: float = RESYNC_SECONDS):
+        self.exchange = exchange
+        self.resync_seconds = resync_seconds
+        self.offset_ms = 0
+        self._synced_at = 0.0
+
+    def sync(self):
+        if self.exchange is None:
+            return
+        try:
+            before = time.time()
+            server_ms = self.exchange.fetch_time()
+            after = time.time()
+            # Considera o meio da viagem de ida e volta
+            self.offset_ms = int(server_ms - (before + after) / 2 * 1000)
+            self._synced_at = after
+            logger.info(f"⏰ Relógio sincronizado com a exchange (offset {self.offset_ms} ms)")
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao sincronizar relógio da exchange: {e}")
+            self._synced_at = time.time()  # Evita martelar a API; tenta no próximo ciclo
+
+    def now_ms(self) -> int:
+        if self.exchange is not None and time.time() - self._synced_at > self.resync_seconds:
+            self.sync()
+        return int(time.time() * 1000) + self.offset_ms
+
+
+class CandleCloseScheduler:
+    """
+    Agenda por timeframe. Uso:
+
+        scheduler = CandleCloseScheduler(exchange)
+        scheduler.register('ETH/USDT', '15m')
+        while True:
+            time.sleep(scheduler.seconds_until_next_close(max_wait=30))
+            for tf, (close_ms, keys) in scheduler.due().items():
+                ...  # valida todas as posições `keys` daquele timeframe
+    """
+
+    def __init__(self, exchange=None, grace_seconds: float = GRACE_SECONDS, clock: Optional[ExchangeClock] = None):
+        self.clock = clock or ExchangeClock(exchange)
+        self.grace_ms = int(grace_seconds * 1000)
+        self._lock = threading.Lock()
+        self._keys: Dict[str, List[str]] = {}       # timeframe -> chaves registradas
+        self._last_fired: Dict[str, int] = {}       # timeframe -> último fechamento entregue
+
+    def register(self, key: str, timeframe: str):
+        if timeframe not in TIMEFRAME_MINUTES:
+            raise ValueError(f"Timeframe não suportado: {timeframe}")
+        with self._lock:
+            keys = self._keys.setdefault(timeframe, [])
+            if key not in keys:
+                keys.append(key)
+            # Só acorda em fechamentos a partir de agora
+            self._last_fired.setdefault(timeframe, last_close_ms(self.clock.now_ms() - self.grace_ms, timeframe))
+
+    def unregister(self, key: str):
+        with self._lock:
+            for tf in list(self._keys):
+                if key in self._keys[tf]:
+                    self._keys[tf].remove(key)
+                if not self._keys[tf]:
+                    del self._keys[tf]
+                    self._last_fired.pop(tf, None)
+
+    def seconds_until_next_close(self, max_wait: Optional[float] = None) -> float:
+        """Segundos até o próximo fechamento (+ folga) entre os timeframes registrados"""
+        now = self.clock.now_ms()
+        with self._lock:
+            timeframes = list(self._keys)
+        if not timeframes:
+            return max_wait if max_wait is not None else 60.0
+        wait = min(next_close_ms(now - self.grace_ms, tf) + self.grace_ms - now for tf in timeframes) / 1000
+        wait = max(wait, 0.0)
+        return min(wait, max_wait) if max_wait is not None else wait
+
+    def due(self) -> Dict[str, tuple]:
+        """
+        Timeframes cuja barra fechou desde a última chamada:
+        {timeframe: (close_ms, [chaves])}. Cada fechamento é entregue uma vez.
+        """
+        now = self.clock.now_ms() - self.grace_ms
+        fired = {}
+        with self._lock:
+            for tf, keys in self._keys.items():
+                close = last_close_ms(now, tf)
+                if close > self._last_fired.get(tf, 0):
+                    self._last_fired[tf] = close
+                    fired[tf] = (close, list(keys))
+        return fired
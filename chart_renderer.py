@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+🖼️ CHART RENDERER - Candlestick rápido em memória para a Vision AI
+
+Substitui o mplfinance (figura nova + PNG em disco + Image.open a cada
+consulta) por um rasterizador direto num buffer NumPy:
+
+- Canvas base (fundo/grade) pré-renderizado e reaproveitado por tamanho
+- Corpos/pavios desenhados por fatiamento de array (sem matplotlib)
+- PNG codificado em memória (zlib) e entregue como bytes para o modelo
+- Só grava em disco quando um save_path é pedido
+
+Mesmo visual dos gráficos antigos: fundo escuro, alta #00ff00, baixa
+#ff0000, sem eixos, linhas horizontais opcionais (ex: entry tracejado ciano).
+"""
+
+import io
+import os
+import struct
+import zlib
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("ChartRenderer")
+
+WIDTH = 800
+HEIGHT = 480
+
+STYLE = {
+    'background': (10, 10, 10),
+    'grid': (32, 32, 40),
+    'up': (0, 255, 0),
+    'down': (255, 0, 0),
+    'title': (220, 220, 220),
+}
+COLORS = {
+    'cyan': (0, 255, 255),
+    'yellow': (255, 255, 0),
+    'white': (255, 255, 255),
+    'orange': (255, 165, 0),
+}
+
+MARGIN_X = 12
+MARGIN_TOP = 36      # Espaço do título
+MARGIN_BOTTOM = 12
+GRID_LINES = 6
+PNG_COMPRESSION = 3  # Gráfico é quase todo fundo liso: nível baixo já comprime bem
+
+_base_cache: Dict[Tuple[int, int], np.ndarray] = {}
+
+
+def _base_canvas(width: int, height: int) -> np.ndarray:
+    """Fundo + grade, renderizado uma vez por tamanho e copiado a cada gráfico"""
+    base = _base_cache.get((width, height))
+    if base is None:
+        base = np.empty((height, width, 3), dtype=np.uint8)
+        base[:] = STYLE['background']
+        plot_h = height - MARGIN_TOP - MARGIN_BOTTOM
+        for i in range(1, GRID_LINES):
+            y = MARGIN_TOP + plot_h * i // GRID_LINES
+            base[y, MARGIN_X:width - MARGIN_X] = STYLE['grid']
+        _base_cache[(width, height)] = base
+    return base.copy()
+
+
+def encode_png(pixels: np.ndarray) -> bytes:
+    """Codifica um array RGB uint8 [H, W, 3] como PNG (filtro None por linha)"""
+    height, width = pixels.shape[:2]
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = pixels.reshape(height, width * 3)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), PNG_COMPRESSION)) + chunk(b'IEND', b''))
+
+
+def _draw_title(pixels: np.ndarray, title: str) -> np.ndarray:
+    """Título via PIL (quando disponível); o gráfico em si não depende dele"""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return pixels
+    img = Image.fromarray(pixels)
+    ImageDraw.Draw(img).text((MARGIN_X, 10), title, fill=STYLE['title'])
+    return np.asarray(img)
+
+
+def render_candles(candles: Sequence[Sequence[float]], title: Optional[str] = None,
+                   hlines: Optional[List[Dict]] = None, save_path: Optional[str] = None,
+                   width: int = WIDTH, height: int = HEIGHT) -> bytes:
+    """
+    Renderiza candles no formato ccxt [[ts, o, h, l, c, v], ...] e retorna PNG em bytes.
+
+    hlines: [{'price': 1.23, 'color': 'cyan', 'dashed': True}, ...]
+    save_path: se informado, também grava o PNG nesse caminho.
+    """
+    data = np.asarray(candles, dtype=np.float64)
+    if data.ndim != 2 or len(data) == 0:
+        raise ValueError("Sem candles para renderizar")
+
+    opens, highs, lows, closes = data[:, 1], data[:, 2], data[:, 3], data[:, 4]
+    pixels = _base_canvas(width, height)
+
+    hlines = hlines or []
+    lo = min(lows.min(), min((h['price'] for h in hlines), default=lows.min()))
+    hi = max(highs.max(), max((h['price'] for h in hlines), default=highs.max()))
+    span = hi - lo
+    if span <= 0:
+        span = abs(hi) * 0.01 or 1.0
+    pad = span * 0.05
+    lo -= pad
+    span += 2 * pad
+
+    top = MARGIN_TOP
+    plot_h = height - MARGIN_TOP - MARGIN_BOTTOM
+    plot_w = width - 2 * MARGIN_X
+
+    def to_y(prices: np.ndarray) -> np.ndarray:
+        y = top + (1.0 - (prices - lo) / span) * (plot_h - 1)
+        return np.clip(np.rint(y), top, top + plot_h - 1).astype(np.int64)
+
+    n = len(data)
+    slot = plot_w / n
+    centers = (MARGIN_X + (np.arange(n) + 0.5) * slot).astype(np.int64)
+    half_body = max(int(slot * 0.35), 1)
+
+    y_high, y_low = to_y(highs), to_y(lows)
+    y_open, y_close = to_y(opens), to_y(closes)
+    body_top = np.minimum(y_open, y_close)
+    body_bot = np.maximum(y_open, y_close)
+    up = closes >= opens
+
+    for i in range(n):
+        color = STYLE['up'] if up[i] else STYLE['down']
+        x = centers[i]
+        pixels[y_high[i]:y_low[i] + 1, x] = color
+        pixels[body_top[i]:body_bot[i] + 1, max(x - half_body, 0):x + half_body + 1] = color
+
+    for line in hlines:
+        y = int(to_y(np.array([line['price']]))[0])
+        color = COLORS.get(line.get('color', 'cyan'), COLORS['cyan'])
+        row = pixels[y, MARGIN_X:width - MARGIN_X]
+        if line.get('dashed', True):
+            dash = (np.arange(len(row)) // 8) % 2 == 0
+            row[dash] = color
+        else:
+            row[:] = color
+
+    if title:
+        pixels = _draw_title(pixels, title)
+
+    png = encode_png(pixels)
+
+    if save_path:
+        try:
+            directory = os.path.dirname(save_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(save_path, 'wb') as f:
+                f.write(png)
+        except Exception as e:
+            logger.error(f"Erro ao salvar gráfico {save_path}: {e}")
+
+    return png
+
+
+def to_pil(png: bytes):
+    """Abre o PNG em memória como PIL.Image (formato aceito pelo Gemini)"""
+    from PIL import Image
+    return Image.open(io.BytesIO(png))
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    closes = 100 + np.cumsum(rng.normal(0, 1, 50))
+    opens = np.concatenate([[100.0], closes[:-1]])
+    highs = np.maximum(opens, closes) + rng.uniform(0, 1, 50)
+    lows = np.minimum(opens, closes) - rng.uniform(0, 1, 50)
+    candles = np.column_stack([np.arange(50) * 900000, opens, highs, lows, closes, np.ones(50)])
+
+    start = time.perf_counter()
+    for _ in range(100):
+        png = render_candles(candles, hlines=[{'price': float(closes[25]), 'color': 'cyan'}])
+    elapsed = (time.perf_counter() - start) / 100
+    print(f"🖼️ {len(png)} bytes | {elapsed * 1000:.2f} ms por gráfico")
+    render_candles(candles, title="DEMO/USDT - FUNDO_DUPLO", save_path="chart_renderer_demo.png")
+    print("✅ chart_renderer_demo.png")
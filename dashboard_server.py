@@ -1,4 +1,4 @@
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, render_template, jsonify, send_from_directory, request
 import json
 import os
 import ccxt
@@ -26,6 +26,15 @@ CACHE_MAX_AGE = 24 * 3600  # 24 horas
 watchlist_mgr = JsonManager(WATCHLIST_FILE)
 
 
+def read_market_snapshot():
+    """Cenário completo (BTC + BTC.D) publicado pelo market_context_service, se ativo"""
+    try:
+        from market_context_service import read_snapshot
+        return read_snapshot()
+    except Exception:
+        return None
+
+
 def fetch_closed_pnl_from_bybit():
     """Busca todos os trades fechados dos últimos 30 dias via Bybit API"""
     secrets = get_secrets()
@@ -556,6 +565,11 @@ def get_detailed_performance():
                 'monthly_performance': []
             })
         
+        # Métricas de risco por horizonte (mesmo cálculo vetorizado do auto_optimizer)
+        from lib_analytics import TradeAnalytics
+        analytics = TradeAnalytics([(t.get('closed_at') or 0) / 1000 for t in closed_trades],
+                                   [safe_float(t.get('pnl')) for t in closed_trades])
+        
         # Calcular estatísticas básicas
         wins = [t for t in closed_trades if safe_float(t.get('pnl')) > 0]
         losses = [t for t in closed_trades if safe_float(t.get('pnl')) <= 0]
@@ -655,7 +669,8 @@ def get_detailed_performance():
                     'trades': len(month_trades),
                     'total_pnl': round(month_total_pnl, 2)
                 }
-            }
+            },
+            'risk_metrics': analytics.horizons()
         }
         
         return jsonify(response_data)
@@ -872,7 +887,8 @@ def get_market():
                 'shorts_status': shorts_status,
                 'scenario_advice': scenario_advice,
                 'source': 'TradingView Premium',
-                'last_update': btcd_data.get('datetime', 'N/A')
+                'last_update': btcd_data.get('datetime', 'N/A'),
+                'context': read_market_snapshot()
             })
         else:
             # Arquivo não existe ainda
@@ -887,7 +903,8 @@ def get_market():
                 'shorts_status': '⏳ Aguardando',
                 'scenario_advice': 'Configurando webhook do TradingView...',
                 'source': 'TradingView Premium',
-                'last_update': 'N/A'
+                'last_update': 'N/A',
+                'context': read_market_snapshot()
             })
     except Exception as e:
         print(f"Erro ao ler market data: {e}")
@@ -973,6 +990,50 @@ def get_vision_stats():
 
 
 
+@app.route('/api/analytics')
+def get_trade_analytics():
+    """Sharpe/Sortino/drawdown/profit factor por horizonte (24h/7d/30d) + séries móveis"""
+    try:
+        from lib_analytics import TradeAnalytics, HORIZONS, series_to_json
+        analytics = TradeAnalytics.from_db(os.path.join(BASE_DIR, 'sniper_brain.db'))
+        horizon = request.args.get('rolling', '24h')
+        seconds = HORIZONS.get(horizon, HORIZONS['24h'])
+        return jsonify({
+            'trades': len(analytics),
+            'horizons': analytics.horizons(),
+            'risk_buckets': analytics.risk_buckets(),
+            'rolling': {
+                'horizon': horizon if horizon in HORIZONS else '24h',
+                **series_to_json(analytics.rolling(seconds), request.args.get('points', 500, type=int)),
+            },
+        })
+    except Exception as e:
+        return jsonify({'error': str(e), 'trades': 0, 'horizons': {}, 'risk_buckets': {}, 'rolling': {}})
+
+_health_collector = None
+
+
+@app.route('/api/health')
+def get_health():
+    """Snapshot de saúde publicado pelos componentes (heartbeat, latência, filas, último erro)"""
+    global _health_collector
+    try:
+        from health_status import HealthCollector
+        if _health_collector is None:
+            _health_collector = HealthCollector()
+        return jsonify(_health_collector.snapshot())
+    except Exception as e:
+        return jsonify({'error': str(e), 'components': {}, 'executors': 0, 'watchlist': {}, 'healthy': False})
+
+@app.route('/api/vision/cache')
+def get_vision_cache_stats():
+    """Taxa de acerto do cache de veredictos da Vision AI (por origem)"""
+    try:
+        from vision_cache import VisionVerdictCache
+        return jsonify(VisionVerdictCache(os.path.join(BASE_DIR, 'sniper_brain.db')).stats())
+    except Exception as e:
+        return jsonify({'error': str(e), 'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 0, 'sources': {}})
+
 @app.route('/api/vision/alerts')
 def get_vision_alerts():
     """Retorna alertas e validações pós-entrada do Vision AI"""
@@ -1032,4 +1093,6 @@ def get_vision_analysis():
 
 
 if __name__ == '__main__':
+    from health_status import HealthReporter
+    HealthReporter('dashboard', interval=30).start_heartbeat()
     app.run(host='0.0.0.0', port=8080, debug=False)
@@ -2,96 +2,282 @@
 """
 Compactador de Dados - Protocolo Severino
 Compacta dados antigos mantendo estatísticas de aprendizado
+
+Subsistema único de compactação (BrainMaintenance.archive_old_data e
+RealtimeFeedbackCollector.compact_old_data delegam para cá). Antes: GROUP BY
+de tudo que passou de 30 dias + DELETE + VACUUM - banco travado enquanto o
+arquivo era reescrito. Agora:
+
+- Chunks pequenos, particionados por dia (índice no timestamp), cada um numa
+  transação curta: resume em learning_summary (merge incremental) e apaga
+- Tamanho do chunk se adapta para a transação ficar abaixo de MAX_LOCK_MS;
+  pausa entre chunks para os escritores (WAL + busy_timeout)
+- PRAGMA incremental_vacuum em passos limitados no lugar do VACUUM
+  (auto_vacuum=INCREMENTAL; banco existente precisa converter uma vez: --convert)
+- Amostras VALID ficam (dataset de treino); cursor em compaction_state
+- Com BrainArchive: as linhas vão antes para o arquivo frio e só se apaga
+  abaixo do cursor de exportação (nada sai do banco sem cópia)
+- Buckets 'hour' de performance_aggregates seguem a mesma retenção
+- Único passo longo: criação do índice no timestamp (uma vez)
 """
 import sqlite3
 import json
 import time
-from datetime import datetime, timedelta
+import logging
+import argparse
+
+from brain_archive import age_condition, get_archive, KEEP_HOT
+from brain_aggregates import prune_aggregates
+
+logger = logging.getLogger("DataCompactor")
+
+DB_PATH = 'sniper_brain.db'
+RETENTION_DAYS = 30
+MAX_LOCK_MS = 5            # Alvo de duração de cada transação de escrita
+CHUNK_ROWS = 100           # Tamanho inicial do chunk (adaptativo)
+MIN_CHUNK_ROWS = 20
+MAX_CHUNK_ROWS = 2000
+PAUSE_SECONDS = 0.02       # Janela livre para os escritores entre chunks
+VACUUM_PAGES = 256         # Páginas devolvidas por passo de incremental_vacuum
+BUSY_TIMEOUT_MS = 2000
+KEEP_WHERE = KEEP_HOT['raw_samples']    # Preservadas (dataset de treino)
+TIMESTAMP_COLUMNS = ('created_at', 'timestamp_detection')
+
+
+def _day(ts):
+    return time.strftime('%Y-%m-%d', time.gmtime(int(ts)))
+
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS learning_summary (
+            date TEXT PRIMARY KEY,
+            total_samples INTEGER,
+            wins INTEGER,
+            losses INTEGER,
+            avg_reward REAL,
+            patterns_used TEXT,
+            created_at INTEGER
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS compaction_state (
+            name TEXT PRIMARY KEY,
+            cursor_ts INTEGER DEFAULT 0,
+            updated_at INTEGER
+        )
+    ''')
+
+
+class DataCompactor:
+    """
+        compactor = DataCompactor(retention_days=30)
+        stats = compactor.run(max_seconds=30)   # Retoma de onde parou na próxima chamada
+    """
+
+    def __init__(self, db_path=DB_PATH, retention_days=RETENTION_DAYS, max_lock_ms=MAX_LOCK_MS,
+                 chunk_rows=CHUNK_ROWS, pause_seconds=PAUSE_SECONDS, archive=None):
+        self.db_path = db_path
+        self.archive = archive
+        self.retention_days = retention_days
+        self.max_lock_ms = max_lock_ms
+        self.chunk_rows = chunk_rows
+        self.pause_seconds = pause_seconds
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        return conn
+
+    # ============================================================
+    # CONFIGURAÇÃO
+    # ============================================================
+    def configure_database(self, convert=False):
+        """
+        WAL + auto_vacuum=INCREMENTAL. Em banco novo vale na hora; em banco
+        existente só após um VACUUM único (convert=True - bloqueante, rodar parado).
+        """
+        conn = self._connect()
+        try:
+            # auto_vacuum antes do journal_mode: em arquivo novo vale sem VACUUM
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode != 2:
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                if convert:
+                    logger.info("🔧 Convertendo banco para auto_vacuum=INCREMENTAL (VACUUM único)...")
+                    conn.execute('VACUUM')
+            conn.execute('PRAGMA journal_mode = WAL')
+            init_tables(conn)
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode != 2:
+                logger.warning("⚠️ auto_vacuum ainda não é INCREMENTAL - rode uma vez com --convert")
+            return mode == 2
+        finally:
+            conn.close()
+
+    def _columns(self, conn):
+        cols = {row[1] for row in conn.execute('PRAGMA table_info(raw_samples)')}
+        pattern = 'pattern_name' if 'pattern_name' in cols else 'pattern_detected' if 'pattern_detected' in cols else 'NULL'
+        return {
+            'timestamps': [c for c in TIMESTAMP_COLUMNS if c in cols],
+            'result': 'trade_result' if 'trade_result' in cols else 'NULL',
+            'reward': 'reward' if 'reward' in cols else 'NULL',
+            'pattern': pattern,
+            'keep': KEEP_WHERE if 'ai_verdict' in cols else '0',
+        }
+
+    # ============================================================
+    # COMPACTAÇÃO
+    # ============================================================
+    def _compact_chunk(self, conn, ts_col, cols, cursor_ts, cutoff, extra='1'):
+        """Um chunk (um só dia) numa transação curta. Retorna (linhas, novo cursor, ms com lock)"""
+        started = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(f'''
+                SELECT id, {ts_col}, {cols['result']}, {cols['reward']}, {cols['pattern']}
+                FROM raw_samples
+                WHERE {ts_col} >= ? AND {ts_col} < ? AND {extra} AND NOT ({cols['keep']})
+                ORDER BY {ts_col}
+                LIMIT ?
+            ''', (cursor_ts, cutoff, self.chunk_rows)).fetchall()
+            if not rows:
+                conn.execute('COMMIT')
+                return 0, cutoff, (time.perf_counter() - started) * 1000
+
+            day = _day(rows[0][1])
+            rows = [r for r in rows if _day(r[1]) == day]
+
+            total = len(rows)
+            wins = sum(1 for r in rows if r[2] == 'WIN')
+            losses = sum(1 for r in rows if r[2] == 'LOSS')
+            sum_reward = sum(float(r[3] or 0) for r in rows)
+            patterns = {str(r[4]) for r in rows if r[4]}
+
+            existing = conn.execute(
+                'SELECT total_samples, wins, losses, avg_reward, patterns_used FROM learning_summary WHERE date = ?',
+                (day,)
+            ).fetchone()
+            if existing:
+                total_prev = existing[0] or 0
+                sum_reward += (existing[3] or 0) * total_prev
+                total += total_prev
+                wins += existing[1] or 0
+                losses += existing[2] or 0
+                patterns |= {p for p in (existing[4] or '').split(',') if p}
+
+            conn.execute('''
+                INSERT OR REPLACE INTO learning_summary
+                (date, total_samples, wins, losses, avg_reward, patterns_used, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (day, total, wins, losses, sum_reward / total if total else 0,
+                  ','.join(sorted(patterns)), int(time.time())))
+
+            conn.executemany('DELETE FROM raw_samples WHERE id = ?', [(r[0],) for r in rows])
+            new_cursor = int(rows[-1][1])
+            conn.execute('''
+                INSERT OR REPLACE INTO compaction_state (name, cursor_ts, updated_at) VALUES (?, ?, ?)
+            ''', (f'raw_samples.{ts_col}', new_cursor, int(time.time())))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows), new_cursor, (time.perf_counter() - started) * 1000
+
+    def _adapt_chunk(self, lock_ms):
+        if lock_ms > self.max_lock_ms:
+            self.chunk_rows = max(MIN_CHUNK_ROWS, self.chunk_rows // 2)
+        elif lock_ms < self.max_lock_ms / 4:
+            self.chunk_rows = min(MAX_CHUNK_ROWS, self.chunk_rows * 2)
 
-print("📦 INICIANDO COMPACTAÇÃO DE DADOS...")
+    def incremental_vacuum(self, conn, pages=VACUUM_PAGES):
+        """Devolve até `pages` páginas livres ao sistema (transação curta)"""
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return 0
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if before:
+            # executescript roda o pragma até o fim (execute() libera só uma página por passo)
+            conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
 
-def compact_old_data():
+    def run(self, max_seconds=None):
+        """Compacta até acabar (ou estourar max_seconds). Retorna estatísticas."""
+        stats = {'rows': 0, 'chunks': 0, 'days': set(), 'max_lock_ms': 0.0, 'freed_pages': 0, 'aggregates': 0}
+        deadline = time.time() + max_seconds if max_seconds else None
+        cutoff = int(time.time() - self.retention_days * 86400)
+
+        self.configure_database()
+        if self.archive:
+            self.archive.export('raw_samples', cutoff)
+        conn = self._connect()
+        try:
+            cols = self._columns(conn)
+            for ts_col in cols['timestamps']:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_raw_samples_{ts_col} ON raw_samples({ts_col})')
+                row = conn.execute('SELECT cursor_ts FROM compaction_state WHERE name = ?',
+                                   (f'raw_samples.{ts_col}',)).fetchone()
+                cursor_ts = row[0] if row else 0
+                # A linha envelhece pela primeira coluna de tempo não nula
+                extra = age_condition(conn, 'raw_samples', ts_col)
+                col_cutoff = min(cutoff, self.archive.cursor('raw_samples', ts_col)) if self.archive else cutoff
+
+                while cursor_ts < col_cutoff:
+                    if deadline and time.time() > deadline:
+                        break
+                    count, cursor_ts, lock_ms = self._compact_chunk(conn, ts_col, cols, cursor_ts, col_cutoff, extra)
+                    if not count:
+                        break
+                    stats['rows'] += count
+                    stats['chunks'] += 1
+                    stats['days'].add(_day(cursor_ts))
+                    stats['max_lock_ms'] = max(stats['max_lock_ms'], lock_ms)
+                    self._adapt_chunk(lock_ms)
+                    if stats['chunks'] % 10 == 0:
+                        stats['freed_pages'] += self.incremental_vacuum(conn)
+                    time.sleep(self.pause_seconds)
+
+            stats['aggregates'] = prune_aggregates(conn, cutoff)
+            stats['freed_pages'] += self.incremental_vacuum(conn)
+        finally:
+            conn.close()
+
+        stats['days'] = len(stats['days'])
+        if stats['rows']:
+            logger.info(f"📦 Compactados {stats['rows']} registros em {stats['chunks']} chunks "
+                        f"({stats['days']} dias, lock máx {stats['max_lock_ms']:.1f}ms, "
+                        f"{stats['freed_pages']} páginas liberadas)")
+        return stats
+
+
+def compact_old_data(retention_days=RETENTION_DAYS, max_seconds=None, convert=False):
     """Compactar dados antigos mantendo learning"""
     try:
-        conn = sqlite3.connect('sniper_brain.db')
-        cursor = conn.cursor()
-        
-        # Manter apenas 30 dias de dados brutos
-        cutoff_days = 30
-        cutoff_time = int((time.time() - cutoff_days * 86400))
-        
-        # 1. Contar dados antigos
-        cursor.execute('SELECT COUNT(*) FROM raw_samples WHERE created_at < ?', (cutoff_time,))
-        old_count = cursor.fetchone()[0]
+        compactor = DataCompactor(retention_days=retention_days, archive=get_archive())
+        compactor.configure_database(convert=convert)
+        stats = compactor.run(max_seconds=max_seconds)
         
-        if old_count == 0:
+        if stats['rows'] == 0:
             print("✅ Nenhum dado antigo para compactar")
-            return
+            return stats
         
-        print(f"📊 Compactando {old_count} registros antigos...")
-        
-        # 2. Criar tabela de estatísticas resumidas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_summary (
-                date TEXT PRIMARY KEY,
-                total_samples INTEGER,
-                wins INTEGER,
-                losses INTEGER,
-                avg_reward REAL,
-                patterns_used TEXT,
-                created_at INTEGER
-            )
-        ''')
-        
-        # 3. Agrupar por dia e salvar estatísticas
-        cursor.execute('''
-            SELECT 
-                DATE(created_at, 'unixepoch') as day,
-                COUNT(*) as total,
-                SUM(CASE WHEN trade_result = 'WIN' THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN trade_result = 'LOSS' THEN 1 ELSE 0 END) as losses,
-                AVG(reward) as avg_reward,
-                GROUP_CONCAT(DISTINCT pattern_name) as patterns
-            FROM raw_samples 
-            WHERE created_at < ?
-            GROUP BY day
-            ORDER BY day
-        ''', (cutoff_time,))
-        
-        summaries = cursor.fetchall()
-        
-        for summary in summaries:
-            day_str, total, wins, losses, avg_reward, patterns = summary
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO learning_summary 
-                (date, total_samples, wins, losses, avg_reward, patterns_used, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (day_str, total, wins, losses, avg_reward or 0, patterns or '', int(time.time())))
-        
-        # 4. Remover dados brutos antigos
-        cursor.execute('DELETE FROM raw_samples WHERE created_at < ?', (cutoff_time,))
-        
-        # 5. VACUUM para otimizar espaço
-        conn.execute('VACUUM')
-        
-        conn.commit()
-        conn.close()
-        
-        print(f"✅ Compactação completa: {old_count} registros → {len(summaries)} resumos diários")
-        print(f"💾 Espaço otimizado com VACUUM")
+        print(f"✅ Compactação completa: {stats['rows']} registros → {stats['days']} resumos diários")
+        print(f"💾 {stats['freed_pages']} páginas devolvidas com incremental_vacuum "
+              f"(lock máx {stats['max_lock_ms']:.1f}ms)")
         
         # Salvar relatório
         report = {
             'timestamp': int(time.time()),
-            'old_records_compacted': old_count,
-            'daily_summaries_created': len(summaries),
-            'cutoff_days': cutoff_days,
-            'database_size_reduction': 'estimado 70-80%'
+            'old_records_compacted': stats['rows'],
+            'daily_summaries_updated': stats['days'],
+            'cutoff_days': retention_days,
+            'chunks': stats['chunks'],
+            'max_lock_ms': round(stats['max_lock_ms'], 2),
+            'freed_pages': stats['freed_pages']
         }
         
         with open('compaction_report.json', 'w') as f:
             json.dump(report, f, indent=2)
+        return stats
         
     except Exception as e:
         print(f"❌ Erro na compactação: {e}")
@@ -152,12 +338,20 @@ def ensure_scanner_feeds_model():
         print(f"❌ Erro ao verificar scanner: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compactação incremental de sniper_brain.db")
+    parser.add_argument('--retention-days', type=int, default=RETENTION_DAYS)
+    parser.add_argument('--max-seconds', type=float, default=None, help="Orçamento de tempo (retoma depois)")
+    parser.add_argument('--convert', action='store_true',
+                        help="Converte o banco para auto_vacuum=INCREMENTAL (VACUUM único, bloqueante)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
     print("=" * 50)
     print("📦 SISTEMA DE COMPACTAÇÃO E OTIMIZAÇÃO")
     print("=" * 50)
     
     # Executar compactação
-    compact_old_data()
+    compact_old_data(args.retention_days, args.max_seconds, args.convert)
     
     # Verificar alimentação scanner->modelo
     ensure_scanner_feeds_model()
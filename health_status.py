@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+🩺 HEALTH STATUS - Saúde publicada por cada componente, lida em milissegundos
+
+O /status do Telegram rodava `python bot_manager.py status` num subprocesso
+(um interpretador inteiro por comando) e o status percorria todos os
+processos do sistema com psutil. Agora:
+
+- Produtor: cada componente tem um HealthReporter e chama beat() no seu
+  loop (ou usa `with health.loop():`). O estado vai para um JSON no
+  diretório compartilhado (/dev/shm, escrita atômica, no máximo a cada
+  PUBLISH_INTERVAL s; erros publicam na hora):
+
+      heartbeat | latência do loop (última/média/máx) | profundidade das filas
+      último erro | pid | início
+
+- Coletor: HealthCollector.snapshot() junta os arquivos (re-parse só quando
+  o mtime muda) + watchlist e classifica cada componente:
+      OK | ERRO (erro recente) | ATRASADO (sem heartbeat há 3x o intervalo)
+      PARADO (pid morto ou parada limpa)
+
+Telegram (/status), dashboard (/api/health) e bot_manager status leem o
+mesmo snapshot.
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from lib_utils import get_shared_dir, atomic_write_json, JsonManager
+
+logger = logging.getLogger("HealthStatus")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WATCHLIST_FILE = os.path.join(BASE_DIR, 'watchlist.json')
+HEALTH_DIR_NAME = 'health'
+PUBLISH_INTERVAL = 5       # Máximo 1 escrita a cada 5s por componente
+STALE_FACTOR = 3           # Sem heartbeat por 3x o intervalo esperado = ATRASADO
+ERROR_WINDOW = 300         # Erro nos últimos 5 min = ERRO
+REAP_SECONDS = 3600        # Relatório de executor encerrado some após 1h
+LATENCY_ALPHA = 0.2        # Suavização da latência média
+
+# Componentes fixos (ordem de exibição) -> rótulo
+COMPONENTS = {
+    'market_context': 'Market Context',
+    'scanner': 'Scanner',
+    'monitor': 'Monitor',
+    'telegram': 'Telegram',
+    'dashboard': 'Dashboard',
+}
+EXECUTOR_PREFIX = 'executor:'
+
+
+def health_dir() -> str:
+    path = os.path.join(get_shared_dir(), HEALTH_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _file_name(component: str) -> str:
+    return component.replace('/', '').replace(':', '__') + '.json'
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+# ============================================================
+# PRODUTOR
+# ============================================================
+class HealthReporter:
+    """
+        health = HealthReporter('monitor', interval=10)
+        with health.loop():                       # mede a latência do ciclo
+            ...
+            health.set_queue('watchlist', len(pares))
+        health.error(e)                           # no except do loop
+    """
+
+    def __init__(self, component: str, interval: float = 60, directory: Optional[str] = None,
+                 publish_interval: float = PUBLISH_INTERVAL):
+        self.component = component
+        self.path = os.path.join(directory or health_dir(), _file_name(component))
+        self.publish_interval = publish_interval
+        self._lock = threading.Lock()
+        self._published_at = 0.0
+        now = time.time()
+        self.state = {
+            'component': component,
+            'pid': os.getpid(),
+            'started_at': now,
+            'heartbeat_at': now,
+            'interval': interval,
+            'status': 'RUNNING',
+            'loops': 0,
+            'latency_ms': None,
+            'latency_avg_ms': None,
+            'latency_max_ms': None,
+            'queues': {},
+            'errors': 0,
+            'last_error': None,
+            'last_error_at': None,
+            'extra': {},
+        }
+        self.publish(force=True)
+        atexit.register(self.close)
+
+    def publish(self, force: bool = False) -> bool:
+        now = time.time()
+        with self._lock:
+            if not force and now - self._published_at < self.publish_interval:
+                return False
+            self._published_at = now
+            data = json.loads(json.dumps(self.state, default=str))
+        return atomic_write_json(self.path, data)
+
+    def beat(self, latency_ms: Optional[float] = None, **queues):
+        """Heartbeat (+ latência do ciclo e filas, opcionais)"""
+        with self._lock:
+            s = self.state
+            s['heartbeat_at'] = time.time()
+            s['loops'] += 1
+            if latency_ms is not None:
+                latency_ms = round(float(latency_ms), 1)
+                s['latency_ms'] = latency_ms
+                s['latency_avg_ms'] = latency_ms if s['latency_avg_ms'] is None else \
+                    round(s['latency_avg_ms'] + LATENCY_ALPHA * (latency_ms - s['latency_avg_ms']), 1)
+                s['latency_max_ms'] = max(s['latency_max_ms'] or 0.0, latency_ms)
+            if queues:
+                s['queues'].update({k: int(v) for k, v in queues.items() if v is not None})
+            first = s['loops'] == 1
+        self.publish(force=first)       # 1º ciclo aparece na hora
+
+    def set_queue(self, name: str, depth: int):
+        with self._lock:
+            self.state['queues'][name] = int(depth)
+
+    def set_extra(self, **values):
+        with self._lock:
+            self.state['extra'].update(values)
+
+    def error(self, err):
+        with self._lock:
+            self.state['errors'] += 1
+            self.state['last_error'] = str(err)[:300]
+            self.state['last_error_at'] = time.time()
+        self.publish(force=True)
+
+    @contextmanager
+    def loop(self, **queues):
+        start = time.perf_counter()
+        try:
+            yield self
+        except Exception as e:
+            self.error(e)
+            raise
+        finally:
+            self.beat((time.perf_counter() - start) * 1000, **queues)
+
+    def start_heartbeat(self, interval: Optional[float] = None) -> threading.Thread:
+        """Batidas numa thread daemon (componentes sem loop próprio, ex. dashboard)"""
+        interval = interval or self.state['interval']
+
+        def _run():
+            while True:
+                time.sleep(interval)
+                self.beat()
+
+        thread = threading.Thread(target=_run, name=f"health-{self.component}", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Parada limpa: o coletor mostra PARADO em vez de pid morto"""
+        with self._lock:
+            self.state['status'] = 'STOPPED'
+            self.state['heartbeat_at'] = time.time()
+        self.publish(force=True)
+
+
+_reporters: Dict[str, HealthReporter] = {}
+
+
+def get_health_reporter(component: str, interval: float = 60) -> HealthReporter:
+    if component not in _reporters:
+        _reporters[component] = HealthReporter(component, interval)
+    return _reporters[component]
+
+
+# ============================================================
+# COLETOR
+# ============================================================
+class HealthCollector:
+    """
+        snapshot = HealthCollector().snapshot()
+        print(format_status(snapshot))
+    """
+
+    def __init__(self, directory: Optional[str] = None, watchlist_file: str = WATCHLIST_FILE):
+        self.directory = directory or health_dir()
+        self.watchlist = JsonManager(watchlist_file)
+        self._cache: Dict[str, tuple] = {}
+
+    def _read(self, path: str) -> Optional[dict]:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._cache[path] = (mtime, data)
+        return data
+
+    @staticmethod
+    def classify(state: dict, now: float) -> str:
+        if state.get('status') == 'STOPPED':
+            return 'PARADO'
+        if not pid_alive(state.get('pid')):
+            return 'PARADO'
+        if now - state.get('heartbeat_at', 0) > STALE_FACTOR * max(state.get('interval') or 60, PUBLISH_INTERVAL):
+            return 'ATRASADO'
+        if state.get('last_error_at') and now - state['last_error_at'] < ERROR_WINDOW:
+            return 'ERRO'
+        return 'OK'
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        now = now or time.time()
+        components: Dict[str, dict] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            state = self._read(entry.path)
+            if not state or 'component' not in state:
+                continue
+            status = self.classify(state, now)
+            if (status == 'PARADO' and state['component'].startswith(EXECUTOR_PREFIX)
+                    and now - state.get('heartbeat_at', 0) > REAP_SECONDS):
+                # Executor que já terminou: limpa o relatório
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+                self._cache.pop(entry.path, None)
+                continue
+            components[state['component']] = {
+                **state,
+                'health': status,
+                'heartbeat_age': round(now - state.get('heartbeat_at', now), 1),
+            }
+
+        executors = {k: v for k, v in components.items() if k.startswith(EXECUTOR_PREFIX)}
+        wl = self.watchlist.read() or {}
+        pares = wl.get('pares', [])
+        return {
+            'timestamp': now,
+            'components': components,
+            'executors': sum(1 for v in executors.values() if v['health'] != 'PARADO'),
+            'watchlist': {'slots': wl.get('slots_ocupados', len(pares)), 'max_slots': wl.get('max_slots'),
+                          'symbols': [p.get('symbol') for p in pares]},
+            'healthy': all(components.get(name, {}).get('health') == 'OK' for name in COMPONENTS),
+        }
+
+
+def _describe(state: Optional[dict]) -> str:
+    if state is None:
+        return "SEM RELATÓRIO"
+    parts = [f"{state['health']} (PID {state.get('pid')})", f"♥ {state['heartbeat_age']:.0f}s"]
+    if state.get('latency_avg_ms') is not None:
+        parts.append(f"loop {state['latency_avg_ms']:.0f}ms (máx {state['latency_max_ms']:.0f})")
+    if state.get('queues'):
+        parts.append(' '.join(f"{k}={v}" for k, v in state['queues'].items()))
+    if state['health'] == 'ERRO' and state.get('last_error'):
+        parts.append(f"erro: {state['last_error'][:80]}")
+    return ' | '.join(parts)
+
+
+def format_status(snapshot: dict) -> str:
+    """Linhas de status (mesmo formato para Telegram e bot_manager)"""
+    components = snapshot['components']
+    lines = [f"{label}: {_describe(components.get(name))}" for name, label in COMPONENTS.items()]
+    executors = sorted(k for k in components if k.startswith(EXECUTOR_PREFIX))
+    lines.append(f"Executores: {snapshot['executors']} ativos")
+    for name in executors:
+        lines.append(f"  {name[len(EXECUTOR_PREFIX):]}: {_describe(components[name])}")
+    wl = snapshot['watchlist']
+    if wl.get('max_slots') is not None:
+        lines.append(f"Watchlist: {wl['slots']}/{wl['max_slots']} slots ocupados")
+    else:
+        lines.append("Watchlist: Não foi possível ler")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Snapshot de saúde dos componentes")
+    parser.add_argument('--json', action='store_true', help="Saída JSON")
+    args = parser.parse_args()
+
+    snap = HealthCollector().snapshot()
+    print(json.dumps(snap, indent=2, default=str) if args.json else format_status(snap))
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+📐 LIB ANALYTICS - Métricas de risco/performance vetorizadas (NumPy)
+
+O auto_optimizer calculava Sharpe e drawdown trade a trade (o drawdown
+dividia o P&L acumulado pelo pico do próprio P&L, sem base de capital) e
+refazia consultas ao raw_samples para cada análise. Aqui os trades são
+carregados uma vez em arrays e tudo sai de somas prefixadas:
+
+    S[k] = Σ x[:k]  ->  soma de qualquer janela [lo, hi) = S[hi] - S[lo]
+
+- Sharpe / Sortino (anualizados, 365 trades/ano como antes), win rate,
+  profit factor, expectância (P&L médio por trade)
+- Drawdown em % da curva de capital: capital = INITIAL_EQUITY + P&L acumulado,
+  retorno do trade = pnl / capital antes do trade
+- Horizontes (24h/7d/30d) = pares (lo, hi) via searchsorted, calculados juntos
+- Séries móveis: mesma conta com uma janela por trade; pico móvel via sparse
+  table (máximo de intervalo em O(n log n))
+
+Usado pelo AutoOptimizer e pelo dashboard (/api/analytics).
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("Analytics")
+
+DB_PATH = 'sniper_brain.db'
+INITIAL_EQUITY = float(os.getenv('ANALYTICS_INITIAL_EQUITY', '1000'))   # Mesmo padrão do backtester
+PERIODS_PER_YEAR = 365
+HORIZONS = {'24h': 86400, '7d': 7 * 86400, '30d': 30 * 86400}
+LARGE_MOVE = 2.0    # |pnl| acima disso = ganho/perda grande (mesmo corte do optimize_risk_parameters)
+
+
+def load_trades(db_path: str = DB_PATH, since: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Uma consulta ao raw_samples -> arrays em ordem cronológica"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT created_at, pnl_real, reward, ai_confidence
+            FROM raw_samples
+            WHERE pnl_real IS NOT NULL AND created_at >= ?
+            ORDER BY created_at
+        ''', (int(since or 0),)).fetchall()
+    finally:
+        conn.close()
+    data = np.array(rows, dtype=np.float64).reshape(-1, 4)   # None -> nan
+    return {'ts': data[:, 0], 'pnl': data[:, 1], 'reward': data[:, 2], 'confidence': data[:, 3]}
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+
+def _range_max(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """max(values[lo:hi]) para vários intervalos (sparse table, hi > lo)"""
+    table = [values]
+    k = 1
+    while 2 * k <= len(values):
+        prev = table[-1]
+        table.append(np.maximum(prev[:-k], prev[k:]))
+        k *= 2
+    length = hi - lo
+    level = np.floor(np.log2(np.maximum(length, 1))).astype(np.int64)
+    out = np.empty(len(lo), dtype=np.float64)
+    for j in np.unique(level):
+        mask = level == j
+        row = table[j]
+        out[mask] = np.maximum(row[lo[mask]], row[hi[mask] - (1 << j)])
+    return out
+
+
+def _ratio(num, den):
+    num, den = np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+
+
+class TradeAnalytics:
+    """
+        analytics = TradeAnalytics.from_db(db_path)          # 1 consulta
+        analytics.window(time.time() - 48 * 3600)              # métricas de uma janela
+        analytics.horizons()                                   # {'24h': {...}, '7d': {...}, '30d': {...}}
+        analytics.rolling(86400)                               # séries móveis por trade
+    """
+
+    def __init__(self, ts: Sequence[float], pnl: Sequence[float], reward: Optional[Sequence[float]] = None,
+                 confidence: Optional[Sequence[float]] = None, initial_equity: float = INITIAL_EQUITY):
+        ts = np.asarray(ts, dtype=np.float64)
+        order = np.argsort(ts, kind='stable')
+        self.ts = ts[order]
+        self.pnl = np.asarray(pnl, dtype=np.float64)[order]
+        n = len(self.ts)
+        self.reward = np.asarray(reward, dtype=np.float64)[order] if reward is not None else np.full(n, np.nan)
+        self.confidence = np.asarray(confidence, dtype=np.float64)[order] if confidence is not None else np.full(n, np.nan)
+        self.initial_equity = initial_equity
+
+        # Capital após cada trade (equity[0] = capital inicial) e retorno de cada trade
+        self.equity = initial_equity + _prefix(self.pnl)
+        self.returns = self.pnl / np.maximum(self.equity[:-1], 1e-9)
+
+        r = self.returns
+        win, loss = self.pnl > 0, self.pnl < 0
+        has_reward, has_conf = ~np.isnan(self.reward), ~np.isnan(self.confidence)
+        self._sums = {
+            'r': _prefix(r),
+            'r2': _prefix(r * r),
+            'down2': _prefix(np.minimum(r, 0.0) ** 2),
+            'pnl': _prefix(self.pnl),
+            'wins': _prefix(win),
+            'losses': _prefix(loss),
+            'gross_win': _prefix(np.where(win, self.pnl, 0.0)),
+            'gross_loss': _prefix(np.where(loss, -self.pnl, 0.0)),
+            'reward': _prefix(np.where(has_reward, self.reward, 0.0)),
+            'n_reward': _prefix(has_reward),
+            'conf': _prefix(np.where(has_conf, self.confidence, 0.0)),
+            'n_conf': _prefix(has_conf),
+        }
+
+    @classmethod
+    def from_db(cls, db_path: str = DB_PATH, since: Optional[float] = None,
+                initial_equity: float = INITIAL_EQUITY) -> 'TradeAnalytics':
+        data = load_trades(db_path, since)
+        return cls(data['ts'], data['pnl'], data['reward'], data['confidence'], initial_equity)
+
+    def __len__(self):
+        return len(self.ts)
+
+    # ============================================================
+    # JANELAS
+    # ============================================================
+    def _metrics(self, lo: np.ndarray, hi: np.ndarray) -> Dict[str, np.ndarray]:
+        """Métricas de todas as janelas [lo, hi) de uma vez (arrays)"""
+        s = {k: v[hi] - v[lo] for k, v in self._sums.items()}
+        n = (hi - lo).astype(np.float64)
+        mean = _ratio(s['r'], n)
+        std = np.sqrt(np.maximum(_ratio(s['r2'], n) - mean ** 2, 0.0))
+        downside = np.sqrt(_ratio(s['down2'], n))
+        annual = np.sqrt(PERIODS_PER_YEAR)
+        enough = n >= 2
+        profit_factor = np.where(s['gross_loss'] > 0, _ratio(s['gross_win'], s['gross_loss']), np.nan)
+        return {
+            'n': n,
+            'wins': s['wins'],
+            'losses': s['losses'],
+            'win_rate': _ratio(s['wins'], n) * 100,
+            'total_pnl': s['pnl'],
+            'expectancy': _ratio(s['pnl'], n),
+            'avg_win': _ratio(s['gross_win'], s['wins']),
+            'avg_loss': _ratio(s['gross_loss'], s['losses']),
+            'profit_factor': profit_factor,
+            'sharpe_ratio': np.where(enough, _ratio(mean, std) * annual, 0.0),
+            'sortino_ratio': np.where(enough, _ratio(mean, downside) * annual, 0.0),
+            'avg_reward': _ratio(s['reward'], s['n_reward']),
+            'avg_confidence': _ratio(s['conf'], s['n_conf']),
+        }
+
+    def _max_drawdown_pct(self, lo: int, hi: int) -> float:
+        """Maior queda (%) do capital em relação ao pico dentro da janela"""
+        if hi <= lo:
+            return 0.0
+        equity = self.equity[lo:hi + 1]
+        peaks = np.maximum.accumulate(equity)
+        return float(((peaks - equity) / np.maximum(peaks, 1e-9)).max() * 100)
+
+    @staticmethod
+    def _scalar(metrics: Dict[str, np.ndarray], i: int) -> dict:
+        out = {}
+        for key, values in metrics.items():
+            v = float(values[i])
+            out[key] = int(v) if key in ('n', 'wins', 'losses') else (None if np.isnan(v) else v)
+        return out
+
+    def window(self, start_ts: float, end_ts: Optional[float] = None) -> dict:
+        """Métricas dos trades com start_ts <= ts < end_ts"""
+        return self.windows([start_ts], end_ts)[0]
+
+    def windows(self, starts: Sequence[float], end_ts: Optional[float] = None) -> list:
+        lo = np.searchsorted(self.ts, np.asarray(starts, dtype=np.float64), side='left')
+        hi_idx = len(self.ts) if end_ts is None else int(np.searchsorted(self.ts, end_ts, side='left'))
+        lo = np.minimum(lo, hi_idx)
+        hi = np.full(len(lo), hi_idx, dtype=np.int64)
+        metrics = self._metrics(lo, hi)
+        out = []
+        for i in range(len(lo)):
+            m = self._scalar(metrics, i)
+            m['max_drawdown_pct'] = self._max_drawdown_pct(int(lo[i]), int(hi[i]))
+            out.append(m)
+        return out
+
+    def horizons(self, now: Optional[float] = None, horizons: Dict[str, int] = HORIZONS) -> Dict[str, dict]:
+        """Todos os horizontes numa chamada (terminando em now)"""
+        now = now or time.time()
+        names = list(horizons)
+        results = self.windows([now - horizons[name] for name in names], end_ts=now + 1e-6)
+        return dict(zip(names, results))
+
+    def rolling(self, seconds: float) -> Dict[str, np.ndarray]:
+        """
+        Para cada trade i: métricas dos trades em (ts[i] - seconds, ts[i]].
+        drawdown_pct = capital após o trade vs. pico dentro da janela.
+        """
+        n = len(self.ts)
+        hi = np.arange(1, n + 1, dtype=np.int64)
+        lo = np.searchsorted(self.ts, self.ts - seconds, side='right').astype(np.int64)
+        lo = np.minimum(lo, hi - 1)
+        series = self._metrics(lo, hi)
+        series['ts'] = self.ts
+        if n:
+            # Pico entre o capital no início da janela (equity[lo]) e após o trade (equity[hi])
+            peaks = _range_max(self.equity, lo, hi + 1)
+            series['drawdown_pct'] = (peaks - self.equity[hi]) / np.maximum(peaks, 1e-9) * 100
+        else:
+            series['drawdown_pct'] = np.zeros(0)
+        return series
+
+    # ============================================================
+    # DISTRIBUIÇÃO
+    # ============================================================
+    def risk_buckets(self, start_ts: Optional[float] = None) -> Dict[str, int]:
+        """Contagem large_win / small_win / large_loss / small_loss"""
+        pnl = self.pnl[np.searchsorted(self.ts, start_ts, side='left'):] if start_ts else self.pnl
+        labels = np.select(
+            [pnl > LARGE_MOVE, pnl > 0, pnl < -LARGE_MOVE],
+            ['large_win', 'small_win', 'large_loss'],
+            default='small_loss',
+        )
+        names, counts = np.unique(labels, return_counts=True)
+        return {str(k): int(v) for k, v in zip(names, counts)}
+
+
+def series_to_json(series: Dict[str, np.ndarray], max_points: int = 500) -> Dict[str, list]:
+    """Séries móveis -> listas JSON (amostragem uniforme, nan -> None)"""
+    n = len(series.get('ts', []))
+    idx = np.unique(np.linspace(0, n - 1, min(n, max_points)).astype(np.int64)) if n else np.zeros(0, dtype=np.int64)
+    out = {}
+    for key, values in series.items():
+        picked = np.asarray(values, dtype=np.float64)[idx]
+        out[key] = [None if np.isnan(v) else round(float(v), 6) for v in picked]
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Métricas de risco/performance dos trades do raw_samples")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--initial-equity', type=float, default=INITIAL_EQUITY)
+    args = parser.parse_args()
+
+    analytics = TradeAnalytics.from_db(args.db, initial_equity=args.initial_equity)
+    print(f"📐 {len(analytics)} trades")
+    print(json.dumps(analytics.horizons(), indent=2))
+    print(json.dumps(analytics.risk_buckets(), indent=2))
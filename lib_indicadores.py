@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+📈 LIB INDICADORES - Indicadores em streaming com atualização O(1) por barra
+
+- SMA / EMA / retorno em janela / volatilidade em janela / ATR / máx-mín em janela
+- Inicialização em lote via NumPy (from_array) e depois update() barra a barra
+- Estado por série (symbol, timeframe) num registro único: todos os
+  consumidores (check_btc_trend, proxy de BTC.D, filtro de volume do scanner,
+  features do cérebro) compartilham a mesma implementação e o mesmo estado
+
+Só barras FECHADAS entram no estado; o candle em formação é passado à parte
+como "preço atual" por quem consome.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+# Recalcula somas do zero a cada N updates para não acumular erro de ponto flutuante
+RESYNC_EVERY = 10000
+# Barras fechadas guardadas por série para semear indicadores registrados depois
+HISTORY_BARS = 500
+
+
+class StreamingIndicator:
+    """Interface: update(bar) -> valor atual; ready indica janela cheia"""
+
+    field = 'close'
+
+    def update(self, value: float):
+        raise NotImplementedError
+
+    @property
+    def value(self) -> Optional[float]:
+        raise NotImplementedError
+
+    @property
+    def ready(self) -> bool:
+        raise NotImplementedError
+
+    @classmethod
+    def from_array(cls, values, *args, **kwargs):
+        ind = cls(*args, **kwargs)
+        ind.init_batch(values)
+        return ind
+
+    def init_batch(self, values):
+        for v in np.asarray(values, dtype=np.float64):
+            self.update(float(v))
+
+
+class SMA(StreamingIndicator):
+    def __init__(self, period: int, field: str = 'close'):
+        self.period = period
+        self.field = field
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self._updates = 0
+
+    def init_batch(self, values):
+        tail = np.asarray(values, dtype=np.float64)[-self.period:]
+        self.window = deque(tail.tolist(), maxlen=self.period)
+        self.total = float(tail.sum())
+        self._updates = 0
+
+    def update(self, value: float):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+        self._updates += 1
+        if self._updates >= RESYNC_EVERY:
+            self.total = math.fsum(self.window)
+            self._updates = 0
+        return self.value
+
+    @property
+    def value(self):
+        return self.total / len(self.window) if self.window else None
+
+    @property
+    def ready(self):
+        return len(self.window) == self.period
+
+
+class EMA(StreamingIndicator):
+    """EMA semeada com a SMA das primeiras `period` barras"""
+
+    def __init__(self, period: int, field: str = 'close'):
+        self.period = period
+        self.field = field
+        self.alpha = 2.0 / (period + 1)
+        self._value = None
+        self._seed = []
+
+    def init_batch(self, values):
+        arr = np.asarray(values, dtype=np.float64)
+        if len(arr) < self.period:
+            self._seed = arr.tolist()
+            return
+        ema = float(arr[:self.period].mean())
+        # Forma fechada do filtro recursivo (evita loop Python em séries longas)
+        rest = arr[self.period:]
+        if len(rest):
+            decay = (1 - self.alpha) ** np.arange(len(rest) - 1, -1, -1)
+            ema = float(ema * (1 - self.alpha) ** len(rest) + self.alpha * (decay * rest).sum())
+        self._value = ema
+        self._seed = []
+
+    def update(self, value: float):
+        if self._value is None:
+            self._seed.append(value)
+            if len(self._seed) == self.period:
+                self._value = sum(self._seed) / self.period
+                self._seed = []
+        else:
+            self._value += self.alpha * (value - self._value)
+        return self._value
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+
+class RollingReturn(StreamingIndicator):
+    """
+    Retorno % sobre `period` barras: value_at(preço_atual) compara com o
+    fechamento de `period` barras atrás (mesma conta do proxy de BTC.D).
+    """
+
+    def __init__(self, period: int, field: str = 'close'):
+        self.period = period
+        self.field = field
+        self.window = deque(maxlen=period)
+
+    def init_batch(self, values):
+        self.window = deque(np.asarray(values, dtype=np.float64)[-self.period:].tolist(), maxlen=self.period)
+
+    def update(self, value: float):
+        self.window.append(value)
+        return self.value
+
+    def value_at(self, current: float) -> Optional[float]:
+        if not self.ready or not self.window[0]:
+            return None
+        return (current - self.window[0]) / self.window[0] * 100
+
+    @property
+    def value(self):
+        # Retorno entre a barra mais antiga e a mais recente da janela
+        return self.value_at(self.window[-1]) if self.window else None
+
+    @property
+    def ready(self):
+        return len(self.window) == self.period
+
+
+class RollingVolatility(StreamingIndicator):
+    """Desvio padrão dos retornos % nas últimas `period` barras (somas móveis)"""
+
+    def __init__(self, period: int, field: str = 'close'):
+        self.period = period
+        self.field = field
+        self.returns = deque(maxlen=period)
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.last = None
+        self._updates = 0
+
+    def update(self, value: float):
+        if self.last:
+            r = (value - self.last) / self.last * 100
+            if len(self.returns) == self.period:
+                old = self.returns[0]
+                self.s1 -= old
+                self.s2 -= old * old
+            self.returns.append(r)
+            self.s1 += r
+            self.s2 += r * r
+            self._updates += 1
+            if self._updates >= RESYNC_EVERY:
+                self.s1 = math.fsum(self.returns)
+                self.s2 = math.fsum(x * x for x in self.returns)
+                self._updates = 0
+        self.last = value
+        return self.value
+
+    def init_batch(self, values):
+        arr = np.asarray(values, dtype=np.float64)[-(self.period + 1):]
+        if len(arr) < 2:
+            self.last = float(arr[-1]) if len(arr) else None
+            return
+        rets = np.diff(arr) / arr[:-1] * 100
+        self.returns = deque(rets.tolist(), maxlen=self.period)
+        self.s1 = float(rets.sum())
+        self.s2 = float((rets * rets).sum())
+        self.last = float(arr[-1])
+        self._updates = 0
+
+    @property
+    def value(self):
+        n = len(self.returns)
+        if n < 2:
+            return None
+        var = (self.s2 - self.s1 * self.s1 / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+    @property
+    def ready(self):
+        return len(self.returns) == self.period
+
+
+class RollingRange(StreamingIndicator):
+    """Máximo e mínimo em janela via deques monotônicos (O(1) amortizado)"""
+
+    def __init__(self, period: int, field: str = 'close'):
+        self.period = period
+        self.field = field
+        self.count = 0
+        self._max = deque()   # (índice, valor) decrescente
+        self._min = deque()   # (índice, valor) crescente
+
+    def update(self, value: float):
+        i = self.count
+        self.count += 1
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((i, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((i, value))
+        start = self.count - self.period
+        if self._max[0][0] < start:
+            self._max.popleft()
+        if self._min[0][0] < start:
+            self._min.popleft()
+        return self.value
+
+    def init_batch(self, values):
+        for v in np.asarray(values, dtype=np.float64)[-self.period:]:
+            self.update(float(v))
+
+    @property
+    def high(self):
+        return self._max[0][1] if self._max else None
+
+    @property
+    def low(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def value(self):
+        """Amplitude % da janela: (máx - mín) / mín * 100"""
+        if not self._min or not self.low:
+            return None
+        return (self.high - self.low) / self.low * 100
+
+    @property
+    def ready(self):
+        return self.count >= self.period
+
+
+class ATR(StreamingIndicator):
+    """Average True Range com suavização de Wilder; update recebe (high, low, close)"""
+
+    field = 'hlc'
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close = None
+        self._value = None
+        self._seed = []
+
+    def update(self, bar):
+        high, low, close = bar
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        if self._value is None:
+            self._seed.append(tr)
+            if len(self._seed) == self.period:
+                self._value = sum(self._seed) / self.period
+                self._seed = []
+        else:
+            self._value = (self._value * (self.period - 1) + tr) / self.period
+        return self._value
+
+    def init_batch(self, values):
+        for bar in np.asarray(values, dtype=np.float64):
+            self.update(tuple(bar))
+
+    @property
+    def value(self):
+        return self._value
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+
+# ============================================================
+# ESTADO POR SÉRIE
+# ============================================================
+_FIELD_COLUMNS = {'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5}
+
+
+def _column(data: np.ndarray, field: str) -> np.ndarray:
+    if field == 'hlc':
+        return data[:, [2, 3, 4]]
+    return data[:, _FIELD_COLUMNS[field]]
+
+
+class SeriesIndicators:
+    """
+    Indicadores de uma série (symbol, timeframe) alimentados só por barras fechadas.
+
+        serie = get_series('BTC/USDT', '4h')
+        serie.sync(candles)                 # candles ccxt; último = em formação
+        sma = serie.get('sma200', lambda: SMA(200))
+    """
+
+    def __init__(self, symbol: str, timeframe: str):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.last_ts = None
+        self.bars = 0
+        self.indicators: Dict[str, StreamingIndicator] = {}
+        self._history = None   # Último lote recebido (semeia indicadores novos)
+        self.lock = threading.Lock()
+
+    def get(self, name: str, factory: Callable[[], StreamingIndicator]) -> StreamingIndicator:
+        ind = self.indicators.get(name)
+        if ind is None:
+            ind = factory()
+            if self._history is not None and len(self._history):
+                ind.init_batch(_column(self._history, ind.field))
+            self.indicators[name] = ind
+        return ind
+
+    def required_bars(self) -> int:
+        """Candles para deixar todos os indicadores prontos (+1 do candle em formação)"""
+        return max((getattr(ind, 'period', 0) for ind in self.indicators.values()), default=0) + 2
+
+    def reset(self):
+        """Esquece o histórico: o próximo sync reinicializa tudo em lote"""
+        self.last_ts = None
+        self.bars = 0
+        self._history = None
+
+    def sync(self, candles: Sequence[Sequence[float]], closed_only: bool = True) -> int:
+        """
+        Alimenta as barras novas (timestamp > último visto). Se os candles não
+        emendam com o estado (primeira vez ou buraco), reinicializa em lote.
+        Retorna quantas barras entraram.
+        """
+        data = np.asarray(candles, dtype=np.float64)
+        if data.ndim != 2 or len(data) == 0:
+            return 0
+        if closed_only:
+            data = data[:-1]
+        if len(data) == 0:
+            return 0
+
+        if self.last_ts is None or data[0, 0] > self.last_ts:
+            # Sem sobreposição: não dá para garantir continuidade -> lote
+            self._history = data[-HISTORY_BARS:]
+            for ind in self.indicators.values():
+                ind.__init__(*_init_args(ind))
+                ind.init_batch(_column(data, ind.field))
+            self.last_ts = float(data[-1, 0])
+            self.bars = len(data)
+            return len(data)
+
+        new = data[data[:, 0] > self.last_ts]
+        for bar in new:
+            for ind in self.indicators.values():
+                col = _column(bar[None, :], ind.field)[0]
+                ind.update(tuple(col) if ind.field == 'hlc' else float(col))
+        if len(new):
+            self._history = np.concatenate([self._history, new])[-HISTORY_BARS:]
+            self.last_ts = float(new[-1, 0])
+            self.bars += len(new)
+        return len(new)
+
+
+def _init_args(ind: StreamingIndicator) -> tuple:
+    if isinstance(ind, ATR):
+        return (ind.period,)
+    return (ind.period, ind.field)
+
+
+_registry: Dict[tuple, SeriesIndicators] = {}
+_registry_lock = threading.Lock()
+
+
+def get_series(symbol: str, timeframe: str) -> SeriesIndicators:
+    """Estado único por (symbol, timeframe) no processo"""
+    key = (symbol, timeframe)
+    with _registry_lock:
+        serie = _registry.get(key)
+        if serie is None:
+            serie = _registry[key] = SeriesIndicators(symbol, timeframe)
+        return serie
+
+
+def bars_to_fetch(serie: SeriesIndicators, timeframe_ms: int, now_ms: int, full: int) -> int:
+    """
+    Quantos candles buscar: histórico completo na primeira vez, depois só as
+    barras novas desde o último fechamento visto (+ a em formação + sobreposição).
+    """
+    if serie.last_ts is None:
+        return full
+    missing = int((now_ms - serie.last_ts) // timeframe_ms)
+    return max(3, min(full, missing + 2))
+
+
+def sync_from_exchange(exchange, symbol: str, timeframe: str, full: int,
+                       specs: Dict[str, Callable[[], StreamingIndicator]]):
+    """
+    Busca só as barras novas da série, alimenta os indicadores pedidos e
+    devolve (serie, candles). Cai para o histórico completo (`full` candles)
+    na primeira vez ou se algum indicador não ficou pronto (buraco na série).
+    """
+    serie = get_series(symbol, timeframe)
+    with serie.lock:
+        for name, factory in specs.items():
+            serie.get(name, factory)
+
+        # Série compartilhada: o histórico completo precisa servir a todos os indicadores dela
+        full = max(full, serie.required_bars())
+        step_ms = exchange.parse_timeframe(timeframe) * 1000
+        limit = bars_to_fetch(serie, step_ms, exchange.milliseconds(), full)
+        candles = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+        serie.sync(candles)
+
+        if limit < full and not all(serie.indicators[name].ready for name in specs):
+            serie.reset()
+            candles = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=full)
+            serie.sync(candles)
+    return serie, candles
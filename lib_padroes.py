@@ -33,7 +33,7 @@ class AnalistaTecnico:
     - Cunha Descendente -> LONG
     """
     
-    def __init__(self):
+    def __init__(self, confiabilidade_base: Optional[dict] = None, tolerancia_simetria: Optional[dict] = None):
         # Confiabilidade base por padrão (dados históricos aproximados)
         self.confiabilidade_base = {
             'OCO': 0.83,
@@ -48,6 +48,16 @@ class AnalistaTecnico:
             'CUNHA_ASCENDENTE': 0.68,
             'CUNHA_DESCENDENTE': 0.68,
         }
+        # Diferença máxima entre ombros (OCO) e entre topos/fundos (duplos)
+        self.tolerancia_simetria = {
+            'ombros': 0.08,
+            'duplos': 0.03,
+        }
+        # Overrides (parameter_sweep.py / backtester.py)
+        if confiabilidade_base:
+            self.confiabilidade_base.update(confiabilidade_base)
+        if tolerancia_simetria:
+            self.tolerancia_simetria.update(tolerancia_simetria)
 
     def identificar_pivos(self, df: pd.DataFrame, order=3) -> Tuple[np.ndarray, np.ndarray]:
         """Identifica topos e fundos locais usando scipy."""
@@ -64,9 +74,19 @@ class AnalistaTecnico:
         """Retorna slope e r² da regressão linear."""
         if len(values) < 3:
             return 0, 0
-        x = np.arange(len(values))
-        slope, intercept, r_value, p_value, std_err = stats.linregress(x, values)
-        return slope, r_value ** 2
+        # Mínimos quadrados em forma fechada (mesmo slope/r² do stats.linregress,
+        # sem o overhead do wrapper do scipy - chamado várias vezes por análise)
+        y = np.asarray(values, dtype=float)
+        x = np.arange(len(y), dtype=float)
+        dx = x - x.mean()
+        dy = y - y.mean()
+        ssxm = dx @ dx
+        ssym = dy @ dy
+        ssxym = dx @ dy
+        slope = ssxym / ssxm
+        if ssym == 0:
+            return slope, 0.0
+        return slope, min(1.0, ssxym * ssxym / (ssxm * ssym))
 
     # ============================================================
     # PADRÃO 1: OCO (Ombro-Cabeça-Ombro) -> SHORT
@@ -77,7 +97,7 @@ class AnalistaTecnico:
             return None
             
         # Últimos 3 topos
-        tops = [(i, df['high'].iloc[i]) for i in top_idx[-5:]]
+        tops = list(zip(top_idx[-5:], df['high'].values[top_idx[-5:]]))
         if len(tops) < 3:
             return None
             
@@ -93,7 +113,7 @@ class AnalistaTecnico:
                 
             # Regra 2: Simetria dos ombros (máx 8% diferença)
             diff_ombros = abs(h1 - h3) / max(h1, h3)
-            if diff_ombros > 0.08:
+            if diff_ombros > self.tolerancia_simetria['ombros']:
                 continue
                 
             # Regra 3: Distância temporal razoável
@@ -138,7 +158,7 @@ class AnalistaTecnico:
         if len(bot_idx) < 3:
             return None
             
-        bots = [(i, df['low'].iloc[i]) for i in bot_idx[-5:]]
+        bots = list(zip(bot_idx[-5:], df['low'].values[bot_idx[-5:]]))
         if len(bots) < 3:
             return None
             
@@ -153,7 +173,7 @@ class AnalistaTecnico:
                 
             # Regra 2: Simetria dos ombros
             diff_ombros = abs(l1 - l3) / max(l1, l3)
-            if diff_ombros > 0.08:
+            if diff_ombros > self.tolerancia_simetria['ombros']:
                 continue
                 
             # Distância temporal
@@ -195,7 +215,7 @@ class AnalistaTecnico:
         if len(top_idx) < 2:
             return None
             
-        tops = [(i, df['high'].iloc[i]) for i in top_idx[-4:]]
+        tops = list(zip(top_idx[-4:], df['high'].values[top_idx[-4:]]))
         if len(tops) < 2:
             return None
             
@@ -205,7 +225,7 @@ class AnalistaTecnico:
             
             # Regra 1: Topos similares (máx 3% diferença)
             diff = abs(h1 - h2) / max(h1, h2)
-            if diff > 0.03:
+            if diff > self.tolerancia_simetria['duplos']:
                 continue
                 
             # Regra 2: Distância temporal adequada
@@ -247,7 +267,7 @@ class AnalistaTecnico:
         if len(bot_idx) < 2:
             return None
             
-        bots = [(i, df['low'].iloc[i]) for i in bot_idx[-4:]]
+        bots = list(zip(bot_idx[-4:], df['low'].values[bot_idx[-4:]]))
         if len(bots) < 2:
             return None
             
@@ -256,7 +276,7 @@ class AnalistaTecnico:
             idx2, l2 = bots[i + 1]
             
             diff = abs(l1 - l2) / max(l1, l2)
-            if diff > 0.03:
+            if diff > self.tolerancia_simetria['duplos']:
                 continue
                 
             dist = idx2 - idx1
@@ -297,8 +317,8 @@ class AnalistaTecnico:
             return None
             
         # Últimos topos e fundos
-        tops = [df['high'].iloc[i] for i in top_idx[-4:]]
-        bots = [df['low'].iloc[i] for i in bot_idx[-4:]]
+        tops = list(df['high'].values[top_idx[-4:]])
+        bots = list(df['low'].values[bot_idx[-4:]])
         
         if len(tops) < 2 or len(bots) < 2:
             return None
@@ -348,8 +368,8 @@ class AnalistaTecnico:
         if len(top_idx) < 2 or len(bot_idx) < 2:
             return None
             
-        tops = [df['high'].iloc[i] for i in top_idx[-4:]]
-        bots = [df['low'].iloc[i] for i in bot_idx[-4:]]
+        tops = list(df['high'].values[top_idx[-4:]])
+        bots = list(df['low'].values[bot_idx[-4:]])
         
         if len(tops) < 2 or len(bots) < 2:
             return None
@@ -396,8 +416,8 @@ class AnalistaTecnico:
         if len(top_idx) < 2 or len(bot_idx) < 2:
             return None
             
-        tops = [df['high'].iloc[i] for i in top_idx[-4:]]
-        bots = [df['low'].iloc[i] for i in bot_idx[-4:]]
+        tops = list(df['high'].values[top_idx[-4:]])
+        bots = list(df['low'].values[bot_idx[-4:]])
         
         if len(tops) < 2 or len(bots) < 2:
             return None
@@ -563,8 +583,8 @@ class AnalistaTecnico:
         if len(top_idx) < 3 or len(bot_idx) < 3:
             return None
             
-        tops = [df['high'].iloc[i] for i in top_idx[-5:]]
-        bots = [df['low'].iloc[i] for i in bot_idx[-5:]]
+        tops = list(df['high'].values[top_idx[-5:]])
+        bots = list(df['low'].values[bot_idx[-5:]])
         
         if len(tops) < 3 or len(bots) < 3:
             return None
@@ -613,8 +633,8 @@ class AnalistaTecnico:
         if len(top_idx) < 3 or len(bot_idx) < 3:
             return None
             
-        tops = [df['high'].iloc[i] for i in top_idx[-5:]]
-        bots = [df['low'].iloc[i] for i in bot_idx[-5:]]
+        tops = list(df['high'].values[top_idx[-5:]])
+        bots = list(df['low'].values[bot_idx[-5:]])
         
         if len(tops) < 3 or len(bots) < 3:
             return None
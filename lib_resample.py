@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+🧮 LIB RESAMPLE - Timeframes maiores montados localmente a partir do menor
+
+O scanner baixava 15m, 30m e 1h separadamente para cada par. Aqui só o
+timeframe base (o menor configurado) é buscado; 30m/1h/4h são agregados em
+NumPy, alinhados às mesmas fronteiras da Bybit (múltiplos do timeframe desde
+a época UTC, como as barras da API v5 até 1d):
+
+    open = 1º open do bucket | high = máx | low = mín | close = último close
+    volume = soma
+
+- Bucket inicial cortado pela janela buscada é descartado (não bate com a
+  barra da exchange); o último bucket pode estar em formação, como na API
+- Incremental: após o aquecimento, só as barras base novas são buscadas e só
+  os buckets afetados são reagregados
+"""
+
+import threading
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from brain_simulator import TIMEFRAME_MINUTES
+
+logger = logging.getLogger("Resample")
+
+PAGE_LIMIT = 1000   # Máximo de klines por requisição na Bybit
+
+
+def timeframe_ms(timeframe: str) -> int:
+    return TIMEFRAME_MINUTES[timeframe] * 60 * 1000
+
+
+def resample_ohlcv(candles, base_tf: str, target_tf: str) -> np.ndarray:
+    """
+    Agrega candles [ts, o, h, l, c, v] do base_tf para target_tf (vetorizado).
+    Descarta o primeiro bucket se a janela começa no meio dele.
+    """
+    data = np.asarray(candles, dtype=np.float64)
+    if len(data) == 0:
+        return np.empty((0, 6))
+    base_ms, target_ms = timeframe_ms(base_tf), timeframe_ms(target_tf)
+    if target_ms % base_ms:
+        raise ValueError(f"{target_tf} não é múltiplo de {base_tf}")
+    if target_ms == base_ms:
+        return data[:, :6].copy()
+
+    ts = data[:, 0].astype(np.int64)
+    buckets = ts // target_ms * target_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(data)] - 1
+
+    out = np.empty((len(starts), 6))
+    out[:, 0] = buckets[starts]
+    out[:, 1] = data[starts, 1]
+    out[:, 2] = np.maximum.reduceat(data[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(data[:, 3], starts)
+    out[:, 4] = data[ends, 4]
+    out[:, 5] = np.add.reduceat(data[:, 5], starts)
+
+    if ts[0] != buckets[0]:
+        out = out[1:]
+    return out
+
+
+def to_ccxt(rows: np.ndarray) -> list:
+    """Array -> lista no formato do ccxt (timestamp inteiro em ms)"""
+    return [[int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[5])] for r in rows]
+
+
+class MultiTimeframeFeed:
+    """
+    Feed por par: busca só o timeframe base e deriva os demais.
+
+        feed = MultiTimeframeFeed(exchange, ['15m', '30m', '1h'], history=200)
+        feed.refresh('ETH/USDT')
+        candles_1h = feed.get('ETH/USDT', '1h')
+    """
+
+    def __init__(self, exchange, timeframes: Sequence[str], history: int = 200, limiter=None):
+        self.exchange = exchange
+        self.timeframes = sorted(set(timeframes), key=lambda tf: TIMEFRAME_MINUTES[tf])
+        self.base_tf = self.timeframes[0]
+        self.base_ms = timeframe_ms(self.base_tf)
+        self.history = history
+        self.limiter = limiter
+        for tf in self.timeframes[1:]:
+            if timeframe_ms(tf) % self.base_ms:
+                raise ValueError(f"{tf} não é múltiplo do timeframe base {self.base_tf}")
+
+        # Barras base para `history` barras do maior timeframe (+1 bucket de alinhamento)
+        ratio = timeframe_ms(self.timeframes[-1]) // self.base_ms
+        self.base_bars = (history + 1) * ratio
+
+        self._base: Dict[str, np.ndarray] = {}
+        self._derived: Dict[tuple, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'base_bars_fetched': 0}
+
+    # ============================================================
+    # BUSCA
+    # ============================================================
+    def _fetch(self, symbol: str, limit: int, since: Optional[int] = None) -> np.ndarray:
+        if self.limiter:
+            self.limiter.wait_if_needed(bot_name="scanner")
+        self.stats['requests'] += 1
+        rows = self.exchange.fetch_ohlcv(symbol, timeframe=self.base_tf, since=since, limit=limit)
+        self.stats['base_bars_fetched'] += len(rows)
+        return np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+
+    def _fetch_history(self, symbol: str) -> np.ndarray:
+        """Aquecimento: pagina para trás até ter base_bars"""
+        if self.base_bars <= PAGE_LIMIT:
+            return self._fetch(symbol, self.base_bars)
+        now = self.exchange.milliseconds()
+        since = (now // self.base_ms - self.base_bars + 1) * self.base_ms
+        pages = []
+        while since <= now:
+            page = self._fetch(symbol, PAGE_LIMIT, since)
+            if len(page) == 0:
+                break
+            pages.append(page)
+            since = int(page[-1, 0]) + self.base_ms
+        return np.concatenate(pages) if pages else np.empty((0, 6))
+
+    def refresh(self, symbol: str) -> int:
+        """Atualiza o par (1 requisição após o aquecimento). Retorna barras base recebidas."""
+        with self._lock:
+            base = self._base.get(symbol)
+
+        if base is None or len(base) == 0:
+            fresh = self._fetch_history(symbol)
+            first_changed = None
+            received = len(fresh)
+        else:
+            last_ts = int(base[-1, 0])
+            missing = (self.exchange.milliseconds() - last_ts) // self.base_ms
+            if missing + 1 > PAGE_LIMIT:
+                # Parado por muito tempo: recomeça do zero
+                with self._lock:
+                    self._base.pop(symbol, None)
+                return self.refresh(symbol)
+            new = self._fetch(symbol, int(missing) + 2)
+            # A barra em formação anterior é substituída pela versão atual
+            new = new[new[:, 0] >= last_ts]
+            fresh = np.concatenate([base[base[:, 0] < (new[0, 0] if len(new) else last_ts + 1)], new])
+            first_changed = int(new[0, 0]) if len(new) else None
+            received = len(new)
+
+        fresh = fresh[-self.base_bars:]
+        with self._lock:
+            self._base[symbol] = fresh
+            for tf in self.timeframes[1:]:
+                self._derive(symbol, tf, fresh, first_changed)
+        return received
+
+    def _derive(self, symbol: str, tf: str, base: np.ndarray, first_changed: Optional[int]):
+        key = (symbol, tf)
+        cached = self._derived.get(key)
+        tf_ms = timeframe_ms(tf)
+        if cached is None or first_changed is None or len(cached) == 0:
+            self._derived[key] = resample_ohlcv(base, self.base_tf, tf)[-self.history:]
+            return
+        # Só reagrega os buckets a partir do primeiro que mudou
+        cut = first_changed // tf_ms * tf_ms
+        head = cached[cached[:, 0] < cut]
+        tail = resample_ohlcv(base[base[:, 0] >= cut], self.base_tf, tf)
+        self._derived[key] = np.concatenate([head, tail])[-self.history:]
+
+    def retain(self, symbols):
+        """Descarta o estado de pares que saíram do universo"""
+        keep = set(symbols)
+        with self._lock:
+            for symbol in [s for s in self._base if s not in keep]:
+                del self._base[symbol]
+            for key in [k for k in self._derived if k[0] not in keep]:
+                del self._derived[key]
+
+    # ============================================================
+    # LEITURA
+    # ============================================================
+    def get(self, symbol: str, timeframe: str, limit: Optional[int] = None) -> List[list]:
+        """Candles no formato ccxt (último = em formação), como fetch_ohlcv"""
+        limit = limit or self.history
+        with self._lock:
+            if timeframe == self.base_tf:
+                rows = self._base.get(symbol)
+            else:
+                rows = self._derived.get((symbol, timeframe))
+        if rows is None:
+            return []
+        return to_ccxt(rows[-limit:])
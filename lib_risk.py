@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+🛡️ LIB RISK - Regras de risco do ExecutorBybit
+
+Fonte única de sizing e Break-Even: o executor ao vivo (bot_executor.py) e o
+replay offline (brain_simulator.py, backtester.py) importam daqui, sem que o
+executor carregue o simulador (NumPy, SQLite) só para ler constantes.
+"""
+
+RISK_PER_TRADE = 0.05    # Arrisca 5% da banca por trade
+MAX_LEVERAGE = 5         # Alavancagem máxima permitida
+BE_TRIGGER_RATIO = 0.5   # Break-Even ao atingir 50% do caminho até o alvo
+BE_STOP_OFFSET = 0.002   # SL vai para entrada * 1.002 (buy) / 0.998 (sell)
+
+
+def break_even_trigger(entry_price: float, target_price: float, side: str) -> float:
+    """Preço que aciona o Break-Even"""
+    distancia_alvo = abs(target_price - entry_price)
+    if side == 'buy':
+        return entry_price + distancia_alvo * BE_TRIGGER_RATIO
+    return entry_price - distancia_alvo * BE_TRIGGER_RATIO
+
+
+def break_even_stop(entry_price: float, side: str) -> float:
+    """Novo SL após Break-Even (pequeno lucro para cobrir taxas)"""
+    return entry_price * (1 + BE_STOP_OFFSET) if side == 'buy' else entry_price * (1 - BE_STOP_OFFSET)
@@ -4,8 +4,46 @@ import time
 import fcntl
 import logging
 
+from lib_indicadores import SMA, RollingReturn, sync_from_exchange
+
 logger = logging.getLogger("Utils")
 
+BTCD_FILE = '/root/bot_sniper_bybit/btcd_data.json'
+BTCD_MAX_AGE_SECONDS = 1800  # Webhook BTC.D mais velho que 30 min -> fallback proxy
+SHARED_DIR_NAME = 'bot_sniper'
+
+
+def get_shared_dir():
+    """
+    Diretório para estado compartilhado entre processos.
+    /dev/shm (tmpfs, sem I/O de disco) quando disponível, senão o tmp do sistema.
+    """
+    import tempfile
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    path = os.path.join(base, SHARED_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def atomic_write_json(path, data):
+    """
+    Grava JSON de forma atômica (tmp + os.replace): leitores veem o arquivo
+    antigo inteiro ou o novo inteiro, nunca um pedaço.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        return True
+    except Exception as e:
+        logger.error(f"Erro ao gravar {path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
 class JsonManager:
     """
     Gerenciador seguro de arquivos JSON com File Locking (Phase 1 Fix).
@@ -72,15 +110,16 @@ def check_btc_trend(exchange, timeframe='4h'):
     Retorna 'LONG', 'SHORT' ou 'NEUTRAL'.
     """
     try:
-        # Usa média móvel de 200 períodos
-        candles = exchange.fetch_ohlcv('BTC/USDT', timeframe=timeframe, limit=201)
-        if len(candles) < 201: return 'NEUTRAL'
+        # Usa média móvel de 200 períodos (estado em streaming: só busca as barras novas)
+        serie, candles = sync_from_exchange(exchange, 'BTC/USDT', timeframe, 201,
+                                            {'sma200': lambda: SMA(200)})
+        sma = serie.indicators['sma200']
+        if not sma.ready: return 'NEUTRAL'
         
-        closes = [c[4] for c in candles]
-        current_price = closes[-1]
+        current_price = candles[-1][4]
         
-        # Simples SMA 200 (pode ser melhorada para EMA)
-        sma200 = sum(closes[:-1]) / 200
+        # Simples SMA 200 das barras fechadas (pode ser melhorada para EMA)
+        sma200 = sma.value
         
         if current_price > sma200:
             return 'LONG'
@@ -98,8 +137,7 @@ def check_btc_dominance_webhook():
     
     Fallback para proxy se dados estiverem antigos (>30 min)
     """
-    BTCD_FILE = '/root/bot_sniper_bybit/btcd_data.json'
-    MAX_AGE_SECONDS = 1800  # 30 minutos
+    MAX_AGE_SECONDS = BTCD_MAX_AGE_SECONDS
     
     try:
         # Verificar se arquivo existe
@@ -142,8 +180,13 @@ def check_btc_dominance_proxy(exchange, timeframe='4h'):
     Se alts performam melhor = dominância caindo
     """
     try:
-        # Buscar candles do BTC e principais alts
-        btc_candles = exchange.fetch_ohlcv('BTC/USDT', timeframe=timeframe, limit=21)
+        # Performance percentual dos últimos 20 candles (close 20 candles atrás -> close atual)
+        def performance(symbol):
+            serie, candles = sync_from_exchange(exchange, symbol, timeframe, 21,
+                                                {'ret20': lambda: RollingReturn(20)})
+            return serie.indicators['ret20'].value_at(candles[-1][4])
+        
+        btc_perf = performance('BTC/USDT')
         
         # Principais alts para comparação
         alt_symbols = ['ETH/USDT', 'SOL/USDT', 'BNB/USDT']
@@ -151,18 +194,9 @@ def check_btc_dominance_proxy(exchange, timeframe='4h'):
         
         for alt_symbol in alt_symbols:
             try:
-                alt_candles = exchange.fetch_ohlcv(alt_symbol, timeframe=timeframe, limit=21)
+                alt_perf = performance(alt_symbol)
                 
-                if len(alt_candles) >= 21 and len(btc_candles) >= 21:
-                    # Calcula performance percentual (últimos 20 candles)
-                    btc_start = btc_candles[-21][4]  # Close 20 candles atrás
-                    btc_end = btc_candles[-1][4]     # Close atual
-                    btc_perf = ((btc_end - btc_start) / btc_start) * 100
-                    
-                    alt_start = alt_candles[-21][4]
-                    alt_end = alt_candles[-1][4]
-                    alt_perf = ((alt_end - alt_start) / alt_start) * 100
-                    
+                if alt_perf is not None and btc_perf is not None:
                     # Diferença de performance
                     # Se positivo: BTC performou melhor (dominância subindo)
                     # Se negativo: Alt performou melhor (dominância caindo)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+🌐 MARKET CONTEXT SERVICE - Snapshot único de BTC + BTC.D + Cenário
+
+Antes, scanner, MarketContextValidator, BrainIntegration e dashboard chamavam
+get_market_analysis() cada um por conta própria (201 candles 4h do BTC +
+21 candles de BTC/ETH/SOL/BNB + leitura do btcd_data.json por chamada).
+
+Agora um único processo recalcula o contexto apenas quando:
+- um candle 4h fecha (relógio da exchange, via CandleCloseScheduler)
+- chega um webhook de BTC.D (mtime do btcd_data.json mudou)
+- o dado do webhook expira (passa a valer o proxy)
+
+e publica um snapshot imutável em memória compartilhada (/dev/shm), trocado
+atomicamente. Os consumidores só leem o arquivo (re-parse apenas quando o
+mtime muda) e caem no cálculo local se o serviço não estiver rodando.
+
+Uso:
+    python market_context_service.py          # Serviço (loop)
+    python market_context_service.py --once   # Recalcula, publica e sai
+    python market_context_service.py --show   # Mostra o snapshot atual
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from lib_utils import (get_shared_dir, atomic_write_json, get_market_analysis,
+                       should_trade_in_scenario, BTCD_FILE, BTCD_MAX_AGE_SECONDS)
+from candle_scheduler import CandleCloseScheduler, timeframe_seconds
+from health_status import HealthReporter
+
+logger = logging.getLogger("MarketContextService")
+
+CONTEXT_TIMEFRAME = '4h'
+SNAPSHOT_NAME = 'market_context.json'
+POLL_SECONDS = 5
+# Snapshot mais velho que 1 candle 4h + folga = serviço parado: consumidores calculam sozinhos
+MAX_SNAPSHOT_AGE = timeframe_seconds(CONTEXT_TIMEFRAME) + 600
+
+
+def snapshot_path() -> str:
+    return os.path.join(get_shared_dir(), SNAPSHOT_NAME)
+
+
+# ============================================================
+# PRODUTOR
+# ============================================================
+class MarketContextService:
+    def __init__(self, exchange=None, timeframe: str = CONTEXT_TIMEFRAME, path: Optional[str] = None):
+        if exchange is None:
+            import ccxt
+            exchange = ccxt.bybit({
+                'enableRateLimit': True,
+                'options': {'defaultType': 'linear'}
+            })
+        self.exchange = exchange
+        self.timeframe = timeframe
+        self.path = path or snapshot_path()
+        self.scheduler = CandleCloseScheduler(exchange)
+        self.scheduler.register('market_context', timeframe)
+        self.version = 0
+        self._btcd_mtime = None
+        self._btcd_expires_at = None
+
+    def _btcd_state(self):
+        """(mtime, expira_em) do arquivo do webhook"""
+        try:
+            mtime = os.path.getmtime(BTCD_FILE)
+            with open(BTCD_FILE, 'r') as f:
+                ts = json.load(f).get('timestamp', 0)
+            return mtime, ts + BTCD_MAX_AGE_SECONDS
+        except Exception:
+            return None, None
+
+    def compute(self, reason: str) -> Dict:
+        analysis = get_market_analysis(self.exchange, timeframe=self.timeframe)
+        scenario = analysis['scenario_number']
+        now = time.time()
+        self.version += 1
+        return {
+            **analysis,
+            'should_trade_long': should_trade_in_scenario(scenario, 'LONG')[0],
+            'should_trade_short': should_trade_in_scenario(scenario, 'SHORT')[0],
+            'timeframe': self.timeframe,
+            'reason': reason,
+            'version': self.version,
+            'timestamp': int(now),
+            'human_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'pid': os.getpid()
+        }
+
+    def publish(self, reason: str) -> Optional[Dict]:
+        try:
+            snapshot = self.compute(reason)
+        except Exception as e:
+            logger.error(f"❌ Erro ao calcular contexto: {e}")
+            return None
+        if atomic_write_json(self.path, snapshot):
+            logger.info(
+                f"📊 Contexto v{snapshot['version']} ({reason}): Cenário {snapshot['scenario_number']} "
+                f"{snapshot['scenario_name']} | BTC={snapshot['btc_trend']} | "
+                f"BTC.D={snapshot['btcd_trend']} ({snapshot['btcd_source']})"
+            )
+        return snapshot
+
+    def check(self) -> Optional[str]:
+        """Motivo para recalcular agora, ou None"""
+        if self.scheduler.due():
+            return 'candle_close'
+        mtime, expires_at = self._btcd_state()
+        if mtime != self._btcd_mtime:
+            self._btcd_mtime, self._btcd_expires_at = mtime, expires_at
+            return 'webhook'
+        if self._btcd_expires_at and time.time() > self._btcd_expires_at:
+            self._btcd_expires_at = None
+            return 'webhook_expired'
+        return None
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        logger.info(f"🌐 Market Context Service iniciado -> {self.path}")
+        self._btcd_mtime, self._btcd_expires_at = self._btcd_state()
+        self.publish('startup')
+        health = HealthReporter('market_context', interval=POLL_SECONDS)
+        while not (stop_event and stop_event.is_set()):
+            try:
+                inicio = time.perf_counter()
+                reason = self.check()
+                if reason:
+                    self.publish(reason)
+                health.beat((time.perf_counter() - inicio) * 1000)
+                time.sleep(min(POLL_SECONDS, self.scheduler.seconds_until_next_close()))
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                logger.error(f"Erro no loop do serviço de contexto: {e}")
+                health.error(e)
+                time.sleep(POLL_SECONDS)
+
+
+# ============================================================
+# CONSUMIDORES
+# ============================================================
+_read_cache = {'path': None, 'mtime': None, 'data': None}
+_read_lock = threading.Lock()
+
+
+def read_snapshot(max_age: Optional[float] = MAX_SNAPSHOT_AGE, path: Optional[str] = None) -> Optional[Dict]:
+    """
+    Snapshot publicado pelo serviço (cópia), ou None se ausente/velho.
+    O JSON só é re-lido quando o arquivo é trocado.
+    """
+    path = path or snapshot_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _read_lock:
+        if _read_cache['path'] != path or _read_cache['mtime'] != mtime:
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return None
+            _read_cache.update(path=path, mtime=mtime, data=data)
+        data = _read_cache['data']
+
+    if max_age is not None and time.time() - data.get('timestamp', 0) > max_age:
+        return None
+    return dict(data)
+
+
+def get_market_context(exchange=None, timeframe: str = CONTEXT_TIMEFRAME) -> Dict:
+    """
+    Contexto de mercado para os bots: snapshot compartilhado se o serviço estiver
+    ativo; senão calcula localmente (comportamento antigo) com a exchange passada.
+    """
+    snapshot = read_snapshot()
+    if snapshot is not None and snapshot.get('timeframe', CONTEXT_TIMEFRAME) == timeframe:
+        return snapshot
+    if exchange is None:
+        raise RuntimeError("Snapshot de contexto indisponível e nenhuma exchange para calcular localmente")
+    logger.debug("Snapshot de contexto indisponível - calculando localmente")
+    return get_market_analysis(exchange, timeframe=timeframe)
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_context.log")),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    parser = argparse.ArgumentParser(description='Serviço de contexto de mercado compartilhado')
+    parser.add_argument('--once', action='store_true', help='Recalcula, publica e sai')
+    parser.add_argument('--show', action='store_true', help='Mostra o snapshot atual e sai')
+    args = parser.parse_args()
+
+    if args.show:
+        print(json.dumps(read_snapshot(max_age=None), indent=2, ensure_ascii=False))
+        sys.exit(0)
+
+    service = MarketContextService()
+    if args.once:
+        service.publish('manual')
+    else:
+        service.run()
@@ -48,10 +48,10 @@ class MarketContextValidator:
             return self.last_analysis
         
         try:
-            # Importar funções do lib_utils
-            from lib_utils import get_market_analysis as lib_get_market_analysis
+            # Snapshot compartilhado (market_context_service); calcula localmente se indisponível
+            from market_context_service import get_market_context
             
-            analysis = lib_get_market_analysis(self.exchange)
+            analysis = get_market_context(self.exchange)
             
             # Adicionar regras de trading baseadas no cenário
             scenario = analysis.get('scenario_number', 5)
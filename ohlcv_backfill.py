@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+⬇️ OHLCV BACKFILL - Download histórico em massa para o OHLCVStore
+
+- Pagina fetch_ohlcv com cursor `since` (1000 candles por página)
+- Vários pares/timeframes em paralelo (threads), todos dentro de um
+  RateLimiter próprio e mais lento que o dos bots
+- Retomável: o cursor de cada série começa no último candle já salvo
+- Só grava candles FECHADOS; ao final audita buracos e tenta preenchê-los
+
+Uso:
+    python ohlcv_backfill.py --days 180
+    python ohlcv_backfill.py --symbols ETH/USDT SOL/USDT --timeframes 15m --since 2025-06-01
+    python ohlcv_backfill.py --gaps   # Só audita/preenche buracos
+"""
+
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from ohlcv_store import OHLCVStore, timeframe_ms
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger("OHLCVBackfill")
+
+PAGE_LIMIT = 1000          # Máximo da API v5 de klines da Bybit
+MAX_RETRIES = 5
+# Limiter próprio (não o singleton get_rate_limiter: ele ignora o limite pedido
+# depois de criado e o default também é 100/min). Com estado em arquivo separado,
+# o backfill nunca passa de 40 chamadas/min e deixa folga para os bots ao vivo
+BACKFILL_CALLS_PER_MINUTE = 40
+BACKFILL_LIMITER_STATE = "/tmp/bybit_backfill_rate_limiter.json"
+
+
+class OHLCVBackfill:
+    def __init__(self, exchange=None, store: Optional[OHLCVStore] = None,
+                 workers: int = 4, page_limit: int = PAGE_LIMIT, limiter=None):
+        if exchange is None:
+            import ccxt
+            exchange = ccxt.bybit({
+                'enableRateLimit': True,
+                'options': {'defaultType': 'linear'}
+            })
+        self.exchange = exchange
+        self.store = store or OHLCVStore()
+        self.workers = workers
+        self.page_limit = page_limit
+        self.limiter = limiter or RateLimiter(BACKFILL_CALLS_PER_MINUTE, state_file=BACKFILL_LIMITER_STATE)
+        self._progress_lock = threading.Lock()
+        self.progress: Dict[str, Dict] = {}
+
+    # ============================================================
+    # PAGINAÇÃO
+    # ============================================================
+    def _fetch_page(self, symbol: str, timeframe: str, since: int) -> list:
+        delay = 2
+        for attempt in range(MAX_RETRIES):
+            try:
+                self.limiter.wait_if_needed(bot_name="backfill")
+                return self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=self.page_limit)
+            except Exception as e:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                logger.warning(f"⚠️ {symbol} [{timeframe}] erro na página ({e}), tentativa {attempt + 1}/{MAX_RETRIES}")
+                time.sleep(delay)
+                delay *= 2
+        return []
+
+    def fetch_range(self, symbol: str, timeframe: str, since: int, until: Optional[int] = None) -> int:
+        """Baixa [since, until) página a página gravando no store. Retorna candles novos."""
+        step = timeframe_ms(timeframe)
+        key = f"{symbol}_{timeframe}"
+        cursor = since
+        added = 0
+
+        while True:
+            # Só candles fechados: o candle em formação começa em now - step
+            now = int(time.time() * 1000)
+            limit_ts = min(until, now - step + 1) if until else now - step + 1
+            if cursor >= limit_ts:
+                break
+
+            page = self._fetch_page(symbol, timeframe, cursor)
+            page = [c for c in page if cursor <= c[0] < limit_ts]
+            if not page:
+                break
+
+            added += self.store.write(symbol, timeframe, page)
+            last = int(page[-1][0])
+            with self._progress_lock:
+                self.progress[key] = {'cursor': last, 'added': added}
+
+            next_cursor = last + step
+            if next_cursor <= cursor:
+                break
+            cursor = next_cursor
+
+        return added
+
+    def backfill_series(self, symbol: str, timeframe: str, since: int) -> Dict:
+        """Retoma do último candle salvo (ou do `since`) até o presente"""
+        last = self.store.last_timestamp(symbol, timeframe)
+        start = max(since, last + timeframe_ms(timeframe)) if last is not None else since
+
+        # Pedido de histórico mais antigo que o salvo: completa o começo também
+        first = self.store.first_timestamp(symbol, timeframe)
+        added = 0
+        if first is not None and since < first:
+            added += self.fetch_range(symbol, timeframe, since, first)
+
+        added += self.fetch_range(symbol, timeframe, start)
+        return {'symbol': symbol, 'timeframe': timeframe, 'added': added}
+
+    def fill_gaps(self, symbol: str, timeframe: str) -> Dict:
+        """Rebaixa os intervalos faltantes; o que continuar faltando é buraco da própria exchange"""
+        gaps = self.store.find_gaps(symbol, timeframe)
+        added = 0
+        for gap_start, gap_end in gaps:
+            added += self.fetch_range(symbol, timeframe, gap_start, gap_end)
+        remaining = self.store.find_gaps(symbol, timeframe)
+        if remaining:
+            logger.warning(f"⚠️ {symbol} [{timeframe}]: {len(remaining)} buracos sem dados na exchange")
+        return {'symbol': symbol, 'timeframe': timeframe, 'gaps': len(gaps), 'added': added,
+                'remaining_gaps': remaining}
+
+    # ============================================================
+    # ORQUESTRAÇÃO
+    # ============================================================
+    def run(self, symbols: List[str], timeframes: List[str], since: int, gaps_only: bool = False) -> List[Dict]:
+        jobs = [(s, tf) for s in symbols for tf in timeframes]
+        logger.info(f"⬇️ Backfill: {len(jobs)} séries, {self.workers} workers, desde {datetime.fromtimestamp(since / 1000, tz=timezone.utc):%Y-%m-%d}")
+        start = time.time()
+        results = []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for symbol, tf in jobs:
+                if gaps_only:
+                    futures[pool.submit(self.fill_gaps, symbol, tf)] = (symbol, tf)
+                else:
+                    futures[pool.submit(self.backfill_series, symbol, tf, since)] = (symbol, tf)
+
+            for future in as_completed(futures):
+                symbol, tf = futures[future]
+                try:
+                    result = future.result()
+                    logger.info(f"✅ {symbol} [{tf}]: +{result['added']} candles")
+                except Exception as e:
+                    result = {'symbol': symbol, 'timeframe': tf, 'added': 0, 'error': str(e)}
+                    logger.error(f"❌ {symbol} [{tf}]: {e}")
+                results.append(result)
+
+        # Auditoria final de buracos (após backfill normal)
+        if not gaps_only:
+            for symbol, tf in jobs:
+                if self.store.find_gaps(symbol, tf):
+                    results.append(self.fill_gaps(symbol, tf))
+
+        total = sum(r.get('added', 0) for r in results)
+        logger.info(f"🏁 Backfill concluído: +{total} candles em {time.time() - start:.0f}s")
+        return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Backfill histórico de OHLCV')
+    parser.add_argument('--symbols', nargs='*', help='Pares (padrão: config_futures.json)')
+    parser.add_argument('--timeframes', nargs='*', help='Timeframes (padrão: config_futures.json)')
+    parser.add_argument('--days', type=int, default=180, help='Dias de histórico (ignorado com --since)')
+    parser.add_argument('--since', help='Data inicial YYYY-MM-DD (UTC)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--store', help='Diretório do store (padrão: ohlcv_data/)')
+    parser.add_argument('--gaps', action='store_true', help='Só audita e preenche buracos')
+    parser.add_argument('--stats', action='store_true', help='Mostra o conteúdo do store e sai')
+    args = parser.parse_args()
+
+    store = OHLCVStore(args.store) if args.store else OHLCVStore()
+
+    if args.stats:
+        for symbol, tf in store.series():
+            s = store.stats(symbol, tf)
+            first = datetime.fromtimestamp(s['first'] / 1000, tz=timezone.utc) if s['first'] else None
+            last = datetime.fromtimestamp(s['last'] / 1000, tz=timezone.utc) if s['last'] else None
+            print(f"{symbol:<12} {tf:<4} | {s['candles']:>8} candles | {first:%Y-%m-%d} -> {last:%Y-%m-%d %H:%M} | {s['gaps']} buracos")
+        raise SystemExit(0)
+
+    with open('config_futures.json', 'r') as f:
+        config = json.load(f)
+
+    if args.since:
+        since = int(datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+    else:
+        since = int((time.time() - args.days * 86400) * 1000)
+
+    backfill = OHLCVBackfill(store=store, workers=args.workers)
+    backfill.run(
+        args.symbols or config.get('pairs', []),
+        args.timeframes or config.get('timeframes', ['15m']),
+        since,
+        gaps_only=args.gaps
+    )
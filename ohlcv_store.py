@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+🗄️ OHLCV STORE - Armazenamento local compacto de candles
+
+Layout (uma partição por par/timeframe/mês, NumPy float64 [N, 6]):
+
+    ohlcv_data/ETH_USDT/15m/2026-01.npy
+    ohlcv_data/ETH_USDT/15m/2026-02.npy
+
+- Leitura por memory-map: read() só toca as partições do intervalo pedido e
+  copia apenas o recorte, então dá para fatiar meses de dados sem carregar tudo
+- Escrita idempotente: merge com a partição existente (dedupe por timestamp)
+  e troca atômica do arquivo (tmp + os.replace)
+- last_timestamp() / find_gaps() servem para retomar e auditar o backfill
+"""
+
+import os
+import logging
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from brain_simulator import TIMEFRAME_MINUTES
+
+logger = logging.getLogger("OHLCVStore")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.path.join(BASE_DIR, 'ohlcv_data')
+
+
+def timeframe_ms(timeframe: str) -> int:
+    return TIMEFRAME_MINUTES[timeframe] * 60 * 1000
+
+
+def _month_key(ts_ms: float) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+
+def _month_start_ms(key: str) -> int:
+    dt = datetime.strptime(key, '%Y-%m').replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+class OHLCVStore:
+    """
+    Store particionado por mês com arquivos .npy memory-mapped.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = root
+
+    # ============================================================
+    # CAMINHOS
+    # ============================================================
+    def _series_dir(self, symbol: str, timeframe: str) -> str:
+        base = symbol.split(':')[0].replace('/', '_')
+        return os.path.join(self.root, base, timeframe)
+
+    def partitions(self, symbol: str, timeframe: str) -> List[str]:
+        """Chaves YYYY-MM existentes, em ordem"""
+        path = self._series_dir(symbol, timeframe)
+        if not os.path.isdir(path):
+            return []
+        return sorted(f[:-4] for f in os.listdir(path) if f.endswith('.npy') and not f.startswith('.'))
+
+    def series(self) -> List[Tuple[str, str]]:
+        """(symbol, timeframe) de tudo que existe no store"""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for base in sorted(os.listdir(self.root)):
+            base_dir = os.path.join(self.root, base)
+            if not os.path.isdir(base_dir):
+                continue
+            for tf in sorted(os.listdir(base_dir)):
+                if os.path.isdir(os.path.join(base_dir, tf)):
+                    found.append((base.replace('_', '/', 1), tf))
+        return found
+
+    # ============================================================
+    # ESCRITA
+    # ============================================================
+    def write(self, symbol: str, timeframe: str, candles) -> int:
+        """
+        Grava candles (formato ccxt) fazendo merge com as partições existentes.
+        Retorna quantos candles novos entraram.
+        """
+        rows = np.asarray(candles, dtype=np.float64)
+        if rows.size == 0:
+            return 0
+        rows = rows[:, :6]
+
+        series_dir = self._series_dir(symbol, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+
+        months = np.array([_month_key(ts) for ts in rows[:, 0]])
+        added = 0
+        for key in np.unique(months):
+            chunk = rows[months == key]
+            path = os.path.join(series_dir, f"{key}.npy")
+
+            if os.path.exists(path):
+                existing = np.load(path)
+                before = len(existing)
+                merged = np.concatenate([existing, chunk])
+            else:
+                before = 0
+                merged = chunk
+
+            # Dedupe mantendo a versão mais recente de cada timestamp
+            order = np.argsort(merged[:, 0], kind='stable')
+            merged = merged[order]
+            keep = np.ones(len(merged), dtype=bool)
+            keep[:-1] = np.diff(merged[:, 0]) > 0
+            merged = merged[keep]
+
+            tmp = os.path.join(series_dir, f".{key}.tmp.npy")
+            np.save(tmp, merged)
+            os.replace(tmp, path)
+            added += len(merged) - before
+
+        return added
+
+    # ============================================================
+    # LEITURA
+    # ============================================================
+    def iter_partitions(self, symbol: str, timeframe: str,
+                        start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Itera recortes memory-mapped (sem cópia) das partições no intervalo [start, end)"""
+        series_dir = self._series_dir(symbol, timeframe)
+        keys = self.partitions(symbol, timeframe)
+        for i, key in enumerate(keys):
+            month_start = _month_start_ms(key)
+            next_start = _month_start_ms(keys[i + 1]) if i + 1 < len(keys) else None
+            if end_ms is not None and month_start >= end_ms:
+                break
+            if start_ms is not None and next_start is not None and next_start <= start_ms:
+                continue
+
+            data = np.load(os.path.join(series_dir, f"{key}.npy"), mmap_mode='r')
+            lo = 0 if start_ms is None else np.searchsorted(data[:, 0], start_ms, side='left')
+            hi = len(data) if end_ms is None else np.searchsorted(data[:, 0], end_ms, side='left')
+            if hi > lo:
+                yield data[lo:hi]
+
+    def read(self, symbol: str, timeframe: str,
+             start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+        """Candles [timestamp, o, h, l, c, v] do intervalo [start, end) num array contíguo"""
+        parts = list(self.iter_partitions(symbol, timeframe, start_ms, end_ms))
+        if not parts:
+            return np.empty((0, 6), dtype=np.float64)
+        return np.concatenate(parts)
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        keys = self.partitions(symbol, timeframe)
+        if not keys:
+            return None
+        data = np.load(os.path.join(self._series_dir(symbol, timeframe), f"{keys[-1]}.npy"), mmap_mode='r')
+        return int(data[-1, 0]) if len(data) else None
+
+    def first_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        keys = self.partitions(symbol, timeframe)
+        if not keys:
+            return None
+        data = np.load(os.path.join(self._series_dir(symbol, timeframe), f"{keys[0]}.npy"), mmap_mode='r')
+        return int(data[0, 0]) if len(data) else None
+
+    def find_gaps(self, symbol: str, timeframe: str,
+                  start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Buracos na série: lista de (primeiro_ts_faltando, próximo_ts_presente).
+        Percorre partição a partição, sem materializar a série inteira.
+        """
+        step = timeframe_ms(timeframe)
+        gaps = []
+        prev = None
+        for part in self.iter_partitions(symbol, timeframe, start_ms, end_ms):
+            ts = np.asarray(part[:, 0], dtype=np.int64)
+            if prev is not None and ts[0] - prev > step:
+                gaps.append((prev + step, int(ts[0])))
+            jumps = np.nonzero(np.diff(ts) > step)[0]
+            gaps.extend((int(ts[j]) + step, int(ts[j + 1])) for j in jumps)
+            prev = int(ts[-1])
+        return gaps
+
+    def stats(self, symbol: str, timeframe: str) -> dict:
+        keys = self.partitions(symbol, timeframe)
+        rows = 0
+        for key in keys:
+            rows += len(np.load(os.path.join(self._series_dir(symbol, timeframe), f"{key}.npy"), mmap_mode='r'))
+        return {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'partitions': len(keys),
+            'candles': rows,
+            'first': self.first_timestamp(symbol, timeframe),
+            'last': self.last_timestamp(symbol, timeframe),
+            'gaps': len(self.find_gaps(symbol, timeframe))
+        }
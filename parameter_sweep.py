@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+🔬 PARAMETER SWEEP - Busca de parâmetros em paralelo sobre o backtester
+
+Alternativa offline ao auto_optimizer.py (que ajusta pesos pelo win-rate ao
+vivo): avalia muitos conjuntos de parâmetros de uma vez, em vários núcleos.
+
+- Modos: grid, random e bayes (processo gaussiano + Expected Improvement)
+- Workers: ProcessPoolExecutor; os candles são copiados UMA vez para um bloco
+  de shared memory e cada worker só mapeia views NumPy sobre ele
+- Cache: resultados em sweep_cache.json por hash (parâmetros + objetivo + dados)
+- Ranking: Sharpe (desc), depois drawdown máximo (asc)
+
+Parâmetros (chaves com prefixo):
+    confiabilidade.<PADRAO>   -> AnalistaTecnico.confiabilidade_base
+    simetria.ombros|duplos    -> AnalistaTecnico.tolerancia_simetria
+    rewards.<peso>            -> brain_config.json "rewards" (objetivo 'brain')
+    <campo>                   -> BacktestConfig (risk_per_trade, volume_multiplier, ...)
+
+Espaço: lista = valores discretos | [min, max] em {"range": [...]} = contínuo
+
+Uso:
+    python parameter_sweep.py --data historico/ --mode bayes --trials 64 --workers 8
+"""
+
+import os
+import json
+import time
+import math
+import random
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backtester import Backtester, BacktestConfig, candle_file, load_candles
+
+logger = logging.getLogger("ParameterSweep")
+
+CACHE_FILE = 'sweep_cache.json'
+MIN_TRADES = 10  # Menos trades que isso não entra no topo do ranking
+
+DEFAULT_SPACE = {
+    'confiabilidade.OCO': {'range': [0.70, 0.90]},
+    'confiabilidade.TOPO_DUPLO': {'range': [0.65, 0.85]},
+    'confiabilidade.TRIANGULO_SIMETRICO': {'range': [0.60, 0.80]},
+    'simetria.ombros': [0.04, 0.06, 0.08, 0.10],
+    'simetria.duplos': [0.02, 0.03, 0.04],
+    'risk_per_trade': [0.01, 0.02, 0.03, 0.05],
+    'volume_multiplier': [1.0, 1.2, 1.5, 2.0],
+}
+
+REWARD_SPACE = {
+    'rewards.profit_weight': {'range': [0.5, 2.0]},
+    'rewards.duration_penalty': {'range': [0.0, 1.5]},
+    'rewards.drawdown_penalty': {'range': [0.0, 4.0]},
+    'rewards.quick_win_bonus': {'range': [0.0, 2.0]},
+}
+
+_CONFIG_FIELDS = {f.name for f in fields(BacktestConfig)}
+
+
+# ============================================================
+# ESPAÇO DE BUSCA
+# ============================================================
+def _is_range(spec) -> bool:
+    return isinstance(spec, dict) and 'range' in spec
+
+
+def grid_points(space: Dict, steps: int = 3) -> List[Dict]:
+    """Produto cartesiano (contínuos viram `steps` pontos igualmente espaçados)"""
+    axes = []
+    for name, spec in space.items():
+        if _is_range(spec):
+            lo, hi = spec['range']
+            values = [round(v, 6) for v in np.linspace(lo, hi, steps).tolist()]
+        else:
+            values = list(spec)
+        axes.append((name, values))
+
+    points = [{}]
+    for name, values in axes:
+        points = [dict(p, **{name: v}) for p in points for v in values]
+    return points
+
+
+def random_point(space: Dict, rng: random.Random) -> Dict:
+    point = {}
+    for name, spec in space.items():
+        if _is_range(spec):
+            lo, hi = spec['range']
+            point[name] = round(rng.uniform(lo, hi), 6)
+        else:
+            point[name] = rng.choice(list(spec))
+    return point
+
+
+def encode(point: Dict, space: Dict) -> np.ndarray:
+    """Parâmetros -> vetor em [0, 1]^d (discretos pelo índice)"""
+    vec = []
+    for name, spec in space.items():
+        if _is_range(spec):
+            lo, hi = spec['range']
+            vec.append((point[name] - lo) / (hi - lo) if hi > lo else 0.0)
+        else:
+            values = list(spec)
+            vec.append(values.index(point[name]) / max(1, len(values) - 1))
+    return np.array(vec, dtype=float)
+
+
+def param_hash(params: Dict, objective: str, data_key: str) -> str:
+    payload = json.dumps({'p': params, 'o': objective, 'd': data_key}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+# ============================================================
+# MÉTRICAS
+# ============================================================
+def equity_metrics(returns: np.ndarray, periods_per_year: float) -> Dict:
+    """Sharpe anualizado e drawdown máximo a partir de retornos por período"""
+    returns = np.asarray(returns, dtype=float)
+    if len(returns) < 2 or returns.std() == 0:
+        sharpe = 0.0
+    else:
+        sharpe = float(returns.mean() / returns.std() * math.sqrt(periods_per_year))
+    equity = np.cumprod(1 + returns) if len(returns) else np.ones(1)
+    peaks = np.maximum.accumulate(equity)
+    max_dd = float(((peaks - equity) / peaks).max() * 100) if len(equity) else 0.0
+    return {'sharpe': sharpe, 'max_drawdown_pct': max_dd}
+
+
+def portfolio_curve(results: List[Dict], initial_equity: float):
+    """Soma o P&L marcado a mercado de cada série numa curva única (forward-fill)"""
+    all_ts = np.unique(np.concatenate([
+        np.array([t for t, _ in r['equity_curve']], dtype=np.int64) for r in results
+    ]))
+    total = np.full(len(all_ts), initial_equity, dtype=float)
+    for r in results:
+        if not r['equity_curve']:
+            continue
+        ts = np.array([t for t, _ in r['equity_curve']], dtype=np.int64)
+        eq = np.array([e for _, e in r['equity_curve']], dtype=float)
+        idx = np.searchsorted(ts, all_ts, side='right') - 1
+        pnl = np.where(idx >= 0, eq[np.maximum(idx, 0)] - initial_equity, 0.0)
+        total += pnl
+    return all_ts, total
+
+
+# ============================================================
+# WORKER (estado por processo)
+# ============================================================
+_WORKER = {}
+
+
+def _init_worker(shm_name: Optional[str], layout: List[Dict], samples: Optional[List[Dict]]):
+    """Mapeia o bloco compartilhado de candles (sem cópia) uma vez por processo"""
+    datasets = []
+    if shm_name:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        block = np.ndarray((shm.size // 8,), dtype=np.float64, buffer=shm.buf)
+        for item in layout:
+            start, rows = item['offset'], item['rows']
+            candles = block[start:start + rows * 6].reshape(rows, 6)
+            datasets.append({'symbol': item['symbol'], 'timeframe': item['timeframe'], 'candles': candles})
+        _WORKER['shm'] = shm  # Mantém a referência viva
+    _WORKER['datasets'] = datasets
+    _WORKER['samples'] = samples or []
+
+
+def _split_params(params: Dict):
+    confiabilidade, simetria, rewards, config = {}, {}, {}, {}
+    for key, value in params.items():
+        if key.startswith('confiabilidade.'):
+            confiabilidade[key.split('.', 1)[1]] = value
+        elif key.startswith('simetria.'):
+            simetria[key.split('.', 1)[1]] = value
+        elif key.startswith('rewards.'):
+            rewards[key.split('.', 1)[1]] = value
+        elif key in _CONFIG_FIELDS:
+            config[key] = value
+        else:
+            raise ValueError(f"Parâmetro desconhecido: {key}")
+    return confiabilidade, simetria, rewards, config
+
+
+def evaluate_backtest(params: Dict, datasets: List[Dict]) -> Dict:
+    """Objetivo 'backtest': roda o pipeline completo e mede a curva da carteira"""
+    from lib_padroes import AnalistaTecnico
+
+    confiabilidade, simetria, _, config = _split_params(params)
+    cfg = BacktestConfig(**config)
+    bt = Backtester(cfg, AnalistaTecnico(confiabilidade, simetria))
+
+    results = [bt.run(d['symbol'], d['timeframe'], d['candles']) for d in datasets]
+    ts, equity = portfolio_curve(results, cfg.initial_equity)
+    returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+
+    step_ms = float(np.median(np.diff(ts))) if len(ts) > 1 else 15 * 60 * 1000
+    periods_per_year = 365 * 24 * 3600 * 1000 / step_ms
+
+    trades = [t for r in results for t in r['trades']]
+    metrics = equity_metrics(returns, periods_per_year)
+    metrics.update({
+        'trades': len(trades),
+        'win_rate': sum(1 for t in trades if t['pnl'] > 0) / len(trades) if trades else 0.0,
+        'net_pnl': float(equity[-1] - cfg.initial_equity) if len(equity) else 0.0,
+    })
+    return metrics
+
+
+def evaluate_brain(params: Dict, samples: List[Dict], episodes: int = 30, seed: int = 42) -> Dict:
+    """
+    Objetivo 'brain': treina o Q-learning com os pesos de recompensa em 80% das
+    amostras simuladas (ordem temporal) e mede a política gulosa nos 20% finais.
+    """
+    from brain_trainer import QLearningBrain, BrainTrainer, DEFAULT_REWARDS
+    from brain_simulator import TradeSimulator
+
+    _, _, rewards, _ = _split_params(params)
+    random.seed(seed)
+
+    brain = QLearningBrain(rewards=dict(DEFAULT_REWARDS, **rewards), load=False)
+    trainer = BrainTrainer()
+    trainer.brain = brain
+    cut = int(len(samples) * 0.8)
+    train, holdout = samples[:cut], samples[cut:]
+
+    for _ in range(episodes):
+        for sample in random.sample(train, len(train)):
+            state = trainer.extract_state_features(sample)
+            action = brain.get_action(state)
+            result = TradeSimulator.result_for_action(sample, action)
+            if result is None:
+                continue
+            brain.update(state, action, brain.calculate_reward(result), state, done=True)
+
+    brain.epsilon = 0.0
+    returns = []
+    for sample in holdout:
+        action = brain.get_action(trainer.extract_state_features(sample))
+        result = TradeSimulator.result_for_action(sample, action)
+        if result and action != 'SKIP':
+            returns.append(result['profit_pct'] / 100)
+
+    metrics = equity_metrics(np.array(returns), periods_per_year=max(1, len(returns)))
+    metrics.update({
+        'trades': len(returns),
+        'win_rate': sum(1 for r in returns if r > 0) / len(returns) if returns else 0.0,
+        'net_pnl': float(sum(returns) * 100),
+    })
+    return metrics
+
+
+def _evaluate(params: Dict, objective: str) -> Dict:
+    start = time.perf_counter()
+    if objective == 'brain':
+        metrics = evaluate_brain(params, _WORKER['samples'])
+    else:
+        metrics = evaluate_backtest(params, _WORKER['datasets'])
+    metrics['elapsed_s'] = time.perf_counter() - start
+    return metrics
+
+
+# ============================================================
+# GP + EXPECTED IMPROVEMENT (Bayes)
+# ============================================================
+def _rbf(a: np.ndarray, b: np.ndarray, length: float) -> np.ndarray:
+    d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+    return np.exp(-0.5 * d2 / length ** 2)
+
+
+def expected_improvement(x_obs: np.ndarray, y_obs: np.ndarray, x_cand: np.ndarray,
+                         length: float = 0.3, noise: float = 1e-4) -> np.ndarray:
+    """EI de um GP (kernel RBF) ajustado em y normalizado"""
+    from math import erf
+
+    mu_y, sd_y = y_obs.mean(), y_obs.std() or 1.0
+    y = (y_obs - mu_y) / sd_y
+
+    k = _rbf(x_obs, x_obs, length) + noise * np.eye(len(x_obs))
+    chol = np.linalg.cholesky(k)
+    alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, y))
+    k_s = _rbf(x_cand, x_obs, length)
+    mu = k_s @ alpha
+    v = np.linalg.solve(chol, k_s.T)
+    sigma = np.sqrt(np.clip(1.0 - (v ** 2).sum(axis=0), 1e-12, None))
+
+    best = y.max()
+    z = (mu - best) / sigma
+    cdf = 0.5 * (1 + np.vectorize(erf)(z / math.sqrt(2)))
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+    return (mu - best) * cdf + sigma * pdf
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+class ParameterSweep:
+    """
+    Executa o sweep num pool de processos com dados em shared memory e cache por hash.
+    """
+
+    def __init__(self, datasets: Optional[List[Dict]] = None, samples: Optional[List[Dict]] = None,
+                 objective: str = 'backtest', workers: Optional[int] = None, cache_file: str = CACHE_FILE):
+        self.datasets = datasets or []
+        self.samples = samples or []
+        self.objective = objective
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_file = cache_file
+        self.cache = self._load_cache()
+        self.data_key = self._data_fingerprint()
+
+    # ---------------- cache ----------------
+    def _load_cache(self) -> Dict:
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Cache do sweep ilegível, recriando: {e}")
+        return {}
+
+    def _save_cache(self):
+        tmp = f"{self.cache_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.cache, f)
+        os.replace(tmp, self.cache_file)
+
+    def _data_fingerprint(self) -> str:
+        """Hash do conteúdo (bytes dos candles e id/resultado de cada amostra), não só do tamanho"""
+        h = hashlib.sha1()
+        for d in self.datasets:
+            c = np.ascontiguousarray(d['candles'], dtype=np.float64)
+            h.update(f"{d['symbol']}|{d['timeframe']}|{c.shape}".encode())
+            h.update(c.tobytes())
+        h.update(f"samples:{len(self.samples)}".encode())
+        for sample in self.samples:
+            sim = sample.get('simulation') or {}
+            h.update(json.dumps([sample.get('id'), sample.get('symbol'), sample.get('timeframe'),
+                                 sample.get('timestamp'), sample.get('direction'), sim.get('outcome'),
+                                 sim.get('profit_pct'), sim.get('duration_hours')], default=str).encode())
+        return h.hexdigest()
+
+    # ---------------- shared memory ----------------
+    def _share_candles(self):
+        total = sum(d['candles'].size for d in self.datasets)
+        if not total:
+            return None, []
+        shm = shared_memory.SharedMemory(create=True, size=total * 8)
+        block = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+        layout, offset = [], 0
+        for d in self.datasets:
+            flat = np.ascontiguousarray(d['candles'], dtype=np.float64).ravel()
+            block[offset:offset + flat.size] = flat
+            layout.append({'symbol': d['symbol'], 'timeframe': d['timeframe'],
+                           'offset': offset, 'rows': len(d['candles'])})
+            offset += flat.size
+        return shm, layout
+
+    # ---------------- avaliação ----------------
+    def evaluate_many(self, points: List[Dict], pool: ProcessPoolExecutor) -> List[Dict]:
+        """Avalia pontos (cache primeiro, resto no pool) e devolve na mesma ordem"""
+        results: List[Optional[Dict]] = [None] * len(points)
+        pending = {}
+        for i, params in enumerate(points):
+            key = param_hash(params, self.objective, self.data_key)
+            if key in self.cache:
+                results[i] = self.cache[key]
+            elif key not in pending.values():
+                pending[pool.submit(_evaluate, params, self.objective)] = key
+                results[i] = {'_key': key}
+            else:
+                results[i] = {'_key': key}
+
+        done = {}
+        for future in as_completed(pending):
+            key = pending[future]
+            try:
+                metrics = future.result()
+            except Exception as e:
+                logger.error(f"❌ Falha na avaliação {key[:8]}: {e}")
+                metrics = {'sharpe': float('-inf'), 'max_drawdown_pct': 100.0, 'trades': 0, 'error': str(e)}
+            done[key] = metrics
+            if 'error' not in metrics:
+                self.cache[key] = metrics
+        if done:
+            self._save_cache()
+
+        final = []
+        for params, res in zip(points, results):
+            metrics = done.get(res['_key'], self.cache.get(res['_key'])) if '_key' in res else res
+            final.append({'params': params, **metrics})
+        return final
+
+    def run(self, space: Dict, mode: str = 'random', trials: int = 32, steps: int = 3,
+            seed: int = 42, n_init: Optional[int] = None) -> List[Dict]:
+        rng = random.Random(seed)
+        shm, layout = self._share_candles() if self.objective == 'backtest' else (None, [])
+        evaluated: List[Dict] = []
+        start = time.perf_counter()
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(shm.name if shm else None, layout, self.samples if self.objective == 'brain' else None)
+            ) as pool:
+                if mode == 'grid':
+                    points = grid_points(space, steps)
+                    evaluated = self.evaluate_many(points[:trials] if trials else points, pool)
+
+                elif mode == 'random':
+                    evaluated = self.evaluate_many([random_point(space, rng) for _ in range(trials)], pool)
+
+                elif mode == 'bayes':
+                    n_init = n_init or max(self.workers, min(10, trials))
+                    evaluated = self.evaluate_many([random_point(space, rng) for _ in range(min(n_init, trials))], pool)
+                    while len(evaluated) < trials:
+                        batch = min(self.workers, trials - len(evaluated))
+                        proposal = self._propose(space, evaluated, batch, rng)
+                        if not proposal:
+                            # Espaço discreto esgotado (todos os pontos sorteados já avaliados)
+                            logger.info(f"ℹ️ Bayes sem pontos novos após {len(evaluated)} avaliações")
+                            break
+                        evaluated += self.evaluate_many(proposal, pool)
+                else:
+                    raise ValueError(f"Modo desconhecido: {mode}")
+        finally:
+            if shm:
+                shm.close()
+                shm.unlink()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"✅ Sweep {mode}: {len(evaluated)} avaliações em {elapsed:.1f}s ({self.workers} workers)")
+        return rank_results(evaluated)
+
+    def _propose(self, space: Dict, evaluated: List[Dict], batch: int, rng: random.Random) -> List[Dict]:
+        """Sorteia candidatos e pega os de maior EI (distintos)"""
+        valid = [e for e in evaluated if np.isfinite(e.get('sharpe', float('-inf')))]
+        if len(valid) < 2:
+            return [random_point(space, rng) for _ in range(batch)]
+
+        x_obs = np.array([encode(e['params'], space) for e in valid])
+        y_obs = np.array([e['sharpe'] for e in valid])
+        candidates = [random_point(space, rng) for _ in range(max(256, batch * 64))]
+        ei = expected_improvement(x_obs, y_obs, np.array([encode(c, space) for c in candidates]))
+
+        seen = {json.dumps(e['params'], sort_keys=True) for e in evaluated}
+        chosen = []
+        for idx in np.argsort(-ei):
+            key = json.dumps(candidates[idx], sort_keys=True)
+            if key in seen:
+                continue
+            seen.add(key)
+            chosen.append(candidates[idx])
+            if len(chosen) == batch:
+                break
+        return chosen
+
+
+def rank_results(results: List[Dict], min_trades: int = MIN_TRADES) -> List[Dict]:
+    """Sharpe desc, drawdown asc; poucos trades vão para o fim"""
+    def key(r):
+        enough = r.get('trades', 0) >= min_trades
+        return (not enough, -r.get('sharpe', float('-inf')), r.get('max_drawdown_pct', 100.0))
+    return sorted(results, key=key)
+
+
+def load_datasets(data_dir: str, symbols: List[str], timeframes: List[str]) -> List[Dict]:
+    datasets = []
+    for sym in symbols:
+        for tf in timeframes:
+            path = candle_file(data_dir, sym, tf)
+            if path:
+                datasets.append({'symbol': sym, 'timeframe': tf, 'candles': load_candles(path)})
+    return datasets
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Sweep de parâmetros do Sniper')
+    parser.add_argument('--data', help='Diretório com candles (SYMBOL_tf.json|csv)')
+    parser.add_argument('--objective', choices=['backtest', 'brain'], default='backtest')
+    parser.add_argument('--mode', choices=['grid', 'random', 'bayes'], default='random')
+    parser.add_argument('--trials', type=int, default=32)
+    parser.add_argument('--steps', type=int, default=3, help='Pontos por parâmetro contínuo no grid')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--space', help='JSON com o espaço de busca (padrão: DEFAULT_SPACE/REWARD_SPACE)')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    space = REWARD_SPACE if args.objective == 'brain' else DEFAULT_SPACE
+    if args.space:
+        with open(args.space, 'r') as f:
+            space = json.load(f)
+
+    datasets, samples = [], []
+    if args.objective == 'backtest':
+        with open('config_futures.json', 'r') as f:
+            config_file = json.load(f)
+        datasets = load_datasets(args.data or '.', config_file.get('pairs', []), config_file.get('timeframes', ['15m']))
+        if not datasets:
+            print("❌ Nenhum arquivo de candles encontrado")
+            raise SystemExit(1)
+    else:
+        from brain_trainer import BrainTrainer
+        trainer = BrainTrainer()
+        data = trainer.get_training_data(limit=100000)
+        samples = sorted(trainer.simulator.simulate_samples(data), key=lambda s: s['timestamp'])
+        if not samples:
+            print("❌ Nenhuma amostra simulável no sniper_brain.db")
+            raise SystemExit(1)
+
+    sweep = ParameterSweep(datasets, samples, objective=args.objective, workers=args.workers)
+    ranked = sweep.run(space, mode=args.mode, trials=args.trials, steps=args.steps)
+
+    print(f"\n🏆 TOP {args.top} ({args.objective}/{args.mode})")
+    print("=" * 80)
+    for r in ranked[:args.top]:
+        print(f"Sharpe {r['sharpe']:6.2f} | DD {r['max_drawdown_pct']:5.1f}% | {r.get('trades', 0):4d} trades | {r['params']}")
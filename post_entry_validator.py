@@ -16,13 +16,16 @@ import time
 import json
 import os
 import logging
-import requests
-import pandas as pd
-import mplfinance as mpf
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from chart_renderer import render_candles, to_pil
+from vision_cache import get_vision_cache
+from brain_image_registry import get_image_registry
+from vision_prefilter import prefilter_post_entry
+from telegram_service import enqueue_message
+
 load_dotenv()
 
 logger = logging.getLogger("PostEntryValidator")
@@ -50,22 +53,51 @@ ALERT_LOG_FILE = os.path.join(BASE_DIR, 'vision_alerts.log')
 if not os.path.exists(IMG_DIR):
     os.makedirs(IMG_DIR)
 
+# Template do prompt (também entra na chave do vision_cache)
+POST_ENTRY_PROMPT = """
+Atue como um Trader Institucional Sênior.
+
+CONTEXTO:
+- Estamos em uma posição {side_text} em {symbol}
+- Padrão que originou a entrada: {pattern_name} ({direction})
+- Preço de entrada: {entry_price}
+- A linha ciano pontilhada marca o preço de entrada
+
+MISSÃO:
+Analise o gráfico ATUALIZADO e determine se o padrão {pattern_name} continua 
+tecnicamente válido e se a posição deve ser mantida.
+
+CRITÉRIOS PARA MANTER (VALID):
+- Estrutura do padrão preservada
+- Preço respeitando suportes/resistências chave
+- Sem reversão clara contra a posição
+- **PULLBACKS SÃO NORMAIS:** Correções pequenas contra a tendência NÃO invalidam o padrão.
+- Só invalide se houver quebra estrutural CLARA (ex: rompimento forte de suporte no Long).
+
+CRITÉRIOS PARA FECHAR (INVALID):
+- Padrão claramente desconfigurado
+- Quebra de estrutura contra a posição com volume
+- Reversão confirmada no price action (não apenas ruído)
+
+Seja TOLERANTE com ruídos de mercado. Só invalide se a tese do trade estiver morta.
+
+Responda ESTRITAMENTE neste formato JSON:
+{{
+    "verdict": "VALID" ou "INVALID",
+    "confidence": 0.0 a 1.0,
+    "reasoning": "Explicação técnica breve (max 2 frases)"
+}}
+"""
+
 
-def send_telegram_alert(message: str):
-    """Envia alerta para o Telegram"""
+def send_telegram_alert(message: str, key: Optional[str] = None):
+    """Enfileira alerta para o Telegram (não bloqueia o monitor da posição)"""
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
         logger.warning("Telegram não configurado para alertas")
         return
-    try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-        data = {
-            "chat_id": TELEGRAM_CHAT_ID,
-            "text": message,
-            "parse_mode": "Markdown"
-        }
-        requests.post(url, data=data, timeout=10)
-    except Exception as e:
-        logger.error(f"Erro ao enviar alerta Telegram: {e}")
+    # Mesma key = alerta repetido: coalescido pelo TelegramService
+    if not enqueue_message(message, TELEGRAM_CHAT_ID, key=key):
+        logger.error("Erro ao enfileirar alerta Telegram")
 
 
 def log_vision_alert(message: str):
@@ -84,6 +116,9 @@ class PostEntryValidator:
     usando Gemini Vision AI no fechamento de cada candle.
     """
 
+    # Imagens vão direto da memória para o modelo; True grava cópia em brain_images/ (debug)
+    SAVE_IMAGES = os.getenv('VISION_SAVE_IMAGES', '0') == '1'
+
     def __init__(self, exchange: ccxt.bybit, symbol: str, entry_price: float,
                  side: str, pattern_data: Dict, timeframe: str = '15m'):
         self.exchange = exchange
@@ -102,6 +137,7 @@ class PostEntryValidator:
 
         # Contadores
         self.validations_count = 0
+        self.prefilter_decisions = 0  # Validações resolvidas localmente (sem Gemini)
         self.api_failures_count = 0
         self.consecutive_api_failures = 0
         self.MAX_CONSECUTIVE_FAILURES = 3  # Alerta após 3 falhas seguidas
@@ -192,92 +228,58 @@ class PostEntryValidator:
             logger.error(f"Erro ao verificar candle: {e}")
             return False
 
-    def _generate_chart_image(self) -> Optional[str]:
-        """Gera imagem atualizada do gráfico candlestick"""
+    def _generate_chart_image(self, candles: Optional[list] = None) -> Optional[bytes]:
+        """Gera o gráfico candlestick atualizado em memória (PNG); só grava em disco se SAVE_IMAGES"""
         try:
             # Busca candles suficientes para visualização do padrão
-            candles = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=50)
+            if candles is None:
+                candles = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=50)
             if len(candles) < 10:
                 return None
 
-            df = pd.DataFrame(candles, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-            df['Date'] = pd.to_datetime(df['Date'], unit='ms')
-            df.set_index('Date', inplace=True)
-
-            safe_symbol = self.symbol.replace('/', '')
-            timestamp = int(time.time())
-            filename = f"{IMG_DIR}/postval_{safe_symbol}_{timestamp}.png"
-
-            mc = mpf.make_marketcolors(up='#00ff00', down='#ff0000', edge='inherit', wick='inherit', volume='in')
-            s = mpf.make_mpf_style(marketcolors=mc, base_mpf_style='nightclouds')
-
-            # Adicionar linha horizontal no entry price
-            hlines = dict(hlines=[self.entry_price], colors=['cyan'], linestyle='--', linewidths=1)
-
-            mpf.plot(df, type='candle', volume=False, style=s,
-                     savefig=dict(fname=filename, dpi=100, bbox_inches='tight'),
-                     title=f"{self.symbol} - {self.pattern_data.get('pattern_name', '')} (Post-Entry)",
-                     hlines=hlines,
-                     axisoff=True)
-
-            return filename
+            filename = None
+            if self.SAVE_IMAGES:
+                safe_symbol = self.symbol.replace('/', '')
+                filename = f"{IMG_DIR}/postval_{safe_symbol}_{int(time.time())}.png"
+
+            # Linha horizontal tracejada (ciano) no entry price
+            png = render_candles(
+                candles,
+                title=f"{self.symbol} - {self.pattern_data.get('pattern_name', '')} (Post-Entry)",
+                hlines=[{'price': float(self.entry_price), 'color': 'cyan', 'dashed': True}],
+                save_path=filename
+            )
+            if filename:
+                get_image_registry().register(filename, kind='postval')
+            return png
 
         except Exception as e:
             logger.error(f"Erro ao gerar imagem pós-entrada: {e}")
             return None
 
-    def _consult_vision_ai(self, image_path: str) -> Optional[Dict]:
-        """Consulta Gemini Vision AI para validar se o padrão continua válido"""
+    def _consult_vision_ai(self, png: bytes, candles: list) -> Optional[Dict]:
+        """Consulta Gemini Vision AI para validar se o padrão continua válido (candles = os do gráfico)"""
         if not self.gemini_model:
             return None
 
         try:
-            from PIL import Image
-
             pattern_name = self.pattern_data.get('pattern_name', 'Unknown')
             direction = self.pattern_data.get('direction', '')
             side_text = "LONG (compra)" if self.side == 'buy' else "SHORT (venda)"
 
-            prompt = f"""
-Atue como um Trader Institucional Sênior.
-
-CONTEXTO:
-- Estamos em uma posição {side_text} em {self.symbol}
-- Padrão que originou a entrada: {pattern_name} ({direction})
-- Preço de entrada: {self.entry_price}
-- A linha ciano pontilhada marca o preço de entrada
-
-MISSÃO:
-Analise o gráfico ATUALIZADO e determine se o padrão {pattern_name} continua 
-tecnicamente válido e se a posição deve ser mantida.
-
-CRITÉRIOS PARA MANTER (VALID):
-- Estrutura do padrão preservada
-- Preço respeitando suportes/resistências chave
-- Sem reversão clara contra a posição
-- **PULLBACKS SÃO NORMAIS:** Correções pequenas contra a tendência NÃO invalidam o padrão.
-- Só invalide se houver quebra estrutural CLARA (ex: rompimento forte de suporte no Long).
-
-CRITÉRIOS PARA FECHAR (INVALID):
-- Padrão claramente desconfigurado
-- Quebra de estrutura contra a posição com volume
-- Reversão confirmada no price action (não apenas ruído)
-
-Seja TOLERANTE com ruídos de mercado. Só invalide se a tese do trade estiver morta.
+            prompt = POST_ENTRY_PROMPT.format(side_text=side_text, symbol=self.symbol, pattern_name=pattern_name,
+                                              direction=direction, entry_price=self.entry_price)
 
-Responda ESTRITAMENTE neste formato JSON:
-{{
-    "verdict": "VALID" ou "INVALID",
-    "confidence": 0.0 a 1.0,
-    "reasoning": "Explicação técnica breve (max 2 frases)"
-}}
-"""
-
-            img = Image.open(image_path)
-            result = self.gemini_model.generate_content([prompt, img])
+            def call_model():
+                result = self.gemini_model.generate_content([prompt, to_pil(png)])
+                response_text = result.text.replace('```json', '').replace('```', '').strip()
+                return json.loads(response_text)
 
-            response_text = result.text.replace('```json', '').replace('```', '').strip()
-            parsed = json.loads(response_text)
+            parsed = get_vision_cache().cached_call(candles, POST_ENTRY_PROMPT, call_model, source='post_entry',
+                                                    symbol=self.symbol, timeframe=self.timeframe,
+                                                    pattern=pattern_name,
+                                                    params={'side': self.side, 'direction': direction,
+                                                            'entry_price': self.entry_price})
 
             # Reset contador de falhas consecutivas API
             self.consecutive_api_failures = 0
@@ -303,7 +305,7 @@ Responda ESTRITAMENTE neste formato JSON:
         alert_text = f"🚨 *ALERTA VISION AI*\n\n{message}\n\n⚠️ Posição protegida pelo SL na corretora."
 
         # Telegram - REATIVADO (nova API key funcionando)
-        send_telegram_alert(alert_text)
+        send_telegram_alert(alert_text, key=f"vision_api:{self.symbol}")
         logger.info(f"Alertas Telegram reativados: {message[:100]}...")
 
         # Log do painel
@@ -312,42 +314,66 @@ Responda ESTRITAMENTE neste formato JSON:
         # Log normal
         logger.warning(f"🚨 ALERTA: {message}")
 
+    def stats(self) -> Dict:
+        """Contadores da validação (quantas decididas pelo pré-filtro, sem Gemini)"""
+        return {
+            'validations': self.validations_count,
+            'prefilter_decisions': self.prefilter_decisions,
+            'escalated': self.validations_count - self.prefilter_decisions,
+            'api_failures': self.api_failures_count,
+        }
+
     def _cleanup_old_images(self):
-        """Remove imagens de validação antigas (> 1 hora)"""
-        try:
-            cutoff = time.time() - 3600
-            for f in os.listdir(IMG_DIR):
-                if f.startswith('postval_'):
-                    fpath = os.path.join(IMG_DIR, f)
-                    if os.path.getmtime(fpath) < cutoff:
-                        os.remove(fpath)
-        except Exception:
-            pass
-
-    def should_exit(self) -> Tuple[bool, str]:
+        """Remove imagens de validação antigas (> 1 hora) - range delete no registro, sem listar o diretório"""
+        get_image_registry().cleanup(kind='postval')
+
+    def should_exit(self, candles: Optional[list] = None, close_ms: Optional[int] = None) -> Tuple[bool, str]:
         """
         Verifica se devemos sair da posição.
         Só valida no fechamento de candle (não a cada tick).
 
+        candles/close_ms: passados pelo executor quando acordado pelo CandleCloseScheduler
+        (candles já buscados, sem polling). Sem eles, usa o modo antigo (_is_candle_closed).
+
         Returns:
             (should_exit: bool, reason: str)
         """
         try:
-            # Só validar quando um novo candle fechar
-            if not self._is_candle_closed():
-                return False, ""
+            if candles is None:
+                # Só validar quando um novo candle fechar
+                if not self._is_candle_closed():
+                    return False, ""
+                candles = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=50)
+                closed = candles[:-1]
+            else:
+                # Barras fechadas = abertas antes do fechamento agendado
+                closed = [c for c in candles if close_ms is None or c[0] < close_ms]
+                if not closed or closed[-1][0] <= self.last_candle_time:
+                    return False, ""
+                self.last_candle_time = closed[-1][0]
 
             self.validations_count += 1
             logger.info(f"🕯️ Candle fechou - Validação #{self.validations_count} para {self.symbol}")
 
-            # Gerar imagem atualizada
-            image_path = self._generate_chart_image()
-            if not image_path:
-                logger.warning("⚠️ Não foi possível gerar imagem - mantendo posição")
-                return False, ""
+            # Pré-filtro local (só candles fechados): casos óbvios não vão para o Gemini
+            ai_result = None
+            if self.gemini_model:
+                triagem = prefilter_post_entry(closed, self.side, self.entry_price, self.pattern_data)
+                ai_result = triagem.as_verdict()
+                if ai_result:
+                    self.prefilter_decisions += 1
+                    logger.info(f"🔬 Pré-filtro decidiu sem Vision AI: {triagem.decision} - {triagem.reason} "
+                                f"({self.prefilter_decisions}/{self.validations_count} validações locais)")
+
+            if ai_result is None:
+                # Gerar imagem atualizada
+                png = self._generate_chart_image(candles)
+                if not png:
+                    logger.warning("⚠️ Não foi possível gerar imagem - mantendo posição")
+                    return False, ""
 
-            # Consultar Vision AI
-            ai_result = self._consult_vision_ai(image_path)
+                # Consultar Vision AI
+                ai_result = self._consult_vision_ai(png, candles)
 
             if ai_result is None:
                 # API falhou - manter posição (SL protege)
@@ -11,6 +11,11 @@ import ccxt
 from dotenv import load_dotenv
 import os
 
+from brain_performance_tracker import normalize_symbol, ensure_detection_index, load_detections, match_nearest_detections
+from brain_aggregates import get_aggregates
+from data_compactor import DataCompactor, RETENTION_DAYS
+from brain_archive import get_archive
+
 # Configuração
 load_dotenv()
 
@@ -89,6 +94,7 @@ class RealtimeFeedbackCollector:
                     if trade_time >= cutoff_time:
                         # Trade recente
                         trade_data = {
+                            'trade_id': f"{t.get('orderId', '')}:{trade_time}",   # Único por fechamento na Bybit
                             'symbol': t['symbol'],
                             'side': t['side'].upper(),
                             'pnl': float(t['closedPnl']),
@@ -162,13 +168,15 @@ class RealtimeFeedbackCollector:
                     pnl = random.uniform(-5.0, -0.5)  # Perda
                     trade_result = 'LOSS'
                 
+                closed_at = int(time.time() * 1000) - i * 3600000  # Distribuir no tempo
                 simulated_trades.append({
+                    'trade_id': f"sim:{symbol}:{closed_at}",
                     'symbol': symbol,
                     'side': 'BUY' if 'LONG' in str(pattern_name).upper() else 'SELL',
                     'pnl': pnl,
                     'entry_price': 0,
                     'exit_price': 0,
-                    'closed_at': int(time.time() * 1000) - i * 3600000,  # Distribuir no tempo
+                    'closed_at': closed_at,
                     'size': 1.0,
                     'leverage': '10',
                     'order_type': 'Market',
@@ -194,10 +202,22 @@ class RealtimeFeedbackCollector:
         updated_count = 0
         
         try:
+            # Padrões correspondentes de todos os trades numa consulta
+            patterns = self.find_matching_patterns(trades)
+
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
-            for trade in trades:
+
+            # A janela de 24h é relida a cada ciclo: só trades ainda não registrados
+            novos = get_aggregates(self.db_path).claim_new(conn, [(t['trade_id'], t['closed_at'] // 1000) for t in trades],
+                                         scope='realtime')
+            if len(novos) < len(trades):
+                logger.info(f"ℹ️ {len(trades) - len(novos)} trades já registrados em ciclos anteriores")
+            
+            for trade, pattern_info in zip(trades, patterns):
+                if trade['trade_id'] not in novos:
+                    continue
+                novos.discard(trade['trade_id'])   # Repetido no mesmo lote
                 symbol = trade['symbol']
                 pnl = trade['pnl']
                 closed_at = trade['closed_at']
@@ -213,9 +233,6 @@ class RealtimeFeedbackCollector:
                     trade_result = 'BREAKEVEN'
                     reward = 0.0
                 
-                # Buscar padrão correspondente
-                pattern_info = self.find_matching_pattern(symbol, closed_at)
-                
                 # Inserir/atualizar no database
                 cursor.execute('''
                     INSERT OR REPLACE INTO raw_samples 
@@ -241,6 +258,7 @@ class RealtimeFeedbackCollector:
                 
                 updated_count += 1
             
+            # raw_samples é a fonte do auto_optimizer (TradeAnalytics.from_db)
             conn.commit()
             conn.close()
             
@@ -259,121 +277,66 @@ class RealtimeFeedbackCollector:
         """
         Encontrar padrão correspondente a um trade
         """
+        return self.find_matching_patterns([{'symbol': symbol, 'closed_at': closed_at}])[0]
+
+    def find_matching_patterns(self, trades):
+        """
+        Padrão mais próximo no tempo (1 hora antes/depois) para cada trade, em lote:
+        uma conexão, uma consulta por índice (symbol, timestamp_detection) e
+        as-of join por símbolo. Retorna lista alinhada com `trades` (None = sem padrão).
+        """
+        if not trades:
+            return []
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Buscar padrão mais próximo no tempo (1 hora antes/after)
+            import pandas as pd
+
             time_window = 3600  # 1 hora em segundos
-            trade_time_sec = closed_at // 1000
-            
-            cursor.execute('''
-                SELECT pattern_name, ai_verdict, ai_confidence, created_at
-                FROM raw_samples 
-                WHERE symbol LIKE ? 
-                AND created_at BETWEEN ? AND ?
-                AND ai_verdict IS NOT NULL
-                ORDER BY ABS(created_at - ?) ASC
-                LIMIT 1
-            ''', (
-                f'%{symbol.replace("USDT", "")}%',
-                trade_time_sec - time_window,
-                trade_time_sec + time_window,
-                trade_time_sec
-            ))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'pattern_name': result[0],
-                    'ai_verdict': result[1],
-                    'ai_confidence': result[2],
-                    'sample_time': result[3]
+            df = pd.DataFrame({
+                'symbol': [normalize_symbol(t['symbol']) for t in trades],
+                'trade_time': [int(t['closed_at']) // 1000 for t in trades],
+            })
+
+            conn = sqlite3.connect(self.db_path)
+            try:
+                ensure_detection_index(conn)
+                detections = load_detections(
+                    conn, df['symbol'], df['trade_time'].min() - time_window, df['trade_time'].max() + time_window,
+                    where="ai_verdict IS NOT NULL", columns="pattern_detected, ai_verdict, ai_confidence"
+                )
+            finally:
+                conn.close()
+
+            matched = match_nearest_detections(df, detections, 'trade_time', time_window)
+            if 'ai_verdict' not in matched:
+                return [None] * len(trades)
+            return [
+                None if pd.isna(r.ai_verdict) else {
+                    'pattern_name': r.pattern_detected,
+                    'ai_verdict': r.ai_verdict,
+                    'ai_confidence': r.ai_confidence,
+                    'sample_time': int(r.timestamp_detection)
                 }
+                for r in matched.itertuples(index=False)
+            ]
             
         except Exception as e:
             logger.error(f"❌ Erro ao buscar padrão: {e}")
         
-        return None
+        return [None] * len(trades)
     
-    def compact_old_data(self, days_to_keep=30):
+    def compact_old_data(self, days_to_keep=RETENTION_DAYS, max_seconds=30):
         """
         Compactar dados antigos mantendo estatísticas de aprendizado
+        (incremental, em chunks curtos - ver data_compactor.DataCompactor)
         """
         try:
-            cutoff_time = int((time.time() - days_to_keep * 86400) * 1000)
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Contar registros antigos
-            cursor.execute('''
-                SELECT COUNT(*) FROM raw_samples 
-                WHERE created_at < ?
-            ''', (cutoff_time // 1000,))
-            
-            old_count = cursor.fetchone()[0]
-            
-            if old_count == 0:
+            stats = DataCompactor(self.db_path, retention_days=days_to_keep,
+                                  archive=get_archive(self.db_path)).run(max_seconds=max_seconds)
+            if stats['rows'] == 0:
                 logger.info("ℹ️ Nenhum dado antigo para compactar")
-                return 0
-            
-            # Criar tabela de estatísticas resumidas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS compacted_stats (
-                    period_start INTEGER,
-                    period_end INTEGER,
-                    total_samples INTEGER,
-                    wins INTEGER,
-                    losses INTEGER,
-                    avg_reward REAL,
-                    patterns_summary TEXT,
-                    PRIMARY KEY (period_start, period_end)
-                )
-            ''')
-            
-            # Agrupar dados antigos por dia
-            cursor.execute('''
-                SELECT 
-                    DATE(created_at, 'unixepoch') as day,
-                    COUNT(*) as total,
-                    SUM(CASE WHEN trade_result = 'WIN' THEN 1 ELSE 0 END) as wins,
-                    SUM(CASE WHEN trade_result = 'LOSS' THEN 1 ELSE 0 END) as losses,
-                    AVG(reward) as avg_reward,
-                    GROUP_CONCAT(DISTINCT pattern_name) as patterns
-                FROM raw_samples 
-                WHERE created_at < ?
-                GROUP BY day
-            ''', (cutoff_time // 1000,))
-            
-            daily_stats = cursor.fetchall()
-            
-            # Inserir estatísticas compactadas
-            for stats in daily_stats:
-                day_str, total, wins, losses, avg_reward, patterns = stats
-                
-                # Converter data para timestamp
-                from datetime import datetime
-                day_dt = datetime.strptime(day_str, '%Y-%m-%d')
-                period_start = int(day_dt.timestamp())
-                period_end = period_start + 86400
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO compacted_stats 
-                    (period_start, period_end, total_samples, wins, losses, avg_reward, patterns_summary)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (period_start, period_end, total, wins, losses, avg_reward or 0, patterns or ''))
-            
-            # Remover dados brutos antigos (manter apenas estatísticas)
-            cursor.execute('DELETE FROM raw_samples WHERE created_at < ?', (cutoff_time // 1000,))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"✅ Dados compactados: {old_count} registros → {len(daily_stats)} estatísticas diárias")
-            return old_count
+            else:
+                logger.info(f"✅ Dados compactados: {stats['rows']} registros → {stats['days']} estatísticas diárias")
+            return stats['rows']
             
         except Exception as e:
             logger.error(f"❌ Erro ao compactar dados: {e}")
@@ -401,7 +364,7 @@ class RealtimeFeedbackCollector:
                     
                     # 3. Compactar dados antigos periodicamente
                     if cycle_count % 12 == 0:  # A cada 6 horas
-                        compacted = self.compact_old_data(days_to_keep=7)  # Manter 7 dias de dados brutos
+                        compacted = self.compact_old_data()  # Mesma retenção do data_compactor
                         if compacted > 0:
                             logger.info(f"📦 Compactação: {compacted} registros antigos resumidos")
                 
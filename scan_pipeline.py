@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+⚙️ SCAN PIPELINE - Varredura paralela de centenas de pares por fechamento
+
+Dois estágios:
+1. I/O: threads atualizam o feed de candles (1 requisição por par, ver
+   lib_resample) - o gargalo real com centenas de pares
+2. CPU: detecção de padrões (AnalistaTecnico, pandas/scipy) num pool de
+   processos, um analista por processo
+
+O pré-filtro (validar_volume + registro no ScanScheduler) roda na thread
+principal porque usa estado em memória do scanner; só o que passa vai para
+os processos. Resultados saem conforme ficam prontos. O que passou no
+pré-filtro mas não teve o resultado consumido (consumidor parou cedo) fica
+em `unfinished`, para o scanner devolver à fila do ScanScheduler.
+
+Meta de throughput: 300 pares x 3 TFs a cada fechamento de 15m numa máquina
+de 4 núcleos. Medição sem rede (latência simulada):
+
+    python3 scan_pipeline.py --bench --symbols 300 --latency 0.15
+"""
+
+import os
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("ScanPipeline")
+
+DEFAULT_FETCH_WORKERS = 8
+TARGET_FRACTION = 0.5    # Ciclo deve caber em metade do menor timeframe
+
+_analista = None
+
+
+def _analisar(par: str, tf: str, candles: list):
+    """Roda no processo do pool (analista criado uma vez por processo)"""
+    global _analista
+    if _analista is None:
+        from lib_padroes import AnalistaTecnico
+        _analista = AnalistaTecnico()
+    return par, tf, _analista.analisar_par(par, candles)
+
+
+class ScanPipeline:
+    """
+        pipeline = ScanPipeline(feed, cpu_workers=4)
+        for par, tf, candles, padrao in pipeline.run(itens, prefilter):
+            ...  # só itens com padrão detectado
+    """
+
+    def __init__(self, feed, fetch_workers: int = DEFAULT_FETCH_WORKERS, cpu_workers: Optional[int] = None):
+        self.feed = feed
+        self.fetch_workers = max(1, fetch_workers)
+        self.cpu_workers = min(4, os.cpu_count() or 1) if cpu_workers is None else cpu_workers
+        self._io = ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="scan-io")
+        # cpu_workers=0 (ou 1 núcleo): analisa na thread principal
+        # spawn: o processo pai já tem threads de I/O rodando (fork não é seguro)
+        self._cpu = (ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=multiprocessing.get_context('spawn'))
+                     if self.cpu_workers > 1 else None)
+        self.last_cycle: Dict[str, float] = {}
+        self.unfinished: List[Tuple[str, str]] = []
+
+    def run(self, items: List[Tuple[str, str]], prefilter: Callable[[str, str, list], bool],
+            closed_only: bool = True) -> Iterator[tuple]:
+        """
+        items: (par, tf) em ordem de prioridade. prefilter(par, tf, candles)
+        decide se vale analisar. Gera (par, tf, candles, padrao) com padrão.
+        """
+        start = time.time()
+        by_pair: Dict[str, List[str]] = {}
+        for par, tf in items:
+            by_pair.setdefault(par, []).append(tf)
+
+        fetches = {self._io.submit(self.feed.refresh, par): par for par in by_pair}
+        analyses = {}
+        pending = set()     # Passaram no pré-filtro e o resultado ainda não foi consumido
+        stats = {'pairs': len(by_pair), 'items': len(items), 'analyzed': 0, 'fetch_errors': 0, 'found': 0}
+        try:
+            for fut in as_completed(fetches):
+                par = fetches[fut]
+                try:
+                    fut.result()
+                except Exception as e:
+                    stats['fetch_errors'] += 1
+                    logger.error(f"Erro ao baixar candles de {par}: {e}")
+                    continue
+                for tf in by_pair[par]:
+                    candles = self.feed.get(par, tf)
+                    if closed_only:
+                        candles = candles[:-1]
+                    if not prefilter(par, tf, candles):
+                        continue
+                    pending.add((par, tf))
+                    if self._cpu is None:
+                        _, _, padrao = _analisar(par, tf, candles)
+                        stats['analyzed'] += 1
+                        if padrao:
+                            stats['found'] += 1
+                            yield par, tf, candles, padrao
+                        pending.discard((par, tf))
+                    else:
+                        analyses[self._cpu.submit(_analisar, par, tf, candles)] = (par, tf, candles)
+
+            for fut in as_completed(analyses):
+                par, tf, candles = analyses[fut]
+                try:
+                    _, _, padrao = fut.result()
+                except Exception as e:
+                    # Falha não volta para a fila (mesmo candle, mesmo erro)
+                    logger.error(f"Erro na análise de padrões: {e}")
+                    pending.discard((par, tf))
+                    continue
+                stats['analyzed'] += 1
+                if padrao:
+                    stats['found'] += 1
+                    yield par, tf, candles, padrao
+                pending.discard((par, tf))
+        finally:
+            # Consumidor parou cedo (watchlist cheia): descarta o que não começou
+            for fut in list(fetches) + list(analyses):
+                fut.cancel()
+            self.unfinished = sorted(pending)
+            stats['unfinished'] = len(pending)
+            stats['seconds'] = round(time.time() - start, 2)
+            stats['items_per_s'] = round(stats['items'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+            self.last_cycle = stats
+
+    def check_target(self, smallest_tf_seconds: float) -> bool:
+        """Loga se o último ciclo estourou a meta (fração do menor timeframe)"""
+        seconds = self.last_cycle.get('seconds', 0.0)
+        budget = smallest_tf_seconds * TARGET_FRACTION
+        if seconds > budget:
+            logger.warning(f"⚠️ Ciclo de scan levou {seconds:.1f}s (meta {budget:.0f}s) - "
+                           f"reduza universe.top_n ou aumente os workers")
+            return False
+        return True
+
+    def shutdown(self):
+        self._io.shutdown(wait=False, cancel_futures=True)
+        if self._cpu is not None:
+            self._cpu.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================================
+# BENCHMARK (sem rede)
+# ============================================================
+class _BenchFeed:
+    """Feed sintético: refresh dorme `latency` (simula a requisição)"""
+
+    def __init__(self, latency: float, bars: int = 200):
+        import numpy as np
+        self.latency = latency
+        rng = np.random.default_rng(0)
+        closes = 100 + np.cumsum(rng.normal(0, 1, bars + 1))
+        self.candles = [[i * 900000, float(v), float(v) + 1, float(v) - 1, float(v), 100.0]
+                        for i, v in enumerate(closes)]
+
+    def refresh(self, symbol):
+        time.sleep(self.latency)
+        return 1
+
+    def get(self, symbol, timeframe, limit=None):
+        return self.candles
+
+
+def bench(symbols: int, timeframes: int, latency: float, fetch_workers: int, cpu_workers: Optional[int]) -> dict:
+    pipeline = ScanPipeline(_BenchFeed(latency), fetch_workers=fetch_workers, cpu_workers=cpu_workers)
+    tfs = ['15m', '30m', '1h', '4h'][:timeframes]
+    items = [(f"S{i}/USDT", tf) for i in range(symbols) for tf in tfs]
+    try:
+        for _ in pipeline.run(items, lambda par, tf, candles: True):
+            pass
+    finally:
+        pipeline.shutdown()
+    return dict(pipeline.last_cycle, cpu_workers=pipeline.cpu_workers, fetch_workers=fetch_workers)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Pipeline de scan paralelo")
+    parser.add_argument('--bench', action='store_true', help="Mede throughput com feed sintético")
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--timeframes', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.15, help="Latência simulada por requisição (s)")
+    parser.add_argument('--fetch-workers', type=int, default=DEFAULT_FETCH_WORKERS)
+    parser.add_argument('--cpu-workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.bench:
+        r = bench(args.symbols, args.timeframes, args.latency, args.fetch_workers, args.cpu_workers)
+        budget = 15 * 60 * TARGET_FRACTION
+        print(f"⚙️ {r['pairs']} pares x {args.timeframes} TFs = {r['items']} análises "
+              f"({r['fetch_workers']} threads I/O, {r['cpu_workers']} processos)")
+        print(f"   {r['seconds']:.2f}s -> {r['items_per_s']:.1f} itens/s | meta 15m: {budget:.0f}s "
+              f"{'✅' if r['seconds'] <= budget else '❌'}")
+    else:
+        parser.print_help()
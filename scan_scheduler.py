@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+🎯 SCAN SCHEDULER - Ordem de análise do scanner por prioridade
+
+Antes: os 30 pares eram varridos na ordem do config, todos os timeframes,
+com sleep(30) fixo entre ciclos. Agora cada (par, timeframe) só volta a ser
+analisado quando fecha uma barra nova (padrão só muda no fechamento) e os
+itens prontos saem de um heap por prioridade:
+
+    score = W_CLOSE  * urgência (pouco tempo até o próximo fechamento)
+          + W_VOL    * volatilidade recente (desvio dos retornos, % por barra)
+          + W_VOLUME * passou no validar_volume há poucas barras
+          + W_BL_EXP * blacklist do par/tf expirou há pouco (padrão pode voltar)
+          - W_BL     * blacklist ativa para o par/tf
+
+Relógio da exchange (ExchangeClock) para bater com as fronteiras da Bybit.
+"""
+
+import os
+import json
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from brain_simulator import TIMEFRAME_MINUTES
+from candle_scheduler import ExchangeClock, GRACE_SECONDS, last_close_ms, next_close_ms, timeframe_seconds
+from lib_indicadores import RollingVolatility
+
+logger = logging.getLogger("ScanScheduler")
+
+BLACKLIST_FILE = 'smart_blacklist.json'
+
+W_CLOSE = 1.0
+W_VOL = 1.0
+W_VOLUME = 1.5
+W_BL_EXP = 0.5
+W_BL = 1.0
+
+VOL_PERIOD = 20
+VOL_REF_PCT = 1.0       # Desvio por barra que vale 1.0 no score (satura acima)
+VOLUME_RECENT_BARS = 3  # "Passou recentemente" = nas últimas N barras do timeframe
+URGENCY_REF_MIN = 15    # Meia urgência quando faltam 15 min para o próximo fechamento
+
+
+@dataclass
+class ScanItem:
+    symbol: str
+    timeframe: str
+    last_close: int = 0                 # Fechamento (ms) da última barra analisada
+    volatility: float = 0.0
+    volume_ok_at: Optional[int] = None  # Fechamento em que validar_volume passou
+
+
+class ScanScheduler:
+    """
+    Uso no scanner:
+
+        scheduler = ScanScheduler(pairs, ['15m', '30m', '1h'], exchange)
+        for symbol, tf in scheduler.due(skip=pares_na_watchlist):
+            ...
+            scheduler.mark_analyzed(symbol, tf, candles, volume_ok)
+        for symbol, tf in pipeline.unfinished:     # Marcados, mas o ciclo parou antes do resultado
+            scheduler.mark_due(symbol, tf)
+        time.sleep(scheduler.seconds_until_next_close(max_wait=60))
+    """
+
+    def __init__(self, pairs: Iterable[str], timeframes: Iterable[str], exchange=None,
+                 clock: Optional[ExchangeClock] = None, grace_seconds: float = GRACE_SECONDS,
+                 blacklist_file: str = BLACKLIST_FILE):
+        self.clock = clock or ExchangeClock(exchange)
+        self.grace_ms = int(grace_seconds * 1000)
+        self.blacklist_file = blacklist_file
+        self._items: Dict[Tuple[str, str], ScanItem] = {}
+        self._lock = threading.Lock()
+        self._bl_cache: Tuple[float, dict] = (0.0, {})
+        self.set_universe(pairs, timeframes)
+
+    def set_universe(self, pairs: Iterable[str], timeframes: Iterable[str]):
+        """Atualiza pares/timeframes mantendo o estado dos que continuam"""
+        timeframes = list(timeframes)
+        for tf in timeframes:
+            if tf not in TIMEFRAME_MINUTES:
+                raise ValueError(f"Timeframe não suportado: {tf}")
+        wanted = {(p, tf) for p in pairs for tf in timeframes}
+        with self._lock:
+            for key in list(self._items):
+                if key not in wanted:
+                    del self._items[key]
+            for symbol, tf in wanted:
+                self._items.setdefault((symbol, tf), ScanItem(symbol, tf))
+            self.timeframes = timeframes
+
+    # ============================================================
+    # BLACKLIST
+    # ============================================================
+    def _blacklist(self) -> dict:
+        """smart_blacklist.json relido só quando muda"""
+        try:
+            mtime = os.path.getmtime(self.blacklist_file)
+        except OSError:
+            return {}
+        if mtime != self._bl_cache[0]:
+            try:
+                with open(self.blacklist_file, 'r') as f:
+                    self._bl_cache = (mtime, json.load(f))
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao ler {self.blacklist_file}: {e}")
+        return self._bl_cache[1]
+
+    def _blacklist_expiries(self) -> Dict[Tuple[str, str], List[float]]:
+        """(par, tf) -> lista de expire (chave do arquivo: SYMBOL_PADRAO_TF)"""
+        out: Dict[Tuple[str, str], List[float]] = {}
+        for key, entry in self._blacklist().items():
+            try:
+                symbol, tf = key.split('_', 1)[0], key.rsplit('_', 1)[1]
+                out.setdefault((symbol, tf), []).append(float(entry['expire']))
+            except (IndexError, KeyError, TypeError, ValueError):
+                continue
+        return out
+
+    # ============================================================
+    # PRIORIDADE
+    # ============================================================
+    def priority(self, item: ScanItem, now_ms: int, expiries: Optional[Dict] = None) -> float:
+        step_ms = timeframe_seconds(item.timeframe) * 1000
+        to_next_min = (next_close_ms(now_ms, item.timeframe) - now_ms) / 60000
+        score = W_CLOSE / (1 + to_next_min / URGENCY_REF_MIN)
+        score += W_VOL * min(item.volatility / VOL_REF_PCT, 1.0)
+
+        if item.volume_ok_at is not None:
+            if last_close_ms(now_ms, item.timeframe) - item.volume_ok_at <= VOLUME_RECENT_BARS * step_ms:
+                score += W_VOLUME
+
+        now_s = now_ms / 1000
+        for expire in (expiries or {}).get((item.symbol, item.timeframe), []):
+            if expire > now_s:
+                score -= W_BL
+            elif now_s - expire <= step_ms / 1000:
+                score += W_BL_EXP
+        return score
+
+    def due(self, skip: Iterable[str] = ()) -> List[Tuple[str, str]]:
+        """(par, timeframe) com barra fechada ainda não analisada, maior prioridade primeiro"""
+        skip = set(skip)
+        now = self.clock.now_ms() - self.grace_ms
+        expiries = self._blacklist_expiries()
+        heap = []
+        with self._lock:
+            for (symbol, tf), item in self._items.items():
+                if symbol in skip or last_close_ms(now, tf) <= item.last_close:
+                    continue
+                heapq.heappush(heap, (-self.priority(item, now, expiries), symbol, tf))
+        return [(symbol, tf) for _, symbol, tf in (heapq.heappop(heap) for _ in range(len(heap)))]
+
+    def mark_analyzed(self, symbol: str, timeframe: str, candles: Optional[list] = None,
+                      volume_ok: Optional[bool] = None):
+        """
+        Registra a análise. candles = barras FECHADAS no formato ccxt: o
+        fechamento analisado é a abertura da última + duração do timeframe.
+        """
+        now = self.clock.now_ms() - self.grace_ms
+        with self._lock:
+            item = self._items.get((symbol, timeframe))
+            if item is None:
+                return
+            close = last_close_ms(now, timeframe)
+            if candles:
+                close = min(close, int(candles[-1][0]) + timeframe_seconds(timeframe) * 1000)
+                closes = [c[4] for c in candles[-(VOL_PERIOD + 1):]]
+                if len(closes) > VOL_PERIOD:
+                    item.volatility = RollingVolatility.from_array(closes, VOL_PERIOD).value or 0.0
+            item.last_close = close
+            if volume_ok:
+                item.volume_ok_at = close
+
+    def mark_due(self, symbol: str, timeframe: str):
+        """Devolve o item à fila: a análise registrada foi cancelada antes do resultado"""
+        with self._lock:
+            item = self._items.get((symbol, timeframe))
+            if item is not None:
+                item.last_close = 0
+
+    def seconds_until_next_close(self, max_wait: Optional[float] = None) -> float:
+        """Segundos até o próximo fechamento (+ folga) entre os timeframes escaneados"""
+        now = self.clock.now_ms()
+        if not self.timeframes:
+            return max_wait if max_wait is not None else 60.0
+        wait = min(next_close_ms(now - self.grace_ms, tf) + self.grace_ms - now for tf in self.timeframes) / 1000
+        wait = max(wait, 0.0)
+        return min(wait, max_wait) if max_wait is not None else wait
+
+    def snapshot(self) -> List[dict]:
+        """Estado atual ordenado por prioridade (debug/dashboard)"""
+        now = self.clock.now_ms() - self.grace_ms
+        expiries = self._blacklist_expiries()
+        with self._lock:
+            rows = [{
+                'symbol': it.symbol, 'timeframe': it.timeframe,
+                'priority': round(self.priority(it, now, expiries), 3),
+                'volatility': round(it.volatility, 4),
+                'due': last_close_ms(now, it.timeframe) > it.last_close,
+            } for it in self._items.values()]
+        return sorted(rows, key=lambda r: -r['priority'])
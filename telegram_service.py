@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""
+📨 TELEGRAM SERVICE - Um único loop asyncio para todo o I/O do Telegram
+
+Antes, bot_telegram (telebot + loop bloqueante), bot_telegram_control
+(long-polling com requests) e post_entry_validator.send_telegram_alert
+falavam com a API de forma síncrona, cada um com a sua sessão: um
+sendMessage lento travava o alerta seguinte e, no pós-entrada, o monitor
+da posição. Agora:
+
+- Qualquer processo chama enqueue_message(): um INSERT no telegram_outbox
+  (SQLite, milissegundos) e segue - nunca espera a rede
+- O TelegramService (um processo, um event loop) drena a fila com uma
+  sessão HTTP reaproveitada (aiohttp; requests.Session numa thread se não
+  houver aiohttp), respeitando ~1 msg/s por chat e o teto global
+- Mensagens pendentes do mesmo chat viram uma só (até 4096 caracteres);
+  alertas com a mesma key são coalescidos: o pendente é atualizado
+  (repetido Nx) e, depois de enviado, o próximo espera COALESCE_SECONDS
+- 429 respeita retry_after; falhas têm backoff e desistem após MAX_ATTEMPTS
+- Comandos (/status, ...) e callbacks de botões chegam pelo mesmo loop
+  (getUpdates); handlers síncronos rodam em asyncio.to_thread
+- health (HealthReporter opcional): atraso do event loop e fila pendente
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    aiohttp = None
+    HAS_AIOHTTP = False
+
+logger = logging.getLogger("TelegramService")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, 'sniper_brain.db')
+API_URL = 'https://api.telegram.org/bot{token}/{method}'
+
+MAX_TEXT = 4096             # Limite do sendMessage
+BATCH_SIZE = 50             # Linhas lidas do outbox por ciclo
+CHAT_INTERVAL = 1.0         # Telegram: ~1 msg/s por chat
+GLOBAL_INTERVAL = 1.0 / 25  # Abaixo do teto de 30 msg/s por bot
+COALESCE_SECONDS = 300      # Mesmo alerta (key) no máximo a cada 5 min
+MAX_ATTEMPTS = 5
+IDLE_POLL = 1.0             # Outros processos só escrevem no SQLite: releitura da fila
+POLL_TIMEOUT = 30           # Long-polling do getUpdates
+RETENTION_SECONDS = 86400   # Enviadas/falhas ficam 1 dia (cooldown das keys)
+DISPATCH_GRACE = 10         # No stop(), handlers em andamento têm até 10s para terminar
+
+
+def init_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS telegram_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL,
+            text TEXT NOT NULL,
+            parse_mode TEXT,
+            reply_markup TEXT,
+            coalesce_key TEXT,
+            repeats INTEGER DEFAULT 1,
+            status TEXT DEFAULT 'PENDING',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL DEFAULT 0,
+            created_at REAL,
+            updated_at REAL,
+            sent_at REAL,
+            error TEXT
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_telegram_outbox_due ON telegram_outbox(status, next_attempt_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_telegram_outbox_key ON telegram_outbox(coalesce_key, status)')
+
+
+def load_credentials() -> Tuple[Optional[str], Optional[str]]:
+    """(token, chat_id): ambiente, depois .env, depois segredos.json (mesmas fontes dos bots)"""
+    secrets = {}
+    for name in ('segredos.json', '.env'):
+        path = os.path.join(BASE_DIR, name)
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r') as f:
+                if name.endswith('.json'):
+                    secrets.update(json.load(f))
+                else:
+                    for line in f:
+                        if '=' in line and not line.startswith('#'):
+                            key, val = line.strip().split('=', 1)
+                            secrets[key] = val
+        except Exception as e:
+            logger.warning(f"⚠️ Erro lendo {name}: {e}")
+    token = os.getenv('TELEGRAM_TOKEN') or secrets.get('TELEGRAM_TOKEN') or secrets.get('telegram_token')
+    chat_id = os.getenv('TELEGRAM_CHAT_ID') or secrets.get('TELEGRAM_CHAT_ID') or secrets.get('chat_id')
+    return token, (str(chat_id) if chat_id else None)
+
+
+def inline_keyboard(*rows) -> dict:
+    """inline_keyboard(('✅ APROVAR', 'aprov_BTC'), ('❌ IGNORAR', 'ignora_BTC')) - uma linha por argumento"""
+    def _row(row):
+        if row and isinstance(row[0], str):
+            row = [row]
+        return [{'text': text, 'callback_data': data} for text, data in row]
+    return {'inline_keyboard': [_row(row) for row in rows]}
+
+
+# ============================================================
+# OUTBOX (síncrono, qualquer processo)
+# ============================================================
+class TelegramOutbox:
+    """
+        outbox = get_outbox()
+        outbox.enqueue("🚀 GATILHO ROMPIDO...", chat_id, key='gatilho:BTC/USDT')
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        try:
+            conn = sqlite3.connect(self.db_path)
+            init_tables(conn)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar outbox do Telegram: {e}")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=2)
+
+    def enqueue(self, text: str, chat_id: str, parse_mode: Optional[str] = 'Markdown',
+                reply_markup: Optional[dict] = None, key: Optional[str] = None,
+                cooldown: float = COALESCE_SECONDS) -> Optional[int]:
+        now = time.time()
+        markup = json.dumps(reply_markup) if reply_markup else None
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            next_at = now
+            if key:
+                row = conn.execute(
+                    "SELECT id FROM telegram_outbox WHERE coalesce_key = ? AND status = 'PENDING' LIMIT 1", (key,)
+                ).fetchone()
+                if row:
+                    # Já tem um igual na fila: atualiza o texto e conta a repetição
+                    conn.execute('''
+                        UPDATE telegram_outbox SET text = ?, reply_markup = ?, repeats = repeats + 1, updated_at = ?
+                        WHERE id = ?
+                    ''', (text, markup, now, row[0]))
+                    conn.commit()
+                    return row[0]
+                last = conn.execute(
+                    "SELECT MAX(sent_at) FROM telegram_outbox WHERE coalesce_key = ? AND status = 'SENT'", (key,)
+                ).fetchone()[0]
+                if last:
+                    next_at = max(now, last + cooldown)
+            cur = conn.execute('''
+                INSERT INTO telegram_outbox
+                (chat_id, text, parse_mode, reply_markup, coalesce_key, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (str(chat_id), text, parse_mode, markup, key, next_at, now, now))
+            conn.commit()
+            return cur.lastrowid
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def due(self, now: Optional[float] = None, limit: int = BATCH_SIZE) -> List[tuple]:
+        """(id, chat_id, text, parse_mode, reply_markup, repeats, attempts) prontas para envio"""
+        conn = self._connect()
+        try:
+            return conn.execute('''
+                SELECT id, chat_id, text, parse_mode, reply_markup, repeats, attempts FROM telegram_outbox
+                WHERE status = 'PENDING' AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+            ''', (now or time.time(), limit)).fetchall()
+        finally:
+            conn.close()
+
+    def mark_sent(self, ids: List[int], now: Optional[float] = None):
+        now = now or time.time()
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE telegram_outbox SET status = 'SENT', sent_at = ?, updated_at = ? WHERE id = ?",
+                             [(now, now, i) for i in ids])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def mark_retry(self, ids: List[int], retry_at: float, error: str, count_attempt: bool = True):
+        """Reagenda; com count_attempt, após MAX_ATTEMPTS a mensagem vira FAILED"""
+        conn = self._connect()
+        try:
+            conn.executemany('''
+                UPDATE telegram_outbox
+                SET attempts = attempts + ?, next_attempt_at = ?, error = ?, updated_at = ?,
+                    status = CASE WHEN attempts + ? >= ? THEN 'FAILED' ELSE status END
+                WHERE id = ?
+            ''', [(int(count_attempt), retry_at, error[:500], time.time(), int(count_attempt), MAX_ATTEMPTS, i)
+                  for i in ids])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def purge(self, older_than: float) -> int:
+        conn = self._connect()
+        try:
+            cur = conn.execute("DELETE FROM telegram_outbox WHERE status != 'PENDING' AND updated_at < ?", (older_than,))
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            return {status: n for status, n in
+                    conn.execute('SELECT status, COUNT(*) FROM telegram_outbox GROUP BY status')}
+        finally:
+            conn.close()
+
+
+_outbox = None
+
+
+def get_outbox(db_path: str = DB_PATH) -> TelegramOutbox:
+    global _outbox
+    if _outbox is None or _outbox.db_path != db_path:
+        _outbox = TelegramOutbox(db_path)
+    return _outbox
+
+
+def enqueue_message(text: str, chat_id: Optional[str] = None, parse_mode: Optional[str] = 'Markdown',
+                    reply_markup: Optional[dict] = None, key: Optional[str] = None,
+                    cooldown: float = COALESCE_SECONDS, db_path: str = DB_PATH) -> bool:
+    """Enfileira para o TelegramService (não faz rede, não lança exceção)"""
+    try:
+        chat_id = chat_id or load_credentials()[1]
+        if not chat_id:
+            logger.warning("Telegram não configurado (TELEGRAM_CHAT_ID)")
+            return False
+        get_outbox(db_path).enqueue(text, chat_id, parse_mode, reply_markup, key, cooldown)
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro ao enfileirar mensagem Telegram: {e}")
+        return False
+
+
+def build_batches(rows: List[tuple], max_text: int = MAX_TEXT) -> List[dict]:
+    """
+    Junta mensagens pendentes consecutivas do mesmo chat (sem botões, mesmo
+    parse_mode) num único sendMessage, na ordem da fila.
+    """
+    batches: List[dict] = []
+    open_batch: Dict[str, dict] = {}
+    for msg_id, chat_id, text, parse_mode, reply_markup, repeats, _attempts in rows:
+        if repeats and repeats > 1:
+            text = f"{text}\n🔁 {repeats}x"
+        text = text[:max_text]
+        current = open_batch.get(chat_id)
+        if (not reply_markup and current is not None and current['parse_mode'] == parse_mode
+                and len(current['text']) + 2 + len(text) <= max_text):
+            current['text'] += '\n\n' + text
+            current['ids'].append(msg_id)
+            continue
+        batch = {'ids': [msg_id], 'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode,
+                 'reply_markup': json.loads(reply_markup) if reply_markup else None}
+        batches.append(batch)
+        open_batch[chat_id] = None if reply_markup else batch
+    return batches
+
+
+# ============================================================
+# TRANSPORTE HTTP (sessão reaproveitada)
+# ============================================================
+class TelegramAPIError(Exception):
+    pass
+
+
+class AiohttpTransport:
+    def __init__(self, token: str, pool_size: int = 8):
+        self.token = token
+        self.pool_size = pool_size
+        self._session = None
+
+    async def __call__(self, method: str, params: dict, timeout: float) -> dict:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        url = API_URL.format(token=self.token, method=method)
+        async with self._session.post(url, json=params, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            return await resp.json(content_type=None)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class RequestsTransport:
+    """Fallback sem aiohttp: uma requests.Session (pool de conexões) chamada via to_thread"""
+
+    def __init__(self, token: str, pool_size: int = 8):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.token = token
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    async def __call__(self, method: str, params: dict, timeout: float) -> dict:
+        url = API_URL.format(token=self.token, method=method)
+        resp = await asyncio.to_thread(self._session.post, url, json=params, timeout=timeout)
+        return resp.json()
+
+    async def close(self):
+        self._session.close()
+
+
+def default_transport(token: str):
+    return AiohttpTransport(token) if HAS_AIOHTTP else RequestsTransport(token)
+
+
+# ============================================================
+# SERVIÇO (um event loop)
+# ============================================================
+Handler = Callable[..., Any]
+
+
+class TelegramService:
+    """
+        service = TelegramService(token, chat_id)
+        service.add_command('/status', lambda service, message, args: "📊 ...")   # texto ou dict de send()
+        service.add_callback('aprov_', lambda service, query, data: ("Ok", "✅ *APROVADO*"))
+        service.add_task(verificar_watchlist, interval=10)
+        service.run_forever()
+    """
+
+    def __init__(self, token: str, chat_id: str, db_path: str = DB_PATH,
+                 transport: Optional[Callable[[str, dict, float], Awaitable[dict]]] = None,
+                 poll: bool = True, chat_interval: float = CHAT_INTERVAL,
+                 global_interval: float = GLOBAL_INTERVAL, idle_poll: float = IDLE_POLL,
+                 health=None):
+        self.token = token
+        self.chat_id = str(chat_id)
+        self.outbox = TelegramOutbox(db_path)
+        self.transport = transport or default_transport(token)
+        self.poll = poll
+        self.chat_interval = chat_interval
+        self.global_interval = global_interval
+        self.idle_poll = idle_poll
+        self.health = health
+
+        self.commands: Dict[str, Handler] = {}
+        self.callbacks: Dict[str, Handler] = {}
+        self.tasks: List[Tuple[Handler, float]] = []
+        self.offset = 0
+        self.stats = {'sent': 0, 'messages': 0, 'retries': 0, 'failed': 0, 'updates': 0}
+
+        self._running = False
+        self._wake: Optional[asyncio.Event] = None
+        self._chat_ready: Dict[str, float] = {}
+        self._global_ready = 0.0
+        self._attempts: Dict[int, int] = {}
+        # Referência forte aos dispatches (o asyncio só guarda referência fraca às tasks)
+        self._dispatching: Set[asyncio.Task] = set()
+
+    # ============================================================
+    # REGISTRO
+    # ============================================================
+    def add_command(self, name: str, handler: Handler):
+        """handler(service, message, args) -> texto de resposta, {'text', 'reply_markup', ...} ou None"""
+        self.commands[name.lower()] = handler
+
+    def add_callback(self, prefix: str, handler: Handler):
+        """handler(service, callback_query, data) -> (resposta curta, novo texto da mensagem)"""
+        self.callbacks[prefix] = handler
+
+    def add_task(self, func: Handler, interval: float):
+        """func() periódica no mesmo loop (síncrona roda em thread)"""
+        self.tasks.append((func, interval))
+
+    # ============================================================
+    # API
+    # ============================================================
+    async def call(self, method: str, params: Optional[dict] = None, timeout: float = 15) -> Any:
+        data = await self.transport(method, params or {}, timeout)
+        if not data.get('ok'):
+            raise TelegramAPIError(json.dumps({k: data.get(k) for k in ('error_code', 'description', 'parameters')}))
+        return data.get('result')
+
+    async def send(self, text: str, chat_id: Optional[str] = None, parse_mode: Optional[str] = 'Markdown',
+                   reply_markup: Optional[dict] = None, key: Optional[str] = None):
+        """Enfileira pelo outbox (mesma fila/limites dos outros processos) e acorda o envio"""
+        await asyncio.to_thread(self.outbox.enqueue, text, chat_id or self.chat_id, parse_mode, reply_markup, key)
+        if self._wake is not None:
+            self._wake.set()
+
+    @staticmethod
+    async def _invoke(handler: Handler, *args):
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(*args)
+        return await asyncio.to_thread(handler, *args)
+
+    # ============================================================
+    # ENVIO
+    # ============================================================
+    async def _send_batch(self, batch: dict) -> Optional[float]:
+        """Envia um lote; retorna o retry_after global em caso de 429"""
+        params = {'chat_id': batch['chat_id'], 'text': batch['text']}
+        if batch['parse_mode']:
+            params['parse_mode'] = batch['parse_mode']
+        if batch['reply_markup']:
+            params['reply_markup'] = batch['reply_markup']
+        try:
+            data = await self.transport('sendMessage', params, 15)
+            if not data.get('ok') and 'parse' in str(data.get('description', '')).lower() and batch['parse_mode']:
+                # Markdown quebrado (ex. '_' num símbolo): melhor chegar sem formatação do que não chegar
+                params.pop('parse_mode')
+                data = await self.transport('sendMessage', params, 15)
+        except Exception as e:
+            data = {'ok': False, 'description': str(e)}
+
+        if data.get('ok'):
+            await asyncio.to_thread(self.outbox.mark_sent, batch['ids'])
+            self.stats['sent'] += 1
+            self.stats['messages'] += len(batch['ids'])
+            return None
+
+        retry_after = (data.get('parameters') or {}).get('retry_after')
+        error = str(data.get('description') or data.get('error_code'))
+        if retry_after:
+            await asyncio.to_thread(self.outbox.mark_retry, batch['ids'], time.time() + retry_after, error, False)
+            self.stats['retries'] += 1
+            return float(retry_after)
+        attempts = 1 + max(self._attempts.get(i, 0) for i in batch['ids'])
+        await asyncio.to_thread(self.outbox.mark_retry, batch['ids'], time.time() + min(300, 2 ** attempts), error)
+        self.stats['failed' if attempts >= MAX_ATTEMPTS else 'retries'] += 1
+        logger.warning(f"⚠️ Falha no envio Telegram ({attempts}/{MAX_ATTEMPTS}): {error[:200]}")
+        return None
+
+    async def _sender_loop(self):
+        while self._running:
+            try:
+                rows = await asyncio.to_thread(self.outbox.due)
+                self._attempts = {row[0]: row[6] for row in rows}
+                next_wake = self.idle_poll
+                for batch in build_batches(rows):
+                    now = time.monotonic()
+                    chat_ready = self._chat_ready.get(batch['chat_id'], 0.0)
+                    if now < chat_ready:
+                        # Chat no limite: fica na fila (os outros chats seguem)
+                        next_wake = min(next_wake, chat_ready - now)
+                        continue
+                    if now < self._global_ready:
+                        await asyncio.sleep(self._global_ready - now)
+                    retry_after = await self._send_batch(batch)
+                    now = time.monotonic()
+                    # 429 segura o chat inteiro: o que vem depois não passa na frente do reenvio
+                    self._chat_ready[batch['chat_id']] = now + max(self.chat_interval, retry_after or 0)
+                    self._global_ready = now + (retry_after or self.global_interval)
+                    if retry_after:
+                        next_wake = min(next_wake, retry_after)
+                        break
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(0.01, next_wake))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erro no envio Telegram: {e}")
+                await asyncio.sleep(self.idle_poll)
+
+    # ============================================================
+    # RECEBIMENTO
+    # ============================================================
+    async def _dispatch(self, update: dict):
+        try:
+            if 'callback_query' in update:
+                query = update['callback_query']
+                chat = str((query.get('message') or {}).get('chat', {}).get('id'))
+                data = query.get('data') or ''
+                if chat != self.chat_id:
+                    return
+                prefix = max((p for p in self.callbacks if data.startswith(p)), key=len, default=None)
+                if prefix is None:
+                    return
+                answer, new_text = await self._invoke(self.callbacks[prefix], self, query, data) or (None, None)
+                await self.call('answerCallbackQuery', {'callback_query_id': query['id'], 'text': answer or ''})
+                if new_text:
+                    await self.call('editMessageText', {'chat_id': chat, 'message_id': query['message']['message_id'],
+                                                        'text': new_text, 'parse_mode': 'Markdown'})
+                return
+
+            message = update.get('message') or {}
+            chat = str(message.get('chat', {}).get('id'))
+            text = (message.get('text') or '').strip()
+            # Segurança: só responde ao chat configurado
+            if chat != self.chat_id or not text.startswith('/'):
+                return
+            parts = text.split()
+            name = parts[0].lower().split('@')[0]
+            logger.info(f"Comando recebido: {name}")
+            handler = self.commands.get(name)
+            if handler is None:
+                await self.send("Comando desconhecido. Use /help", chat)
+                return
+            reply = await self._invoke(handler, self, message, parts[1:])
+            if isinstance(reply, dict):
+                # {'text': ..., 'reply_markup': ..., 'parse_mode': ...}
+                await self.send(chat_id=chat, **reply)
+            elif reply:
+                await self.send(reply, chat)
+        except Exception as e:
+            logger.error(f"❌ Erro ao processar update {update.get('update_id')}: {e}")
+
+    async def _poll_loop(self):
+        while self._running:
+            try:
+                updates = await self.call('getUpdates', {
+                    'offset': self.offset, 'timeout': POLL_TIMEOUT,
+                    'allowed_updates': ['message', 'callback_query'],
+                }, timeout=POLL_TIMEOUT + 10) or []
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no polling: {e}")
+                await asyncio.sleep(5)
+                continue
+            for update in updates:
+                self.offset = update['update_id'] + 1
+                self.stats['updates'] += 1
+                # Handler lento (subprocess, Bybit) não segura o polling nem o envio
+                task = asyncio.ensure_future(self._dispatch(update))
+                self._dispatching.add(task)
+                task.add_done_callback(self._dispatching.discard)
+
+    async def _task_loop(self, func: Handler, interval: float):
+        while self._running:
+            try:
+                await self._invoke(func)
+            except Exception as e:
+                logger.error(f"❌ Erro na tarefa {getattr(func, '__name__', func)}: {e}")
+                if self.health is not None:
+                    self.health.error(e)
+            await asyncio.sleep(interval)
+
+    async def _purge_loop(self):
+        while self._running:
+            try:
+                await asyncio.to_thread(self.outbox.purge, time.time() - RETENTION_SECONDS)
+            except Exception as e:
+                logger.error(f"❌ Erro limpando outbox: {e}")
+            await asyncio.sleep(3600)
+
+    async def _health_loop(self):
+        """Latência = atraso do event loop (quanto o sleep passou do previsto)"""
+        interval = self.health.state['interval']
+        while self._running:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag_ms = max((time.perf_counter() - start - interval) * 1000, 0.0)
+            try:
+                pending = (await asyncio.to_thread(self.outbox.stats)).get('PENDING', 0)
+                self.health.set_extra(**self.stats)
+                self.health.beat(lag_ms, outbox=pending)
+            except Exception as e:
+                logger.error(f"❌ Erro publicando saúde: {e}")
+
+    # ============================================================
+    # CICLO DE VIDA
+    # ============================================================
+    async def run(self):
+        self._running = True
+        self._wake = asyncio.Event()
+        loops = [self._sender_loop(), self._purge_loop()] + [self._task_loop(f, i) for f, i in self.tasks]
+        if self.poll:
+            loops.append(self._poll_loop())
+        if self.health is not None:
+            loops.append(self._health_loop())
+        tasks = [asyncio.ensure_future(c) for c in loops]
+        logger.info(f"📨 Telegram service ativo ({len(self.commands)} comandos, "
+                    f"{'aiohttp' if isinstance(self.transport, AiohttpTransport) else 'sessão HTTP'})")
+        try:
+            while self._running:
+                await asyncio.sleep(0.2)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._dispatching:
+                # Ex. aprovação que lança executor: deixa terminar antes de fechar o transporte
+                _, late = await asyncio.wait(set(self._dispatching), timeout=DISPATCH_GRACE)
+                for t in late:
+                    t.cancel()
+                await asyncio.gather(*late, return_exceptions=True)
+            close = getattr(self.transport, 'close', None)
+            if close is not None:
+                await close()
+
+    def stop(self):
+        self._running = False
+
+    def run_forever(self):
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            logger.info("🛑 Telegram service interrompido")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Fila de mensagens do Telegram")
+    parser.add_argument('command', choices=['stats', 'send', 'run'], nargs='?', default='stats')
+    parser.add_argument('--text', default='📨 Teste do Telegram service')
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'send':
+        print("✅ Enfileirada" if enqueue_message(args.text, db_path=args.db) else "❌ Falhou")
+    elif args.command == 'run':
+        token, chat_id = load_credentials()
+        if not token or not chat_id:
+            raise SystemExit("TELEGRAM_TOKEN/TELEGRAM_CHAT_ID não configurados")
+        TelegramService(token, chat_id, db_path=args.db, poll=False).run_forever()
+    print(f"📨 Outbox: {get_outbox(args.db).stats()}")
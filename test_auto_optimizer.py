@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Teste do AutoOptimizer (métricas do período e ajuste de risco sobre um banco temporário)
+"""
+
+import sys
+import os
+import json
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# O módulo abre auto_optimizer.log no diretório atual ao ser importado
+_cwd = os.getcwd()
+os.chdir(tempfile.mkdtemp())
+try:
+    from auto_optimizer import AutoOptimizer
+finally:
+    os.chdir(_cwd)
+
+from lib_analytics import TradeAnalytics, HORIZONS
+
+
+def _db(trades):
+    """raw_samples com (idade em horas, pnl, reward, confiança)"""
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE raw_samples (id INTEGER PRIMARY KEY, created_at INTEGER, pnl_real REAL,
+                    reward REAL, ai_confidence REAL)''')
+    now = time.time()
+    conn.executemany('INSERT INTO raw_samples (created_at, pnl_real, reward, ai_confidence) VALUES (?, ?, ?, ?)',
+                     [(int(now - hours * 3600), pnl, reward, conf) for hours, pnl, reward, conf in trades])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _optimizer(db_path):
+    return AutoOptimizer(db_path=db_path, config_file=os.path.join(os.path.dirname(db_path), 'optimizer.json'))
+
+
+def test_performance_metrics_window():
+    trades = [(1, 1.5, 1.0, 0.8), (2, -0.5, -0.5, 0.6), (3, 0.8, 0.5, 0.7), (5, -3.0, -1.0, 0.9),
+              (30, 5.0, 1.0, 0.5), (200, -4.0, -1.0, 0.5), (2, None, None, 0.5),     # Sem pnl: ignorado
+              (24 * 40, 9.0, 1.0, 0.5)]                                                # Além do maior horizonte
+    path = _db(trades)
+    optimizer = _optimizer(path)
+    assert os.path.exists(optimizer.config_file)                  # Config padrão criada no caminho dado
+
+    metrics = optimizer.calculate_performance_metrics(hours_back=24)
+    assert metrics['total_trades'] == 4 and metrics['wins'] == 2 and metrics['losses'] == 2
+    assert metrics['break_even'] == 0 and metrics['win_rate'] == 50.0
+    assert abs(metrics['total_pnl'] - (-1.2)) < 1e-9
+    assert abs(metrics['avg_reward'] - 0.0) < 1e-9 and abs(metrics['avg_confidence'] - 0.75) < 1e-9
+
+    assert len(optimizer.analytics) == 6                          # Só o período do maior horizonte
+    since = metrics['timestamp'] - max(HORIZONS.values())
+    expected = TradeAnalytics.from_db(path, since=since).window(metrics['timestamp'] - 24 * 3600)
+    assert abs(metrics['sharpe_ratio'] - expected['sharpe_ratio']) < 1e-9
+    assert abs(metrics['max_drawdown'] - expected['max_drawdown_pct']) < 1e-9
+    assert metrics['horizons']['7d']['n'] == 5 and metrics['horizons']['30d']['n'] == 6
+    assert optimizer.performance_history == [metrics]
+
+    # Janela pedida maior que o maior horizonte: carrega a janela inteira
+    assert optimizer.calculate_performance_metrics(hours_back=24 * 45)['total_trades'] == 7
+
+    assert _optimizer(_db([(48, 1.0, 1.0, 0.5)])).calculate_performance_metrics(hours_back=24) is None
+
+
+def test_optimize_risk_parameters():
+    # 4 de 10 perdas grandes (> 30%) e 5 de 10 vitórias pequenas (> 40%)
+    trades = [(1, -3.0, -1.0, 0.5)] * 4 + [(2, 0.5, 0.3, 0.5)] * 5 + [(3, 2.5, 1.0, 0.5)]
+    optimizer = _optimizer(_db(trades))
+    risk = dict(optimizer.config['risk_adjustments'])
+
+    assert optimizer.calculate_performance_metrics(hours_back=24)['total_trades'] == 10
+    optimizer.optimize_risk_parameters()
+    adjusted = optimizer.config['risk_adjustments']
+    assert abs(adjusted['max_position_size'] - risk['max_position_size'] * 0.8) < 1e-12
+    assert abs(adjusted['take_profit_multiplier'] - risk['take_profit_multiplier'] * 1.1) < 1e-12
+    assert adjusted['stop_loss_multiplier'] == risk['stop_loss_multiplier']
+    with open(optimizer.config_file) as f:
+        assert json.load(f)['risk_adjustments'] == adjusted
+
+    # Sem métricas calculadas antes: carrega sozinho o mesmo período (vitórias antigas não diluem)
+    fresh = _optimizer(_db(trades + [(24 * 40, 2.5, 1.0, 0.5)] * 20))
+    fresh.optimize_risk_parameters()
+    assert abs(fresh.config['risk_adjustments']['max_position_size'] - risk['max_position_size'] * 0.8) < 1e-12
+
+    # Banco sem trades: nada muda
+    empty = _optimizer(_db([]))
+    empty.optimize_risk_parameters()
+    assert empty.config['risk_adjustments'] == risk
+
+
+def main():
+    print("🧪 TESTE: Auto optimizer")
+    print("=" * 60)
+    tests = [test_performance_metrics_window, test_optimize_risk_parameters]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Teste do Backtester (Scanner -> Monitor -> Executor offline)
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from lib_padroes import PadraoDetectado
+from backtester import Backtester, BacktestConfig, load_candles, volume_pass_mask
+
+TF_MS = 15 * 60 * 1000
+
+
+class AnalistaFixo:
+    """Detector determinístico: sempre vê o mesmo FUNDO_DUPLO LONG"""
+
+    def analisar_par(self, symbol, candles):
+        return PadraoDetectado(
+            nome='FUNDO_DUPLO', direcao='LONG', confiabilidade=0.78,
+            neckline_price=101.0, target_price=105.0, stop_loss_price=98.0,
+            timestamp=int(candles[-1][0] / 1000)
+        )
+
+
+def _serie(eventos):
+    """40 candles laterais + candle de volume (detecção) + eventos + cauda lateral"""
+    rows = [[100.0, 100.5, 99.5, 100.0, 1000.0]] * 40
+    rows.append([100.0, 100.5, 99.5, 100.0, 5000.0])
+    rows += eventos
+    rows += [[100.0, 100.5, 99.5, 100.0, 1000.0]] * 10
+    return np.array([[i * TF_MS] + r for i, r in enumerate(rows)])
+
+
+def _run(eventos, scenario=5, **cfg):
+    params = dict(fee_rate=0.0, slippage_pct=0.0)
+    params.update(cfg)
+    bt = Backtester(BacktestConfig(**params), analista=AnalistaFixo())
+    return bt.run('TEST/USDT', '15m', _serie(eventos), scenario=scenario)
+
+
+def test_long_trade_hits_target_after_break_even():
+    result = _run([
+        [100.5, 101.2, 100.2, 101.0, 1000.0],   # Gatilho na neckline
+        [101.0, 103.5, 101.0, 103.0, 1000.0],   # Passa de 50% do alvo -> BE
+        [103.0, 106.0, 102.0, 105.5, 1000.0],   # Target
+    ])
+    assert result['stats']['trades'] == 1
+    trade = result['trades'][0]
+    assert trade['exit_reason'] == 'TARGET'
+    assert trade['entry_price'] == 101.0 and trade['exit_price'] == 105.0
+    assert trade['break_even'] is True
+
+    # Sizing por risco: 5% de 1000 / (101 - 98)
+    assert abs(trade['qty'] - 50.0 / 3.0) < 1e-9
+    assert abs(trade['pnl'] - 4.0 * 50.0 / 3.0) < 1e-9
+    assert len(result['equity_curve']) == len(_serie([[0, 0, 0, 0, 0]] * 3))
+    assert abs(result['equity_curve'][-1][1] - result['stats']['final_equity']) < 1e-9
+
+
+def test_break_even_stop_exit():
+    result = _run([
+        [100.5, 101.2, 100.2, 101.0, 1000.0],
+        [101.0, 103.5, 101.0, 103.0, 1000.0],
+        [103.0, 103.2, 100.0, 100.5, 1000.0],   # Volta e pega o stop no BE (101 * 1.002)
+    ])
+    trade = result['trades'][0]
+    assert trade['exit_reason'] == 'BREAK_EVEN'
+    assert abs(trade['exit_price'] - 101.0 * 1.002) < 1e-9
+
+    sem_be = _run([
+        [100.5, 101.2, 100.2, 101.0, 1000.0],
+        [101.0, 103.5, 101.0, 103.0, 1000.0],
+        [103.0, 103.2, 97.0, 97.5, 1000.0],
+    ], break_even=False)
+    assert sem_be['trades'][0]['exit_reason'] == 'STOP_LOSS'
+    assert sem_be['trades'][0]['exit_price'] == 98.0
+
+
+def test_fees_and_slippage_reduce_pnl():
+    eventos = [
+        [100.5, 101.2, 100.2, 101.0, 1000.0],
+        [103.0, 106.0, 102.0, 105.5, 1000.0],
+    ]
+    limpo = _run(eventos)['trades'][0]
+    custos = _run(eventos, fee_rate=0.00055, slippage_pct=0.0005)['trades'][0]
+    assert custos['entry_price'] > limpo['entry_price']
+    assert custos['exit_price'] < limpo['exit_price']
+    assert custos['fees'] > 0 and custos['pnl'] < limpo['pnl']
+
+
+def test_stop_before_entry_blacklists_pattern():
+    result = _run([
+        [100.0, 100.5, 97.5, 98.0, 1000.0],     # Stop antes do gatilho
+        [100.0, 100.5, 99.5, 100.0, 5000.0],    # Novo volume: padrão em blacklist (6h)
+        [100.5, 101.2, 100.2, 101.0, 1000.0],
+    ])
+    assert result['stats']['trades'] == 0
+
+
+def test_scenario_and_volume_filters():
+    eventos = [[100.5, 101.2, 100.2, 101.0, 1000.0], [103.0, 106.0, 102.0, 105.5, 1000.0]]
+    # Cenário 2 (pânico nas alts) bloqueia LONG
+    assert _run(eventos, scenario=2)['stats']['trades'] == 0
+    assert _run(eventos, scenario=2, scenario_filter=False)['stats']['trades'] == 1
+    # Multiplicador alto: o pico de 5x não passa no filtro
+    assert _run(eventos, volume_multiplier=6.0)['stats']['analyses'] == 0
+
+
+def test_volume_mask_matches_scanner_rule():
+    rng = np.random.default_rng(7)
+    volumes = rng.uniform(500, 2000, 300)
+    mask = volume_pass_mask(volumes, 1.2)
+    for i in range(300):
+        janela = volumes[:i + 1]
+        esperado = len(janela) >= 21 and janela[-1] > (sum(janela[-21:-1]) / 20) * 1.2
+        assert mask[i] == esperado
+
+
+def test_load_candles_json_and_csv():
+    candles = [[2 * TF_MS, 1, 2, 0.5, 1.5, 10], [TF_MS, 1, 2, 0.5, 1.5, 10], [TF_MS, 1, 2, 0.5, 1.5, 10]]
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'TEST_USDT_15m.json')
+        with open(json_path, 'w') as f:
+            json.dump(candles, f)
+        csv_path = os.path.join(tmp, 'TEST_USDT_15m.csv')
+        with open(csv_path, 'w') as f:
+            f.write('timestamp,open,high,low,close,volume\n')
+            f.writelines(','.join(str(v) for v in c) + '\n' for c in candles)
+
+        for path in (json_path, csv_path):
+            loaded = load_candles(path)
+            assert loaded.shape == (2, 6)
+            assert list(loaded[:, 0]) == [TF_MS, 2 * TF_MS]
+
+
+def main():
+    print("🧪 TESTE: Backtester")
+    print("=" * 60)
+    tests = [test_long_trade_hits_target_after_break_even, test_break_even_stop_exit,
+             test_fees_and_slippage_reduce_pnl, test_stop_before_entry_blacklists_pattern,
+             test_scenario_and_volume_filters, test_volume_mask_matches_scanner_rule,
+             test_load_candles_json_and_csv]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
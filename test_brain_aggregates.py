@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Teste dos agregados incrementais de performance (brain_aggregates)
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from brain_aggregates import PerformanceAggregates, WINDOW_SIZE, prune_aggregates, hour_key
+
+rng = np.random.default_rng(3)
+
+
+def _trades(n, now):
+    out = []
+    for i in range(n):
+        pnl = float(rng.normal(0.2, 2.0))
+        feats = [float(rng.uniform(0.5, 1)), float(rng.uniform(0.5, 1)), float(rng.uniform(0, 24))]
+        out.append({
+            'pattern': ['OCO', 'TOPO_DUPLO'][i % 2], 'symbol': 'BTC/USDT', 'timeframe': '15m',
+            'ts': now - (n - i) * 600, 'pnl': pnl, 'score': float(rng.uniform(0, 1)),
+            'duration': feats[2], 'confidence': feats[0], 'features': feats,
+        })
+    return out
+
+
+def _aggregates():
+    return PerformanceAggregates(os.path.join(tempfile.mkdtemp(), 'brain.db'))
+
+
+def test_incremental_matches_batch_stats():
+    agg = _aggregates()
+    now = int(time.time())
+    trades = _trades(300, now)
+    conn = sqlite3.connect(agg.db_path)
+    for i in range(0, 300, 37):                 # Vários lotes, como o tracker grava
+        agg.record(conn, trades[i:i + 37])
+    conn.commit()
+    conn.close()
+
+    oco = [t for t in trades if t['pattern'] == 'OCO']
+    pnl = np.array([t['pnl'] for t in oco])
+    stats = agg.get('pattern', 'OCO')
+    assert stats['n'] == len(oco)
+    assert stats['wins'] == int((pnl > 0).sum())
+    assert abs(stats['avg_pnl'] - pnl.mean()) < 1e-9
+    assert abs(stats['std_pnl'] - pnl.std()) < 1e-9
+    assert stats['recent_n'] == WINDOW_SIZE
+    assert abs(stats['recent_avg_pnl'] - pnl[-WINDOW_SIZE:].mean()) < 1e-9
+    assert agg.get('all')['n'] == 300
+
+    X = np.column_stack([[t['features'] for t in oco], np.ones(len(oco))])
+    y = np.array([t['score'] for t in oco])
+    assert np.allclose(agg.regression('pattern', 'OCO'), np.linalg.lstsq(X, y, rcond=None)[0])
+
+
+def test_period_sums_hour_buckets():
+    agg = _aggregates()
+    now = int(time.time())
+    trades = _trades(100, now)                   # Um trade a cada 10 min (~16h)
+    conn = sqlite3.connect(agg.db_path)
+    agg.record(conn, trades, scope='realtime')
+    conn.commit()
+    conn.close()
+
+    cutoff = (now - 6 * 3600) // 3600 * 3600
+    recentes = [t for t in trades if t['ts'] >= cutoff]
+    stats = agg.period(6, scope='realtime')
+    assert stats['n'] == len(recentes)
+    assert abs(stats['total_pnl'] - sum(t['pnl'] for t in recentes)) < 1e-9
+    assert agg.period(6)['n'] == 0               # Escopos separados
+
+
+def test_rereading_window_counts_each_trade_once():
+    """O coletor relê as últimas 24h a cada 30 min: só trade_id novo entra nos agregados"""
+    agg = _aggregates()
+    now = int(time.time())
+    trades = [dict(t, trade_id=f"order{i}:{t['ts'] * 1000}") for i, t in enumerate(_trades(60, now))]
+    conn = sqlite3.connect(agg.db_path)
+    for start in (0, 10, 20, 30, 40):                       # Janelas sobrepostas, como os ciclos do coletor
+        lote = trades[start:start + 20] + trades[start:start + 1]     # Inclui repetição no mesmo lote
+        novos = agg.claim_new(conn, [(t['trade_id'], t['ts']) for t in lote])
+        agg.record(conn, [t for t in trades if t['trade_id'] in novos], scope='realtime')
+        conn.commit()
+    conn.close()
+
+    assert agg.get('all', scope='realtime')['n'] == 60
+    assert abs(agg.get('all', scope='realtime')['total_pnl'] - sum(t['pnl'] for t in trades)) < 1e-9
+    conn = sqlite3.connect(agg.db_path)
+    assert agg.claim_new(conn, [(trades[0]['trade_id'], trades[0]['ts'])]) == set()
+    assert agg.claim_new(conn, [(trades[0]['trade_id'], trades[0]['ts'])], scope='outro') == {trades[0]['trade_id']}
+    conn.close()
+
+
+def test_prune_hour_buckets_and_seen_ids():
+    agg = _aggregates()
+    now = int(time.time())
+    trades = _trades(100, now)                              # ~16h de trades
+    conn = sqlite3.connect(agg.db_path)
+    agg.record(conn, trades, scope='realtime')
+    agg.claim_new(conn, [(f'id{i}', t['ts']) for i, t in enumerate(trades)])
+    conn.commit()
+
+    cutoff = now - 8 * 3600
+    deleted = prune_aggregates(conn, cutoff)
+    conn.commit()
+    hours = [int(r[0]) for r in conn.execute(
+        "SELECT key FROM performance_aggregates WHERE dimension = 'hour'")]
+    seen = conn.execute('SELECT COUNT(*) FROM aggregate_seen').fetchone()[0]
+    conn.close()
+    assert hours and min(hours) == int(hour_key(cutoff))
+    assert seen == sum(1 for t in trades if t['ts'] >= cutoff)
+    assert deleted == len({hour_key(t['ts']) for t in trades if int(hour_key(t['ts'])) < int(hour_key(cutoff))}) + \
+        sum(1 for t in trades if t['ts'] < cutoff)
+    assert agg.get('all', scope='realtime')['n'] == 100     # Totais por dimensão ficam
+    assert agg.period(6, scope='realtime')['n'] == sum(1 for t in trades if t['ts'] >= (now - 6 * 3600) // 3600 * 3600)
+
+    assert prune_aggregates(sqlite3.connect(os.path.join(tempfile.mkdtemp(), 'vazio.db')), now) == 0
+
+
+def main():
+    print("🧪 TESTE: Agregados incrementais de performance")
+    print("=" * 60)
+    tests = [test_incremental_matches_batch_stats, test_period_sums_hour_buckets,
+             test_rereading_window_counts_each_trade_once, test_prune_hour_buckets_and_seen_ids]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
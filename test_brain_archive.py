@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Teste do arquivo frio mensal (brain_archive)
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import brain_archive
+from brain_archive import BrainArchive, _month_key
+from data_compactor import DataCompactor
+
+rng = np.random.default_rng(13)
+NOW = int(time.time())
+
+
+def _setup(n=400):
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, 'brain.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE raw_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT,
+                    timestamp_detection INTEGER, created_at INTEGER, pattern_detected TEXT, ai_verdict TEXT,
+                    ai_confidence REAL, ohlcv_json TEXT)''')
+    conn.execute('''CREATE TABLE trade_performance (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT,
+                    actual_pnl REAL, created_at INTEGER)''')
+    for i in range(n):
+        ts = NOW - int(rng.uniform(0, 200) * 86400)
+        conn.execute('INSERT INTO raw_samples (symbol, timestamp_detection, created_at, pattern_detected, '
+                     'ai_verdict, ai_confidence, ohlcv_json) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     ('BTC/USDT', ts, ts if i % 4 else None, 'OCO', ['VALID', 'INVALID'][i % 2],
+                      None if i % 7 == 0 else float(rng.uniform()), f'[[{ts}, 1.0, "ç"]]'))
+        conn.execute('INSERT INTO trade_performance (symbol, actual_pnl, created_at) VALUES (?, ?, ?)',
+                     ('BTC/USDT', float(rng.normal()), ts))
+    conn.commit()
+    conn.close()
+    return path, os.path.join(tmp, 'archive')
+
+
+def _rows(path, table, where='1'):
+    conn = sqlite3.connect(path)
+    rows = conn.execute(f'SELECT * FROM {table} WHERE {where} ORDER BY id').fetchall()
+    conn.close()
+    return rows
+
+
+def test_export_roundtrip_and_prune():
+    brain_archive.SEGMENT_ROWS = 40
+    path, root = _setup()
+    cutoff = NOW - 90 * 86400
+    start = NOW - 150 * 86400
+    expected = _rows(path, 'raw_samples', f'COALESCE(created_at, timestamp_detection) < {cutoff}')
+    expected_trades = _rows(path, 'trade_performance', f'created_at >= {start} AND created_at < {cutoff}')
+
+    archive = BrainArchive(root, path)
+    report = archive.run(now=NOW)
+    valid = [r for r in expected if r[5] == 'VALID']
+    assert valid and report['raw_samples']['exported'] == len(expected)
+    assert report['raw_samples']['pruned'] == len(expected) - len(valid)
+    # VALID (dataset de treino) continua no banco quente, onde get_training_data lê
+    assert _rows(path, 'raw_samples', f'COALESCE(created_at, timestamp_detection) < {cutoff}') == valid
+    assert archive.run(now=NOW)['raw_samples'] == {'exported': 0, 'pruned': 0}
+
+    reopened = BrainArchive(root, path)                 # Só o manifest no disco
+    df = reopened.read('raw_samples').sort_values('id')
+    got = [tuple(None if v is None or (isinstance(v, float) and np.isnan(v)) else v for v in r)
+           for r in df.itertuples(index=False)]
+    assert got == expected
+    for seg in reopened.segments('raw_samples'):
+        assert seg['rows'] <= 40
+        assert _month_key(seg['min_ts']) == _month_key(seg['max_ts']) == seg['month']
+
+    part = reopened.read('trade_performance', start=start, columns=['actual_pnl', 'created_at'])
+    assert list(part.columns) == ['actual_pnl', 'created_at']
+    assert (part['created_at'] >= start).all()
+    assert sorted(part['actual_pnl']) == sorted(r[2] for r in expected_trades)
+
+
+def test_compactor_only_deletes_archived_rows():
+    path, root = _setup()
+    archive = BrainArchive(root, path)
+    old = _rows(path, 'raw_samples', f"COALESCE(created_at, timestamp_detection) < {NOW - 30 * 86400} "
+                                     f"AND ai_verdict != 'VALID'")
+    stats = DataCompactor(path, pause_seconds=0, archive=archive).run()
+    assert stats['rows'] == len(old)
+    archived_ids = set(archive.read('raw_samples', columns=['id'])['id'])
+    assert {r[0] for r in old} <= archived_ids
+
+
+def main():
+    print("🧪 TESTE: Arquivo frio mensal")
+    print("=" * 60)
+    tests = [test_export_roundtrip_and_prune, test_compactor_only_deletes_archived_rows]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
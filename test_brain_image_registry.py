@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Teste do registro de imagens (brain_image_registry)
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from brain_image_registry import ImageRegistry
+
+
+def _registry(max_bytes=10 ** 9):
+    tmp = tempfile.mkdtemp()
+    images = os.path.join(tmp, 'brain_images')
+    os.makedirs(images)
+    return ImageRegistry(os.path.join(tmp, 'brain.db'), images_dir=images, max_bytes=max_bytes), images
+
+
+def _png(images, name, size=1000):
+    path = os.path.join(images, name)
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return path
+
+
+def test_expire_keeps_referenced_and_recent():
+    registry, images = _registry()
+    now = time.time()
+    old_watch = _png(images, 'watchlist_BTCUSDT_1.png')
+    new_watch = _png(images, 'watchlist_BTCUSDT_2.png')
+    old_valid = _png(images, '7_BTCUSDT_OCO.png')
+    registry.register(old_watch, kind='watchlist', created_at=now - 7200)
+    registry.register(new_watch, kind='watchlist', created_at=now)
+    registry.register(old_valid, kind='sample', sample_id=7, created_at=now - 30 * 86400)
+    registry.set_reference(7, 'raw_samples')
+
+    assert registry.cleanup(now=now) == 1
+    assert not os.path.exists(old_watch)
+    assert os.path.exists(new_watch) and os.path.exists(old_valid)
+    assert registry.stats()['files'] == 2
+    assert registry.stats()['bytes'] == 2000
+
+
+def test_budget_evicts_oldest_unreferenced_first():
+    registry, images = _registry(max_bytes=5000)
+    now = time.time()
+    for i in range(8):
+        registry.register(_png(images, f'{i}_ETHUSDT_OCO.png'), kind='sample', sample_id=i, created_at=now - 100 + i)
+    registry.set_reference(0, 'raw_samples')           # Mais antiga, mas referenciada
+
+    registry.enforce_budget()
+    left = sorted(os.listdir(images))
+    assert registry.stats()['bytes'] <= 5000 * 0.9
+    assert '0_ETHUSDT_OCO.png' in left
+    assert left == ['0_ETHUSDT_OCO.png', '5_ETHUSDT_OCO.png', '6_ETHUSDT_OCO.png', '7_ETHUSDT_OCO.png']
+
+
+def test_backfill_registers_existing_files_once():
+    registry, images = _registry()
+    _png(images, '3_BTCUSDT_OCO.png')
+    _png(images, 'postval_BTCUSDT_1.png')
+    assert registry.backfill() == 2
+    assert registry.backfill() == 0
+    assert registry.stats()['files'] == 2
+
+
+def test_backfill_once_even_if_validators_registered_first():
+    registry, images = _registry()
+    legado = _png(images, '3_BTCUSDT_OCO.png')                  # De antes do registro
+    registry.register(_png(images, 'watchlist_BTCUSDT_9.png'), kind='watchlist')   # Validador já rodou
+    assert registry.stats()['files'] == 1
+
+    assert registry.backfill_once() == 1
+    assert registry.stats()['files'] == 2 and registry.stats()['bytes'] == 2000
+    _png(images, '4_BTCUSDT_OCO.png')                           # Não registrado, mas backfill já feito
+    assert registry.backfill_once() == 0
+    assert os.path.exists(legado)
+
+
+def main():
+    print("🧪 TESTE: Registro de imagens")
+    print("=" * 60)
+    tests = [test_expire_keeps_referenced_and_recent, test_budget_evicts_oldest_unreferenced_first,
+             test_backfill_registers_existing_files_once, test_backfill_once_even_if_validators_registered_first]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
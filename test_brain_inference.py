@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Teste do BrainInferenceService (política gulosa x QLearningBrain/BrainTrainer)
+"""
+
+import sys
+import os
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from brain_trainer import QLearningBrain, BrainTrainer
+from brain_inference import BrainInferenceService, UNKNOWN_STATE_DECISION
+from brain_integration import BrainIntegration
+
+CONTEXT = {'scenario_number': 3, 'btc_trend': 'LONG', 'btcd_trend': 'SHORT', 'btcd_source': 'teste'}
+PATTERNS = [('OCO', 'SHORT'), ('OCO_INVERTIDO', 'LONG'), ('TOPO_DUPLO', 'SHORT'), ('FUNDO_DUPLO', 'LONG')]
+
+
+def _brain(seed=7):
+    """Q-table populada (inclui empate e estado só com zeros); epsilon=0 para o get_action ser guloso"""
+    rng = random.Random(seed)
+    brain = QLearningBrain(epsilon=0.0, load=False)
+    for pattern, direction in PATTERNS:
+        for timeframe in ('15m', '1h'):
+            for context in (CONTEXT, None):
+                state = _trainer(None).extract_state_features(
+                    {'pattern': pattern, 'timeframe': timeframe, 'direction': direction}, context)
+                brain.q_table[brain._state_to_key(state)] = {
+                    a: round(rng.uniform(-1, 1), 3) for a in brain._get_actions()}
+    state = {'pattern': 'OCO', 'timeframe': '4h', 'direction': 'SHORT', 'ai_confidence': 0}
+    brain.q_table[brain._state_to_key(state)] = {a: 0.0 for a in brain._get_actions()}
+    return brain
+
+
+def _trainer(brain):
+    trainer = BrainTrainer.__new__(BrainTrainer)   # Sem DB/simulador: só features + predict
+    trainer.brain = brain
+    return trainer
+
+
+def _items():
+    items = []
+    for pattern, direction in PATTERNS:
+        for timeframe in ('15m', '1h', '4h', '1d'):      # 1d nunca visto
+            # Metade no formato da watchlist (padrao/direcao), metade no do trainer
+            items.append({'symbol': f'{pattern}/USDT', 'timeframe': timeframe, 'padrao': pattern, 'direcao': direction})
+            items.append({'symbol': f'{pattern}/USDT', 'timeframe': timeframe, 'pattern': pattern, 'direction': direction})
+    return items
+
+
+def _state(item, context):
+    sample = {'pattern': item.get('pattern') or item.get('padrao'), 'timeframe': item['timeframe'],
+              'direction': item.get('direction') or item.get('direcao')}
+    return _trainer(None).extract_state_features(sample, context)
+
+
+def test_decide_matches_get_action_and_predict():
+    for context in (CONTEXT, None):
+        brain = _brain()
+        service = BrainInferenceService(brain)
+        service.set_context(context)
+        trainer = _trainer(_brain())     # Cópia: o predict insere estados novos na Q-table
+
+        for item in _items():
+            state = _state(item, context)
+            fast = service.decide(item)
+            action, confidence = trainer.predict(state)
+            assert fast['brain_advice'] == action == brain.get_action(state), (item, context)
+            assert abs(fast['confidence'] - confidence) < 1e-12, (item, context)
+
+        # Estado nunca visto: mesmo resultado do predict numa Q-table vazia para ele
+        unseen = {'symbol': 'X/USDT', 'timeframe': '1d', 'padrao': 'OCO', 'direcao': 'SHORT'}
+        assert (service.decide(unseen)['brain_advice'], service.decide(unseen)['confidence']) == UNKNOWN_STATE_DECISION
+
+
+def test_decide_batch_equals_decide():
+    service = BrainInferenceService(_brain())
+    service.set_context(CONTEXT)
+    items = _items()
+    batch = service.decide_batch(items)
+    assert batch == [service.decide(item) for item in items]
+
+    for item, result in zip(items, batch):
+        direction = item.get('direction') or item.get('direcao')
+        expected = 'ENTER' if result['brain_advice'] == f'ENTER_{direction}' else 'SKIP'
+        assert result['decision'] == expected and result['symbol'] == item['symbol']
+
+
+def test_policy_follows_model_reload():
+    brain = _brain()
+    service = BrainInferenceService(brain)
+    item = {'symbol': 'A/USDT', 'timeframe': '4h', 'padrao': 'OCO', 'direcao': 'SHORT'}
+    assert service.decide(item)['confidence'] == 0.5          # Empate: confiança neutra
+
+    key = brain._state_to_key(_state(item, None))
+    brain.q_table[key] = {'ENTER_LONG': 0.1, 'ENTER_SHORT': 0.9, 'SKIP': -0.4}
+    assert service.decide(item)['brain_advice'] == 'ENTER_LONG'  # Política compilada não muda sozinha
+    service.compile_policy(brain)
+    decision = service.decide(item)
+    assert decision['brain_advice'] == 'ENTER_SHORT' and decision['decision'] == 'ENTER'
+    assert decision['confidence'] == 1.0
+
+
+def test_load_for_inference_is_read_only():
+    cwd, tmp = os.getcwd(), tempfile.mkdtemp()
+    originals = (QLearningBrain.save_model, BrainTrainer.train_offline)
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("caminho de inferência não pode treinar nem salvar")
+
+    os.chdir(tmp)                                              # MODEL_PATH é relativo
+    try:
+        assert BrainIntegration(trainer=False).load_for_inference() is False    # Sem modelo salvo
+        expected = _brain()
+        expected.save_model()
+        model = os.path.join('brain_models', 'q_learning_model.pkl')
+        with open(model, 'rb') as f:
+            saved = f.read()
+        mtime = os.path.getmtime(model)
+
+        QLearningBrain.save_model = BrainTrainer.train_offline = forbidden
+        integration = BrainIntegration(trainer=False)
+        assert integration.load_for_inference() is True
+        assert integration.brain_trainer is None and integration.exchange is None
+        assert integration.inference.policy == BrainInferenceService(expected).policy
+        item = {'symbol': 'A/USDT', 'timeframe': '1h', 'padrao': 'OCO', 'direcao': 'SHORT'}
+        assert integration.should_enter_trade_fast(item) == integration.inference.decide(item)
+        assert integration.refresh_inference_context() is None       # Sem exchange: nada a recalcular
+
+        with open(model, 'rb') as f:
+            assert f.read() == saved
+        assert os.path.getmtime(model) == mtime
+    finally:
+        QLearningBrain.save_model, BrainTrainer.train_offline = originals
+        os.chdir(cwd)
+
+
+def test_latency_stats_percentiles():
+    service = BrainInferenceService(_brain(), latency_window=100)
+    assert service.latency_stats() == {'count': 0, 'p50_us': 0.0, 'p99_us': 0.0, 'max_us': 0.0}
+
+    service.decide_batch(_items() * 10)       # 320 decisões, janela de 100
+    stats = service.latency_stats()
+    assert stats['count'] == 100
+    assert 0 < stats['p50_us'] <= stats['p99_us'] <= stats['max_us']
+
+    service._latencies_us.clear()
+    service._latencies_us.extend(float(i) for i in range(1, 101))
+    assert service.latency_stats() == {'count': 100, 'p50_us': 51.0, 'p99_us': 99.0, 'max_us': 100.0}
+
+
+def main():
+    print("🧪 TESTE: Brain inference (caminho rápido)")
+    print("=" * 60)
+    tests = [test_decide_matches_get_action_and_predict, test_decide_batch_equals_decide,
+             test_policy_follows_model_reload, test_load_for_inference_is_read_only, test_latency_stats_percentiles]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Teste do aprendizado online por trade (brain_online_learning)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from brain_online_learning import OnlineLearner, rls_update, ew_alpha
+
+rng = np.random.default_rng(5)
+
+
+def _trade(pattern, pnl, score, feats):
+    return {'pattern': pattern, 'pnl': pnl, 'score': score, 'features': feats}
+
+
+def test_rls_without_forgetting_matches_lstsq():
+    X = np.column_stack([rng.uniform(0.5, 1, 200), rng.uniform(0.5, 1, 200), rng.uniform(0, 24, 200),
+                         np.ones(200)])
+    y = X @ np.array([0.4, 0.2, -0.01, 0.1]) + rng.normal(0, 0.05, 200)
+    theta, P = np.zeros(4), np.eye(4) * 1e5
+    for x, target in zip(X, y):
+        theta, P = rls_update(theta, P, x, target, lam=1.0)
+    assert np.allclose(theta, np.linalg.lstsq(X, y, rcond=None)[0], atol=1e-4)
+
+
+def test_update_publishes_versions_and_ew_stats():
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    learner = OnlineLearner(path, half_life=10, min_samples=5)
+    conn = sqlite3.connect(path)
+    versions = []
+    for i in range(20):
+        win = i >= 10                              # Regime muda: perdas e depois ganhos
+        versions.append(learner.update(conn, [_trade('OCO', 1.0 if win else -1.0, 0.8 if win else 0.2,
+                                                     [0.7, 0.6, 2.0])]))
+        conn.commit()
+    conn.close()
+
+    assert versions == list(range(1, 21))
+    assert learner.latest_version() == 20
+    version, weights, model = learner.load()
+    assert version == 20
+    a = ew_alpha(10)
+    expected_win = 0.0                             # Média simples até 1/α trades, depois EW
+    for n in range(1, 21):
+        expected_win += max(a, 1.0 / n) * ((1.0 if n > 10 else 0.0) - expected_win)
+    assert abs(weights['OCO']['success_rate'] - expected_win) < 1e-9
+    assert weights['OCO']['samples_count'] == 20
+    assert set(model['OCO']) == {'ai_coeff', 'tech_coeff', 'duration_coeff', 'bias', 'samples'}
+
+
+def test_min_samples_hides_young_patterns():
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    learner = OnlineLearner(path, min_samples=10)
+    conn = sqlite3.connect(path)
+    learner.update(conn, [_trade('TOPO_DUPLO', 1.0, 0.9, [0.8, 0.7, 1.0])] * 3)
+    conn.commit()
+    conn.close()
+    version, weights, _ = learner.load()
+    assert version == 1
+    assert weights == {}
+
+
+def main():
+    print("🧪 TESTE: Aprendizado online")
+    print("=" * 60)
+    tests = [test_rls_without_forgetting_matches_lstsq, test_update_publishes_versions_and_ew_stats,
+             test_min_samples_hides_young_patterns]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Teste do Brain Simulator (replay histórico com regras do executor)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from brain_simulator import (
+    TradeSimulator, OUTCOME_TARGET, OUTCOME_STOP, OUTCOME_BREAKEVEN,
+    OUTCOME_INVALIDATED, OUTCOME_NO_TRIGGER
+)
+
+TF_MS = 15 * 60 * 1000
+
+
+def _candles(prices, start_ts=0):
+    """(high, low, close) -> candles ccxt [ts, open, high, low, close, volume]"""
+    return [[start_ts + i * TF_MS, c, h, l, c, 1000.0] for i, (h, l, c) in enumerate(prices)]
+
+
+def _simulate(direction, future, neckline, target, stop_loss):
+    history = _candles([(100.5, 99.5, 100.0)] * 30)
+    sim = TradeSimulator(db_path=':memory:')
+    sim.set_history('TEST/USDT', '15m', history + _candles(future, start_ts=len(history) * TF_MS))
+    sample = {
+        'symbol': 'TEST/USDT', 'timeframe': '15m', 'direction': direction,
+        'ohlcv': history, 'neckline': neckline, 'target': target, 'stop_loss': stop_loss
+    }
+    assert sim.simulate_samples([sample]) == [sample]
+    return sample
+
+
+def test_long_hits_target():
+    sample = _simulate('LONG', [(101.2, 100.2, 101.0), (103.0, 101.0, 102.5), (106.0, 102.0, 105.5)],
+                       neckline=101.0, target=105.0, stop_loss=98.0)
+    sim = sample['simulation']
+    assert sim['outcome'] == OUTCOME_TARGET
+    assert abs(sim['profit_pct'] - (105.0 - 101.0) / 101.0 * 100) < 1e-9
+    assert sim['duration_hours'] == 0.5
+
+
+def test_long_break_even():
+    # Passa de 50% do alvo (103) e volta: sai no BE (101 * 1.002)
+    sample = _simulate('LONG', [(101.2, 100.2, 101.0), (103.5, 101.5, 103.0), (103.0, 100.0, 100.5)],
+                       neckline=101.0, target=105.0, stop_loss=98.0)
+    sim = sample['simulation']
+    assert sim['outcome'] == OUTCOME_BREAKEVEN
+    assert abs(sim['profit_pct'] - 0.2) < 1e-9
+
+
+def test_short_stop_and_ambiguous_candle():
+    # Candle que toca stop e alvo ao mesmo tempo: stop vence
+    sample = _simulate('SHORT', [(100.0, 98.8, 99.0), (103.0, 94.0, 99.0)],
+                       neckline=99.0, target=95.0, stop_loss=102.0)
+    sim = sample['simulation']
+    assert sim['outcome'] == OUTCOME_STOP
+    assert abs(sim['profit_pct'] - (99.0 - 102.0) / 99.0 * 100) < 1e-9
+
+
+def test_invalidated_and_no_trigger():
+    invalid = _simulate('SHORT', [(102.5, 100.0, 101.0), (100.0, 98.0, 98.5)],
+                        neckline=99.0, target=95.0, stop_loss=102.0)
+    assert invalid['simulation']['outcome'] == OUTCOME_INVALIDATED
+    assert TradeSimulator.result_for_action(invalid, 'ENTER_SHORT')['profit_pct'] == 0
+
+    idle = _simulate('LONG', [(100.5, 99.5, 100.0)] * 5, neckline=101.0, target=105.0, stop_loss=98.0)
+    assert idle['simulation']['outcome'] == OUTCOME_NO_TRIGGER
+
+
+def test_opposite_action_mirrors_pnl():
+    sample = _simulate('LONG', [(101.2, 100.2, 101.0), (106.0, 102.0, 105.5)],
+                       neckline=101.0, target=105.0, stop_loss=98.0)
+    aligned = TradeSimulator.result_for_action(sample, 'ENTER_LONG')
+    opposite = TradeSimulator.result_for_action(sample, 'ENTER_SHORT')
+    assert opposite['profit_pct'] == -aligned['profit_pct']
+    assert TradeSimulator.result_for_action(sample, 'SKIP')['profit_pct'] == 0
+
+
+def test_sample_without_future_is_skipped():
+    sim = TradeSimulator(db_path=':memory:')
+    history = _candles([(100.5, 99.5, 100.0)] * 30)
+    sim.set_history('TEST/USDT', '15m', history)
+    sample = {'symbol': 'TEST/USDT', 'timeframe': '15m', 'direction': 'LONG', 'ohlcv': history,
+              'neckline': 101.0, 'target': 105.0, 'stop_loss': 98.0}
+    assert sim.simulate_samples([sample]) == []
+    assert 'simulation' not in sample
+
+
+def main():
+    print("🧪 TESTE: Brain Simulator")
+    print("=" * 60)
+    tests = [test_long_hits_target, test_long_break_even, test_short_stop_and_ambiguous_candle,
+             test_invalidated_and_no_trigger, test_opposite_action_mirrors_pnl,
+             test_sample_without_future_is_skipped]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Teste do watermark de treinamento + outbox de feedbacks (brain_watermark)
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from brain_watermark import TrainingWatermark, PENDING_GRACE_SECONDS
+
+
+def _db():
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE raw_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT, "
+                 "timestamp_detection INTEGER, status TEXT)")
+    conn.execute("CREATE TABLE trade_performance (id INTEGER PRIMARY KEY AUTOINCREMENT, brain_sample_id INTEGER, "
+                 "actual_pnl REAL)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _insert(path, samples=0, feedbacks=0, status='PROCESSED', age=0):
+    conn = sqlite3.connect(path)
+    for _ in range(samples):
+        conn.execute("INSERT INTO raw_samples (symbol, timestamp_detection, status) VALUES ('BTC/USDT', ?, ?)",
+                     (int(time.time() - age), status))
+    for i in range(feedbacks):
+        conn.execute("INSERT INTO trade_performance (brain_sample_id, actual_pnl) VALUES (?, 1.0)", (i + 1,))
+    conn.commit()
+    conn.close()
+
+
+def _process(path, *ids):
+    conn = sqlite3.connect(path)
+    conn.executemany("UPDATE raw_samples SET status = 'PROCESSED' WHERE id = ?", [(i,) for i in ids])
+    conn.commit()
+    conn.close()
+
+
+def _outbox(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute('SELECT seq FROM feedback_outbox ORDER BY seq')]
+    finally:
+        conn.close()
+
+
+def test_pending_counts_only_delta():
+    path = _db()
+    wm = TrainingWatermark(path)
+    _insert(path, samples=5, feedbacks=3)
+    _insert(path, samples=2, status='PENDING')     # Não processadas não contam
+
+    pending = wm.pending()
+    assert pending['samples'] == 5
+    assert pending['feedbacks'] == 3               # Trigger alimenta o outbox
+    assert [row[2] for row in wm.delta_feedback(pending['feedback_hi'])] == [1, 2, 3]
+
+    wm.advance(pending['sample_hi'], pending['feedback_hi'])
+    assert wm.pending()['samples'] == 0
+    assert wm.pending()['feedbacks'] == 0
+
+    _insert(path, samples=1, feedbacks=2)
+    pending = wm.pending()
+    assert pending['samples'] == 0                 # #8 espera as PENDING #6/#7
+    assert pending['sample_hi'] == 5
+    assert pending['feedbacks'] == 2
+    assert len(wm.delta_feedback(pending['feedback_hi'])) == 2
+
+    _process(path, 6, 7)
+    assert wm.pending()['samples'] == 3 and wm.pending()['sample_hi'] == 8
+
+
+def test_out_of_order_processing_is_not_skipped():
+    path = _db()
+    wm = TrainingWatermark(path)
+    _insert(path, samples=3, status='PENDING')     # #1..#3
+    _process(path, 3)                              # Vision AI respondeu a #3 antes de #1/#2
+    pending = wm.pending()
+    assert pending['samples'] == 0 and pending['sample_hi'] == 0
+    wm.advance(pending['sample_hi'], pending['feedback_hi'])
+
+    _process(path, 1)
+    pending = wm.pending()
+    assert pending['samples'] == 1 and pending['sample_hi'] == 1
+    wm.advance(pending['sample_hi'], pending['feedback_hi'])
+
+    _process(path, 2)
+    pending = wm.pending()
+    assert pending['samples'] == 2 and pending['sample_hi'] == 3     # #2 e #3: nada ficou para trás
+    wm.advance(pending['sample_hi'], pending['feedback_hi'])
+    assert wm.pending()['samples'] == 0
+
+
+def test_stuck_pending_does_not_freeze_trigger():
+    path = _db()
+    wm = TrainingWatermark(path)
+    _insert(path, samples=1, status='PENDING', age=PENDING_GRACE_SECONDS + 60)   # #1: Vision AI nunca respondeu
+    _insert(path, samples=3)                                                     # #2..#4
+    _insert(path, samples=1, status='PENDING')                                   # #5: recente, ainda espera
+
+    pending = wm.pending()
+    assert pending['samples'] == 3 and pending['sample_hi'] == 4 and pending['stalled'] == 1
+    wm.advance(pending['sample_hi'], pending['feedback_hi'])
+    assert wm.pending()['stalled'] == 0                  # Já ficou para trás do watermark
+
+    _insert(path, samples=2)                             # #6, #7 esperam a #5
+    assert wm.pending()['samples'] == 0 and wm.pending()['sample_hi'] == 4
+    _process(path, 5)
+    pending = wm.pending()
+    assert pending['samples'] == 3 and pending['sample_hi'] == 7
+
+    # Folga menor: a mesma PENDING recente já não segura o topo
+    other = TrainingWatermark(path, name='curto', pending_grace=0)
+    _insert(path, samples=1, status='PENDING', age=5)    # #8
+    _insert(path, samples=1)                             # #9
+    assert other.pending()['sample_hi'] == 9 and other.pending()['stalled'] == 2   # #1 e #8
+    assert wm.pending()['sample_hi'] == 7
+
+
+def test_advance_purges_consumed_outbox():
+    path = _db()
+    wm = TrainingWatermark(path)
+    other = TrainingWatermark(path, name='outro')
+    _insert(path, feedbacks=5)
+    pending = wm.pending()
+    wm.advance(pending['sample_hi'], 3)
+    assert _outbox(path) == [1, 2, 3, 4, 5]         # 'outro' ainda não consumiu nada
+    other.advance(0, 4)
+    assert _outbox(path) == [4, 5]
+    wm.advance(pending['sample_hi'], 5)
+    assert _outbox(path) == [5]
+
+    _insert(path, feedbacks=2)
+    assert other.pending()['feedbacks'] == 3         # seq continua crescendo após o purge
+    assert [row[0] for row in other.delta_feedback(other.pending()['feedback_hi'])] == [5, 6, 7]
+
+
+def test_online_mode_consumes_outbox():
+    from brain_continuous_learning import ContinuousLearningEngine
+
+    path = _db()
+    engine = ContinuousLearningEngine(path, models_dir=os.path.join(os.path.dirname(path), 'models'))
+    _insert(path, samples=2, feedbacks=4)
+    assert engine.check_training_trigger() is False
+    pending = engine.watermark.pending()
+    assert pending['feedbacks'] == 0 and _outbox(path) == []
+    assert pending['samples'] == 2 and pending['last_sample_id'] == 0   # Amostras seguem para o lote
+
+
+def test_advance_never_goes_back():
+    path = _db()
+    wm = TrainingWatermark(path)
+    _insert(path, samples=4, feedbacks=4)
+    pending = wm.pending()
+    wm.advance(pending['sample_hi'], pending['feedback_hi'])
+    wm.advance(1, 1)
+    assert wm.pending()['last_sample_id'] == pending['sample_hi']
+    assert wm.pending()['last_feedback_seq'] == pending['feedback_hi']
+
+
+def main():
+    print("🧪 TESTE: Watermark de treinamento")
+    print("=" * 60)
+    tests = [test_pending_counts_only_delta, test_out_of_order_processing_is_not_skipped,
+             test_stuck_pending_does_not_freeze_trigger, test_advance_purges_consumed_outbox, test_online_mode_consumes_outbox, test_advance_never_goes_back]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
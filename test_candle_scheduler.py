@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Teste do agendador de fechamento de candles (candle_scheduler) com relógio falso
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import candle_scheduler
+from candle_scheduler import (CandleCloseScheduler, ExchangeClock, next_close_ms, last_close_ms,
+                              timeframe_seconds, GRACE_SECONDS)
+
+S = 1000
+M15 = 15 * 60 * S
+H1 = 4 * M15
+T = 1000 * H1                    # Início de hora (múltiplo de todos os timeframes até 1h)
+
+
+class FakeClock:
+    def __init__(self, now_ms):
+        self.now = now_ms
+
+    def now_ms(self):
+        return self.now
+
+
+class FakeTime:
+    """Substitui o módulo time dentro do candle_scheduler (segundos)"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class FakeExchange:
+    """fetch_time() com relógio adiantado `offset_ms` e viagem de ida e volta `rtt` s"""
+
+    def __init__(self, clock, offset_ms, rtt=0.2):
+        self.clock, self.offset_ms, self.rtt = clock, offset_ms, rtt
+        self.calls = 0
+        self.fail = False
+
+    def fetch_time(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("exchange fora")
+        self.clock.now += self.rtt / 2
+        server = int(self.clock.now * 1000) + self.offset_ms
+        self.clock.now += self.rtt / 2
+        return server
+
+
+def _with_time(test):
+    def run():
+        real, fake = candle_scheduler.time, FakeTime(T / 1000 + 7 * 60)
+        candle_scheduler.time = fake
+        try:
+            test(fake)
+        finally:
+            candle_scheduler.time = real
+    run.__name__ = test.__name__
+    return run
+
+
+def test_close_boundaries():
+    assert timeframe_seconds('15m') == 900 and timeframe_seconds('1h') == 3600
+    assert next_close_ms(T, '15m') == T + M15                # Exatamente no fechamento: próximo é o seguinte
+    assert last_close_ms(T, '15m') == T
+    assert next_close_ms(T - 1, '15m') == T and last_close_ms(T - 1, '15m') == T - M15
+    assert next_close_ms(T + 7 * 60 * S, '1h') == T + H1
+    assert last_close_ms(T + H1 - 1, '1h') == T and last_close_ms(T + H1, '1h') == T + H1
+    try:
+        CandleCloseScheduler(clock=FakeClock(T)).register('X', '7m')
+        assert False, "timeframe inválido deveria falhar"
+    except ValueError:
+        pass
+
+
+def test_grace_period_and_single_delivery():
+    clock = FakeClock(T + 7 * 60 * S)                        # 10:07 de um candle de 15m
+    sched = CandleCloseScheduler(clock=clock)
+    sched.register('ETH/USDT', '15m')
+    sched.register('BTC/USDT', '15m')
+    assert sched.due() == {}
+    assert sched.seconds_until_next_close() == 8 * 60 + GRACE_SECONDS
+    assert sched.seconds_until_next_close(max_wait=30) == 30
+
+    clock.now = T + M15 + GRACE_SECONDS * S - 1              # Fechou, mas ainda na folga
+    assert sched.due() == {}
+    assert abs(sched.seconds_until_next_close() - 0.001) < 1e-9
+    clock.now = T + M15 + GRACE_SECONDS * S
+    assert sched.due() == {'15m': (T + M15, ['ETH/USDT', 'BTC/USDT'])}
+    assert sched.due() == {}                                  # Cada fechamento uma vez só
+    assert sched.seconds_until_next_close() == 15 * 60
+
+    # Registro dentro da folga de um fechamento: ainda recebe aquele fechamento
+    late = CandleCloseScheduler(clock=FakeClock(T + M15 + 1 * S))
+    late.register('SOL/USDT', '15m')
+    late.clock.now = T + M15 + GRACE_SECONDS * S
+    assert late.due() == {'15m': (T + M15, ['SOL/USDT'])}
+
+    # Dormiu várias barras: entrega só o último fechamento
+    clock.now = T + 4 * M15 + 10 * S
+    assert sched.due() == {'15m': (T + 4 * M15, ['ETH/USDT', 'BTC/USDT'])}
+
+
+def test_multiple_timeframes_and_unregister():
+    clock = FakeClock(T + 50 * 60 * S)
+    sched = CandleCloseScheduler(clock=clock, grace_seconds=0)
+    sched.register('A', '15m')
+    sched.register('B', '1h')
+    assert sched.seconds_until_next_close() == 10 * 60       # 11:00 fecha os dois
+
+    clock.now = T + H1
+    assert sched.due() == {'15m': (T + H1, ['A']), '1h': (T + H1, ['B'])}
+    sched.unregister('A')
+    clock.now = T + H1 + M15
+    assert sched.due() == {}
+    assert sched.seconds_until_next_close() == 45 * 60
+    sched.unregister('B')
+    assert sched.seconds_until_next_close() == 60.0 and sched.seconds_until_next_close(max_wait=5) == 5
+
+
+@_with_time
+def test_exchange_clock_offset_and_resync(fake):
+    exchange = FakeExchange(fake, offset_ms=3000)            # Exchange 3s à frente
+    clock = ExchangeClock(exchange, resync_seconds=3600)
+    start = fake.now
+    assert clock.now_ms() == int(fake.now * 1000) + 3000     # Meio da ida e volta: offset exato
+    assert exchange.calls == 1 and fake.now == start + 0.2
+
+    fake.now += 3599
+    clock.now_ms()
+    assert exchange.calls == 1
+    exchange.offset_ms = -1500
+    fake.now += 2
+    assert clock.now_ms() == int(fake.now * 1000) - 1500
+    assert exchange.calls == 2
+
+    # Falha: mantém o offset anterior e só tenta de novo após resync_seconds
+    exchange.fail = True
+    fake.now += 3601
+    assert clock.now_ms() == int(fake.now * 1000) - 1500
+    fake.now += 10
+    clock.now_ms()
+    assert exchange.calls == 3
+
+    assert ExchangeClock(None).now_ms() == int(fake.now * 1000)
+
+
+@_with_time
+def test_scheduler_uses_exchange_time(fake):
+    # Relógio local 3s atrasado: a barra fecha (na exchange) 3s antes do horário local
+    fake.now = (T + M15) / 1000 - 10
+    sched = CandleCloseScheduler(FakeExchange(fake, offset_ms=3000, rtt=0.0))
+    sched.register('ETH/USDT', '15m')
+    assert abs(sched.seconds_until_next_close() - (10 - 3 + GRACE_SECONDS)) < 1e-9
+    fake.now = (T + M15) / 1000 - 3 + GRACE_SECONDS
+    assert sched.due() == {'15m': (T + M15, ['ETH/USDT'])}
+
+
+def main():
+    print("🧪 TESTE: Candle scheduler (relógio falso)")
+    print("=" * 60)
+    tests = [test_close_boundaries, test_grace_period_and_single_delivery, test_multiple_timeframes_and_unregister,
+             test_exchange_clock_offset_and_resync, test_scheduler_uses_exchange_time]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
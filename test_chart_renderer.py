@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Teste do chart_renderer (PNG decodificado: cabeçalho, dimensões e pixels dos candles)
+"""
+
+import sys
+import os
+import struct
+import zlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from chart_renderer import render_candles, STYLE, COLORS, MARGIN_X, MARGIN_TOP, MARGIN_BOTTOM, GRID_LINES
+
+W, H = 200, 120
+# Alta 95 -> 105 (pavio 90..108), baixa 104 -> 96 (pavio 92..110), alta 100 -> 101 (pavio 99..102)
+CANDLES = [[0, 95.0, 108.0, 90.0, 105.0, 1.0],
+           [1, 104.0, 110.0, 92.0, 96.0, 1.0],
+           [2, 100.0, 102.0, 99.0, 101.0, 1.0]]
+
+
+def decode_png(png):
+    """Decodificador mínimo (RGB 8 bits, sem entrelaçamento): confere assinatura, CRCs e filtros"""
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    pos, chunks = 8, []
+    while pos < len(png):
+        length, tag = struct.unpack('>I4s', png[pos:pos + 8])
+        data = png[pos + 8:pos + 8 + length]
+        crc, = struct.unpack('>I', png[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(tag + data) & 0xffffffff, tag
+        chunks.append((tag, data))
+        pos += 12 + length
+    assert [t for t, _ in chunks][0] == b'IHDR' and chunks[-1][0] == b'IEND'
+
+    width, height, depth, color, comp, filt, interlace = struct.unpack('>IIBBBBB', chunks[0][1])
+    assert (depth, color, comp, filt, interlace) == (8, 2, 0, 0, 0)
+    raw = np.frombuffer(zlib.decompress(b''.join(d for t, d in chunks if t == b'IDAT')), dtype=np.uint8)
+    raw = raw.reshape(height, width * 3 + 1)
+    assert (raw[:, 0] == 0).all()          # Filtro None em todas as linhas
+    return raw[:, 1:].reshape(height, width, 3)
+
+
+def _y(price, prices):
+    """Mesma escala do renderer: faixa dos preços + 5% de folga, de cima para baixo"""
+    lo, hi = min(prices), max(prices)
+    pad = (hi - lo) * 0.05
+    lo, span = lo - pad, (hi - lo) + 2 * pad
+    plot_h = H - MARGIN_TOP - MARGIN_BOTTOM
+    return int(round(MARGIN_TOP + (1.0 - (price - lo) / span) * (plot_h - 1)))
+
+
+def test_png_header_and_dimensions():
+    png = render_candles(CANDLES, width=W, height=H)
+    pixels = decode_png(png)
+    assert pixels.shape == (H, W, 3)
+    assert tuple(pixels[0, 0]) == STYLE['background'] and tuple(pixels[H - 1, W - 1]) == STYLE['background']
+
+    try:
+        from PIL import Image
+        import io
+        img = Image.open(io.BytesIO(png))
+        assert img.size == (W, H) and img.mode == 'RGB'
+        assert np.array_equal(np.asarray(img), pixels)
+    except ImportError:
+        pass
+
+    path = os.path.join(tempfile.mkdtemp(), 'charts', 'c.png')
+    assert render_candles(CANDLES, width=W, height=H, save_path=path) == png
+    with open(path, 'rb') as f:
+        assert f.read() == png
+
+    try:
+        render_candles([])
+        assert False, "candles vazios deveriam falhar"
+    except ValueError:
+        pass
+
+
+def test_candle_pixels():
+    pixels = decode_png(render_candles(CANDLES, width=W, height=H))
+    prices = [p for c in CANDLES for p in c[2:4]]
+    slot = (W - 2 * MARGIN_X) / len(CANDLES)
+    half_body = max(int(slot * 0.35), 1)
+    up, down, bg = STYLE['up'], STYLE['down'], STYLE['background']
+
+    for i, (_, o, h, l, c, _) in enumerate(CANDLES):
+        x = int(MARGIN_X + (i + 0.5) * slot)
+        color = up if c >= o else down
+        body_top, body_bot = _y(max(o, c), prices), _y(min(o, c), prices)
+        # Corpo cheio de borda a borda, pavio só na coluna central
+        assert tuple(pixels[(body_top + body_bot) // 2, x - half_body]) == color, i
+        assert tuple(pixels[(body_top + body_bot) // 2, x + half_body]) == color, i
+        assert tuple(pixels[_y(h, prices), x]) == color and tuple(pixels[_y(l, prices), x]) == color, i
+        assert tuple(pixels[_y(h, prices) - 1, x]) != color, i
+        assert tuple(pixels[_y(l, prices) + 1, x]) != color, i
+        wick = (_y(h, prices) + body_top) // 2
+        if wick < body_top:
+            assert tuple(pixels[wick, x + 1]) in (bg, STYLE['grid']), i
+        # Fora da coluna do candle nada dessa cor
+        assert tuple(pixels[(body_top + body_bot) // 2, x + half_body + 1]) != color, i
+
+    # Máxima (110) e mínima (90) ficam a 5% das bordas da área útil
+    assert _y(110.0, prices) == MARGIN_TOP + 3 and _y(90.0, prices) == H - MARGIN_BOTTOM - 1 - 3
+
+
+def test_grid_and_hlines():
+    entry = 107.0
+    pixels = decode_png(render_candles(CANDLES, width=W, height=H,
+                                       hlines=[{'price': entry, 'color': 'cyan'},
+                                               {'price': 91.0, 'color': 'orange', 'dashed': False}]))
+    prices = [p for c in CANDLES for p in c[2:4]]
+    y = _y(entry, prices)
+    assert tuple(pixels[y, MARGIN_X]) == COLORS['cyan']
+    assert tuple(pixels[y, MARGIN_X + 8]) != COLORS['cyan']           # Tracejado de 8 px
+    assert tuple(pixels[y, MARGIN_X + 16]) == COLORS['cyan']
+    assert tuple(pixels[y, MARGIN_X - 1]) == STYLE['background']
+
+    solid = pixels[_y(91.0, prices), MARGIN_X:W - MARGIN_X]
+    assert (solid == COLORS['orange']).all()
+
+    plain = decode_png(render_candles(CANDLES, width=W, height=H))
+    grid_y = MARGIN_TOP + (H - MARGIN_TOP - MARGIN_BOTTOM) // GRID_LINES
+    assert tuple(plain[grid_y, MARGIN_X]) == STYLE['grid'] and tuple(plain[grid_y, MARGIN_X - 1]) == STYLE['background']
+
+
+def main():
+    print("🧪 TESTE: Chart renderer (PNG em memória)")
+    print("=" * 60)
+    tests = [test_png_header_and_dimensions, test_candle_pixels, test_grid_and_hlines]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
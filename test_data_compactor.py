@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Teste da compactação incremental (data_compactor)
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from data_compactor import DataCompactor
+from brain_aggregates import PerformanceAggregates
+
+rng = np.random.default_rng(11)
+NOW = int(time.time())
+
+
+def _db(n_old=600, n_recent=50):
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    DataCompactor(path).configure_database()           # Banco novo: INCREMENTAL sem VACUUM
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE raw_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT,
+                    created_at INTEGER, trade_result TEXT, reward REAL, pattern_name TEXT, ai_verdict TEXT,
+                    ohlcv_json TEXT)''')
+    rows = []
+    for i in range(n_old):
+        ts = NOW - int(rng.uniform(31, 40) * 86400)
+        rows.append(('BTC/USDT', ts, str(rng.choice(['WIN', 'LOSS', 'BREAKEVEN'])), float(rng.normal()),
+                     str(rng.choice(['OCO', 'TOPO_DUPLO'])), 'VALID' if i % 10 == 0 else 'INVALID', 'x' * 2000))
+    for _ in range(n_recent):
+        rows.append(('ETH/USDT', NOW - 3600, 'WIN', 1.0, 'OCO', 'INVALID', 'x' * 2000))
+    conn.executemany('INSERT INTO raw_samples (symbol, created_at, trade_result, reward, pattern_name, '
+                     'ai_verdict, ohlcv_json) VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.commit()
+    expected = conn.execute('''
+        SELECT DATE(created_at, 'unixepoch'), COUNT(*), SUM(trade_result = 'WIN'), SUM(trade_result = 'LOSS'),
+               AVG(reward)
+        FROM raw_samples WHERE created_at < ? AND ai_verdict != 'VALID' GROUP BY 1
+    ''', (NOW - 30 * 86400,)).fetchall()
+    conn.close()
+    return path, {r[0]: r[1:] for r in expected}
+
+
+def test_chunks_match_batch_summary():
+    path, expected = _db()
+    compactor = DataCompactor(path, chunk_rows=25, pause_seconds=0)
+    stats = compactor.run(max_seconds=0.05)              # Para no meio...
+    stats_rest = compactor.run()                          # ...e retoma pelo cursor
+    assert stats['rows'] + stats_rest['rows'] == sum(v[0] for v in expected.values())
+
+    conn = sqlite3.connect(path)
+    summary = {r[0]: r[1:] for r in conn.execute(
+        'SELECT date, total_samples, wins, losses, avg_reward FROM learning_summary')}
+    assert set(summary) == set(expected)
+    for day, (total, wins, losses, avg_reward) in expected.items():
+        assert summary[day][:3] == (total, wins, losses)
+        assert abs(summary[day][3] - avg_reward) < 1e-9
+    assert conn.execute("SELECT COUNT(*) FROM raw_samples WHERE ai_verdict = 'VALID'").fetchone()[0] == 60
+    assert conn.execute("SELECT COUNT(*) FROM raw_samples WHERE created_at > ?", (NOW - 86400,)).fetchone()[0] == 50
+    conn.close()
+
+
+def test_incremental_vacuum_returns_pages():
+    path, _ = _db()
+    size_before = os.path.getsize(path)
+    stats = DataCompactor(path, pause_seconds=0).run()
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+    free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    conn.close()
+    assert stats['freed_pages'] > free_pages
+    assert os.path.getsize(path) < size_before
+
+
+def test_run_prunes_hour_buckets_with_retention():
+    path, _ = _db(n_old=20, n_recent=5)
+    agg = PerformanceAggregates(path)
+    trades = [{'symbol': 'BTC/USDT', 'ts': NOW - d * 86400, 'pnl': 1.0} for d in (45, 31, 29, 1)]
+    conn = sqlite3.connect(path)
+    agg.record(conn, trades, scope='realtime')
+    agg.claim_new(conn, [(f"id{i}", t['ts']) for i, t in enumerate(trades)])
+    conn.commit()
+    conn.close()
+
+    stats = DataCompactor(path, pause_seconds=0).run()
+    assert stats['aggregates'] == 4                      # 2 buckets + 2 ids além de 30 dias
+    buckets = agg.get_all('hour', scope='realtime')
+    assert sorted(int(k) for k in buckets) == sorted((t['ts'] // 3600) * 3600 for t in trades[2:])
+    assert agg.get('all', scope='realtime')['n'] == 4
+
+
+def main():
+    print("🧪 TESTE: Compactação incremental")
+    print("=" * 60)
+    tests = [test_chunks_match_batch_summary, test_incremental_vacuum_returns_pages,
+             test_run_prunes_hour_buckets_with_retention]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Teste do matching trade -> detecção em lote (as-of join x busca exaustiva)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from brain_performance_tracker import BrainPerformanceTracker, MATCH_WINDOW_SECONDS
+
+T0 = 1_700_000_000
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
+PATTERNS = ['OCO', 'OCO_INVERTIDO', 'TOPO_DUPLO', 'FUNDO_DUPLO']
+COLLECTOR_WINDOW = 3600      # find_matching_patterns: ±1h do fechamento
+
+
+def _db(detections):
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE raw_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL, timestamp_detection INTEGER, pattern_detected TEXT, direction TEXT,
+                    ai_verdict TEXT, ai_confidence REAL, status TEXT DEFAULT 'PENDING')''')
+    for d in detections:
+        d['id'] = conn.execute(
+            'INSERT INTO raw_samples (symbol, timeframe, timestamp_detection, pattern_detected, direction, '
+            'ai_verdict, ai_confidence, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (d['symbol'], '15m', d['ts'], d['pattern'], d['direction'], d['verdict'], 0.8, d['status'])).lastrowid
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _detections(seed=11, n=120):
+    """Detecções aleatórias (timestamps distintos por símbolo) + casos de borda da janela"""
+    rng = np.random.default_rng(seed)
+    dets = []
+    for symbol in SYMBOLS:
+        for ts in rng.choice(np.arange(T0, T0 + 48 * 3600, 7), n, replace=False):
+            dets.append({'symbol': symbol, 'ts': int(ts), 'pattern': str(rng.choice(PATTERNS)),
+                         'direction': str(rng.choice(['LONG', 'SHORT'])),
+                         'verdict': None if rng.random() < 0.3 else 'VALID',
+                         'status': 'PROCESSED' if rng.random() < 0.7 else 'PENDING'})
+    # ADA: uma só detecção exatamente na borda da janela de cada lado do trade em T0 + 100h
+    edge = T0 + 100 * 3600
+    dets.append({'symbol': 'ADA/USDT', 'ts': edge - MATCH_WINDOW_SECONDS, 'pattern': 'OCO', 'direction': 'SHORT',
+                 'verdict': 'VALID', 'status': 'PROCESSED'})
+    dets.append({'symbol': 'ADA/USDT', 'ts': edge + 200 * 3600 + COLLECTOR_WINDOW, 'pattern': 'FUNDO_DUPLO',
+                 'direction': 'LONG', 'verdict': 'VALID', 'status': 'PROCESSED'})
+    # XRP: detecção 1s além da janela (nenhuma candidata)
+    dets.append({'symbol': 'XRP/USDT', 'ts': edge - MATCH_WINDOW_SECONDS - 1, 'pattern': 'OCO', 'direction': 'SHORT',
+                 'verdict': 'VALID', 'status': 'PROCESSED'})
+    return dets
+
+
+def _trade_times(seed=12, n=40):
+    rng = np.random.default_rng(seed)
+    times = [(str(rng.choice(SYMBOLS)), int(t)) for t in rng.choice(np.arange(T0 - 3 * 3600, T0 + 51 * 3600), n,
+                                                                          replace=False)]
+    edge = T0 + 100 * 3600
+    times += [('ADA/USDT', edge), ('ADA/USDT', edge + 200 * 3600), ('XRP/USDT', edge), ('DOGE/USDT', T0)]
+    return times
+
+
+def _exchange_symbol(symbol, i):
+    """Alterna os formatos de símbolo da Bybit e do ccxt"""
+    return symbol.replace('/', '') if i % 2 else symbol + ':USDT'
+
+
+def _brute_force(times, dets, window, accept):
+    """Para cada trade: (menor distância, ids empatados nessa distância) ou None"""
+    out = []
+    for symbol, t in times:
+        cands = [(abs(d['ts'] - t), d['id']) for d in dets
+                 if d['symbol'] == symbol and accept(d) and abs(d['ts'] - t) <= window]
+        if not cands:
+            out.append(None)
+            continue
+        best = min(c[0] for c in cands)
+        out.append((best, {i for dist, i in cands if dist == best}))
+    return out
+
+
+def _check(times, found_ids, expected, by_id):
+    for (symbol, t), got, exp in zip(times, found_ids, expected):
+        if exp is None:
+            assert got is None, (symbol, t, got)
+            continue
+        assert got is not None, (symbol, t, exp)
+        dist, ids = exp
+        assert abs(by_id[got]['ts'] - t) == dist and got in ids, (symbol, t, got, exp)
+
+
+def _tracker_matches(path, times):
+    tracker = BrainPerformanceTracker(path)
+    trades = [{'symbol': _exchange_symbol(s, i), 'opened_at': t * 1000, 'closed_at': (t + 1800) * 1000,
+               'pnl': 1.0 if i % 3 else -0.5} for i, (s, t) in enumerate(times)]
+    registered = tracker.match_predictions_batch(trades)
+    conn = sqlite3.connect(path)
+    rows = dict(((s, o), bid) for s, o, bid in conn.execute(
+        'SELECT symbol, opened_at, brain_sample_id FROM trade_performance'))
+    conn.close()
+    return registered, [rows.get((s, t)) for s, t in times]
+
+
+def test_tracker_batch_matches_brute_force():
+    dets = _detections()
+    path = _db(dets)
+    times = _trade_times()
+    registered, found = _tracker_matches(path, times)
+
+    expected = _brute_force(times, dets, MATCH_WINDOW_SECONDS, lambda d: d['status'] == 'PROCESSED')
+    _check(times, found, expected, {d['id']: d for d in dets})
+    assert registered == sum(e is not None for e in expected)
+
+    # Bordas: exatamente em -window casa; 1s além não; símbolo sem detecções fica sem feedback
+    edge = T0 + 100 * 3600
+    assert found[times.index(('ADA/USDT', edge))] is not None
+    assert found[times.index(('XRP/USDT', edge))] is None
+    assert found[times.index(('DOGE/USDT', T0))] is None
+    assert len({s for (s, _), f in zip(times, found) if f is not None}) >= 3     # Vários símbolos no mesmo lote
+
+
+def test_tracker_with_empty_detections():
+    path = _db([])
+    registered, found = _tracker_matches(path, _trade_times(n=5))
+    assert registered == 0 and found == [None] * len(found)
+    assert BrainPerformanceTracker(path).match_predictions_batch([]) == 0
+
+
+def test_collector_batch_matches_brute_force():
+    from realtime_feedback_collector import RealtimeFeedbackCollector
+
+    dets = _detections(seed=21)
+    collector = RealtimeFeedbackCollector.__new__(RealtimeFeedbackCollector)    # Sem exchange
+    collector.db_path = _db(dets)
+    times = _trade_times(seed=22)
+    trades = [{'symbol': _exchange_symbol(s, i), 'closed_at': t * 1000} for i, (s, t) in enumerate(times)]
+    matches = collector.find_matching_patterns(trades)
+    assert len(matches) == len(trades)
+
+    by_ts = {(d['symbol'], d['ts']): d for d in dets if d['verdict'] is not None}
+    found = [None if m is None else by_ts[(s, m['sample_time'])]['id'] for (s, _), m in zip(times, matches)]
+    expected = _brute_force(times, dets, COLLECTOR_WINDOW, lambda d: d['verdict'] is not None)
+    _check(times, found, expected, {d['id']: d for d in dets})
+    for m, f in zip(matches, found):
+        if m is not None:
+            d = next(d for d in dets if d['id'] == f)
+            assert (m['pattern_name'], m['ai_verdict']) == (d['pattern'], d['verdict'])
+
+    # Bordas: +window casa, -window-1 não; sem candidato e lote vazio
+    edge = T0 + 100 * 3600
+    assert matches[times.index(('ADA/USDT', edge + 200 * 3600))]['pattern_name'] == 'FUNDO_DUPLO'
+    assert matches[times.index(('XRP/USDT', edge))] is None
+    assert matches[times.index(('DOGE/USDT', T0))] is None
+    assert collector.find_matching_patterns([]) == []
+
+    collector.db_path = _db([])
+    assert collector.find_matching_patterns(trades[:3]) == [None, None, None]
+
+
+def main():
+    print("🧪 TESTE: Matching trade -> detecção (lote x força bruta)")
+    print("=" * 60)
+    tests = [test_tracker_batch_matches_brute_force, test_tracker_with_empty_detections,
+             test_collector_batch_matches_brute_force]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Teste do health status (reporter por componente + coletor do snapshot)
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from health_status import HealthReporter, HealthCollector, format_status, REAP_SECONDS
+
+
+def _dirs():
+    base = tempfile.mkdtemp()
+    watchlist = os.path.join(base, 'watchlist.json')
+    with open(watchlist, 'w') as f:
+        json.dump({'pares': [{'symbol': 'BTC/USDT'}], 'slots_ocupados': 1, 'max_slots': 5}, f)
+    health = os.path.join(base, 'health')
+    os.makedirs(health)
+    return health, watchlist
+
+
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def test_reporter_tracks_latency_queues_and_errors():
+    directory, _ = _dirs()
+    health = HealthReporter('monitor', interval=10, directory=directory, publish_interval=60)
+    health.beat(100.0, watchlist=3)
+    health.beat(200.0, watchlist=2, vision=1)
+    with open(health.path) as f:
+        assert json.load(f)['loops'] == 1          # Throttle: 2º beat não publica
+
+    health.error(ValueError("timeout na exchange"))  # Erro publica na hora
+    with open(health.path) as f:
+        state = json.load(f)
+    assert state['loops'] == 2 and state['errors'] == 1
+    assert state['latency_ms'] == 200.0 and state['latency_max_ms'] == 200.0
+    assert abs(state['latency_avg_ms'] - 120.0) < 1e-9
+    assert state['queues'] == {'watchlist': 2, 'vision': 1}
+    assert state['last_error'] == "timeout na exchange"
+
+    try:
+        with health.loop():
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert health.state['errors'] == 2 and health.state['loops'] == 3
+
+
+def test_collector_classifies_components():
+    directory, watchlist = _dirs()
+    HealthReporter('scanner', interval=60, directory=directory).beat(1500.0, itens=40)
+    HealthReporter('dashboard', interval=30, directory=directory).close()
+    HealthReporter('monitor', interval=10, directory=directory).error("api fora")
+    stale = HealthReporter('market_context', interval=5, directory=directory)
+    stale.state['heartbeat_at'] = time.time() - 100
+    stale.publish(force=True)
+    dead = HealthReporter('executor:ETH/USDT:USDT', interval=30, directory=directory)
+    dead.state['pid'] = _dead_pid()
+    dead.publish(force=True)
+    HealthReporter('executor:BTC/USDT:USDT', interval=30, directory=directory).beat(80.0)
+
+    collector = HealthCollector(directory, watchlist)
+    snap = collector.snapshot()
+    health = {name: c['health'] for name, c in snap['components'].items()}
+    assert health == {'scanner': 'OK', 'dashboard': 'PARADO', 'monitor': 'ERRO', 'market_context': 'ATRASADO',
+                      'executor:ETH/USDT:USDT': 'PARADO', 'executor:BTC/USDT:USDT': 'OK'}
+    assert snap['executors'] == 1 and snap['healthy'] is False
+    assert snap['watchlist']['slots'] == 1 and snap['watchlist']['max_slots'] == 5
+
+    text = format_status(snap)
+    assert 'Scanner: OK' in text and 'itens=40' in text and 'erro: api fora' in text
+    assert 'Telegram: SEM RELATÓRIO' in text and 'Watchlist: 1/5 slots ocupados' in text
+
+    # Executor encerrado há mais de REAP_SECONDS: relatório removido
+    snap = collector.snapshot(now=time.time() + REAP_SECONDS + 10)
+    assert 'executor:ETH/USDT:USDT' not in snap['components'] and 'dashboard' in snap['components']
+    assert not os.path.exists(dead.path)
+
+
+def main():
+    print("🧪 TESTE: Health status (reporter + coletor)")
+    print("=" * 60)
+    tests = [test_reporter_tracks_latency_queues_and_errors, test_collector_classifies_components]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Teste das métricas vetorizadas de risco/performance (lib_analytics)
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from lib_analytics import TradeAnalytics, HORIZONS, load_trades
+
+rng = np.random.default_rng(11)
+NOW = 1_700_000_000.0
+N = 400
+TS = np.sort(NOW - rng.uniform(0, 40 * 86400, N))
+PNL = rng.normal(0.3, 3.0, N)
+PNL[::17] = 0.0
+
+
+def _brute(pnl, mask, equity0=1000.0):
+    """Conta direta sobre os trades selecionados por mask"""
+    equity = equity0 + np.concatenate(([0.0], np.cumsum(pnl)))
+    returns = pnl / equity[:-1]
+    idx = np.flatnonzero(mask)
+    r, p = returns[mask], pnl[mask]
+    out = {'n': len(p), 'wins': int((p > 0).sum()), 'total_pnl': float(p.sum())}
+    out['sharpe'] = float(r.mean() / r.std() * np.sqrt(365)) if len(r) >= 2 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(r, 0) ** 2)) if len(r) else 0.0
+    out['sortino'] = float(r.mean() / downside * np.sqrt(365)) if len(r) >= 2 and downside > 0 else 0.0
+    loss = -p[p < 0].sum()
+    out['profit_factor'] = float(p[p > 0].sum() / loss) if loss > 0 else None
+    curve = equity[idx[0]:idx[-1] + 2] if len(idx) else equity[:1]
+    peaks = np.maximum.accumulate(curve)
+    out['max_dd'] = float(((peaks - curve) / peaks).max() * 100)
+    return out
+
+
+def test_horizons_match_brute_force():
+    analytics = TradeAnalytics(TS, PNL)
+    result = analytics.horizons(now=NOW)
+    assert set(result) == set(HORIZONS)
+    for name, seconds in HORIZONS.items():
+        got, expected = result[name], _brute(PNL, (TS >= NOW - seconds) & (TS <= NOW))
+        assert got['n'] == expected['n'] and got['wins'] == expected['wins']
+        assert abs(got['total_pnl'] - expected['total_pnl']) < 1e-9
+        assert abs(got['expectancy'] - expected['total_pnl'] / expected['n']) < 1e-9
+        assert abs(got['sharpe_ratio'] - expected['sharpe']) < 1e-6
+        assert abs(got['sortino_ratio'] - expected['sortino']) < 1e-6
+        assert abs(got['profit_factor'] - expected['profit_factor']) < 1e-9
+        assert abs(got['max_drawdown_pct'] - expected['max_dd']) < 1e-9
+
+
+def test_drawdown_is_equity_percent():
+    # +100 e depois -110 sobre 1000: pico 1100 -> 990 = 10% (não -110%)
+    analytics = TradeAnalytics([1, 2], [100.0, -110.0], initial_equity=1000.0)
+    assert abs(analytics.window(0)['max_drawdown_pct'] - 10.0) < 1e-9
+    only_wins = TradeAnalytics([1, 2], [5.0, 1.0]).window(0)
+    assert only_wins['max_drawdown_pct'] == 0.0 and only_wins['profit_factor'] is None
+
+
+def test_rolling_matches_trailing_windows():
+    analytics = TradeAnalytics(TS, PNL)
+    day = HORIZONS['24h']
+    series = analytics.rolling(day)
+    equity = 1000.0 + np.concatenate(([0.0], np.cumsum(PNL)))
+    for i in range(0, N, 23):
+        expected = _brute(PNL, (TS > TS[i] - day) & (np.arange(N) <= i))
+        assert series['n'][i] == expected['n']
+        assert abs(series['sharpe_ratio'][i] - expected['sharpe']) < 1e-6
+        lo = int(np.searchsorted(TS, TS[i] - day, side='right'))
+        peak = equity[lo:i + 2].max()
+        assert abs(series['drawdown_pct'][i] - (peak - equity[i + 1]) / peak * 100) < 1e-9
+
+
+def test_load_trades_and_risk_buckets():
+    db_path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE raw_samples (id INTEGER PRIMARY KEY, created_at INTEGER, pnl_real REAL, '
+                 'reward REAL, ai_confidence REAL)')
+    now = int(time.time())
+    rows = [(now - 100, 3.0, 1.03, 0.8), (now - 50, -0.5, -1.005, None), (now - 10, None, None, 0.5),
+            (now - 5, -4.0, -1.04, 0.6), (now - 1, 1.0, 1.01, 0.7)]
+    conn.executemany('INSERT INTO raw_samples (created_at, pnl_real, reward, ai_confidence) VALUES (?, ?, ?, ?)', rows)
+    conn.commit()
+    conn.close()
+
+    data = load_trades(db_path)
+    assert len(data['ts']) == 4 and np.isnan(data['confidence'][1])
+    analytics = TradeAnalytics.from_db(db_path)
+    assert analytics.risk_buckets() == {'large_win': 1, 'small_loss': 1, 'large_loss': 1, 'small_win': 1}
+    stats = analytics.window(now - 60)
+    assert stats['n'] == 3
+    assert abs(stats['avg_confidence'] - 0.65) < 1e-9
+    assert abs(stats['avg_reward'] - (-1.005 - 1.04 + 1.01) / 3) < 1e-9
+
+
+def main():
+    print("🧪 TESTE: Métricas vetorizadas de risco/performance")
+    print("=" * 60)
+    tests = [test_horizons_match_brute_force, test_drawdown_is_equity_percent,
+             test_rolling_matches_trailing_windows, test_load_trades_and_risk_buckets]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Teste dos indicadores em streaming (lib_indicadores)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from lib_indicadores import (SMA, EMA, RollingReturn, RollingVolatility, RollingRange, ATR,
+                             SeriesIndicators, sync_from_exchange)
+
+STEP = 4 * 60 * 60 * 1000
+rng = np.random.default_rng(11)
+CLOSES = 100 + np.cumsum(rng.normal(0, 1, 400))
+
+
+def _candles(n, start=0):
+    c = CLOSES[start:start + n]
+    return [[(start + i) * STEP, v, v + 1, v - 1, v, 1000.0 + i] for i, v in enumerate(c)]
+
+
+class FakeExchange:
+    """fetch_ohlcv devolve as últimas `limit` barras até `now` (última = em formação)"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def parse_timeframe(self, tf):
+        return STEP // 1000
+
+    def milliseconds(self):
+        return self.bars * STEP + 1
+
+    def fetch_ohlcv(self, symbol, timeframe=None, limit=None):
+        self.calls.append(limit)
+        start = max(0, self.bars + 1 - limit)
+        return _candles(self.bars + 1 - start, start)
+
+
+def test_streaming_matches_batch():
+    sma, ema, ret, vol, rr = SMA(20), EMA(20), RollingReturn(20), RollingVolatility(20), RollingRange(20)
+    for v in CLOSES[:300]:
+        for ind in (sma, ema, ret, vol, rr):
+            ind.update(float(v))
+
+    window = CLOSES[280:300]
+    assert abs(sma.value - window.mean()) < 1e-9
+    assert abs(SMA.from_array(CLOSES[:300], 20).value - sma.value) < 1e-9
+    assert abs(EMA.from_array(CLOSES[:300], 20).value - ema.value) < 1e-9
+    assert abs(ret.value_at(CLOSES[300]) - (CLOSES[300] - CLOSES[280]) / CLOSES[280] * 100) < 1e-9
+    rets = np.diff(CLOSES[279:300]) / CLOSES[279:299] * 100
+    assert abs(vol.value - rets.std(ddof=1)) < 1e-9
+    assert abs(rr.value - (window.max() - window.min()) / window.min() * 100) < 1e-9
+
+
+def test_atr_wilder():
+    bars = np.array(_candles(50))[:, [2, 3, 4]]
+    atr = ATR.from_array(bars, 14)
+    tr = [bars[0, 0] - bars[0, 1]] + [
+        max(h - l, abs(h - pc), abs(l - pc)) for (h, l, _), pc in zip(bars[1:], bars[:-1, 2])
+    ]
+    esperado = sum(tr[:14]) / 14
+    for t in tr[14:]:
+        esperado = (esperado * 13 + t) / 14
+    assert abs(atr.value - esperado) < 1e-9
+
+
+def test_series_sync_only_feeds_new_closed_bars():
+    serie = SeriesIndicators('BTC/USDT', '4h')
+    sma = serie.get('sma200', lambda: SMA(200))
+    assert serie.sync(_candles(201)) == 200           # Último candle está em formação
+    assert abs(sma.value - CLOSES[:200].mean()) < 1e-9
+
+    # Nova barra fechada: entra só ela, mesmo recebendo a janela inteira de novo
+    assert serie.sync(_candles(202)) == 1
+    assert serie.sync(_candles(202)) == 0
+    assert abs(sma.value - CLOSES[1:201].mean()) < 1e-9
+
+    # Indicador registrado depois é semeado com o histórico guardado
+    ret = serie.get('ret20', lambda: RollingReturn(20))
+    assert ret.ready and ret.window[0] == CLOSES[181]
+
+
+def test_sync_from_exchange_fetches_incrementally():
+    exchange = FakeExchange(bars=250)
+    specs = {'sma200': lambda: SMA(200)}
+    serie, candles = sync_from_exchange(exchange, 'X/USDT', '4h', 201, specs)
+    assert abs(serie.indicators['sma200'].value - CLOSES[50:250].mean()) < 1e-9
+
+    exchange.bars = 252
+    serie, candles = sync_from_exchange(exchange, 'X/USDT', '4h', 201, specs)
+    assert exchange.calls[-1] < 10
+    assert abs(serie.indicators['sma200'].value - CLOSES[52:252].mean()) < 1e-9
+    assert candles[-1][4] == CLOSES[252]
+
+
+def main():
+    print("🧪 TESTE: Indicadores em streaming")
+    print("=" * 60)
+    tests = [test_streaming_matches_batch, test_atr_wilder,
+             test_series_sync_only_feeds_new_closed_bars, test_sync_from_exchange_fetches_incrementally]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
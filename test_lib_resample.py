@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Teste do resample local de timeframes (lib_resample)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from lib_resample import resample_ohlcv, MultiTimeframeFeed
+
+M15 = 15 * 60 * 1000
+H1 = 4 * M15
+rng = np.random.default_rng(7)
+N = 3000
+CLOSES = 100 + np.cumsum(rng.normal(0, 0.5, N))
+BASE = np.column_stack([
+    np.arange(N) * M15,
+    np.r_[100, CLOSES[:-1]],
+    CLOSES + rng.uniform(0, 1, N),
+    CLOSES - rng.uniform(0, 1, N),
+    CLOSES,
+    rng.uniform(10, 100, N),
+])
+
+
+def _exchange_bars(step, upto):
+    """Barras como a exchange agregaria (referência em loop simples)"""
+    out = []
+    for start in range(0, upto, step):
+        rows = BASE[(BASE[:, 0] >= start) & (BASE[:, 0] < min(start + step, upto))]
+        if len(rows):
+            out.append([start, rows[0, 1], rows[:, 2].max(), rows[:, 3].min(), rows[-1, 4], rows[:, 5].sum()])
+    return np.array(out)
+
+
+class FakeExchange:
+    """Última barra retornada é a em formação (índice `bars`)"""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def milliseconds(self):
+        return self.bars * M15 + 1
+
+    def fetch_ohlcv(self, symbol, timeframe=None, since=None, limit=None):
+        self.calls.append((timeframe, since, limit))
+        end = self.bars + 1
+        start = max(0, end - limit) if since is None else since // M15
+        return BASE[start:min(end, start + limit)].tolist()
+
+
+def test_resample_matches_exchange_boundaries():
+    janela = BASE[6:406]          # Começa no meio de uma barra de 1h
+    h1 = resample_ohlcv(janela, '15m', '1h')
+    ref = _exchange_bars(H1, 406 * M15)
+    assert h1[0, 0] == 2 * H1     # Bucket cortado descartado
+    assert np.allclose(h1, ref[2:])
+    assert h1[-1, 0] == 101 * H1  # Último bucket parcial (em formação) mantido
+
+
+def test_feed_incremental_matches_full_resample():
+    exchange = FakeExchange(bars=1000)
+    feed = MultiTimeframeFeed(exchange, ['15m', '30m', '1h'], history=200)
+    feed.refresh('X/USDT')
+    assert len(exchange.calls) == 1 and all(tf == '15m' for tf, _, _ in exchange.calls)
+
+    for bars in (1001, 1002, 1005):
+        exchange.bars = bars
+        feed.refresh('X/USDT')
+        assert exchange.calls[-1][2] < 10
+        for tf, step in (('30m', 2 * M15), ('1h', H1)):
+            ref = _exchange_bars(step, (bars + 1) * M15)[-200:]
+            got = np.array(feed.get('X/USDT', tf))
+            assert len(got) == 200
+            assert np.allclose(got, ref), tf
+    assert feed.get('X/USDT', '15m')[-1][4] == CLOSES[1005]
+
+
+def test_feed_paginates_warmup_for_4h():
+    exchange = FakeExchange(bars=2999)
+    feed = MultiTimeframeFeed(exchange, ['15m', '4h'], history=150)
+    feed.refresh('X/USDT')
+    assert len(exchange.calls) > 1
+    ref = _exchange_bars(16 * M15, 3000 * M15)[-150:]
+    assert np.allclose(np.array(feed.get('X/USDT', '4h')), ref)
+
+
+def main():
+    print("🧪 TESTE: Resample local de timeframes")
+    print("=" * 60)
+    tests = [test_resample_matches_exchange_boundaries, test_feed_incremental_matches_full_resample,
+             test_feed_paginates_warmup_for_4h]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Teste das regras de risco compartilhadas (lib_risk) entre executor e replay
+"""
+
+import sys
+import os
+import ast
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lib_risk import break_even_trigger, break_even_stop
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _imported_modules(filename):
+    with open(os.path.join(BASE_DIR, filename)) as f:
+        tree = ast.parse(f.read())
+    return {node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)} | \
+           {alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names}
+
+
+def test_break_even_levels():
+    assert break_even_trigger(100.0, 110.0, 'buy') == 105.0
+    assert break_even_trigger(100.0, 90.0, 'sell') == 95.0
+    assert abs(break_even_stop(100.0, 'buy') - 100.2) < 1e-9
+    assert abs(break_even_stop(100.0, 'sell') - 99.8) < 1e-9
+
+
+def test_simulator_break_even_matches_executor_rule():
+    from test_brain_simulator import _simulate
+    # Passa do gatilho do executor e volta: o replay sai no mesmo SL de Break-Even
+    trigger = break_even_trigger(101.0, 105.0, 'buy')
+    sample = _simulate('LONG', [(101.2, 100.2, 101.0), (trigger + 0.1, 101.5, trigger), (trigger, 100.0, 100.5)],
+                       neckline=101.0, target=105.0, stop_loss=98.0)
+    expected = (break_even_stop(101.0, 'buy') - 101.0) / 101.0 * 100
+    assert abs(sample['simulation']['profit_pct'] - expected) < 1e-9
+
+
+def test_executor_does_not_load_the_simulator():
+    modules = _imported_modules('bot_executor.py')
+    assert 'lib_risk' in modules and 'brain_simulator' not in modules
+
+
+def main():
+    print("🧪 TESTE: Regras de risco (lib_risk)")
+    print("=" * 60)
+    tests = [test_break_even_levels, test_simulator_break_even_matches_executor_rule,
+             test_executor_does_not_load_the_simulator]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
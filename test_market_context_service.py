@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Teste do market_context_service (snapshot publicado, leitura, fallback e escrita atômica)
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import market_context_service as mcs
+from market_context_service import MarketContextService, read_snapshot, get_market_context, MAX_SNAPSHOT_AGE
+from lib_utils import atomic_write_json
+
+ANALYSIS = {'scenario_number': 3, 'scenario_name': 'ALTSEASON', 'btc_trend': 'LONG', 'btcd_trend': 'SHORT',
+            'btcd_source': 'webhook'}
+
+
+class FakeExchange:
+    def fetch_time(self):
+        return int(time.time() * 1000)
+
+
+class FakeAnalysis:
+    """Substitui get_market_analysis (cálculo local com a exchange) e conta as chamadas"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, exchange, timeframe='4h'):
+        self.calls.append((exchange, timeframe))
+        return dict(ANALYSIS, local=True)
+
+
+def _patched(test):
+    def run():
+        base = tempfile.mkdtemp()
+        originals = (mcs.get_market_analysis, mcs.snapshot_path, mcs.BTCD_FILE)
+        analysis = FakeAnalysis()
+        mcs.get_market_analysis = analysis
+        mcs.snapshot_path = lambda: os.path.join(base, 'market_context.json')
+        mcs.BTCD_FILE = os.path.join(base, 'btcd_data.json')
+        try:
+            test(analysis, base)
+        finally:
+            mcs.get_market_analysis, mcs.snapshot_path, mcs.BTCD_FILE = originals
+    run.__name__ = test.__name__
+    return run
+
+
+@_patched
+def test_publish_and_read_round_trip(analysis, base):
+    service = MarketContextService(FakeExchange())
+    assert service.path == os.path.join(base, 'market_context.json')
+    published = service.publish('startup')
+    assert published['version'] == 1 and published['reason'] == 'startup' and published['timeframe'] == '4h'
+    assert published['should_trade_long'] in (True, False) and published['pid'] == os.getpid()
+
+    snapshot = read_snapshot()
+    assert snapshot == published
+    snapshot['scenario_number'] = 99                 # Cópia: não contamina o cache de leitura
+    assert read_snapshot()['scenario_number'] == 3
+
+    second = service.publish('webhook')
+    os.utime(service.path, ns=(time.time_ns(), time.time_ns() + 1000))   # mtime distinto mesmo em FS grosseiro
+    assert read_snapshot()['version'] == 2 == second['version']
+    assert len(analysis.calls) == 2
+
+    assert get_market_context() == second            # Serviço ativo: nenhum cálculo local
+    assert len(analysis.calls) == 2
+
+
+@_patched
+def test_stale_or_missing_snapshot_falls_back(analysis, base):
+    exchange = FakeExchange()
+    try:
+        get_market_context()
+        assert False, "sem snapshot e sem exchange deveria falhar"
+    except RuntimeError:
+        pass
+    assert get_market_context(exchange)['local'] is True
+    assert analysis.calls == [(exchange, '4h')]
+
+    old = dict(ANALYSIS, timestamp=int(time.time()) - MAX_SNAPSHOT_AGE - 1, timeframe='4h')
+    atomic_write_json(mcs.snapshot_path(), old)
+    assert read_snapshot() is None
+    assert read_snapshot(max_age=None)['scenario_number'] == 3
+    assert get_market_context(exchange)['local'] is True     # Serviço parado: calcula sozinho
+    assert len(analysis.calls) == 2
+
+    fresh = dict(ANALYSIS, timestamp=int(time.time()), timeframe='4h')
+    atomic_write_json(mcs.snapshot_path(), fresh)
+    os.utime(mcs.snapshot_path(), ns=(time.time_ns(), time.time_ns() + 2000))
+    assert 'local' not in get_market_context(exchange)
+    assert get_market_context(exchange, timeframe='1h')['local'] is True   # Outro timeframe: cálculo local
+    assert analysis.calls[-1] == (exchange, '1h')
+
+
+@_patched
+def test_check_reasons(analysis, base):
+    service = MarketContextService(FakeExchange())
+    service._btcd_mtime, service._btcd_expires_at = service._btcd_state()
+    assert service.check() is None
+
+    with open(mcs.BTCD_FILE, 'w') as f:
+        json.dump({'timestamp': time.time() - mcs.BTCD_MAX_AGE_SECONDS + 60, 'direction': 'LONG'}, f)
+    assert service.check() == 'webhook'
+    assert service.check() is None
+    service._btcd_expires_at = time.time() - 1        # Webhook venceu: passa a valer o proxy
+    assert service.check() == 'webhook_expired'
+    assert service.check() is None
+
+
+def test_atomic_write_json():
+    base = tempfile.mkdtemp()
+    path = os.path.join(base, 'snap.json')
+    assert atomic_write_json(path, {'a': 1}) is True
+    with open(path) as f:
+        assert json.load(f) == {'a': 1}
+    assert os.listdir(base) == ['snap.json']          # Sem .tmp sobrando
+
+    assert atomic_write_json(os.path.join(base, 'nao_existe', 'x.json'), {'a': 1}) is False
+    assert atomic_write_json(os.path.join(base, 'y.json'), {'bad': object()}) is False
+    assert sorted(os.listdir(base)) == ['snap.json']
+
+    # Leitores concorrentes sempre veem um documento inteiro (antigo ou novo)
+    stop, errors = threading.Event(), []
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            atomic_write_json(path, {'version': i, 'payload': 'x' * (1000 + i % 5000)})
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            try:
+                with open(path) as f:
+                    doc = json.load(f)
+                assert doc == {'a': 1} or doc['payload'] == 'x' * (1000 + doc['version'] % 5000)
+            except ValueError as e:
+                errors.append(e)
+    finally:
+        stop.set()
+        thread.join()
+    assert errors == []
+
+
+def main():
+    print("🧪 TESTE: Market context service")
+    print("=" * 60)
+    tests = [test_publish_and_read_round_trip, test_stale_or_missing_snapshot_falls_back, test_check_reasons,
+             test_atomic_write_json]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Teste do OHLCVBackfill (paginação, retomada do último candle salvo e limiter próprio)
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ohlcv_store import OHLCVStore
+from ohlcv_backfill import OHLCVBackfill, BACKFILL_CALLS_PER_MINUTE, BACKFILL_LIMITER_STATE
+from rate_limiter import RateLimiter, get_rate_limiter
+
+STEP = 60 * 60 * 1000  # 1h
+
+
+class Interrupted(BaseException):
+    """Processo morto no meio do backfill (não é tratado pelo retry)"""
+
+
+class FakeExchange:
+    """fetch_ohlcv sobre uma série 1h contínua até o candle em formação"""
+
+    def __init__(self, first_ts, fail_after=None):
+        self.first_ts = first_ts
+        self.fail_after = fail_after
+        self.calls = []
+
+    def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=1000):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise Interrupted()
+        self.calls.append((symbol, since))
+        now = int(time.time() * 1000)
+        ts = max(since, self.first_ts)
+        ts += (-(ts - self.first_ts)) % STEP
+        page = []
+        while ts <= now and len(page) < limit:
+            price = 100.0 + (ts - self.first_ts) / STEP
+            page.append([ts, price, price + 1, price - 1, price, 10.0])
+            ts += STEP
+        return page
+
+
+class NoLimit:
+    def wait_if_needed(self, bot_name="unknown"):
+        return False
+
+
+def _backfill(exchange, store):
+    return OHLCVBackfill(exchange, store, workers=2, page_limit=10, limiter=NoLimit())
+
+
+def _origin(hours=45):
+    """Início alinhado de uma série de `hours` candles fechados"""
+    current = int(time.time() * 1000) // STEP * STEP      # Candle em formação
+    return current - hours * STEP
+
+
+def test_full_backfill_only_closed_candles():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        origin = _origin()
+        exchange = FakeExchange(origin)
+        result = _backfill(exchange, store).backfill_series('ETH/USDT', '1h', origin)
+
+        data = store.read('ETH/USDT', '1h')
+        assert result['added'] == 45 == len(data)
+        assert data[0, 0] == origin and data[-1, 0] == origin + 44 * STEP    # Sem o candle em formação
+        assert np.all(np.diff(data[:, 0]) == STEP)
+        assert [since for _, since in exchange.calls] == [origin + i * 10 * STEP for i in range(5)]
+
+
+def test_resume_from_last_saved_candle():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        origin = _origin()
+        crashed = _backfill(FakeExchange(origin, fail_after=2), store)
+        try:
+            crashed.backfill_series('ETH/USDT', '1h', origin)
+            assert False, "deveria ter sido interrompido"
+        except Interrupted:
+            pass
+        # Checkpoint = o que já está no store (2 páginas) + progresso em memória
+        assert store.last_timestamp('ETH/USDT', '1h') == origin + 19 * STEP
+        assert crashed.progress['ETH/USDT_1h'] == {'cursor': origin + 19 * STEP, 'added': 20}
+
+        exchange = FakeExchange(origin)
+        result = _backfill(exchange, store).backfill_series('ETH/USDT', '1h', origin)
+        assert result['added'] == 25
+        assert exchange.calls[0] == ('ETH/USDT', origin + 20 * STEP)   # Nada é rebaixado
+        assert len(exchange.calls) == 3
+        data = store.read('ETH/USDT', '1h')
+        assert len(data) == 45 and np.all(np.diff(data[:, 0]) == STEP)
+        assert data[-1, 4] == 100.0 + 44
+
+        # Já completo: uma página vazia e nada novo
+        again = FakeExchange(origin)
+        assert _backfill(again, store).backfill_series('ETH/USDT', '1h', origin)['added'] == 0
+        assert len(again.calls) <= 1
+
+
+def test_older_since_fills_the_beginning_and_gaps():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        origin = _origin()
+        backfill = _backfill(FakeExchange(origin), store)
+        backfill.backfill_series('ETH/USDT', '1h', origin + 30 * STEP)
+        assert len(store.read('ETH/USDT', '1h')) == 15
+
+        exchange = FakeExchange(origin)
+        assert _backfill(exchange, store).backfill_series('ETH/USDT', '1h', origin)['added'] == 30
+        assert exchange.calls[0] == ('ETH/USDT', origin)
+        assert len(store.read('ETH/USDT', '1h')) == 45
+
+        # Buraco no meio: run() audita e preenche
+        data = store.read('ETH/USDT', '1h')
+        other = np.delete(data, slice(10, 14), axis=0)
+        store.write('SOL/USDT', '1h', other.tolist())
+        assert store.find_gaps('SOL/USDT', '1h')
+        results = _backfill(FakeExchange(origin), store).run(['SOL/USDT'], ['1h'], origin)
+        assert not store.find_gaps('SOL/USDT', '1h') and len(store.read('SOL/USDT', '1h')) == 45
+        assert sum(r['added'] for r in results) == 4
+
+
+def test_default_limiter_is_separate_and_slower():
+    backfill = OHLCVBackfill(FakeExchange(_origin()), OHLCVStore(tempfile.mkdtemp()))
+    shared = get_rate_limiter()
+    assert isinstance(backfill.limiter, RateLimiter) and backfill.limiter is not shared
+    assert backfill.limiter.max_calls == BACKFILL_CALLS_PER_MINUTE < shared.max_calls
+    assert backfill.limiter.state_file == BACKFILL_LIMITER_STATE != shared.state_file
+
+
+def main():
+    print("🧪 TESTE: OHLCV backfill (retomada)")
+    print("=" * 60)
+    tests = [test_full_backfill_only_closed_candles, test_resume_from_last_saved_candle,
+             test_older_since_fills_the_beginning_and_gaps, test_default_limiter_is_separate_and_slower]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
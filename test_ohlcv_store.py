@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Teste do OHLCVStore (partições mensais memory-mapped)
+"""
+
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from ohlcv_store import OHLCVStore
+
+STEP = 60 * 60 * 1000  # 1h
+START = 1767225600000  # 2026-01-01 00:00 UTC
+
+
+def _candles(first, count, price=100.0):
+    return [[START + (first + i) * STEP, price, price + 1, price - 1, price, 10.0] for i in range(count)]
+
+
+def test_write_partitions_by_month_and_dedupes():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        # 31 dias de janeiro + 5 de fevereiro
+        assert store.write('ETH/USDT', '1h', _candles(0, 36 * 24)) == 36 * 24
+        assert store.partitions('ETH/USDT', '1h') == ['2026-01', '2026-02']
+
+        # Reescrever o mesmo intervalo não duplica; a versão nova prevalece
+        assert store.write('ETH/USDT', '1h', _candles(10, 5, price=200.0)) == 0
+        data = store.read('ETH/USDT', '1h')
+        assert len(data) == 36 * 24
+        assert data[10, 4] == 200.0 and data[15, 4] == 100.0
+        assert np.all(np.diff(data[:, 0]) == STEP)
+
+
+def test_read_slices_range_across_partitions():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        store.write('ETH/USDT', '1h', _candles(0, 40 * 24))
+
+        start = START + 740 * STEP   # fim de janeiro
+        end = START + 760 * STEP     # começo de fevereiro
+        data = store.read('ETH/USDT', '1h', start, end)
+        assert len(data) == 20
+        assert data[0, 0] == start and data[-1, 0] == end - STEP
+
+        assert store.read('ETH/USDT', '1h', START + 10000 * STEP).shape == (0, 6)
+        assert store.last_timestamp('ETH/USDT', '1h') == START + (40 * 24 - 1) * STEP
+
+
+def test_find_gaps():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OHLCVStore(tmp)
+        store.write('SOL/USDT', '1h', _candles(0, 100) + _candles(110, 50) + _candles(800, 10))
+        gaps = store.find_gaps('SOL/USDT', '1h')
+        assert gaps == [
+            (START + 100 * STEP, START + 110 * STEP),
+            (START + 160 * STEP, START + 800 * STEP),
+        ]
+        assert store.series() == [('SOL/USDT', '1h')]
+
+
+def main():
+    print("🧪 TESTE: OHLCV Store")
+    print("=" * 60)
+    tests = [test_write_partitions_by_month_and_dedupes, test_read_slices_range_across_partitions, test_find_gaps]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
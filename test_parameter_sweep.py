@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Teste do ParameterSweep (grid/random/bayes, cache, shared memory, ranking)
+"""
+
+import sys
+import os
+import json
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from parameter_sweep import (ParameterSweep, grid_points, random_point, rank_results,
+                             evaluate_backtest, param_hash, _init_worker, _WORKER)
+
+TINY_SPACE = {'risk_per_trade': [0.01, 0.02], 'volume_multiplier': [1.0, 1.5]}
+
+
+def _candles(n=400, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * 1.003
+    low = np.minimum(open_, close) * 0.997
+    return np.column_stack([np.arange(n) * 900000.0, open_, high, low, close, rng.uniform(500, 3000, n)])
+
+
+def _sweep(**kwargs):
+    datasets = [{'symbol': 'A/USDT', 'timeframe': '15m', 'candles': _candles()},
+                {'symbol': 'B/USDT', 'timeframe': '15m', 'candles': _candles(seed=5)}]
+    cache_file = os.path.join(tempfile.mkdtemp(), 'sweep_cache.json')
+    return ParameterSweep(datasets, workers=2, cache_file=cache_file, **kwargs)
+
+
+class PoolProibido:
+    """Pool que falha se algo for submetido (tudo deveria vir do cache)"""
+
+    def submit(self, *args, **kwargs):
+        raise AssertionError("avaliação fora do cache")
+
+
+def test_grid_and_random_counts():
+    space = {'risk_per_trade': [0.01, 0.02, 0.03], 'volume_multiplier': {'range': [1.0, 2.0]}}
+    points = grid_points(space, steps=4)
+    assert len(points) == 12
+    assert sorted({p['volume_multiplier'] for p in points}) == [1.0, 1.333333, 1.666667, 2.0]
+
+    rng = random.Random(1)
+    for _ in range(50):
+        p = random_point(space, rng)
+        assert p['risk_per_trade'] in space['risk_per_trade'] and 1.0 <= p['volume_multiplier'] <= 2.0
+
+    sweep = _sweep()
+    assert len(sweep.run(TINY_SPACE, mode='grid', trials=0)) == 4
+    assert len(sweep.run(TINY_SPACE, mode='grid', trials=3)) == 3
+    assert len(sweep.run(TINY_SPACE, mode='random', trials=6)) == 6
+
+
+def test_bayes_stops_when_discrete_space_is_exhausted():
+    sweep = _sweep()
+    results = sweep.run(TINY_SPACE, mode='bayes', trials=20, n_init=2)   # Só existem 4 pontos
+    distinct = {json.dumps(r['params'], sort_keys=True) for r in results}
+    assert len(distinct) == 4
+    assert len(results) < 20
+
+
+def test_results_come_from_shared_memory_and_cache():
+    sweep = _sweep()
+    results = sweep.run(TINY_SPACE, mode='grid', trials=0)
+
+    # Workers leram os candles do bloco compartilhado: mesmas métricas da conta local
+    for r in results:
+        local = evaluate_backtest(r['params'], sweep.datasets)
+        assert abs(r['sharpe'] - local['sharpe']) < 1e-9 and r['trades'] == local['trades']
+
+    shm, layout = sweep._share_candles()
+    try:
+        _init_worker(shm.name, layout, None)
+        for mapped, original in zip(_WORKER['datasets'], sweep.datasets):
+            assert mapped['symbol'] == original['symbol']
+            assert np.array_equal(mapped['candles'], original['candles'])
+    finally:
+        _WORKER.pop('shm').close()
+        shm.close()
+        shm.unlink()
+
+    # Segundo sweep (mesmo arquivo de cache, mesmos dados): nada é reavaliado
+    again = ParameterSweep(sweep.datasets, workers=2, cache_file=sweep.cache_file)
+    keys = {param_hash(p, 'backtest', again.data_key) for p in grid_points(TINY_SPACE)}
+    assert keys <= set(again.cache)
+    cached = again.evaluate_many(grid_points(TINY_SPACE), PoolProibido())
+    assert [r['sharpe'] for r in rank_results(cached)] == [r['sharpe'] for r in results]
+
+
+def test_data_fingerprint_follows_content():
+    base = _sweep()
+    assert _sweep().data_key == base.data_key
+
+    # Mesmo tamanho e mesmos timestamps da ponta, um preço diferente no meio
+    changed = [dict(d, candles=d['candles'].copy()) for d in base.datasets]
+    changed[0]['candles'][200, 4] *= 1.01
+    assert ParameterSweep(changed, cache_file=base.cache_file).data_key != base.data_key
+
+    samples = [{'id': i, 'symbol': 'A/USDT', 'timestamp': i * 900, 'direction': 'LONG',
+                'simulation': {'outcome': 'WIN', 'profit_pct': 1.0, 'duration_hours': 2.0}} for i in range(5)]
+    brain = ParameterSweep(base.datasets, samples, objective='brain', cache_file=base.cache_file)
+    other = [dict(s) for s in samples]
+    other[2] = dict(other[2], simulation={'outcome': 'LOSS', 'profit_pct': -1.0, 'duration_hours': 2.0})
+    assert ParameterSweep(base.datasets, other, objective='brain', cache_file=base.cache_file).data_key != brain.data_key
+    other = [dict(s, id=s['id'] + 100) for s in samples]
+    assert ParameterSweep(base.datasets, other, objective='brain', cache_file=base.cache_file).data_key != brain.data_key
+
+
+def test_rank_results_order():
+    results = [
+        {'params': {'id': 'poucos'}, 'sharpe': 9.0, 'max_drawdown_pct': 1.0, 'trades': 3},
+        {'params': {'id': 'b'}, 'sharpe': 1.5, 'max_drawdown_pct': 8.0, 'trades': 20},
+        {'params': {'id': 'a'}, 'sharpe': 1.5, 'max_drawdown_pct': 4.0, 'trades': 20},
+        {'params': {'id': 'melhor'}, 'sharpe': 2.0, 'max_drawdown_pct': 12.0, 'trades': 15},
+        {'params': {'id': 'erro'}, 'sharpe': float('-inf'), 'max_drawdown_pct': 100.0, 'trades': 0},
+    ]
+    assert [r['params']['id'] for r in rank_results(results)] == ['melhor', 'a', 'b', 'poucos', 'erro']
+
+
+def main():
+    print("🧪 TESTE: Parameter sweep")
+    print("=" * 60)
+    tests = [test_grid_and_random_counts, test_bayes_stops_when_discrete_space_is_exhausted,
+             test_results_come_from_shared_memory_and_cache, test_data_fingerprint_follows_content,
+             test_rank_results_order]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Teste do agendador de prioridade do scanner (scan_scheduler)
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scan_scheduler import ScanScheduler
+
+M15 = 15 * 60 * 1000
+H1 = 4 * M15
+
+
+class FakeClock:
+    def __init__(self, now_ms):
+        self.now = now_ms
+
+    def now_ms(self):
+        return self.now
+
+
+def _closed(tf_ms, close_ms, n=30, step_pct=0.1):
+    """n barras fechadas terminando em close_ms, alternando +/- step_pct"""
+    bars, price = [], 100.0
+    for i in range(n):
+        price *= 1 + (step_pct if i % 2 else -step_pct) / 100
+        bars.append([close_ms - (n - i) * tf_ms, price, price, price, price, 1.0])
+    return bars
+
+
+def _scheduler(pairs, tfs, now, blacklist=None):
+    path = os.path.join(tempfile.mkdtemp(), 'smart_blacklist.json')
+    if blacklist is not None:
+        with open(path, 'w') as f:
+            json.dump(blacklist, f)
+    return ScanScheduler(pairs, tfs, clock=FakeClock(now), grace_seconds=0, blacklist_file=path)
+
+
+def test_only_new_closes_are_due():
+    now = 100 * H1 + 5 * 60 * 1000
+    sched = _scheduler(['A/USDT'], ['15m', '1h'], now)
+    assert set(sched.due()) == {('A/USDT', '15m'), ('A/USDT', '1h')}
+
+    sched.mark_analyzed('A/USDT', '15m', _closed(M15, 100 * H1))
+    sched.mark_analyzed('A/USDT', '1h', _closed(H1, 100 * H1))
+    assert sched.due() == []
+
+    sched.clock.now = 100 * H1 + M15 + 1000
+    assert sched.due() == [('A/USDT', '15m')]
+    assert sched.due(skip=['A/USDT']) == []
+    assert 0 < sched.seconds_until_next_close() <= 15 * 60
+
+    # Marcado no pré-filtro mas o ciclo parou antes do resultado: volta para a fila
+    sched.mark_analyzed('A/USDT', '15m', _closed(M15, 100 * H1 + M15))
+    assert sched.due() == []
+    sched.mark_due('A/USDT', '15m')
+    sched.mark_due('X/USDT', '15m')                            # Fora do universo: ignorado
+    assert sched.due() == [('A/USDT', '15m')]
+
+
+def test_priority_volume_volatility_and_blacklist():
+    now = 100 * H1 + 1000
+    pairs = ['CALM/USDT', 'WILD/USDT', 'VOL/USDT', 'BL/USDT']
+    expire = now / 1000 + 3600
+    sched = _scheduler(pairs, ['15m'], now, {'BL/USDT_OCO_15m': {'expire': expire}})
+    for par in pairs:
+        sched.mark_analyzed(par, '15m', _closed(M15, 100 * H1 - M15, step_pct=2.0 if par == 'WILD/USDT' else 0.1),
+                            volume_ok=(par == 'VOL/USDT'))
+
+    order = sched.due()
+    assert order[0] == ('VOL/USDT', '15m')
+    assert order[1] == ('WILD/USDT', '15m')
+    assert order[-1] == ('BL/USDT', '15m')
+
+
+def main():
+    print("🧪 TESTE: Agendador de prioridade do scanner")
+    print("=" * 60)
+    tests = [test_only_new_closes_are_due, test_priority_volume_volatility_and_blacklist]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
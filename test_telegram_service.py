@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Teste do TelegramService (outbox, lotes, 429, comandos) com transporte falso
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from telegram_service import TelegramOutbox, TelegramService, build_batches, enqueue_message, inline_keyboard
+
+
+class FakeTelegram:
+    """Transporte assíncrono que responde como a API (sem rede)"""
+
+    def __init__(self, updates=None, rate_limit_first=False):
+        self.calls = []
+        self.updates = list(updates or [])
+        self.rate_limit_first = rate_limit_first
+
+    async def __call__(self, method, params, timeout):
+        self.calls.append((time.monotonic(), method, params))
+        if method == 'getUpdates':
+            await asyncio.sleep(0.01)
+            pending, self.updates = self.updates, []
+            return {'ok': True, 'result': pending}
+        if method == 'sendMessage':
+            if self.rate_limit_first:
+                self.rate_limit_first = False
+                return {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                        'parameters': {'retry_after': 0.2}}
+        return {'ok': True, 'result': {}}
+
+    def sent(self):
+        return [p for _, m, p in self.calls if m == 'sendMessage']
+
+
+def _db():
+    return os.path.join(tempfile.mkdtemp(), 'brain.db')
+
+
+def _run(service, until, timeout=5.0):
+    async def main():
+        task = asyncio.ensure_future(service.run())
+        start = time.time()
+        while not until() and time.time() - start < timeout:
+            await asyncio.sleep(0.02)
+        service.stop()
+        await task
+    asyncio.run(main())
+
+
+def test_enqueue_coalesces_repeated_alerts():
+    db = _db()
+    outbox = TelegramOutbox(db)
+    first = outbox.enqueue("API falhou (1)", '42', key='vision_api:BTC')
+    assert outbox.enqueue("API falhou (2)", '42', key='vision_api:BTC') == first
+    outbox.enqueue("Outro", '42')
+    rows = outbox.due()
+    assert len(rows) == 2
+    assert rows[0][2] == "API falhou (2)" and rows[0][5] == 2
+
+    # Depois de enviado, o próximo com a mesma key espera o cooldown
+    outbox.mark_sent([first])
+    outbox.enqueue("API falhou (3)", '42', key='vision_api:BTC', cooldown=60)
+    assert [r[2] for r in outbox.due()] == ["Outro"]
+    assert len(outbox.due(now=time.time() + 61)) == 2
+
+    assert enqueue_message("via helper", chat_id='42', db_path=db)
+    assert outbox.stats() == {'PENDING': 3, 'SENT': 1}
+
+
+def test_build_batches_joins_per_chat():
+    rows = [
+        (1, '42', 'a', 'Markdown', None, 1, 0),
+        (2, '7', 'x', 'Markdown', None, 1, 0),
+        (3, '42', 'b', 'Markdown', None, 3, 0),
+        (4, '42', 'botões', 'Markdown', '{"inline_keyboard": []}', 1, 0),
+        (5, '42', 'c', 'Markdown', None, 1, 0),
+        (6, '42', 'y' * 4094, 'Markdown', None, 1, 0),
+    ]
+    batches = build_batches(rows)
+    assert [b['ids'] for b in batches] == [[1, 3], [2], [4], [5], [6]]
+    assert batches[0]['text'] == 'a\n\nb\n🔁 3x'
+    assert batches[2]['reply_markup'] == {'inline_keyboard': []}
+
+
+def test_service_sends_batched_and_respects_rate_limits():
+    db = _db()
+    outbox = TelegramOutbox(db)
+    for i in range(5):
+        outbox.enqueue(f"alerta {i}", '42')
+    outbox.enqueue("aprovar?", '42', reply_markup=inline_keyboard([('✅', 'aprov_BTC'), ('❌', 'ignora_BTC')]))
+
+    fake = FakeTelegram(rate_limit_first=True)
+    service = TelegramService('T', '42', db_path=db, transport=fake, poll=False,
+                              chat_interval=0.1, idle_poll=0.05)
+    _run(service, lambda: outbox.stats().get('PENDING', 0) == 0)
+
+    sent = fake.sent()
+    # 1ª tentativa levou 429 -> mesmo lote reenviado após retry_after; depois o da botoeira
+    assert [p['text'].count('alerta') for p in sent] == [5, 5, 0]
+    assert sent[2]['reply_markup']['inline_keyboard'][0][1]['callback_data'] == 'ignora_BTC'
+    times = [t for t, m, _ in fake.calls if m == 'sendMessage']
+    assert times[1] - times[0] >= 0.19
+    assert times[2] - times[1] >= 0.09
+    assert outbox.stats() == {'SENT': 6}
+
+
+def test_commands_and_callbacks_run_in_loop():
+    db = _db()
+    fake = FakeTelegram(updates=[
+        {'update_id': 10, 'message': {'chat': {'id': 42}, 'text': '/status agora'}},
+        {'update_id': 11, 'message': {'chat': {'id': 99}, 'text': '/status'}},       # Outro chat: ignorado
+        {'update_id': 12, 'message': {'chat': {'id': 42}, 'text': '/nada'}},
+        {'update_id': 13, 'callback_query': {'id': 'q1', 'data': 'aprov_BTC',
+                                             'message': {'chat': {'id': 42}, 'message_id': 5}}},
+    ])
+    seen = []
+
+    def status(service, message, args):
+        time.sleep(0.2)              # Handler lento roda em thread
+        seen.append(args)
+        return "📊 ok"
+
+    service = TelegramService('T', '42', db_path=db, transport=fake, chat_interval=0, idle_poll=0.05)
+    service.add_command('/status', status)
+    service.add_callback('aprov_', lambda service, query, data: ("Iniciando", f"✅ *{data}*"))
+    texts = lambda: '\n\n'.join(p['text'] for p in fake.sent())
+    _run(service, lambda: '📊 ok' in texts() and 'desconhecido' in texts())
+
+    methods = [m for _, m, _ in fake.calls]
+    assert seen == [['agora']]
+    assert 'answerCallbackQuery' in methods and 'editMessageText' in methods
+    edit = next(p for _, m, p in fake.calls if m == 'editMessageText')
+    assert edit['text'] == '✅ *aprov_BTC*' and edit['message_id'] == 5
+    assert 'Comando desconhecido' in texts() and '📊 ok' in texts()
+    assert service.offset == 14
+
+
+def test_stop_waits_for_running_dispatch():
+    db = _db()
+    fake = FakeTelegram(updates=[
+        {'update_id': 20, 'callback_query': {'id': 'q2', 'data': 'aprov_ETH',
+                                             'message': {'chat': {'id': 42}, 'message_id': 8}}},
+    ])
+    started, finished = [], []
+
+    def aprovar(service, query, data):
+        started.append(data)
+        time.sleep(0.3)              # Ex. lançando o executor
+        finished.append(data)
+        return "Iniciando", None
+
+    service = TelegramService('T', '42', db_path=db, transport=fake, chat_interval=0, idle_poll=0.05)
+    service.add_callback('aprov_', aprovar)
+    _run(service, lambda: bool(started))          # stop() no meio do handler
+
+    assert finished == ['aprov_ETH']
+    assert any(m == 'answerCallbackQuery' for _, m, _ in fake.calls)
+    assert not service._dispatching
+
+
+def main():
+    print("🧪 TESTE: Telegram service (outbox + loop asyncio)")
+    print("=" * 60)
+    tests = [test_enqueue_coalesces_repeated_alerts, test_build_batches_joins_per_chat,
+             test_service_sends_batched_and_respects_rate_limits, test_commands_and_callbacks_run_in_loop,
+             test_stop_waits_for_running_dispatch]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
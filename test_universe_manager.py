@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Teste do universo dinâmico de pares (universe_manager) e do pipeline de scan
+"""
+
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from universe_manager import UniverseManager
+import scan_pipeline
+from scan_pipeline import ScanPipeline, _BenchFeed
+
+
+def _market(base, swap=True, settle='USDT', active=True):
+    symbol = f"{base}/USDT:USDT" if swap else f"{base}/USDT"
+    return symbol, {'symbol': symbol, 'base': base, 'quote': 'USDT', 'swap': swap, 'linear': swap,
+                    'settle': settle if swap else None, 'active': active}
+
+
+class FakeExchange:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.ticker_calls = 0
+
+    def load_markets(self):
+        return dict([_market('BTC'), _market('ETH'), _market('DOGE'), _market('OLD', active=False),
+                     _market('SOL', swap=False)])
+
+    def fetch_tickers(self, params=None):
+        self.ticker_calls += 1
+        if self.fail:
+            raise ConnectionError("offline")
+        turnover = {'BTC/USDT:USDT': 9e9, 'ETH/USDT:USDT': 5e9, 'DOGE/USDT:USDT': 1e6,
+                    'OLD/USDT:USDT': 8e9, 'SOL/USDT': 7e9}
+        return {s: {'symbol': s, 'info': {'turnover24h': str(t)}} for s, t in turnover.items()}
+
+
+CONFIG = {'pairs': ['XRP/USDT'],
+          'universe': {'enabled': True, 'top_n': 5, 'min_turnover_usdt': 2e6, 'refresh_minutes': 60}}
+
+
+def test_ranks_active_usdt_perpetuals_by_turnover():
+    exchange = FakeExchange()
+    universe = UniverseManager(exchange, CONFIG)
+    assert universe.pairs() == ['BTC/USDT', 'ETH/USDT']
+    assert universe.pairs() == ['BTC/USDT', 'ETH/USDT']
+    assert exchange.ticker_calls == 1                  # Só reavalia após refresh_minutes
+
+
+def test_falls_back_to_config_pairs():
+    assert UniverseManager(FakeExchange(fail=True), CONFIG).pairs() == ['XRP/USDT']
+    assert UniverseManager(FakeExchange(), {'pairs': ['XRP/USDT']}).pairs() == ['XRP/USDT']
+
+    # Config distribuído: universo desligado, vale a lista "pairs" (sem chamar a API)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config_futures.json')) as f:
+        shipped = json.load(f)
+    exchange = FakeExchange()
+    assert UniverseManager(exchange, shipped).pairs() == shipped['pairs'] and exchange.ticker_calls == 0
+
+
+def test_pipeline_runs_prefilter_for_every_item():
+    pipeline = ScanPipeline(_BenchFeed(latency=0), fetch_workers=4, cpu_workers=0)
+    items = [(f"S{i}/USDT", tf) for i in range(10) for tf in ('15m', '1h')]
+    vistos = []
+    list(pipeline.run(items, lambda par, tf, candles: vistos.append((par, tf)) or par == 'S0/USDT'))
+    pipeline.shutdown()
+    assert sorted(vistos) == sorted(items)
+    assert pipeline.last_cycle['analyzed'] == 2
+    assert pipeline.last_cycle['pairs'] == 10
+
+
+def test_pipeline_reports_items_stopped_early():
+    original = scan_pipeline._analisar
+    scan_pipeline._analisar = lambda par, tf, candles: (par, tf, 'PADRAO')     # Todo item tem padrão
+    try:
+        pipeline = ScanPipeline(_BenchFeed(latency=0), fetch_workers=4, cpu_workers=0)
+        items = [(f"S{i}/USDT", '15m') for i in range(6)]
+        marcados, consumidos = [], []
+        resultados = pipeline.run(items, lambda par, tf, candles: marcados.append((par, tf)) or True)
+        for par, tf, candles, padrao in resultados:
+            if len(consumidos) == 2:
+                parado = (par, tf)
+                break                                     # Watchlist cheia
+            consumidos.append((par, tf))
+        resultados.close()
+        # Só o item entregue e não processado volta; o resto nem passou no pré-filtro
+        assert pipeline.unfinished == [parado] and pipeline.last_cycle['unfinished'] == 1
+        assert marcados == consumidos + [parado]
+
+        assert len(list(pipeline.run(items, lambda par, tf, candles: True))) == 6
+        assert pipeline.unfinished == [] and pipeline.last_cycle['unfinished'] == 0
+        pipeline.shutdown()
+    finally:
+        scan_pipeline._analisar = original
+
+
+def main():
+    print("🧪 TESTE: Universo dinâmico e pipeline de scan")
+    print("=" * 60)
+    tests = [test_ranks_active_usdt_perpetuals_by_turnover, test_falls_back_to_config_pairs,
+             test_pipeline_runs_prefilter_for_every_item, test_pipeline_reports_items_stopped_early]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de veredictos da Vision AI (chave por candles fechados, TTL, LRU e estatísticas em lote)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import vision_cache
+from vision_cache import (VisionVerdictCache, make_key, closed_candles, ttl_for_timeframe, DEFAULT_TTL,
+                          STATS_FLUSH_EVERY, STATS_FLUSH_SECONDS)
+
+VALID = {'verdict': 'VALID', 'confidence': 0.9, 'reasoning': 'ok'}
+TEMPLATE = 'Padrão {pattern_name} ({direction}) em {symbol}?'
+M15 = 15 * 60 * 1000
+NOW = 1_700_000_000.0
+OPEN = int(NOW * 1000) // M15 * M15          # Abertura do candle 15m em formação em NOW
+
+
+def _candles(n=50, forming_close=100.0, opened=OPEN):
+    """n candles de 15m; o último abre em `opened` (em formação até opened + 15m)"""
+    rows = [[opened - (n - 1 - i) * M15, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0 + i] for i in range(n)]
+    rows[-1][4] = forming_close
+    return rows
+
+
+class FakeClock:
+    """Substitui o módulo time dentro do vision_cache"""
+
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def _cache(max_entries=100):
+    return VisionVerdictCache(os.path.join(tempfile.mkdtemp(), 'brain.db'), max_entries=max_entries)
+
+
+def _with_clock(test):
+    def run():
+        real, clock = vision_cache.time, FakeClock()
+        vision_cache.time = clock
+        try:
+            test(clock)
+        finally:
+            vision_cache.time = real
+    run.__name__ = test.__name__
+    return run
+
+
+def _key(candles, symbol='BTC/USDT', timeframe='15m', pattern='OCO', template=TEMPLATE, params=None):
+    return make_key(closed_candles(candles, timeframe, NOW * 1000), symbol, timeframe, pattern, template,
+                    params if params is not None else {'direction': 'SHORT'})
+
+
+def test_key_uses_closed_window_and_request():
+    candles = _candles()
+    assert len(closed_candles(candles, '15m', NOW * 1000)) == 49               # Sem o candle em formação
+    assert closed_candles(candles, '15m', OPEN + M15) == candles                 # Fechou: entra na janela
+    assert closed_candles(candles, None, NOW * 1000) == candles                  # Timeframe desconhecido
+
+    key = _key(candles)
+    assert _key(_candles(forming_close=250.0)) == key        # Candle em formação não muda a chave
+    assert _key([list(c) for c in candles]) == key
+    changed = [list(c) for c in candles]
+    changed[10][3] -= 0.5
+    assert _key(changed) != key                               # Qualquer valor de um candle fechado muda
+    assert _key(candles, symbol='ETH/USDT') != key and _key(candles, timeframe='1h') != key
+    assert _key(candles, pattern='TOPO_DUPLO') != key and _key(candles, template=TEMPLATE + ' ') != key
+    assert _key(candles, params={'direction': 'LONG'}) != key
+    assert _key(candles, params={'side': 'buy', 'entry_price': 1.0}) != _key(candles, params={'side': 'buy', 'entry_price': 1.1})
+
+    assert ttl_for_timeframe('15m') == 900 and ttl_for_timeframe('1h') == 3600
+    assert ttl_for_timeframe('4h') == 4 * 3600 and ttl_for_timeframe(None) == DEFAULT_TTL
+
+
+@_with_clock
+def test_hit_until_next_close(clock):
+    cache = _cache()
+    calls = []
+
+    def call():
+        calls.append(1)
+        return VALID
+
+    def ask(candles, source='watchlist'):
+        return cache.cached_call(candles, TEMPLATE, call, source, 'BTC/USDT', '15m', 'OCO', {'direction': 'SHORT'})
+
+    # Título/PNG de cada origem e o candle em formação mudam; a janela fechada não
+    assert ask(_candles(forming_close=101.0)) == VALID
+    clock.now += 60
+    assert ask(_candles(forming_close=103.0), source='raw_sample') == VALID
+    assert len(calls) == 1
+
+    # Próximo fechamento: janela nova (o candle que estava em formação entrou) -> nova consulta
+    clock.now = OPEN / 1000 + 900
+    assert ask(_candles(opened=OPEN + M15)) == VALID
+    assert len(calls) == 2
+
+    # Falha da API (None) não é cacheada
+    assert cache.cached_call(_candles(), 'outro', lambda: None, 'watchlist', 'BTC/USDT', '15m') is None
+    assert cache.cached_call(_candles(), 'outro', call, 'watchlist', 'BTC/USDT', '15m') == VALID
+    assert len(calls) == 3
+
+
+@_with_clock
+def test_ttl_expiry(clock):
+    cache = _cache()
+    cache.put('k', VALID, ttl=ttl_for_timeframe('15m'))
+    clock.now += 899
+    assert cache.get('k') == VALID
+    clock.now += 1                          # Duração do candle de 15m: expirou
+    assert cache.get('k') is None
+
+
+@_with_clock
+def test_lru_eviction(clock):
+    cache = _cache(max_entries=3)
+    for name in ('a', 'b', 'c'):
+        clock.now += 1
+        cache.put(name, {'verdict': name}, ttl=3600)
+    clock.now += 1
+    assert cache.get('a') == {'verdict': 'a'}     # 'a' passa a ser a mais recente
+    clock.now += 1
+    cache.put('d', {'verdict': 'd'}, ttl=3600)
+    assert cache.get('b') is None                 # Acessada há mais tempo: removida
+    for name in ('a', 'c', 'd'):
+        clock.now += 1
+        assert cache.get(name) == {'verdict': name}
+
+    # 'curta' expira antes do próximo put: sai ela, não a LRU ('c')
+    clock.now += 1
+    cache.put('curta', {'verdict': 'x'}, ttl=1)   # Excesso: remove 'a'
+    clock.now += 2
+    cache.put('e', {'verdict': 'e'}, ttl=3600)
+    assert [cache.get(k) is not None for k in ('a', 'curta', 'c', 'd', 'e')] == [False, False, True, True, True]
+
+
+@_with_clock
+def test_stats_by_source(clock):
+    cache = _cache()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 0, 'sources': {}}
+
+    hour = [[OPEN - (50 - i) * 3600 * 1000, 1, 2, 0.5, 1.5, 9] for i in range(50)]
+    for _ in range(3):
+        cache.cached_call(hour, 'w', lambda: VALID, 'watchlist', 'BTC/USDT', '1h')    # 1 miss, 2 hits
+    cache.cached_call(_candles(), 'p', lambda: VALID, 'post_entry', 'ETH/USDT', '15m')  # 1 miss
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 2, 2)
+    assert stats['hit_rate'] == 0.5
+    assert stats['sources'] == {'watchlist': {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3},
+                                'post_entry': {'hits': 0, 'misses': 1, 'hit_rate': 0.0}}
+
+    # Outro processo (nova instância, mesmo banco) vê os mesmos números - é o que /api/vision/cache lê
+    assert VisionVerdictCache(cache.db_path).stats() == stats
+    clock.now += 901
+    assert cache.stats()['entries'] == 1          # Só o de 1h continua válido
+
+
+@_with_clock
+def test_get_does_not_write_until_flush(clock):
+    cache = _cache()
+    cache.put('k', VALID, ttl=3600)
+    created = clock.now
+
+    def stored():
+        conn = sqlite3.connect(cache.db_path)
+        rows = conn.execute("SELECT source, hits, misses FROM vision_cache_stats").fetchall()
+        access = conn.execute("SELECT last_access, hits FROM vision_verdict_cache WHERE key = 'k'").fetchone()
+        conn.close()
+        return rows, access
+
+    reader = VisionVerdictCache(cache.db_path)
+    for i in range(STATS_FLUSH_EVERY - 1):
+        clock.now += 0.01
+        assert cache.get('k' if i % 2 else 'x', 'watchlist') == (VALID if i % 2 else None)
+    assert stored() == ([], (created, 0))                   # Tudo ainda em memória
+    assert reader.stats()['hits'] == 0
+
+    clock.now += 0.01
+    cache.get('k', 'watchlist')                             # Atingiu STATS_FLUSH_EVERY: grava em lote
+    hits = STATS_FLUSH_EVERY // 2
+    rows, (last_access, entry_hits) = stored()
+    assert rows == [('watchlist', hits, STATS_FLUSH_EVERY - hits)]
+    assert entry_hits == hits and last_access == clock.now
+
+    # Poucas consultas: gravadas quando passa STATS_FLUSH_SECONDS
+    cache.get('x', 'raw_sample')
+    assert reader.stats()['sources'].get('raw_sample') is None
+    clock.now += STATS_FLUSH_SECONDS
+    cache.get('x', 'raw_sample')
+    assert reader.stats()['sources']['raw_sample'] == {'hits': 0, 'misses': 2, 'hit_rate': 0.0}
+
+
+def main():
+    print("🧪 TESTE: Vision cache")
+    print("=" * 60)
+    tests = [test_key_uses_closed_window_and_request, test_hit_until_next_close, test_ttl_expiry, test_lru_eviction,
+             test_stats_by_source, test_get_does_not_write_until_flush]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
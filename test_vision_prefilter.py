@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Teste do pré-filtro local da Vision AI (limiares de ACCEPT/REJECT automáticos)
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from lib_padroes import AnalistaTecnico
+from vision_prefilter import (prefilter_watchlist, prefilter_post_entry, pivot_symmetry, _structure_score,
+                              ACCEPT, REJECT, ESCALATE, PRE_ACCEPT_SCORE, PRE_REJECT_SCORE)
+
+TF_MS = 15 * 60 * 1000
+
+# OCO: ombro esquerdo (15), cabeça (32), ombro direito (45) e queda até perto da neckline
+OCO_KNOTS = [(0, 100), (15, 110), (22, 104), (32, 116), (38, 104), (45, 110), (65, 105)]
+
+
+def _serie(knots, volume_up=True):
+    """Fechamentos interpolados entre os pontos; pavio fixo de 0.3"""
+    xs, ys = zip(*knots)
+    close = np.interp(np.arange(xs[-1] + 1), xs, ys)
+    volume = np.full(len(close), 1000.0)
+    volume[-20:] = np.linspace(1000, 2000, 20) if volume_up else np.linspace(2000, 1000, 20)
+    return [[i * TF_MS, c, c + 0.3, c - 0.3, c, v] for i, (c, v) in enumerate(zip(close, volume))]
+
+
+def _pattern_data(candles):
+    padrao = AnalistaTecnico().analisar_par('TEST/USDT', candles)
+    return {'padrao': padrao.nome, 'direcao': padrao.direcao, 'neckline': padrao.neckline_price,
+            'stop_loss': padrao.stop_loss_price, 'target': padrao.target_price}
+
+
+def test_clean_oco_is_accepted_locally():
+    candles = _serie(OCO_KNOTS)
+    data = _pattern_data(candles)
+    assert data['padrao'] == 'OCO' and data['direcao'] == 'SHORT'
+
+    decision = prefilter_watchlist(candles, data, 'TEST/USDT')
+    assert decision.decision == ACCEPT and decision.score >= PRE_ACCEPT_SCORE
+    # Simetria dos OMBROS (110 x 110), não cabeça x ombro direito (116 x 110)
+    assert decision.features['pivot_symmetry'] == 1.0
+    assert decision.as_verdict()['verdict'] == 'VALID'
+
+
+def test_symmetry_follows_detector_pivots():
+    candles = np.array(_serie([(0, 100), (15, 110), (22, 104), (32, 116), (38, 104), (45, 107.8), (65, 105)]))
+    highs, lows = candles[:, 2], candles[:, 3]
+    # Ombros 110.3 x 108.1: 2% de diferença com tolerância de 8% -> 0.75
+    assert abs(pivot_symmetry(highs, lows, 'OCO') - (1 - (2.2 / 110.3) / 0.08)) < 1e-9
+    # Topos 110/116/108 não formam topo duplo (>3%) -> 0; os fundos 104/104 formam
+    assert pivot_symmetry(highs, lows, 'TOPO_DUPLO') == 0.0
+    assert pivot_symmetry(highs, lows, 'FUNDO_DUPLO') == 1.0
+    # Triângulos/cunhas não têm simetria de pivôs: fica fora do score
+    assert pivot_symmetry(highs, lows, 'TRIANGULO_SIMETRICO') is None
+    base = {'r2': 0.9, 'slope_aligned': True, 'volume_trend': 0.5, 'neckline_r': -0.2}
+    assert abs(_structure_score(dict(base, pivot_symmetry=None)) - (0.225 + 0.075 + 0.2) / 0.65) < 1e-9
+
+
+def test_reject_thresholds():
+    candles = _serie(OCO_KNOTS)
+    data = _pattern_data(candles)
+
+    acima_do_stop = dict(data, stop_loss=104.5)
+    assert prefilter_watchlist(candles, acima_do_stop, check_detection=False).decision == REJECT
+
+    alem_da_neckline = dict(data, neckline=107.0, stop_loss=108.0)    # 2R abaixo da neckline (SHORT)
+    decision = prefilter_watchlist(candles, alem_da_neckline, check_detection=False)
+    assert decision.decision == REJECT and 'além da neckline' in decision.reason
+
+    outro_padrao = dict(data, padrao='TOPO_DUPLO')
+    decision = prefilter_watchlist(candles, outro_padrao, 'TEST/USDT')
+    assert decision.decision == REJECT and decision.features['detected'] is False
+
+    # Alta contra o SHORT, volume caindo, preço colado no stop e sem ombros: estrutura fraca
+    subindo = _serie([(0, 100), (60, 108)], volume_up=False)
+    fraca = {'padrao': 'OCO', 'direcao': 'SHORT', 'neckline': 100.0, 'stop_loss': 109.0, 'target': 91.0}
+    decision = prefilter_watchlist(subindo, fraca, check_detection=False)
+    assert decision.decision == REJECT and decision.score <= PRE_REJECT_SCORE
+    assert decision.as_verdict()['verdict'] == 'INVALID'
+
+
+def test_post_entry_decisions():
+    candles = _serie(OCO_KNOTS)
+    data = _pattern_data(candles)
+    # Posição vendida em 105: metade do caminho até o alvo -> mantém sem Vision AI
+    alvo = dict(data, neckline=115.0, target=95.0)
+    assert prefilter_post_entry(candles, 'sell', 105.0, alvo).decision == ACCEPT
+    # Pouco acima da neckline (0.1R): ambíguo -> Vision AI
+    assert prefilter_post_entry(candles, 'sell', 105.0, dict(data, neckline=104.0)).decision == ESCALATE
+    assert prefilter_post_entry(candles, 'sell', 105.0, {}).decision == ESCALATE
+    # Voltou 0.9R acima da neckline com alta consistente: fecha sem Vision AI
+    subindo = _serie([(0, 100), (60, 108)])
+    decision = prefilter_post_entry(subindo, 'sell', 100.0, {'neckline': 100.0, 'stop_loss': 109.0, 'target': 91.0})
+    assert decision.decision == REJECT and decision.as_verdict()['verdict'] == 'INVALID'
+
+
+def main():
+    print("🧪 TESTE: Pré-filtro da Vision AI")
+    print("=" * 60)
+    tests = [test_clean_oco_is_accepted_locally, test_symmetry_follows_detector_pivots,
+             test_reject_thresholds, test_post_entry_decisions]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
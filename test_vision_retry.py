@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Teste da fila de retry da Vision AI (vision_retry) com relógio falso
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import vision_retry
+from vision_retry import VisionRetryQueue, backoff_seconds, MAX_ATTEMPTS, BACKOFF_BASE, BACKOFF_MAX
+from brain_watermark import TrainingWatermark
+
+T0 = 1_700_000_000
+
+
+class FakeTime:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def _with_clock(test):
+    def run():
+        real, fake = vision_retry.time, FakeTime(T0)
+        vision_retry.time = fake
+        try:
+            test(fake)
+        finally:
+            vision_retry.time = real
+    run.__name__ = test.__name__
+    return run
+
+
+def _db(n, detected=T0):
+    """n amostras PENDING no esquema antigo (sem as colunas de retry)"""
+    path = os.path.join(tempfile.mkdtemp(), 'brain.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE raw_samples (id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT, "
+                 "timestamp_detection INTEGER, status TEXT)")
+    conn.executemany("INSERT INTO raw_samples (symbol, timestamp_detection, status) VALUES (?, ?, 'PENDING')",
+                     [(f"S{i}/USDT", detected) for i in range(n)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _status(path, sample_id):
+    conn = sqlite3.connect(path)
+    row = conn.execute("SELECT status, vision_attempts FROM raw_samples WHERE id = ?", (sample_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def test_backoff_schedule():
+    assert [backoff_seconds(a) for a in range(1, 5)] == [BACKOFF_BASE * k for k in (1, 2, 4, 8)]
+    assert backoff_seconds(30) == BACKOFF_MAX
+
+
+@_with_clock
+def test_failed_sample_backs_off_then_errors(clock):
+    path = _db(7)
+    queue = VisionRetryQueue(path)
+    assert [r['id'] for r in queue.pending(limit=5)] == [1, 2, 3, 4, 5]
+
+    # #1 falha: sai da fila durante o backoff e não trava a cabeça (LIMIT 5)
+    assert queue.failed(1, "timeout") == 'PENDING'
+    assert [r['id'] for r in queue.pending(limit=5)] == [2, 3, 4, 5, 6]
+    clock.now += BACKOFF_BASE - 1
+    assert 1 not in [r['id'] for r in queue.pending(limit=5)]
+    clock.now += 1
+    assert queue.pending(limit=5)[0]['id'] == 1
+
+    for attempt in range(2, MAX_ATTEMPTS):
+        assert queue.failed(1, "timeout") == 'PENDING'
+        assert _status(path, 1) == ('PENDING', attempt)
+        clock.now += backoff_seconds(attempt)
+    assert queue.failed(1, "timeout") == 'ERROR'
+    assert _status(path, 1) == ('ERROR', MAX_ATTEMPTS)
+
+    clock.now += BACKOFF_MAX
+    assert [r['id'] for r in queue.pending(limit=10)] == [2, 3, 4, 5, 6, 7]
+    assert queue.failed(1, "tarde") is None                 # Terminal: nada muda
+
+
+@_with_clock
+def test_processed_sample_is_left_alone(clock):
+    path = _db(1)
+    queue = VisionRetryQueue(path)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE raw_samples SET status = 'PROCESSED' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    assert queue.failed(1, "resultado atrasado") is None
+    assert _status(path, 1) == ('PROCESSED', 0)
+    VisionRetryQueue(path)                                  # Colunas já existem: idempotente
+
+
+@_with_clock
+def test_error_sample_does_not_hold_the_watermark(clock):
+    detected = int(time.time())                             # Relógio real do watermark
+    path = _db(1, detected)
+    queue = VisionRetryQueue(path)
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO raw_samples (symbol, timestamp_detection, status) VALUES ('X', ?, 'PROCESSED')",
+                     [(detected,)] * 3)
+    conn.commit()
+    conn.close()
+
+    wm = TrainingWatermark(path)
+    assert wm.pending()['samples'] == 0                     # #1 PENDING recente segura o topo
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        queue.failed(1, "sem resposta")
+        clock.now += backoff_seconds(attempt)
+    assert _status(path, 1)[0] == 'ERROR'
+    assert wm.pending()['samples'] == 3 and wm.pending()['sample_hi'] == 4
+
+
+def main():
+    print("🧪 TESTE: Vision retry (backoff e ERROR)")
+    print("=" * 60)
+    tests = [test_backoff_schedule, test_failed_sample_backs_off_then_errors, test_processed_sample_is_left_alone,
+             test_error_sample_does_not_hold_the_watermark]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
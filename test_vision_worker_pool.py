@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste do VisionWorkerPool contra o servidor stub (sem Gemini)
+"""
+
+import sys
+import os
+import time
+import socket
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from vision_worker_pool import VisionWorkerPool
+from vision_stub_server import start_stub_server, StubVisionModel
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_concurrent_calls_against_stub():
+    port = _free_port()
+    server = start_stub_server(port, delay=0.3, verdict='INVALID', confidence=0.8)
+    model = StubVisionModel(f"http://127.0.0.1:{port}")
+    pool = VisionWorkerPool(lambda s: model.generate_content([s, b'png']).text, max_concurrency=4, timeout=5)
+    try:
+        start = time.time()
+        for i in range(8):
+            assert pool.submit(f"PAR{i}", f"PAR{i}/USDT")
+        # Mesma chave pendente não entra de novo
+        assert not pool.submit("PAR0", "PAR0/USDT")
+        assert pool.wait_idle(5)
+        elapsed = time.time() - start
+
+        results = pool.drain()
+        assert len(results) == 8 and all(r.ok for r in results)
+        assert '"INVALID"' in results[0].value
+        # 8 chamadas de 0.3s com 4 em paralelo: ~0.6s, não 2.4s
+        assert elapsed < 1.8
+        assert server.stub_requests == 8
+    finally:
+        pool.shutdown()
+        server.shutdown()
+
+
+def test_timeout_and_errors_go_to_queue():
+    def lento(segundos):
+        time.sleep(segundos)
+        return True
+
+    def quebra():
+        raise RuntimeError("boom")
+
+    pool = VisionWorkerPool(lento, max_concurrency=2, timeout=0.2)
+    erro = VisionWorkerPool(quebra, timeout=1)
+    try:
+        pool.submit('rapido', 0.01, context={'padrao': 'OCO'})
+        pool.submit('lento', 1.0)
+        erro.submit('x')
+        assert pool.wait_idle(2) and erro.wait_idle(2)
+
+        results = {r.key: r for r in pool.drain()}
+        assert results['rapido'].ok and results['rapido'].value is True
+        assert results['rapido'].context == {'padrao': 'OCO'}
+        assert not results['lento'].ok and results['lento'].error == 'timeout'
+        assert pool.stats['timeouts'] == 1
+
+        falha = erro.drain()[0]
+        assert not falha.ok and 'boom' in falha.error
+        # Chave liberada após o resultado: pode ser reenviada
+        assert pool.submit('lento', 0.01)
+    finally:
+        pool.shutdown()
+        erro.shutdown()
+
+
+def test_timed_out_key_stays_pending_until_thread_ends():
+    inicios = {}
+
+    def lento(nome, segundos):
+        inicios[nome] = time.time()
+        time.sleep(segundos)
+        return nome
+
+    pool = VisionWorkerPool(lento, max_concurrency=1, timeout=0.1)
+    try:
+        t0 = time.time()
+        assert pool.submit('BTC', 'BTC', 0.6)
+        assert pool.submit('ETH', 'ETH', 0.01)
+        while not pool.drain():
+            time.sleep(0.01)
+        # Timeout entregue, mas a thread ainda roda: nada de reenvio nem novo slot
+        assert time.time() - t0 < 0.5
+        assert pool.is_pending('BTC') and not pool.submit('BTC', 'BTC', 0.01)
+        assert 'ETH' not in inicios
+
+        assert pool.wait_idle(2)
+        assert inicios['ETH'] - t0 >= 0.55          # Só começou quando a thread do BTC acabou
+        assert [r.key for r in pool.drain()] == ['ETH']
+        assert pool.stats['timeouts'] == 1 and pool.submit('BTC', 'BTC', 0.01)
+    finally:
+        pool.shutdown()
+
+
+def main():
+    print("🧪 TESTE: Vision Worker Pool")
+    print("=" * 60)
+    tests = [test_concurrent_calls_against_stub, test_timeout_and_errors_go_to_queue,
+             test_timed_out_key_stays_pending_until_thread_ends]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
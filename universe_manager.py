@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+🌐 UNIVERSE MANAGER - Universo de pares dinâmico (perpétuos USDT da Bybit)
+
+Substitui a lista fixa de 30 pares do config_futures.json:
+- load_markets(): todos os perpétuos lineares USDT ativos
+- 1 fetch_tickers() (category=linear): ranking por turnover 24h (USDT)
+- Top N (config "universe.top_n", pode ser centenas) acima de um turnover
+  mínimo, reavaliado a cada "refresh_minutes"
+- Falha de rede ou "enabled": false -> lista "pairs" do config
+
+Pares no formato usado pelo resto do bot ("BTC/USDT"; o defaultType linear
+da exchange resolve para o perpétuo).
+
+Uso:
+    python3 universe_manager.py           # mostra o ranking atual
+    python3 universe_manager.py --top 50
+"""
+
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("UniverseManager")
+
+DEFAULT_TOP_N = 100
+DEFAULT_MIN_TURNOVER = 5_000_000     # USDT em 24h
+DEFAULT_REFRESH_MINUTES = 60
+
+
+def pair_name(market: dict) -> str:
+    return f"{market['base']}/{market['quote']}"
+
+
+def is_usdt_perpetual(market: dict) -> bool:
+    return bool(
+        market.get('swap') and market.get('linear')
+        and market.get('settle') == 'USDT' and market.get('quote') == 'USDT'
+        and market.get('active', True) is not False
+    )
+
+
+def ticker_turnover(ticker: dict) -> float:
+    """Turnover 24h em USDT (campo nativo da Bybit, senão quoteVolume do ccxt)"""
+    info = ticker.get('info') or {}
+    for value in (info.get('turnover24h'), ticker.get('quoteVolume')):
+        try:
+            if value is not None:
+                return float(value)
+        except (TypeError, ValueError):
+            continue
+    return 0.0
+
+
+class UniverseManager:
+    """
+        universe = UniverseManager(exchange, config)
+        pares = universe.pairs()     # reavalia se passou refresh_minutes
+    """
+
+    def __init__(self, exchange, config: Optional[dict] = None):
+        config = config or {}
+        cfg = config.get('universe', {})
+        self.exchange = exchange
+        self.enabled = cfg.get('enabled', False)
+        self.top_n = int(cfg.get('top_n', DEFAULT_TOP_N))
+        self.min_turnover = float(cfg.get('min_turnover_usdt', DEFAULT_MIN_TURNOVER))
+        self.refresh_seconds = float(cfg.get('refresh_minutes', DEFAULT_REFRESH_MINUTES)) * 60
+        self.exclude = set(cfg.get('exclude', []))
+        self.fallback = list(config.get('pairs', []))
+
+        self._lock = threading.Lock()
+        self._pairs: List[str] = []
+        self._turnover: Dict[str, float] = {}
+        self._updated_at = 0.0
+
+    def rank(self) -> List[tuple]:
+        """[(par, turnover)] de todos os perpétuos USDT, maior turnover primeiro"""
+        markets = self.exchange.load_markets()
+        perpetuals = {m['symbol']: pair_name(m) for m in markets.values() if is_usdt_perpetual(m)}
+        tickers = self.exchange.fetch_tickers(params={'category': 'linear'})
+
+        ranking = {}
+        for symbol, ticker in tickers.items():
+            par = perpetuals.get(symbol)
+            if par and par not in self.exclude:
+                ranking[par] = max(ranking.get(par, 0.0), ticker_turnover(ticker))
+        return sorted(ranking.items(), key=lambda kv: kv[1], reverse=True)
+
+    def refresh(self) -> List[str]:
+        try:
+            ranking = self.rank()
+            selected = [(p, t) for p, t in ranking if t >= self.min_turnover][:self.top_n]
+            if not selected:
+                raise ValueError("nenhum par acima do turnover mínimo")
+            with self._lock:
+                self._pairs = [p for p, _ in selected]
+                self._turnover = dict(selected)
+                self._updated_at = time.time()
+            logger.info(f"🌐 Universo: {len(self._pairs)}/{len(ranking)} perpétuos USDT "
+                        f"(turnover ≥ {self.min_turnover:,.0f} USDT)")
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao atualizar universo ({e}); mantendo lista anterior")
+            with self._lock:
+                self._updated_at = time.time()  # Não martela a API; tenta no próximo refresh
+        return self.pairs(refresh=False)
+
+    def pairs(self, refresh: bool = True) -> List[str]:
+        if not self.enabled:
+            return list(self.fallback)
+        if refresh and time.time() - self._updated_at >= self.refresh_seconds:
+            return self.refresh()
+        with self._lock:
+            return list(self._pairs) or list(self.fallback)
+
+    def turnover(self, par: str) -> float:
+        with self._lock:
+            return self._turnover.get(par, 0.0)
+
+
+if __name__ == "__main__":
+    import json
+    import ccxt
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Ranking de perpétuos USDT por turnover 24h")
+    parser.add_argument('--top', type=int, default=None, help="Quantidade de pares (padrão: config)")
+    args = parser.parse_args()
+
+    with open('config_futures.json', 'r') as f:
+        config = json.load(f)
+    exchange = ccxt.bybit({'enableRateLimit': True, 'options': {'defaultType': 'linear'}})
+    universe = UniverseManager(exchange, config)
+
+    ranking = universe.rank()
+    top = args.top or universe.top_n
+    print(f"🌐 {len(ranking)} perpétuos USDT | top {top}:")
+    for i, (par, turnover) in enumerate(ranking[:top], 1):
+        print(f"  {i:>3}. {par:<16} {turnover / 1e6:>12,.1f} M USDT")
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+🗃️ VISION CACHE - Cache de veredictos da Vision AI endereçado por conteúdo
+
+O mesmo gráfico de um par/timeframe vai várias vezes para o Gemini (watchlist a
+cada fechamento, raw sample, pós-entrada a cada ciclo) sem mudança estrutural.
+
+- Chave: sha256 da janela de candles FECHADOS (OHLCV float64) + symbol/timeframe
+  + padrão + template do prompt (+ parâmetros do prompt, ex. direção e entrada).
+  Os bytes do PNG não servem: incluem o candle em formação e o título de cada
+  origem, então nunca se repetiam
+- TTL: duração do candle do timeframe (no próximo fechamento a janela muda)
+- LRU: acima de max_entries remove as entradas acessadas há mais tempo
+- Persistido no sniper_brain.db (tabelas vision_verdict_cache / vision_cache_stats),
+  então o dashboard lê a taxa de acerto de todos os processos
+- Hits/misses e last_access ficam em memória e vão para o banco em lote
+  (a cada STATS_FLUSH_EVERY consultas ou STATS_FLUSH_SECONDS): get() só lê
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from brain_simulator import TIMEFRAME_MINUTES
+
+logger = logging.getLogger("VisionCache")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, 'sniper_brain.db')
+MAX_ENTRIES = 5000
+DEFAULT_TTL = 15 * 60
+STATS_FLUSH_EVERY = 50        # Consultas acumuladas antes de gravar hits/misses
+STATS_FLUSH_SECONDS = 60      # Atraso máximo das estatísticas vistas pelo dashboard
+
+
+def closed_candles(candles: Sequence, timeframe: Optional[str], now_ms: Optional[float] = None) -> list:
+    """Só os candles cujo período já terminou (remove o candle em formação)"""
+    minutes = TIMEFRAME_MINUTES.get(timeframe)
+    if not minutes:
+        return list(candles)
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    bar_ms = minutes * 60 * 1000
+    return [c for c in candles if c[0] + bar_ms <= now_ms]
+
+
+def make_key(candles: Sequence, symbol: Optional[str], timeframe: Optional[str], pattern: Optional[str],
+             prompt_template: str, params: Optional[Dict] = None) -> str:
+    """
+    candles: janela já restrita aos candles fechados (closed_candles)
+    params: valores interpolados no template que não estão no resto da chave
+    """
+    h = hashlib.sha256()
+    h.update(np.asarray([row[:6] for row in candles], dtype=np.float64).tobytes())
+    header = json.dumps([symbol, timeframe, pattern, prompt_template, params or {}], sort_keys=True, default=str)
+    h.update(b'\x00')
+    h.update(header.encode('utf-8'))
+    return h.hexdigest()
+
+
+def ttl_for_timeframe(timeframe: Optional[str]) -> int:
+    minutes = TIMEFRAME_MINUTES.get(timeframe)
+    return minutes * 60 if minutes else DEFAULT_TTL
+
+
+class VisionVerdictCache:
+    def __init__(self, db_path: str = DB_PATH, max_entries: int = MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: Dict[str, list] = {}           # source -> [hits, misses] ainda não gravados
+        self._accessed: Dict[str, list] = {}         # key -> [last_access, hits] ainda não gravados
+        self._pending = 0
+        self._flushed_at = time.time()
+        self._init_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_tables(self):
+        try:
+            conn = self._connect()
+            c = conn.cursor()
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS vision_verdict_cache (
+                    key TEXT PRIMARY KEY,
+                    source TEXT,
+                    symbol TEXT,
+                    timeframe TEXT,
+                    verdict_json TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_vision_cache_access ON vision_verdict_cache(last_access)')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS vision_cache_stats (
+                    source TEXT PRIMARY KEY,
+                    hits INTEGER DEFAULT 0,
+                    misses INTEGER DEFAULT 0
+                )
+            ''')
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erro ao criar tabelas do cache: {e}")
+
+    def _count(self, source: str, key: str, hit: bool, now: float):
+        with self._lock:
+            counts = self._counts.setdefault(source, [0, 0])
+            counts[0 if hit else 1] += 1
+            if hit:
+                access = self._accessed.setdefault(key, [now, 0])
+                access[0] = now
+                access[1] += 1
+            self._pending += 1
+            due = self._pending >= STATS_FLUSH_EVERY or now - self._flushed_at >= STATS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def _take_pending(self):
+        with self._lock:
+            counts, accessed = self._counts, self._accessed
+            self._counts, self._accessed = {}, {}
+            self._pending = 0
+            self._flushed_at = time.time()
+        return counts, accessed
+
+    def _write_pending(self, conn, counts: Dict[str, list], accessed: Dict[str, list]):
+        conn.executemany("INSERT OR IGNORE INTO vision_cache_stats (source) VALUES (?)", [(s,) for s in counts])
+        conn.executemany(
+            "UPDATE vision_cache_stats SET hits = hits + ?, misses = misses + ? WHERE source = ?",
+            [(hits, misses, source) for source, (hits, misses) in counts.items()]
+        )
+        conn.executemany(
+            "UPDATE vision_verdict_cache SET last_access = MAX(last_access, ?), hits = hits + ? WHERE key = ?",
+            [(last_access, hits, key) for key, (last_access, hits) in accessed.items()]
+        )
+
+    def flush(self):
+        """Grava hits/misses e acessos acumulados em memória (uma transação)"""
+        counts, accessed = self._take_pending()
+        if not counts and not accessed:
+            return
+        try:
+            conn = self._connect()
+            self._write_pending(conn, counts, accessed)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erro ao gravar estatísticas do cache: {e}")
+
+    # ============================================================
+    # GET / PUT
+    # ============================================================
+    def get(self, key: str, source: str = 'default') -> Optional[Dict]:
+        try:
+            now = time.time()
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT verdict_json FROM vision_verdict_cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erro ao ler cache: {e}")
+            return None
+        self._count(source, key, row is not None, now)
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, verdict: Dict, ttl: float, source: str = 'default',
+            symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        counts, accessed = self._take_pending()      # LRU precisa dos acessos recentes
+        try:
+            now = time.time()
+            conn = self._connect()
+            self._write_pending(conn, counts, accessed)
+            conn.execute('''
+                INSERT OR REPLACE INTO vision_verdict_cache
+                (key, source, symbol, timeframe, verdict_json, created_at, expires_at, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ''', (key, source, symbol, timeframe, json.dumps(verdict), now, now + ttl, now))
+            self._evict(conn, now)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erro ao gravar cache: {e}")
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM vision_verdict_cache WHERE expires_at <= ?", (now,))
+        excess = conn.execute("SELECT COUNT(*) FROM vision_verdict_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute('''
+                DELETE FROM vision_verdict_cache WHERE key IN (
+                    SELECT key FROM vision_verdict_cache ORDER BY last_access ASC LIMIT ?
+                )
+            ''', (excess,))
+
+    def cached_call(self, candles: Sequence, prompt_template: str, call: Callable[[], Optional[Dict]],
+                    source: str = 'default', symbol: Optional[str] = None,
+                    timeframe: Optional[str] = None, pattern: Optional[str] = None,
+                    params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Veredicto do cache ou de call() (a chamada real ao modelo).
+        candles: os mesmos candles do gráfico; o candle em formação fica fora da chave.
+        Respostas None (falha de API) não são cacheadas.
+        """
+        key = make_key(closed_candles(candles, timeframe), symbol, timeframe, pattern, prompt_template, params)
+        cached = self.get(key, source)
+        if cached is not None:
+            logger.info(f"🗃️ Vision cache HIT ({source}) {symbol or ''} {timeframe or ''}")
+            return cached
+
+        result = call()
+        if result is not None:
+            self.put(key, result, ttl_for_timeframe(timeframe), source, symbol, timeframe)
+        return result
+
+    # ============================================================
+    # ESTATÍSTICAS
+    # ============================================================
+    def stats(self) -> Dict:
+        self.flush()
+        try:
+            conn = self._connect()
+            rows = conn.execute("SELECT source, hits, misses FROM vision_cache_stats").fetchall()
+            entries = conn.execute(
+                "SELECT COUNT(*) FROM vision_verdict_cache WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+            conn.close()
+        except Exception as e:
+            logger.error(f"Erro ao ler estatísticas do cache: {e}")
+            return {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'entries': 0, 'sources': {}}
+
+        sources = {}
+        for source, hits, misses in rows:
+            total = hits + misses
+            sources[source] = {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+        hits = sum(s['hits'] for s in sources.values())
+        misses = sum(s['misses'] for s in sources.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': entries,
+            'sources': sources
+        }
+
+
+_cache_instance = None
+
+
+def get_vision_cache(db_path: str = DB_PATH) -> VisionVerdictCache:
+    """Singleton por processo"""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = VisionVerdictCache(db_path)
+        atexit.register(_cache_instance.flush)
+    return _cache_instance
+
+
+if __name__ == "__main__":
+    stats = get_vision_cache().stats()
+    print(f"🗃️ Vision cache: {stats['entries']} entradas | hit rate {stats['hit_rate']:.1%} "
+          f"({stats['hits']} hits / {stats['misses']} misses)")
+    for source, s in stats['sources'].items():
+        print(f"   {source:<12} {s['hit_rate']:.1%} ({s['hits']}/{s['hits'] + s['misses']})")
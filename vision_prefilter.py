@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+🔬 VISION PREFILTER - Triagem local antes de chamar o Gemini
+
+Calcula features estruturais em NumPy e decide sozinho os casos óbvios:
+
+- ACCEPT   -> veredicto VALID local (sem chamada remota)
+- REJECT   -> veredicto INVALID local
+- ESCALATE -> ambíguo, vai para a Vision AI
+
+Features:
+- neckline_r / stop_r: distância do preço à neckline e ao stop em múltiplos
+  do risco (|neckline - stop|), no sentido do trade
+- target_progress: fração do caminho neckline -> alvo já percorrida
+- slope/r²: regressão dos fechamentos recentes, alinhada à direção
+- pivot_symmetry: simetria dos pivôs que o AnalistaTecnico usa no padrão
+  (ombros no OCO/OCO_INVERTIDO, topos/fundos nos duplos), 0 no limite da
+  tolerância do detector; None em padrões sem simetria (triângulos,
+  cunhas, bandeiras) - aí o score usa só as demais features
+- volume_trend: inclinação do volume normalizada pela média
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from scipy.signal import argrelextrema
+
+from lib_padroes import AnalistaTecnico
+
+logger = logging.getLogger("VisionPrefilter")
+
+ACCEPT = 'ACCEPT'
+REJECT = 'REJECT'
+ESCALATE = 'ESCALATE'
+
+TREND_WINDOW = 20
+PIVOT_ORDER = 3
+
+# Watchlist (pré-entrada)
+PRE_ACCEPT_SCORE = 0.80
+PRE_REJECT_SCORE = 0.25
+PRE_MAX_BEYOND_NECKLINE_R = 1.0   # Já andou mais de 1R além da neckline: entrada perdida
+
+# Pós-entrada
+POST_ACCEPT_PROGRESS = 0.5        # Mesma marca do break-even do executor
+POST_REJECT_AGAINST_R = 0.6       # Voltou 0.6R contra a neckline...
+POST_REJECT_MIN_R2 = 0.5          # ...com tendência contrária consistente
+
+# Confiança reportada nos veredictos locais (passa no limiar de 0.85 do pós-entrada,
+# que ainda exige 2 candles INVALID seguidos)
+LOCAL_CONFIDENCE = 0.9
+
+_analista = None
+
+
+def _get_analista() -> AnalistaTecnico:
+    global _analista
+    if _analista is None:
+        _analista = AnalistaTecnico()
+    return _analista
+
+
+@dataclass
+class PrefilterDecision:
+    decision: str
+    score: float
+    reason: str
+    features: Dict = field(default_factory=dict)
+
+    def as_verdict(self) -> Optional[Dict]:
+        """Formato do JSON da Vision AI; None quando precisa escalar"""
+        if self.decision == ESCALATE:
+            return None
+        return {
+            'verdict': 'VALID' if self.decision == ACCEPT else 'INVALID',
+            'confidence': LOCAL_CONFIDENCE,
+            'reasoning': f"Pré-filtro local: {self.reason}",
+            'source': 'prefilter'
+        }
+
+
+# Padrão -> (lado dos pivôs, pivôs considerados, distância mín/máx, chave da tolerância)
+SYMMETRY_RULES = {
+    'OCO': ('high', 5, 10, 100, 'ombros'),
+    'OCO_INVERTIDO': ('low', 5, 10, 100, 'ombros'),
+    'TOPO_DUPLO': ('high', 4, 8, 60, 'duplos'),
+    'FUNDO_DUPLO': ('low', 4, 8, 60, 'duplos'),
+}
+
+
+def pivot_symmetry(highs: np.ndarray, lows: np.ndarray, pattern: Optional[str]) -> Optional[float]:
+    """
+    1 - diferença / tolerância do detector, sobre os mesmos pivôs e regras de
+    verificar_oco*/verificar_*_duplo. 0.0 se a formação não existe mais;
+    None se o padrão não tem simetria de pivôs.
+    """
+    rule = SYMMETRY_RULES.get(pattern or '')
+    if rule is None:
+        return None
+    side, last, min_dist, max_dist, tol_key = rule
+    tolerance = _get_analista().tolerancia_simetria[tol_key]
+    series = highs if side == 'high' else lows
+    comparator = np.greater_equal if side == 'high' else np.less_equal
+    idx = argrelextrema(series, comparator, order=PIVOT_ORDER)[0][-last:]
+    pivots = [(int(i), float(series[i])) for i in idx]
+
+    if tol_key == 'ombros':
+        for (i1, p1), (_, p2), (i3, p3) in zip(pivots, pivots[1:], pivots[2:]):
+            head = p2 > p1 and p2 > p3 if side == 'high' else p2 < p1 and p2 < p3
+            diff = abs(p1 - p3) / max(p1, p3)
+            if head and diff <= tolerance and min_dist <= i3 - i1 <= max_dist:
+                return float(max(0.0, 1.0 - diff / tolerance))
+    else:
+        for (i1, p1), (i2, p2) in zip(pivots, pivots[1:]):
+            diff = abs(p1 - p2) / max(p1, p2)
+            if diff <= tolerance and min_dist <= i2 - i1 <= max_dist:
+                return float(max(0.0, 1.0 - diff / tolerance))
+    return 0.0
+
+
+def extract_features(candles: Sequence[Sequence[float]], direction: str,
+                     neckline: float, stop_loss: float, target: Optional[float] = None,
+                     pattern: Optional[str] = None) -> Dict:
+    """Features estruturais de candles ccxt [[ts, o, h, l, c, v], ...]"""
+    data = np.asarray(candles, dtype=np.float64)
+    highs, lows, closes, volumes = data[:, 2], data[:, 3], data[:, 4], data[:, 5]
+    sign = 1.0 if direction.upper() in ('LONG', 'BUY') else -1.0
+    price = closes[-1]
+
+    risk = abs(neckline - stop_loss) or abs(neckline) * 0.01 or 1.0
+    features = {
+        'price': float(price),
+        'neckline_r': float(sign * (price - neckline) / risk),
+        'stop_r': float(sign * (price - stop_loss) / risk),
+    }
+
+    if target is not None and target != neckline:
+        features['target_progress'] = float((price - neckline) / (target - neckline))
+    else:
+        features['target_progress'] = 0.0
+
+    analista = _get_analista()
+    slope, r2 = analista.calcular_tendencia(closes[-TREND_WINDOW:])
+    features['slope_aligned'] = bool(sign * slope > 0)
+    features['r2'] = float(r2)
+
+    features['pivot_symmetry'] = pivot_symmetry(highs, lows, pattern)
+
+    vol = volumes[-TREND_WINDOW:]
+    mean_vol = vol.mean() if len(vol) else 0.0
+    if mean_vol > 0:
+        vol_slope, _ = analista.calcular_tendencia(vol / mean_vol)
+        features['volume_trend'] = float(vol_slope * len(vol))  # variação relativa na janela
+    else:
+        features['volume_trend'] = 0.0
+
+    return features
+
+
+def _structure_score(f: Dict) -> float:
+    """0..1: quão 'limpa' está a estrutura no sentido do trade"""
+    trend = f['r2'] if f['slope_aligned'] else 0.0
+    volume = min(max(f['volume_trend'], 0.0), 1.0)
+    proximity = max(0.0, 1.0 - abs(f['neckline_r']))
+    score = 0.25 * trend + 0.15 * volume + 0.25 * proximity
+    if f.get('pivot_symmetry') is None:
+        return score / 0.65          # Padrão sem simetria de pivôs: renormaliza os demais pesos
+    return 0.35 * f['pivot_symmetry'] + score
+
+
+def prefilter_watchlist(candles, pattern_data: Dict, symbol: str = '',
+                        check_detection: bool = True) -> PrefilterDecision:
+    """Triagem pré-entrada de um par da watchlist (dict do watchlist.json)"""
+    try:
+        direction = pattern_data.get('direcao', '')
+        features = extract_features(candles, direction, pattern_data['neckline'],
+                                    pattern_data['stop_loss'], pattern_data.get('target'),
+                                    pattern_data.get('padrao'))
+    except Exception as e:
+        return PrefilterDecision(ESCALATE, 0.0, f"features indisponíveis ({e})")
+
+    if features['stop_r'] <= 0:
+        return PrefilterDecision(REJECT, 0.0, "preço além do stop", features)
+    if features['neckline_r'] > PRE_MAX_BEYOND_NECKLINE_R:
+        return PrefilterDecision(REJECT, 0.0, f"preço {features['neckline_r']:.1f}R além da neckline", features)
+
+    if check_detection and len(candles) >= 30:
+        padrao = _get_analista().analisar_par(symbol, candles)
+        detected = (padrao is not None and padrao.nome == pattern_data.get('padrao')
+                    and padrao.direcao == direction)
+        features['detected'] = detected
+        if not detected:
+            return PrefilterDecision(REJECT, 0.0, "AnalistaTecnico não detecta mais o padrão", features)
+
+    score = _structure_score(features)
+    if score >= PRE_ACCEPT_SCORE:
+        return PrefilterDecision(ACCEPT, score, f"estrutura limpa (score {score:.2f})", features)
+    if score <= PRE_REJECT_SCORE:
+        return PrefilterDecision(REJECT, score, f"estrutura fraca (score {score:.2f})", features)
+    return PrefilterDecision(ESCALATE, score, f"ambíguo (score {score:.2f})", features)
+
+
+def prefilter_post_entry(candles, side: str, entry_price: float, pattern_data: Dict) -> PrefilterDecision:
+    """Triagem pós-entrada: o padrão que originou a posição continua de pé?"""
+    try:
+        neckline = pattern_data.get('neckline') or entry_price
+        stop_loss = pattern_data.get('stop_loss')
+        if stop_loss is None:
+            return PrefilterDecision(ESCALATE, 0.0, "sem stop no pattern_data")
+        features = extract_features(candles, side, neckline, stop_loss, pattern_data.get('target'),
+                                    pattern_data.get('padrao'))
+    except Exception as e:
+        return PrefilterDecision(ESCALATE, 0.0, f"features indisponíveis ({e})")
+
+    if features['target_progress'] >= POST_ACCEPT_PROGRESS:
+        return PrefilterDecision(ACCEPT, 1.0, f"{features['target_progress']:.0%} do caminho até o alvo", features)
+
+    if features['neckline_r'] >= 0 and features['slope_aligned']:
+        return PrefilterDecision(ACCEPT, 0.8, "além da neckline com tendência a favor da posição", features)
+
+    against = (-features['neckline_r'] >= POST_REJECT_AGAINST_R
+               and not features['slope_aligned'] and features['r2'] >= POST_REJECT_MIN_R2)
+    if against:
+        return PrefilterDecision(
+            REJECT, 0.0,
+            f"{-features['neckline_r']:.1f}R de volta além da neckline com tendência contrária (r² {features['r2']:.2f})",
+            features
+        )
+
+    return PrefilterDecision(ESCALATE, 0.5, "pullback ambíguo", features)
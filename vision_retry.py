@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+🔁 VISION RETRY - Fila de raw_samples PENDING com backoff por amostra
+
+Uma amostra cuja validação falha (imagem não gerada, oráculo sem resposta,
+timeout do pool) continuava PENDING e voltava ao pool a cada segundo - e,
+como a busca é ORDER BY id LIMIT 5, poucas amostras quebradas travavam a
+fila inteira. Agora cada falha:
+
+- incrementa raw_samples.vision_attempts
+- adia a amostra por BACKOFF_BASE * 2^(tentativas-1) s (até BACKOFF_MAX)
+- na MAX_ATTEMPTS-ésima vira status 'ERROR' (terminal, fora da fila)
+
+ERROR não é PENDING: não segura o topo do TrainingWatermark nem entra no
+treino (que só lê PROCESSED). Com os valores padrão a amostra vira ERROR em
+~8 min, bem antes do PENDING_GRACE_SECONDS do watermark.
+"""
+
+import time
+import sqlite3
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger("VisionRetry")
+
+DB_PATH = 'sniper_brain.db'
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30        # Segundos até a 2ª tentativa (dobra a cada falha)
+BACKOFF_MAX = 3600
+STATUS_ERROR = 'ERROR'
+
+COLUMNS = [
+    ('vision_attempts', 'INTEGER DEFAULT 0'),
+    ('vision_retry_at', 'INTEGER DEFAULT 0'),   # Não buscar antes deste timestamp
+]
+
+
+def backoff_seconds(attempts: int) -> int:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+
+
+class VisionRetryQueue:
+    """
+        queue = VisionRetryQueue(db_path)
+        for sample in queue.pending(limit=5):
+            ...                                   # sucesso: status = 'PROCESSED'
+        queue.failed(sample_id, "timeout")        # falha: backoff ou ERROR
+    """
+
+    def __init__(self, db_path: str = DB_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._ensure_columns()
+
+    def _ensure_columns(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                existing = {row[1] for row in conn.execute('PRAGMA table_info(raw_samples)')}
+                if not existing:
+                    return
+                for name, col_type in COLUMNS:
+                    if name not in existing:
+                        conn.execute(f'ALTER TABLE raw_samples ADD COLUMN {name} {col_type}')
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"❌ Erro ao preparar colunas de retry: {e}")
+
+    def pending(self, limit: int = 5) -> List[sqlite3.Row]:
+        """PENDING fora do backoff, mais antigas primeiro"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            try:
+                return conn.execute('''
+                    SELECT * FROM raw_samples
+                    WHERE status = 'PENDING' AND COALESCE(vision_retry_at, 0) <= ?
+                    ORDER BY id ASC LIMIT ?
+                ''', (int(time.time()), limit)).fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"Erro DB: {e}")
+            return []
+
+    def failed(self, sample_id: int, error: Optional[str] = None) -> Optional[str]:
+        """Registra a falha; retorna o novo status ('PENDING' ou 'ERROR')"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                row = conn.execute("SELECT COALESCE(vision_attempts, 0) FROM raw_samples "
+                                   "WHERE id = ? AND status = 'PENDING'", (sample_id,)).fetchone()
+                if row is None:
+                    return None                       # Já processada (ou removida) por outro caminho
+                attempts = row[0] + 1
+                if attempts >= self.max_attempts:
+                    conn.execute('UPDATE raw_samples SET vision_attempts = ?, status = ? WHERE id = ?',
+                                 (attempts, STATUS_ERROR, sample_id))
+                    status = STATUS_ERROR
+                    logger.error(f"❌ Amostra {sample_id} falhou {attempts}x ({error}) - marcada como ERROR")
+                else:
+                    delay = backoff_seconds(attempts)
+                    conn.execute('UPDATE raw_samples SET vision_attempts = ?, vision_retry_at = ? WHERE id = ?',
+                                 (attempts, int(time.time()) + delay, sample_id))
+                    status = 'PENDING'
+                    logger.warning(f"⚠️ Amostra {sample_id} sem resposta ({error}) - "
+                                   f"tentativa {attempts}/{self.max_attempts}, nova em {delay}s")
+                conn.commit()
+                return status
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"Erro ao registrar falha da amostra {sample_id}: {e}")
+            return None
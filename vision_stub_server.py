@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+🧪 VISION STUB SERVER - Modelo Vision falso para testes locais
+
+Servidor HTTP mínimo que responde como o Gemini (texto com JSON de veredicto)
+com latência configurável, para exercitar o VisionWorkerPool e os validadores
+sem gastar cota da API.
+
+Uso:
+    python vision_stub_server.py --port 8765 --delay 2.5 --verdict random
+    VISION_STUB_URL=http://127.0.0.1:8765 python bot_monitor.py
+
+POST /generate  {"prompt": "...", "images": <qtd>}
+    -> {"text": "{\"verdict\": \"VALID\", \"confidence\": 0.8, \"reasoning\": \"...\"}"}
+"""
+
+import json
+import time
+import random
+import logging
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+logger = logging.getLogger("VisionStubServer")
+
+DEFAULT_PORT = 8765
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        cfg = self.server.stub_config
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            payload = {}
+
+        self.server.stub_requests += 1
+        time.sleep(cfg['delay'])
+
+        if random.random() < cfg['fail_rate']:
+            self.send_response(500)
+            self.end_headers()
+            self.wfile.write(b'{"error": "stub failure"}')
+            return
+
+        verdict = cfg['verdict']
+        if verdict == 'random':
+            verdict = random.choice(['VALID', 'INVALID'])
+        answer = {
+            'verdict': verdict,
+            'confidence': cfg['confidence'],
+            'reasoning': f"Stub ({payload.get('images', 0)} imagem/ns, prompt {len(payload.get('prompt', ''))} chars)"
+        }
+        body = json.dumps({'text': json.dumps(answer)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        logger.debug(fmt % args)
+
+
+def start_stub_server(port: int = DEFAULT_PORT, delay: float = 1.0, verdict: str = 'VALID',
+                      confidence: float = 0.9, fail_rate: float = 0.0, host: str = '127.0.0.1'):
+    """Sobe o servidor numa thread daemon e retorna a instância (server.shutdown() para parar)"""
+    server = ThreadingHTTPServer((host, port), _StubHandler)
+    server.daemon_threads = True
+    server.stub_config = {'delay': delay, 'verdict': verdict, 'confidence': confidence, 'fail_rate': fail_rate}
+    server.stub_requests = 0
+    threading.Thread(target=server.serve_forever, name="vision-stub", daemon=True).start()
+    return server
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubVisionModel:
+    """Cliente com a mesma interface do genai.GenerativeModel usada pelos validadores"""
+
+    def __init__(self, url: str, timeout: Optional[float] = 60):
+        self.url = url.rstrip('/') + '/generate'
+        self.timeout = timeout
+
+    def generate_content(self, parts) -> _StubResponse:
+        prompt = next((p for p in parts if isinstance(p, str)), '')
+        images = sum(1 for p in parts if not isinstance(p, str))
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps({'prompt': prompt, 'images': images}).encode(),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return _StubResponse(json.loads(resp.read())['text'])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Servidor stub da Vision AI')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--delay', type=float, default=1.0, help='Latência simulada (s)')
+    parser.add_argument('--verdict', default='VALID', choices=['VALID', 'INVALID', 'random'])
+    parser.add_argument('--confidence', type=float, default=0.9)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fração de respostas HTTP 500')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.delay, args.verdict, args.confidence, args.fail_rate)
+    logger.info(f"🧪 Vision stub em http://127.0.0.1:{args.port} (delay {args.delay}s, {args.verdict})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
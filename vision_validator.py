@@ -5,10 +5,13 @@ import sys
 import time
 import logging
 import google.generativeai as genai
-import pandas as pd
-import mplfinance as mpf
 from dotenv import load_dotenv
 from lib_utils import JsonManager 
+from chart_renderer import render_candles, to_pil
+from vision_worker_pool import VisionWorkerPool
+from vision_cache import get_vision_cache
+from brain_image_registry import get_image_registry
+from vision_retry import VisionRetryQueue
 
 # Configuração
 load_dotenv()
@@ -24,78 +27,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger("VisionValidator")
 watchlist_mgr = JsonManager(WATCHLIST_FILE)
+vision_cache = get_vision_cache()
+image_registry = get_image_registry(DB_NAME)
+retry_queue = VisionRetryQueue(DB_NAME)
 
 if not os.path.exists(IMG_DIR):
     os.makedirs(IMG_DIR)
 
+# Template do prompt (também entra na chave do vision_cache)
+ORACLE_PROMPT = """
+        Atue como um Trader Institucional Sênior.
+        Analise a imagem deste gráfico. O sistema detectou um {pattern_name} ({direction}).
+        
+        Sua missão é validar se esse padrão é tecnicamente válido e se o contexto favorece o trade.
+        Seja RIGOROSO. Na dúvida, rejeite.
+        
+        Responda ESTRITAMENTE neste formato JSON:
+        {{
+            "verdict": "VALID" ou "INVALID",
+            "confidence": 0.0 a 1.0,
+            "reasoning": "Explicação técnica breve (max 1 frase)"
+        }}
+        """
+
 if API_KEY:
     genai.configure(api_key=API_KEY)
 else:
     logger.warning("GOOGLE_API_KEY não configurada")
 
 def get_pending_samples():
-    try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("SELECT * FROM raw_samples WHERE status = 'PENDING' ORDER BY id ASC LIMIT 5")
-        rows = c.fetchall()
-        conn.close()
-        return rows
-    except Exception as e:
-        logger.error(f"Erro DB: {e}")
-        return []
+    # Amostras em backoff (falharam há pouco) ficam de fora
+    return retry_queue.pending(limit=5)
 
 def generate_chart_image(sample):
+    """Renderiza o gráfico em memória; o PNG também fica em disco (image_path do raw_samples)"""
     try:
         data = json.loads(sample['ohlcv_json'])
-        df = pd.DataFrame(data, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-        df['Date'] = pd.to_datetime(df['Date'], unit='ms')
-        df.set_index('Date', inplace=True)
         
         safe_symbol = sample['symbol'].replace('/', '')
         filename = f"{IMG_DIR}/{sample['id']}_{safe_symbol}_{sample['pattern_detected']}.png"
         
-        mc = mpf.make_marketcolors(up='#00ff00', down='#ff0000', edge='inherit', wick='inherit', volume='in')
-        s  = mpf.make_mpf_style(marketcolors=mc, base_mpf_style='nightclouds')
-        
-        mpf.plot(df, type='candle', volume=False, style=s, 
-                 savefig=dict(fname=filename, dpi=100, bbox_inches='tight'),
-                 title=f"{sample['symbol']} - {sample['pattern_detected']}",
-                 axisoff=True)
-        return filename
+        png = render_candles(data, title=f"{sample['symbol']} - {sample['pattern_detected']}",
+                             save_path=filename)
+        image_registry.register(filename, kind='sample', sample_id=sample['id'])
+        return png, filename
     except Exception as e:
         logger.error(f"Erro ao gerar imagem: {e}")
-        return None
+        return None, None
 
-def consult_oracle(image_path, pattern_name, direction):
+def consult_oracle(png, candles, pattern_name, direction, symbol=None, timeframe=None):
     if not API_KEY: 
         logger.warning("API KEY ausente. Pulando consulta.")
         return None
     try:
-        from PIL import Image
+        prompt = ORACLE_PROMPT.format(pattern_name=pattern_name, direction=direction)
         
-        prompt = f"""
-        Atue como um Trader Institucional Sênior.
-        Analise a imagem deste gráfico. O sistema detectou um {pattern_name} ({direction}).
+        def call_model():
+            model = genai.GenerativeModel('gemini-2.0-flash')
+            result = model.generate_content([prompt, to_pil(png)])
+            response_text = result.text.replace('```json', '').replace('```', '').strip()
+            return json.loads(response_text)
         
-        Sua missão é validar se esse padrão é tecnicamente válido e se o contexto favorece o trade.
-        Seja RIGOROSO. Na dúvida, rejeite.
-        
-        Responda ESTRITAMENTE neste formato JSON:
-        {{
-            "verdict": "VALID" ou "INVALID",
-            "confidence": 0.0 a 1.0,
-            "reasoning": "Explicação técnica breve (max 1 frase)"
-        }}
-        """
-        
-        img = Image.open(image_path)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        result = model.generate_content([prompt, img])
-        
-        response_text = result.text.replace('```json', '').replace('```', '').strip()
-        return json.loads(response_text)
+        return vision_cache.cached_call(candles, ORACLE_PROMPT, call_model, source='raw_sample',
+                                        symbol=symbol, timeframe=timeframe, pattern=pattern_name,
+                                        params={'direction': direction})
         
     except Exception as e:
         logger.error(f"Erro na API Vision: {e}")
@@ -133,37 +128,48 @@ def update_db(sample_id, ai_result, image_path):
         ))
         conn.commit()
         conn.close()
+        # Imagem de amostra VALID faz parte do dataset: não expira por idade
+        image_registry.set_reference(sample_id, 'raw_samples' if ai_result['verdict'] == 'VALID' else None)
     except Exception as e:
         logger.error(f"Erro ao atualizar DB: {e}")
 
-def run_loop():
-    logger.info("👁️ Vision Validator (Active Mode) Iniciado.")
+def process_sample(sample):
+    """Imagem + oráculo + gravação de um raw_sample (roda numa worker do pool)"""
+    png, img_path = generate_chart_image(sample)
+    if not png:
+        return None
+        
+    ai_result = consult_oracle(png, json.loads(sample['ohlcv_json']), sample['pattern_detected'],
+                               sample['direction'], sample['symbol'], sample['timeframe'])
+    
+    if ai_result:
+        update_db(sample['id'], ai_result, img_path)
+        
+        if ai_result['verdict'] == 'INVALID':
+            logger.warning(f"❌ REJEITADO PELA IA: {sample['symbol']} (conf: {ai_result['confidence']:.2f}) - {ai_result['reasoning']}")
+            remove_from_watchlist(sample['symbol'], f"Vision AI Reject: {ai_result['reasoning']}")
+        else:
+            logger.info(f"✅ APROVADO PELA IA: {sample['symbol']} (conf: {ai_result['confidence']:.2f})")
+    return ai_result
+
+def run_loop(concurrency=3, timeout=60):
+    logger.info(f"👁️ Vision Validator (Active Mode) Iniciado. ({concurrency} consultas simultâneas)")
+    pool = VisionWorkerPool(process_sample, max_concurrency=concurrency, timeout=timeout)
     while True:
-        samples = get_pending_samples()
+        for result in pool.drain():
+            # Exceção/timeout no pool ou process_sample sem resultado (imagem ou oráculo falhou)
+            if not result.ok or not result.value:
+                retry_queue.failed(int(result.key), result.error or "sem resposta do oráculo")
         
-        if not samples:
-            time.sleep(5)
-            continue
-            
+        samples = get_pending_samples()
+        submitted = 0
         for sample in samples:
-            logger.info(f"Analisando ID {sample['id']}: {sample['symbol']}...")
-            
-            img_path = generate_chart_image(sample)
-            if not img_path:
-                continue 
-                
-            ai_result = consult_oracle(img_path, sample['pattern_detected'], sample['direction'])
-            
-            if ai_result:
-                update_db(sample['id'], ai_result, img_path)
-                
-                if ai_result['verdict'] == 'INVALID':
-                    logger.warning(f"❌ REJEITADO PELA IA: {sample['symbol']} (conf: {ai_result['confidence']:.2f}) - {ai_result['reasoning']}")
-                    remove_from_watchlist(sample['symbol'], f"Vision AI Reject: {ai_result['reasoning']}")
-                else:
-                    logger.info(f"✅ APROVADO PELA IA: {sample['symbol']} (conf: {ai_result['confidence']:.2f})")
-            
-            time.sleep(3) 
+            # Amostra continua PENDING até o update_db: não reenviar enquanto estiver no pool
+            if pool.submit(str(sample['id']), sample):
+                logger.info(f"Analisando ID {sample['id']}: {sample['symbol']}...")
+                submitted += 1
+        
+        time.sleep(5 if not submitted else 1)
 
 if __name__ == "__main__":
     run_loop()
@@ -8,12 +8,15 @@ import json
 import os
 import logging
 import requests
-import pandas as pd
-import mplfinance as mpf
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+from chart_renderer import render_candles, to_pil
+from vision_cache import get_vision_cache
+from brain_image_registry import get_image_registry
+from vision_prefilter import prefilter_watchlist, ACCEPT, REJECT
+
 load_dotenv()
 
 logger = logging.getLogger("VisionValidatorWatchlist")
@@ -32,17 +35,54 @@ IMG_DIR = os.path.join(BASE_DIR, 'brain_images')
 if not os.path.exists(IMG_DIR):
     os.makedirs(IMG_DIR)
 
+# Template do prompt (também entra na chave do vision_cache)
+WATCHLIST_PROMPT = """
+Atue como um Trader Institucional Sênior.
+
+CONTEXTO:
+- Estamos monitorando {symbol} para uma possível entrada.
+- Padrão detectado matematicamente: {pattern_name} ({direction})
+
+MISSÃO:
+Analise o gráfico e valide se este padrão é VISUALMENTE VÁLIDO e PROMISSOR para operar.
+
+CRITÉRIOS DE APROVAÇÃO (VALID):
+- O padrão gráfico (ex: Cunha, Bandeira, OCO) é claramente reconhecível?
+- A tendência do timeframe favorece a direção do padrão?
+- O preço está "respeitando" a estrutura?
+
+CRITÉRIOS DE REJEIÇÃO (INVALID):
+- O gráfico está "sujo", lateral demais ou sem tendência clara?
+- O padrão parece forçado ou inexistente visualmente?
+- Há resistências/suportes muito próximos que bloqueiam o alvo?
+
+Responda ESTRITAMENTE neste formato JSON:
+{{
+    "verdict": "VALID" ou "INVALID",
+    "confidence": 0.0 a 1.0,
+    "reasoning": "Explicação técnica breve"
+}}
+"""
+
 class VisionValidatorWatchlist:
     """
     Valida visualmente os padrões na Watchlist (Pré-Trade) usando Gemini Vision AI.
     Funciona como um filtro extra antes de gastar dinheiro.
     """
 
+    # Imagens vão direto da memória para o modelo; True grava cópia em brain_images/ (debug)
+    SAVE_IMAGES = os.getenv('VISION_SAVE_IMAGES', '0') == '1'
+
     def __init__(self, exchange: ccxt.bybit):
         self.exchange = exchange
         self.gemini_model = None
         
-        if GOOGLE_API_KEY:
+        if os.getenv('VISION_STUB_URL'):
+            # Servidor stub local (testes de carga/latência sem gastar cota)
+            from vision_stub_server import StubVisionModel
+            self.gemini_model = StubVisionModel(os.getenv('VISION_STUB_URL'))
+            logger.info(f"🧪 Vision Validator Watchlist usando stub: {os.getenv('VISION_STUB_URL')}")
+        elif GOOGLE_API_KEY:
             try:
                 import google.generativeai as genai
                 genai.configure(api_key=GOOGLE_API_KEY)
@@ -53,45 +93,33 @@ class VisionValidatorWatchlist:
         else:
             logger.warning("⚠️ GOOGLE_API_KEY ausente - Vision Validator Watchlist desabilitado")
 
-    def _generate_chart_image(self, symbol: str, timeframe: str, pattern: str) -> Optional[str]:
-        """Gera imagem do gráfico candlestick para análise"""
+    def _generate_chart_image(self, symbol: str, timeframe: str, pattern: str,
+                              candles: Optional[list] = None) -> Optional[bytes]:
+        """Gera o gráfico candlestick em memória (PNG); só grava em disco se SAVE_IMAGES"""
         try:
             # Busca candles suficientes para visualização do padrão
-            candles = self.exchange.fetch_ohlcv(symbol, timeframe, limit=50)
+            if candles is None:
+                candles = self.exchange.fetch_ohlcv(symbol, timeframe, limit=50)
+            candles = candles[-50:]
             if len(candles) < 10: return None
 
-            df = pd.DataFrame(candles, columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-            df['Date'] = pd.to_datetime(df['Date'], unit='ms')
-            df.set_index('Date', inplace=True)
-
-            safe_symbol = symbol.replace('/', '')
-            timestamp = int(time.time())
-            filename = f"{IMG_DIR}/watchlist_{safe_symbol}_{timestamp}.png"
-
-            mc = mpf.make_marketcolors(up='#00ff00', down='#ff0000', edge='inherit', wick='inherit', volume='in')
-            s = mpf.make_mpf_style(marketcolors=mc, base_mpf_style='nightclouds')
-
-            mpf.plot(df, type='candle', volume=False, style=s,
-                     savefig=dict(fname=filename, dpi=100, bbox_inches='tight'),
-                     title=f"{symbol} - {pattern} (Watchlist)",
-                     axisoff=True)
+            filename = None
+            if self.SAVE_IMAGES:
+                safe_symbol = symbol.replace('/', '')
+                filename = f"{IMG_DIR}/watchlist_{safe_symbol}_{int(time.time())}.png"
 
-            return filename
+            png = render_candles(candles, title=f"{symbol} - {pattern} (Watchlist)", save_path=filename)
+            if filename:
+                get_image_registry().register(filename, kind='watchlist')
+            return png
 
         except Exception as e:
             logger.error(f"Erro ao gerar imagem watchlist: {e}")
             return None
 
     def _cleanup_old_images(self):
-        """Remove imagens antigas (> 1 hora)"""
-        try:
-            cutoff = time.time() - 3600
-            for f in os.listdir(IMG_DIR):
-                if f.startswith('watchlist_'):
-                    fpath = os.path.join(IMG_DIR, f)
-                    if os.path.getmtime(fpath) < cutoff:
-                        os.remove(fpath)
-        except Exception: pass
+        """Remove imagens antigas (> 1 hora) - range delete no registro, sem listar o diretório"""
+        get_image_registry().cleanup(kind='watchlist')
 
     def validate_pattern(self, symbol: str, timeframe: str, pattern_data: Dict) -> bool:
         """
@@ -102,47 +130,35 @@ class VisionValidatorWatchlist:
             return True # Se API falhar/ausente, aprova por padrão (fallback para lógica matemática)
 
         try:
-            # Gera imagem
             pattern_name = pattern_data.get('padrao', 'Unknown')
-            image_path = self._generate_chart_image(symbol, timeframe, pattern_name)
-            
-            if not image_path: return True
+            # Mesma janela do AnalistaTecnico no monitor (200); o gráfico usa os últimos 50
+            candles = self.exchange.fetch_ohlcv(symbol, timeframe, limit=200)
+
+            # Pré-filtro local: casos óbvios não vão para o Gemini
+            triagem = prefilter_watchlist(candles, pattern_data, symbol)
+            if triagem.decision == ACCEPT:
+                logger.info(f"✅ WATCHLIST APROVADO PELO PRÉ-FILTRO: {symbol} - {triagem.reason}")
+                return True
+            if triagem.decision == REJECT:
+                logger.warning(f"🚫 WATCHLIST REJEITADO PELO PRÉ-FILTRO: {symbol} - {triagem.reason}")
+                return False
 
-            from PIL import Image
-            direction = pattern_data.get('direcao', '')
+            # Gera imagem
+            png = self._generate_chart_image(symbol, timeframe, pattern_name, candles)
             
-            prompt = f"""
-Atue como um Trader Institucional Sênior.
-
-CONTEXTO:
-- Estamos monitorando {symbol} para uma possível entrada.
-- Padrão detectado matematicamente: {pattern_name} ({direction})
-
-MISSÃO:
-Analise o gráfico e valide se este padrão é VISUALMENTE VÁLIDO e PROMISSOR para operar.
-
-CRITÉRIOS DE APROVAÇÃO (VALID):
-- O padrão gráfico (ex: Cunha, Bandeira, OCO) é claramente reconhecível?
-- A tendência do timeframe favorece a direção do padrão?
-- O preço está "respeitando" a estrutura?
-
-CRITÉRIOS DE REJEIÇÃO (INVALID):
-- O gráfico está "sujo", lateral demais ou sem tendência clara?
-- O padrão parece forçado ou inexistente visualmente?
-- Há resistências/suportes muito próximos que bloqueiam o alvo?
+            if not png: return True
 
-Responda ESTRITAMENTE neste formato JSON:
-{{
-    "verdict": "VALID" ou "INVALID",
-    "confidence": 0.0 a 1.0,
-    "reasoning": "Explicação técnica breve"
-}}
-"""
-            img = Image.open(image_path)
-            result = self.gemini_model.generate_content([prompt, img])
+            direction = pattern_data.get('direcao', '')
             
-            response_text = result.text.replace('```json', '').replace('```', '').strip()
-            parsed = json.loads(response_text)
+            prompt = WATCHLIST_PROMPT.format(symbol=symbol, pattern_name=pattern_name, direction=direction)
+            def call_model():
+                result = self.gemini_model.generate_content([prompt, to_pil(png)])
+                response_text = result.text.replace('```json', '').replace('```', '').strip()
+                return json.loads(response_text)
+
+            parsed = get_vision_cache().cached_call(candles[-50:], WATCHLIST_PROMPT, call_model, source='watchlist',
+                                                    symbol=symbol, timeframe=timeframe, pattern=pattern_name,
+                                                    params={'direction': direction})
             
             verdict = parsed.get('verdict', 'VALID')
             confidence = parsed.get('confidence', 0)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+👁️ VISION WORKER POOL - Validações Vision AI fora do loop do monitor
+
+O generate_content do Gemini leva segundos; chamado inline ele trava a checagem
+de gatilho de todos os outros pares da watchlist. Este pool:
+
+- Roda um event loop asyncio numa thread dedicada (o chamador nunca bloqueia)
+- Limita a concorrência com Semaphore (respeita cota da API)
+- Aplica timeout por requisição (asyncio.wait_for). Funções síncronas não
+  podem ser interrompidas: o timeout é entregue na hora, mas a chave continua
+  pendente e o slot ocupado até a thread terminar (sem chamada duplicada)
+- Entrega os resultados numa fila thread-safe: o monitor faz submit(), continua
+  vigiando preços e aplica os veredictos quando drain() os devolver
+- Deduplica por chave: não enfileira duas validações do mesmo par
+
+Funções síncronas rodam em asyncio.to_thread; corrotinas (ex: clientes
+async do modelo) são aguardadas direto no loop.
+"""
+
+import time
+import queue
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("VisionWorkerPool")
+
+DEFAULT_CONCURRENCY = 3
+DEFAULT_TIMEOUT = 45  # segundos por validação (imagem + modelo)
+
+
+@dataclass
+class VisionJobResult:
+    key: str
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    context: Dict = field(default_factory=dict)
+
+
+class VisionWorkerPool:
+    """
+    Pool assíncrono de validações com concorrência limitada.
+
+    Uso:
+        pool = VisionWorkerPool(validator.validate_pattern, max_concurrency=3)
+        pool.submit('ETH/USDT', 'ETH/USDT', '15m', par, context={'padrao': ...})
+        for result in pool.drain():
+            ...
+    """
+
+    def __init__(self, func: Callable, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT, name: str = "vision"):
+        self.func = func
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.name = name
+
+        self.results: "queue.Queue[VisionJobResult]" = queue.Queue()
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timeouts': 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name=f"{name}-pool", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    # ============================================================
+    # EVENT LOOP (thread dedicada)
+    # ============================================================
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _execute(self, key: str, args: tuple, kwargs: dict, context: Dict):
+        start = time.time()
+        async with self._semaphore:
+            thread_call = None
+            try:
+                if asyncio.iscoroutinefunction(self.func):
+                    call = self.func(*args, **kwargs)
+                else:
+                    # shield: o timeout cancela só a espera, não a referência à thread
+                    thread_call = asyncio.ensure_future(asyncio.to_thread(self.func, *args, **kwargs))
+                    call = asyncio.shield(thread_call)
+                value = await asyncio.wait_for(call, timeout=self.timeout)
+                result = VisionJobResult(key, True, value=value, elapsed=time.time() - start, context=context)
+                self.stats['completed'] += 1
+            except asyncio.TimeoutError:
+                result = VisionJobResult(key, False, error='timeout', elapsed=time.time() - start, context=context)
+                self.stats['timeouts'] += 1
+                logger.warning(f"⏱️ Vision timeout ({self.timeout:.0f}s): {key}")
+            except Exception as e:
+                result = VisionJobResult(key, False, error=str(e), elapsed=time.time() - start, context=context)
+                self.stats['failed'] += 1
+                logger.error(f"❌ Vision job {key} falhou: {e}")
+
+            if thread_call is not None and not thread_call.done():
+                # Timeout já entregue; a thread segue rodando: chave e slot só são
+                # liberados quando ela terminar (o resultado tardio é descartado)
+                self.results.put(result)
+                result = None
+                try:
+                    await thread_call
+                except Exception:
+                    pass
+                logger.info(f"⏱️ Vision job {key} terminou {time.time() - start:.0f}s após o início (descartado)")
+
+        with self._lock:
+            self._pending.pop(key, None)
+        if result is not None:
+            self.results.put(result)
+
+    # ============================================================
+    # API (thread do chamador)
+    # ============================================================
+    def submit(self, key: str, *args, context: Optional[Dict] = None, **kwargs) -> bool:
+        """Enfileira func(*args, **kwargs). Retorna False se a chave já está pendente."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending[key] = time.time()
+        self.stats['submitted'] += 1
+        asyncio.run_coroutine_threadsafe(self._execute(key, args, kwargs, context or {}), self._loop)
+        return True
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def drain(self, max_items: Optional[int] = None) -> List[VisionJobResult]:
+        """Resultados prontos (não bloqueia)"""
+        items = []
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até não haver jobs pendentes (usado em scripts/testes)"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending_count():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self, wait: bool = True):
+        if wait:
+            self.wait_idle(self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    import os
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Demo do pool contra o servidor stub')
+    parser.add_argument('--url', default=os.getenv('VISION_STUB_URL', 'http://127.0.0.1:8765'))
+    parser.add_argument('--jobs', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+    args = parser.parse_args()
+
+    from vision_stub_server import StubVisionModel
+
+    model = StubVisionModel(args.url)
+    pool = VisionWorkerPool(lambda prompt: model.generate_content([prompt]).text,
+                            max_concurrency=args.concurrency, timeout=args.timeout)
+    start = time.time()
+    for i in range(args.jobs):
+        pool.submit(f"job{i}", f"PAR{i}/USDT")
+    pool.wait_idle()
+    for r in pool.drain():
+        print(f"{'✅' if r.ok else '❌'} {r.key}: {r.value or r.error} ({r.elapsed:.2f}s)")
+    print(f"📊 {args.jobs} jobs em {time.time() - start:.2f}s | {pool.stats}")
+    pool.shutdown()